@@ -2,23 +2,25 @@
 """
 FormDetails Tool - 主入口點
 提供統一的命令列介面來執行 JSON 處理功能
+
+處理模組在命令實際執行時才載入，--help、--version 與參數錯誤不會載入它們，也不會建立日誌檔案。
 """
 
+import os
 import sys
 import argparse
-from pathlib import Path
 
 
 # 添加 src 目錄到 Python 路徑
-src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_path))
+src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+sys.path.insert(0, src_path)
 
-from merge_json import main as merge_main
-from optimized_process_json import main as optimize_main
+from options import (COMPRESSIONS, FILE_LOG_LEVELS, FSYNC_POLICIES, INDEX_FILE, INFLIGHT_MB, JSON_BACKENDS,
+                     MERGE_POLICIES, OUTPUT_STYLES)
 
 
-def main():
-    """主函數 - 提供統一的命令列介面"""
+def build_parser() -> argparse.ArgumentParser:
+    """建立命令列解析器"""
     parser = argparse.ArgumentParser(
         description="FormDetails Tool - JSON 檔案處理工具集",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -27,41 +29,447 @@ def main():
   python -m formdetails_tool merge      # 執行 JSON 合併
   python -m formdetails_tool optimize   # 執行 C# 結構優化
   python -m formdetails_tool all       # 執行完整處理流程
+  python -m formdetails_tool all --jobs 8   # 使用 8 個工作行程平行處理
+  python -m formdetails_tool watch      # 常駐監看 add 資料夾，只處理變更的檔案
+  python -m formdetails_tool all --shard 2/4 --metrics-out shard-2.json   # 4 台機器中的第 2 台
+  python -m formdetails_tool combine-reports shard-*.json --metrics-out combined.json
+  python -m formdetails_tool all --input forms.zip --output out.zip   # 直接讀寫封存檔
+  python -m formdetails_tool all --async-io --inflight-mb 128   # 重疊網路磁碟的讀寫與處理
+  python -m formdetails_tool check      # 只檢查 add 資料夾是否已符合C#類別契約，不產生輸出
+  python -m formdetails_tool all --index   # 處理時順便更新欄位索引
+  python -m formdetails_tool query --where fieldType=dxDateBox   # 查詢使用日期欄位的檔案與表單
+  python -m formdetails_tool optimize --where formFieldId=f_amount*   # 只重新處理包含符合條件欄位的檔案
         """
     )
 
     parser.add_argument(
         "command",
-        choices=["merge", "optimize", "all"],
+        choices=["merge", "optimize", "all", "watch", "combine-reports", "check", "index", "query"],
         help="要執行的命令"
     )
 
+    parser.add_argument(
+        "reports",
+        nargs="*",
+        metavar="REPORT",
+        help="combine-reports 要合併的各分片處理指標報告"
+    )
+
+    parser.add_argument(
+        "--target",
+        choices=["merge", "optimize", "all"],
+        default="all",
+        help="watch 命令對變更的檔案執行的處理（預設 all）"
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="watch 命令輪詢 add 資料夾的間隔秒數（預設 1）"
+    )
+
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="watch 命令只處理最後修改超過此秒數且大小與修改時間不再變動的檔案，避免讀到寫入到一半的檔案（預設 2）"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="平行處理的工作行程數量（0 表示使用所有CPU核心，預設 1）"
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="以串流模式逐一處理forms，適用於超大型檔案"
+    )
+
+    parser.add_argument(
+        "--input",
+        dest="input_dir",
+        metavar="PATH",
+        default="add",
+        help="輸入資料夾或封存檔（.zip、.tar、.tar.gz、.tgz），封存檔直接讀取其中的JSON成員而不解壓縮（預設 add）"
+    )
+
+    parser.add_argument(
+        "--output",
+        dest="output_dir",
+        metavar="PATH",
+        default="out",
+        help="輸出資料夾或封存檔（.zip、.tar、.tar.gz、.tgz），成員名稱與輸出到資料夾時的檔案名稱相同（預設 out）"
+    )
+
+    parser.add_argument(
+        "--async-io",
+        action="store_true",
+        help="以非同步 I/O 處理流程預先讀取下一批檔案並在背景寫出結果，處理不必等待網路磁碟的讀寫延遲"
+             "（適用於 merge、optimize 與 all）"
+    )
+
+    parser.add_argument(
+        "--inflight-mb",
+        type=int,
+        default=INFLIGHT_MB,
+        metavar="MB",
+        help=f"--async-io 已讀入、尚未寫完的資料上限，達到上限時暫停預先讀取（預設 {INFLIGHT_MB}）"
+    )
+
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="只處理 N 個分片中的第 i 個（依檔案相對路徑的穩定雜湊分配），"
+             "多台機器各自執行一個分片而不需要協調（適用於 merge、optimize 與 all）"
+    )
+
+    parser.add_argument(
+        "--index",
+        dest="index_path",
+        nargs="?",
+        const=INDEX_FILE,
+        metavar="PATH",
+        help=f"處理時順便更新 SQLite 欄位索引（file → formId → formFieldId/fieldType/sort），"
+             f"只重新索引內容變更的檔案；index 與 query 命令使用的索引檔（預設 {INDEX_FILE}）"
+    )
+
+    parser.add_argument(
+        "--where",
+        action="append",
+        metavar="KEY=VALUE",
+        help="只處理包含符合條件欄位的檔案，query 時為查詢條件；KEY 為 formId、formFieldId、fieldType、"
+             "sort 或 specialFieldCode，VALUE 可使用 * 與 ? 萬用字元，可重複指定（同一個欄位須符合所有條件）"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="忽略增量建置快取，重新處理所有檔案"
+    )
+
+    parser.add_argument(
+        "--merge-policy",
+        choices=MERGE_POLICIES,
+        default="append",
+        help="合併策略：append 直接附加；replace/keep/patch 以 formFieldId 比對已存在的欄位"
+             "並取代/保留/逐屬性覆寫（預設 append）"
+    )
+
+    parser.add_argument(
+        "--format",
+        dest="output_style",
+        choices=OUTPUT_STYLES,
+        default="pretty",
+        help="輸出格式：pretty 排版JSON、compact 緊湊JSON、ndjson 每行一個form、"
+             "patch 由輸入變成處理結果的 JSON Patch（<檔名>.patch.json）（預設 pretty）"
+    )
+
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default="none",
+        help="以串流方式壓縮輸出檔案，副檔名加上 .gz 或 .xz（預設 none）"
+    )
+
+    parser.add_argument(
+        "--fsync",
+        choices=FSYNC_POLICIES,
+        default="none",
+        help="輸出檔案的同步寫入策略：none 不呼叫 fsync、file 取代前將檔案寫入磁碟、"
+             "full 另外將輸出資料夾寫入磁碟（預設 none）"
+    )
+
+    parser.add_argument(
+        "--json-backend",
+        choices=JSON_BACKENDS,
+        default="auto",
+        help="JSON解析與序列化後端：auto 有安裝 orjson 時使用 orjson，否則使用 json（預設 auto）"
+    )
+
+    parser.add_argument(
+        "--routes",
+        metavar="PATH",
+        help="合併資料路由設定檔：依 formId 或檔案名稱模式套用不同的合併資料片段，"
+             "一次處理即可套用所有路由（取代 append_json.json，適用於 merge、all 與 watch）"
+    )
+
+    parser.add_argument(
+        "--intern",
+        dest="intern_strings",
+        action="store_true",
+        help="解析後讓重複的鍵與短字串值共用同一個字串物件，減少記憶體用量，"
+             "並在處理指標中回報節省的位元組數（會增加解析時間）"
+    )
+
+    parser.add_argument(
+        "--schema",
+        metavar="PATH",
+        help="C#類別結構描述檔（預設使用內建的 src/formdetail_schema.json）"
+    )
+
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        help="將每個檔案與彙總的處理指標（各階段耗時、位元組、表單與欄位數量、失敗）寫入JSON報告；"
+             "combine-reports 時為合併後的報告路徑，check 時為檢查報告路徑"
+    )
+
+    parser.add_argument(
+        "--all-violations",
+        action="store_true",
+        help="check 命令列出每個檔案所有違反契約的位置（預設找到第一筆即停止檢查該檔案）"
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="以 cProfile 剖析整個執行並輸出剖析檔（多工作行程時只包含主行程）"
+    )
+
+    parser.add_argument(
+        "--file-log-level",
+        choices=FILE_LOG_LEVELS,
+        default="info",
+        help="每個檔案處理訊息（開始處理、已儲存、合併結果、單一檔案的錯誤）的日誌等級，"
+             "執行摘要不受影響（預設 info）"
+    )
+
+    parser.add_argument(
+        "--summary-only",
+        dest="file_log_level",
+        action="store_const",
+        const="off",
+        help="只輸出執行摘要，不記錄每個檔案的訊息（等同 --file-log-level off），適用於大量檔案"
+    )
+
     parser.add_argument(
         "--version",
         action="version",
         version="FormDetails Tool 1.0.0"
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def combine_reports(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """
+    合併各分片的處理指標報告
+
+    Args:
+        args (argparse.Namespace): 命令列參數
+        parser (argparse.ArgumentParser): 命令列解析器，用於回報參數錯誤
+
+    Returns:
+        int: 每個輸入檔案都恰好處理一次時為 0，否則為 1
+    """
+    from sharding import combine_report_files, print_combined
+
+    if not args.reports:
+        parser.error("combine-reports 需要至少一份報告")
+
+    try:
+        combined = combine_report_files(args.reports, args.metrics_out)
+    except (OSError, ValueError) as e:
+        parser.error(f"無法讀取報告: {e}")
+
+    print_combined(combined)
+    return 1 if combined["problems"] else 0
+
+
+def check_contract(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """
+    檢查輸入檔案是否符合C#類別契約，不產生任何輸出檔案
+
+    Args:
+        args (argparse.Namespace): 命令列參數
+        parser (argparse.ArgumentParser): 命令列解析器，用於回報參數錯誤
+
+    Returns:
+        int: 所有檔案都符合契約時為 0，否則為 1
+    """
+    from contract_check import get_checker, main as check_main
+    from json_codec import resolve_backend
+    from logging_setup import configure_logging
+
+    if args.shard:
+        parser.error("check 不支援 --shard")
+
+    try:
+        json_backend = resolve_backend(args.json_backend)
+        get_checker(args.schema)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    # 只輸出到主控台，不建立日誌檔
+    configure_logging(None)
+    return check_main(input_dir=args.input_dir, schema_path=args.schema, json_backend=json_backend,
+                      all_violations=args.all_violations, jobs=args.jobs, report_out=args.metrics_out)
+
+
+def field_index_command(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """
+    更新或查詢欄位索引，不產生任何輸出檔案
+
+    Args:
+        args (argparse.Namespace): 命令列參數
+        parser (argparse.ArgumentParser): 命令列解析器，用於回報參數錯誤
+
+    Returns:
+        int: index 成功或 query 找到符合的欄位時為 0，否則為 1
+    """
+    from field_index import main as index_main
+    from json_codec import resolve_backend
+    from logging_setup import configure_logging
+
+    if args.shard:
+        parser.error(f"{args.command} 不支援 --shard")
+    if args.command == "index" and args.where:
+        parser.error("index 不接受 --where，請使用 query")
+
+    try:
+        json_backend = resolve_backend(args.json_backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 只輸出到主控台，不建立日誌檔
+    configure_logging(None)
+    return index_main(command=args.command, input_dir=args.input_dir, index_path=args.index_path,
+                      where=args.where, json_backend=json_backend, jobs=args.jobs)
+
+
+def run_command(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """
+    載入並執行指定的命令
+
+    Args:
+        args (argparse.Namespace): 命令列參數
+        parser (argparse.ArgumentParser): 命令列解析器，用於回報參數錯誤
+
+    Returns:
+        int: 結束代碼
+    """
+    if args.command == "combine-reports":
+        return combine_reports(args, parser)
+    if args.reports:
+        parser.error(f"{args.command} 不接受報告檔案參數: {' '.join(args.reports)}")
+    if args.where:
+        from field_index import parse_where
+
+        try:
+            for expression in args.where:
+                parse_where(expression)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "check":
+        return check_contract(args, parser)
+    if args.command in ("index", "query"):
+        return field_index_command(args, parser)
+
+    shard = None
+    if args.shard:
+        if args.command == "watch":
+            parser.error("watch 不支援 --shard")
+        from sharding import Shard
+
+        try:
+            shard = Shard.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.command == "watch" and (args.input_dir != "add" or args.output_dir != "out"):
+        parser.error("watch 只監看 add 資料夾並輸出到 out 資料夾，不支援 --input 與 --output")
+    if args.command == "watch" and args.async_io:
+        parser.error("watch 不支援 --async-io")
+    if args.command == "watch" and (args.index_path or args.where):
+        parser.error("watch 不支援 --index 與 --where")
+    if args.inflight_mb < 1:
+        parser.error("--inflight-mb 必須至少為 1")
+
+    from json_codec import resolve_backend
+    from metrics import profiled
+    from output_formats import OutputFormat
+    from schema import get_projector
+
+    output_format = OutputFormat(args.output_style, args.compress, args.fsync)
+
+    try:
+        json_backend = resolve_backend(args.json_backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 在處理任何檔案前先編譯結構描述，格式錯誤時直接回報
+    try:
+        get_projector(args.schema)
+    except (OSError, ValueError) as e:
+        parser.error(f"無法載入結構描述 {args.schema}: {e}")
 
     print("🚀 FormDetails Tool 啟動...")
     print("=" * 60)
 
-    if args.command == "merge":
-        print("📋 執行 JSON 合併功能...")
-        merge_main()
-    elif args.command == "optimize":
-        print("⚡ 執行 C# 結構優化...")
-        optimize_main()
-    elif args.command == "all":
-        print("🔄 執行完整處理流程...")
-        print("\n步驟 1: JSON 合併")
-        merge_main()
-        print("\n步驟 2: C# 結構優化")
-        optimize_main()
+    with profiled(args.profile):
+        if args.command == "merge":
+            from merge_json import main as merge_main
+
+            print("📋 執行 JSON 合併功能...")
+            merge_main(jobs=args.jobs, stream=args.stream, force=args.force,
+                       merge_policy=args.merge_policy, output_format=output_format,
+                       json_backend=json_backend, metrics_out=args.metrics_out,
+                       file_log_level=args.file_log_level, routes_file=args.routes,
+                       intern_strings=args.intern_strings, shard=shard,
+                       input_dir=args.input_dir, output_dir=args.output_dir,
+                       async_io=args.async_io, inflight_mb=args.inflight_mb,
+                       index_path=args.index_path, where=args.where)
+        elif args.command == "optimize":
+            from optimized_process_json import main as optimize_main
+
+            print("⚡ 執行 C# 結構優化...")
+            optimize_main(jobs=args.jobs, stream=args.stream, force=args.force,
+                          output_format=output_format, json_backend=json_backend,
+                          schema_path=args.schema, metrics_out=args.metrics_out,
+                          file_log_level=args.file_log_level, intern_strings=args.intern_strings,
+                          shard=shard, input_dir=args.input_dir, output_dir=args.output_dir,
+                          async_io=args.async_io, inflight_mb=args.inflight_mb,
+                          index_path=args.index_path, where=args.where)
+        elif args.command == "all":
+            from pipeline import main as pipeline_main
+
+            print("🔄 執行完整處理流程（合併 + C# 結構優化）...")
+            pipeline_main(jobs=args.jobs, stream=args.stream, force=args.force,
+                          merge_policy=args.merge_policy, output_format=output_format,
+                          json_backend=json_backend, schema_path=args.schema,
+                          metrics_out=args.metrics_out, file_log_level=args.file_log_level,
+                          routes_file=args.routes, intern_strings=args.intern_strings,
+                          shard=shard, input_dir=args.input_dir, output_dir=args.output_dir,
+                          async_io=args.async_io, inflight_mb=args.inflight_mb,
+                          index_path=args.index_path, where=args.where)
+        elif args.command == "watch":
+            from watch import main as watch_main
+
+            print(f"👀 監看 add 資料夾並執行 {args.target}...")
+            watch_main(target=args.target, jobs=args.jobs, stream=args.stream,
+                       merge_policy=args.merge_policy, output_format=output_format,
+                       json_backend=json_backend, schema_path=args.schema,
+                       interval=args.interval, settle=args.settle,
+                       file_log_level=args.file_log_level, routes_file=args.routes,
+                       intern_strings=args.intern_strings)
 
     print("=" * 60)
     print("✅ 處理完成！")
+    return 0
+
+
+def main():
+    """主函數 - 提供統一的命令列介面"""
+    parser = build_parser()
+    args = parser.parse_args()
+    sys.exit(run_command(args, parser))
 
 
 if __name__ == "__main__":
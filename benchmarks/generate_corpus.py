@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+FormDetail 測試資料產生器
+功能：產生結構與 add/範例.json 相似的 FormDetail 檔案（中文欄位名稱、translation 陣列、
+relatedSource 等），以及對應的 append_json.json，供效能量測使用
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict
+
+FIELD_TYPES = (
+    "dxTextBox", "dxNumberBox", "dxSelectBox", "dxDateBox",
+    "dxCheckBox", "dxTextArea", "dxFileUploader", "inputObject",
+)
+
+FIELD_NAME_WORDS = (
+    "申請者", "申請日期", "開始時間", "結束時間", "加班原因", "成本部門", "備註", "附件",
+    "補休失效日", "加班時數", "流程狀態", "部門層級", "職稱層級", "簽核狀態", "表單外碼",
+    "請假類別", "代理人", "出差地點", "費用金額", "幣別",
+)
+
+FORM_NAMES = ("加班單", "請假單", "出差單", "費用報銷單", "削價單", "採購申請單")
+
+LANGUAGES = ("en-US", "ja-JP", "zh-CN")
+
+
+def make_field(rng: random.Random, form_index: int, field_index: int,
+               translation_ratio: float = 0.5) -> Dict[str, Any]:
+    """
+    產生單個formField
+
+    Args:
+        rng (random.Random): 亂數產生器
+        form_index (int): 表單序號
+        field_index (int): 欄位序號
+        translation_ratio (float): 含有 translation 內容的欄位比例
+
+    Returns:
+        dict: 欄位資料，鍵順序與範例檔案相同
+    """
+    field_name = f"{rng.choice(FIELD_NAME_WORDS)}{field_index}"
+    field_type = rng.choice(FIELD_TYPES)
+
+    translation = []
+    if rng.random() < translation_ratio:
+        translation = [
+            {"languageCode": language, "text": f"{field_name} ({language})"}
+            for language in LANGUAGES
+        ]
+
+    related_source = None
+    if field_type == "dxSelectBox":
+        related_source = {
+            "type": "API",
+            "source": f"{rng.getrandbits(128):032X}",
+            "labelColumn": "$.items[*].displayName",
+            "valueColumn": "$.items[*].id"
+        }
+
+    field_options = []
+    if field_type == "dxCheckBox":
+        field_options = [{"text": f"選項{i}", "value": str(i)} for i in range(rng.randint(1, 4))]
+
+    return {
+        "fieldName": field_name,
+        "colSpan": rng.choice((1, 2, 4)),
+        "fieldType": field_type,
+        "formFieldId": f"form-{form_index}-field-{field_index}",
+        "editorOptions": {"searchEnabled": rng.random() < 0.5},
+        "isReadonly": rng.random() < 0.3,
+        "defaultValue": rng.choice(("", None, "0")),
+        "fieldGroup": None,
+        "parentField": None,
+        "displayCondition": None,
+        "infoDisplayCondition": False,
+        "relatedFormsExtend": None,
+        "fieldOptions": field_options,
+        "relatedSource": related_source,
+        "translation": translation,
+        "isVisible": rng.random() < 0.8,
+        "specialFieldCode": f"CODE{field_index}" if rng.random() < 0.2 else "",
+        "sort": field_index
+    }
+
+
+def make_form_detail(rng: random.Random, file_index: int, forms_per_file: int,
+                     fields_per_form: int, translation_ratio: float = 0.5) -> Dict[str, Any]:
+    """
+    產生單個FormDetail檔案的內容
+
+    Args:
+        rng (random.Random): 亂數產生器
+        file_index (int): 檔案序號
+        forms_per_file (int): 每個檔案的表單數量
+        fields_per_form (int): 每個表單的欄位數量
+        translation_ratio (float): 含有 translation 內容的欄位比例
+
+    Returns:
+        dict: FormDetail資料
+    """
+    forms = []
+    for form_number in range(forms_per_file):
+        form_index = file_index * forms_per_file + form_number
+        form_name = rng.choice(FORM_NAMES)
+        forms.append({
+            "description": form_name,
+            "fieldGroups": [],
+            "formFields": [
+                make_field(rng, form_index, field_index, translation_ratio)
+                for field_index in range(fields_per_form)
+            ],
+            "formId": f"{form_name}{form_index}",
+            "formName": form_name,
+            "batchingFormColumns": []
+        })
+    return {"forms": forms}
+
+
+def generate_corpus(output_dir, files: int = 10, forms_per_file: int = 5, fields_per_form: int = 30,
+                    append_fields: int = 10, translation_ratio: float = 0.5,
+                    seed: int = 0) -> Dict[str, Any]:
+    """
+    產生測試資料集
+
+    output_dir 下會建立 add/*.json 與 append_json.json。相同參數與 seed 會產生完全相同的檔案。
+
+    Args:
+        output_dir (Path): 輸出資料夾
+        files (int): 檔案數量
+        forms_per_file (int): 每個檔案的表單數量
+        fields_per_form (int): 每個表單的欄位數量
+        append_fields (int): append_json.json 中的欄位數量
+        translation_ratio (float): 含有 translation 內容的欄位比例
+        seed (int): 亂數種子
+
+    Returns:
+        dict: 資料集描述 {"files", "forms", "fields", "bytes", ...}
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    input_dir = output_dir / "add"
+    input_dir.mkdir(parents=True, exist_ok=True)
+
+    total_bytes = 0
+    for file_index in range(files):
+        data = make_form_detail(rng, file_index, forms_per_file, fields_per_form, translation_ratio)
+        content = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        (input_dir / f"表單{file_index:04d}.json").write_bytes(content)
+        total_bytes += len(content)
+
+    # append_json.json 使用逗號分隔的物件片段，與 JSONMerger.load_append_data 的預期格式相同
+    append_data = [make_field(rng, -1, index, translation_ratio) for index in range(append_fields)]
+    append_content = ",\n".join(json.dumps(field, ensure_ascii=False, indent=2) for field in append_data)
+    (output_dir / "append_json.json").write_text(append_content + ",\n", encoding='utf-8')
+
+    return {
+        "files": files,
+        "forms_per_file": forms_per_file,
+        "fields_per_form": fields_per_form,
+        "append_fields": append_fields,
+        "translation_ratio": translation_ratio,
+        "seed": seed,
+        "forms": files * forms_per_file,
+        "fields": files * forms_per_file * fields_per_form,
+        "bytes": total_bytes
+    }
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser):
+    """
+    加入資料集參數
+
+    Args:
+        parser (argparse.ArgumentParser): 命令列解析器
+    """
+    parser.add_argument("--files", type=int, default=20, help="檔案數量（預設 20）")
+    parser.add_argument("--forms", type=int, default=5, help="每個檔案的表單數量（預設 5）")
+    parser.add_argument("--fields", type=int, default=30, help="每個表單的欄位數量（預設 30）")
+    parser.add_argument("--append-fields", type=int, default=10,
+                        help="append_json.json 中的欄位數量（預設 10）")
+    parser.add_argument("--translation-ratio", type=float, default=0.5,
+                        help="含有 translation 內容的欄位比例（預設 0.5）")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子（預設 0）")
+
+
+def main():
+    """
+    主函數 - 產生測試資料集
+    """
+    parser = argparse.ArgumentParser(description="產生 FormDetail 測試資料集")
+    parser.add_argument("output_dir", help="輸出資料夾，會建立 add/ 與 append_json.json")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.output_dir, files=args.files, forms_per_file=args.forms,
+                             fields_per_form=args.fields, append_fields=args.append_fields,
+                             translation_ratio=args.translation_ratio, seed=args.seed)
+    print(f"已產生 {corpus['files']} 個檔案、{corpus['forms']} 個表單、{corpus['fields']} 個欄位，"
+          f"共 {corpus['bytes'] / 1024 / 1024:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
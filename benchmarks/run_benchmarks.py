@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+效能量測腳本
+功能：以產生的 FormDetail 資料集量測 merge / optimize / all 的端對端與各階段效能
+（files/s、fields/s、MB/s、峰值記憶體）、巢狀字典與 __slots__ 模型的記憶體用量及命令列啟動時間，
+以及模擬網路磁碟延遲時非同步 I/O 處理流程的效果，儲存結果並與先前的基準比較，
+退步超過容許範圍時以非零狀態結束
+"""
+
+import argparse
+import builtins
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from generate_corpus import add_corpus_arguments, generate_corpus  # noqa: E402
+
+from json_codec import JSON_BACKENDS, resolve_backend  # noqa: E402
+from merge_json import JSONMerger  # noqa: E402
+from models import measure_memory  # noqa: E402
+from optimized_process_json import FormDetailProcessor  # noqa: E402
+from output_formats import OutputFormat  # noqa: E402
+from pipeline import FormDetailPipeline  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+COMMANDS = ("merge", "optimize", "all")
+STAGES = ("read", "parse", "merge", "optimize", "serialize", "write")
+
+
+def make_metrics(seconds: float, corpus: Dict[str, Any], peak_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    由耗時與資料集大小計算吞吐量
+
+    Args:
+        seconds (float): 耗時（秒）
+        corpus (dict): 資料集描述
+        peak_bytes (int): 峰值記憶體（位元組）
+
+    Returns:
+        dict: {"seconds", "files_per_sec", "fields_per_sec", "mb_per_sec", "peak_mb"}
+    """
+    seconds = max(seconds, 1e-9)
+    metrics = {
+        "seconds": round(seconds, 6),
+        "files_per_sec": round(corpus["files"] / seconds, 2),
+        "fields_per_sec": round(corpus["fields"] / seconds, 2),
+        "mb_per_sec": round(corpus["bytes"] / 1024 / 1024 / seconds, 3),
+    }
+    if peak_bytes is not None:
+        metrics["peak_mb"] = round(peak_bytes / 1024 / 1024, 3)
+    return metrics
+
+
+def measure(run: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    量測函數的最短耗時與峰值記憶體
+
+    峰值記憶體以 tracemalloc 另外執行一次取得，避免追蹤成本影響耗時。
+
+    Args:
+        run (callable): 要量測的函數
+        repeat (int): 重複次數
+
+    Returns:
+        dict: {"seconds", "peak_bytes"}
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def make_command(command: str, corpus_dir: Path, output_dir: Path, jobs: int,
+                 json_backend: str, output_format: OutputFormat, async_io: bool = False) -> Callable[[], None]:
+    """
+    建立執行單一命令的函數，每次執行都忽略增量建置快取
+
+    Args:
+        command (str): merge / optimize / all
+        corpus_dir (Path): 資料集資料夾
+        output_dir (Path): 輸出資料夾
+        jobs (int): 平行處理的工作行程數量
+        json_backend (str): JSON後端
+        output_format (OutputFormat): 輸出格式
+        async_io (bool): 是否使用非同步 I/O 處理流程
+
+    Returns:
+        callable: 執行命令的函數
+    """
+    input_dir = corpus_dir / "add"
+    append_file = corpus_dir / "append_json.json"
+
+    if command == "merge":
+        merger = JSONMerger(append_file=append_file, input_dir=input_dir, output_dir=output_dir,
+                            output_format=output_format, json_backend=json_backend)
+        return lambda: merger.merge_all_files(jobs=jobs, force=True, async_io=async_io)
+
+    if command == "optimize":
+        processor = FormDetailProcessor(input_dir=input_dir, output_dir=output_dir,
+                                        output_format=output_format, json_backend=json_backend)
+        return lambda: processor.process_all_files(jobs=jobs, force=True, async_io=async_io)
+
+    pipeline = FormDetailPipeline(append_file=append_file, input_dir=input_dir, output_dir=output_dir,
+                                  output_format=output_format, json_backend=json_backend)
+    return lambda: pipeline.process_all_files(jobs=jobs, force=True, async_io=async_io)
+
+
+def measure_stages(corpus_dir: Path, output_dir: Path, json_backend: str,
+                   output_format: OutputFormat) -> Dict[str, float]:
+    """
+    依序執行 all 命令的每個階段，分別累計各階段耗時
+
+    Args:
+        corpus_dir (Path): 資料集資料夾
+        output_dir (Path): 輸出資料夾
+        json_backend (str): JSON後端
+        output_format (OutputFormat): 輸出格式
+
+    Returns:
+        dict: 各階段耗時（秒）
+    """
+    pipeline = FormDetailPipeline(append_file=corpus_dir / "append_json.json",
+                                  input_dir=corpus_dir / "add", output_dir=output_dir,
+                                  output_format=output_format, json_backend=json_backend)
+    merger = pipeline.merger
+    codec = pipeline.codec
+    append_data = merger.load_append_data() or []
+    # 直接呼叫父類別的轉換，只量測C#結構優化本身
+    optimize_form = super(FormDetailPipeline, pipeline).transform_form
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    for json_file in sorted((corpus_dir / "add").glob("*.json")):
+        start = time.perf_counter()
+        content = json_file.read_bytes()
+        checkpoint = time.perf_counter()
+        timings["read"] += checkpoint - start
+
+        start = checkpoint
+        data = codec.loads(content)
+        checkpoint = time.perf_counter()
+        timings["parse"] += checkpoint - start
+
+        start = checkpoint
+        forms = [merger.merge_form(form, append_data) for form in data.get("forms") or []]
+        checkpoint = time.perf_counter()
+        timings["merge"] += checkpoint - start
+
+        start = checkpoint
+        processed_data = {"forms": [optimize_form(form) for form in forms]}
+        checkpoint = time.perf_counter()
+        timings["optimize"] += checkpoint - start
+
+        start = checkpoint
+        buffer = io.BytesIO()
+        with output_format.wrap(buffer) as fp:
+            output_format.write(processed_data, fp, codec)
+        checkpoint = time.perf_counter()
+        timings["serialize"] += checkpoint - start
+
+        start = checkpoint
+        pipeline.output_path(json_file.name).write_bytes(buffer.getvalue())
+        timings["write"] += time.perf_counter() - start
+
+    return timings
+
+
+def run_benchmarks(corpus_dir: Path, corpus: Dict[str, Any], commands=COMMANDS, repeat: int = 3,
+                   jobs: int = 1, json_backend: str = "auto",
+                   output_format: Optional[OutputFormat] = None) -> Dict[str, Any]:
+    """
+    執行所有量測
+
+    Args:
+        corpus_dir (Path): 資料集資料夾
+        corpus (dict): 資料集描述
+        commands (tuple): 要量測的命令
+        repeat (int): 重複次數，取最短耗時
+        jobs (int): 平行處理的工作行程數量
+        json_backend (str): JSON後端
+        output_format (OutputFormat): 輸出格式
+
+    Returns:
+        dict: 量測結果
+    """
+    json_backend = resolve_backend(json_backend)
+    output_format = output_format or OutputFormat()
+    output_dir = corpus_dir / "out"
+
+    results: Dict[str, Any] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": json_backend,
+            "output_format": output_format.describe(),
+            "jobs": jobs,
+        },
+        "corpus": corpus,
+        "commands": {},
+        "stages": {},
+    }
+
+    for command in commands:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        run = make_command(command, corpus_dir, output_dir, jobs, json_backend, output_format)
+        measured = measure(run, repeat)
+        results["commands"][command] = make_metrics(measured["seconds"], corpus, measured["peak_bytes"])
+
+    # 各階段取多次執行中每個階段的最短耗時
+    stage_seconds = dict.fromkeys(STAGES, float("inf"))
+    for _ in range(repeat):
+        for stage, seconds in measure_stages(corpus_dir, output_dir, json_backend, output_format).items():
+            stage_seconds[stage] = min(stage_seconds[stage], seconds)
+    results["stages"] = {stage: make_metrics(seconds, corpus) for stage, seconds in stage_seconds.items()}
+
+    # 整個資料集同時保存在記憶體中時，巢狀字典與模型的大小
+    contents = [path.read_bytes() for path in sorted((corpus_dir / "add").glob("*.json"))]
+    memory = measure_memory(contents, json_backend)
+    results["memory"] = {
+        "dict_mb": round(memory["dict_bytes"] / 1024 / 1024, 3),
+        "model_mb": round(memory["model_bytes"] / 1024 / 1024, 3),
+        "model_ratio": round(memory["model_bytes"] / (memory["dict_bytes"] or 1), 3),
+    }
+
+    return results
+
+
+@contextmanager
+def injected_latency(roots: Sequence[Path], seconds: float) -> Iterator[None]:
+    """
+    模擬網路磁碟：開啟 roots 中的檔案前先等待 seconds 秒
+
+    以替換 open 的方式注入延遲，等待期間與真正的網路 I/O 一樣釋放 GIL；
+    只影響目前行程（以及在此期間以 fork 建立的工作行程）。
+
+    Args:
+        roots (list): 要加上延遲的資料夾
+        seconds (float): 每次開啟檔案的延遲（秒）
+    """
+    prefixes = tuple(os.path.join(os.path.abspath(root), "") for root in roots)
+    real_open = builtins.open
+
+    def slow_open(file, *args, **kwargs):
+        if isinstance(file, (str, Path)) and os.path.abspath(file).startswith(prefixes):
+            time.sleep(seconds)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = slow_open
+    try:
+        yield
+    finally:
+        builtins.open = real_open
+
+
+def measure_io_latency(corpus_dir: Path, corpus: Dict[str, Any], latency: float, repeat: int = 3,
+                       jobs: int = 1, json_backend: str = "auto",
+                       output_format: Optional[OutputFormat] = None) -> Dict[str, Any]:
+    """
+    在輸入與輸出資料夾加上延遲，比較一般模式與非同步 I/O 處理流程執行 all 命令的耗時
+
+    Args:
+        corpus_dir (Path): 資料集資料夾
+        corpus (dict): 資料集描述
+        latency (float): 每次開啟檔案的延遲（秒）
+        repeat (int): 重複次數，取最短耗時
+        jobs (int): 平行處理的工作行程數量
+        json_backend (str): JSON後端
+        output_format (OutputFormat): 輸出格式
+
+    Returns:
+        dict: {"latency_ms", "sync", "async", "speedup"}
+    """
+    json_backend = resolve_backend(json_backend)
+    output_format = output_format or OutputFormat()
+    output_dir = corpus_dir / "out"
+
+    results: Dict[str, Any] = {"latency_ms": round(latency * 1000, 3)}
+    with injected_latency([corpus_dir / "add", output_dir], latency):
+        for mode, async_io in (("sync", False), ("async", True)):
+            shutil.rmtree(output_dir, ignore_errors=True)
+            run = make_command("all", corpus_dir, output_dir, jobs, json_backend, output_format, async_io)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - start)
+            results[mode] = make_metrics(best, corpus)
+
+    results["speedup"] = round(results["sync"]["seconds"] / results["async"]["seconds"], 2)
+    return results
+
+
+def measure_startup(repeat: int = 10) -> Dict[str, Any]:
+    """
+    量測命令列在不執行任何處理時的啟動時間
+
+    interpreter 是只啟動 Python 直譯器的時間，可用來扣除直譯器本身的成本；
+    同時檢查啟動時是否在目前資料夾建立了檔案（例如日誌檔）。
+
+    Args:
+        repeat (int): 每個命令執行的次數
+
+    Returns:
+        dict: {"interpreter" / "version" / "help": {"seconds", "median"}, "files_created": [...]}
+    """
+    commands = {
+        "interpreter": [sys.executable, "-c", "pass"],
+        "version": [sys.executable, str(MAIN_SCRIPT), "--version"],
+        "help": [sys.executable, str(MAIN_SCRIPT), "--help"],
+    }
+
+    results: Dict[str, Any] = {}
+    work_dir = Path(tempfile.mkdtemp(prefix="formdetails-startup-"))
+    try:
+        for name, argv in commands.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(argv, cwd=work_dir, stdout=subprocess.DEVNULL, check=True)
+                timings.append(time.perf_counter() - start)
+            results[name] = {"seconds": round(min(timings), 6), "median": round(statistics.median(timings), 6)}
+
+        results["files_created"] = sorted(path.name for path in work_dir.iterdir())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.15) -> List[str]:
+    """
+    與基準比較，找出退步超過容許範圍的項目
+
+    只有資料集與JSON後端相同時才比較處理效能；fields/s 下降或峰值記憶體上升超過 tolerance 視為退步。
+    啟動時間（扣除直譯器本身）增加超過 tolerance，或啟動時建立了檔案，也視為退步。
+
+    Args:
+        current (dict): 本次量測結果
+        baseline (dict): 基準量測結果
+        tolerance (float): 容許的變動比例
+
+    Returns:
+        list: 退步項目的說明，沒有退步時為空列表
+    """
+    regressions = _compare_startup(current.get("startup"), baseline.get("startup"), tolerance)
+
+    if current.get("corpus") != baseline.get("corpus"):
+        logging.warning("資料集與基準不同，略過處理效能的基準比較")
+        return regressions
+    if current["environment"].get("json_backend") != baseline["environment"].get("json_backend"):
+        logging.warning("JSON後端與基準不同，略過處理效能的基準比較")
+        return regressions
+
+    for section in ("commands", "stages"):
+        for name, metrics in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if not base:
+                continue
+
+            if metrics["fields_per_sec"] < base["fields_per_sec"] * (1 - tolerance):
+                change = metrics["fields_per_sec"] / base["fields_per_sec"] - 1
+                regressions.append(f"{section}.{name} fields/s: {base['fields_per_sec']:.0f} → "
+                                   f"{metrics['fields_per_sec']:.0f} ({change:+.1%})")
+
+            if "peak_mb" in metrics and "peak_mb" in base and \
+                    metrics["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+                change = metrics["peak_mb"] / base["peak_mb"] - 1
+                regressions.append(f"{section}.{name} 峰值記憶體: {base['peak_mb']:.2f} MB → "
+                                   f"{metrics['peak_mb']:.2f} MB ({change:+.1%})")
+
+    return regressions
+
+
+def _compare_startup(current: Optional[Dict[str, Any]], baseline: Optional[Dict[str, Any]],
+                     tolerance: float) -> List[str]:
+    """比較啟動時間，以扣除直譯器啟動時間後的工具本身成本判斷"""
+    if not current:
+        return []
+
+    regressions = []
+    if current.get("files_created"):
+        regressions.append(f"startup 啟動時建立了檔案: {', '.join(current['files_created'])}")
+
+    if not baseline:
+        return regressions
+
+    for name in ("version", "help"):
+        if name not in current or name not in baseline:
+            continue
+        overhead = current[name]["seconds"] - current["interpreter"]["seconds"]
+        base_overhead = baseline[name]["seconds"] - baseline["interpreter"]["seconds"]
+        # 加上 5 毫秒的絕對容許值，避免極短的時間因雜訊而誤判
+        if overhead > base_overhead * (1 + tolerance) + 0.005:
+            regressions.append(f"startup.{name} 啟動成本: {base_overhead * 1000:.1f} ms → "
+                               f"{overhead * 1000:.1f} ms")
+    return regressions
+
+
+def print_results(results: Dict[str, Any]):
+    """
+    以表格輸出量測結果
+
+    Args:
+        results (dict): 量測結果
+    """
+    corpus = results["corpus"]
+    print(f"資料集: {corpus['files']} 個檔案、{corpus['forms']} 個表單、{corpus['fields']} 個欄位，"
+          f"{corpus['bytes'] / 1024 / 1024:.2f} MB")
+    print(f"JSON 後端: {results['environment']['json_backend']}，"
+          f"輸出格式: {results['environment']['output_format']}")
+
+    for section, title in (("commands", "命令"), ("stages", "階段")):
+        if not results.get(section):
+            continue
+        print("=" * 72)
+        print(f"{title:<12}{'秒':>10}{'files/s':>12}{'fields/s':>14}{'MB/s':>10}{'峰值MB':>12}")
+        print("-" * 72)
+        for name, metrics in results[section].items():
+            peak = f"{metrics['peak_mb']:.2f}" if "peak_mb" in metrics else "-"
+            print(f"{name:<12}{metrics['seconds']:>10.4f}{metrics['files_per_sec']:>12.1f}"
+                  f"{metrics['fields_per_sec']:>14.0f}{metrics['mb_per_sec']:>10.2f}{peak:>12}")
+
+    memory = results.get("memory")
+    if memory:
+        print("=" * 72)
+        print(f"記憶體（整個資料集）：巢狀字典 {memory['dict_mb']:.2f} MB，"
+              f"__slots__ 模型 {memory['model_mb']:.2f} MB（{memory['model_ratio']:.1%}）")
+
+    startup = results.get("startup")
+    if startup:
+        print("=" * 72)
+        print(f"{'啟動':<12}{'最短(ms)':>12}{'中位數(ms)':>14}{'扣除直譯器(ms)':>18}")
+        print("-" * 72)
+        for name in ("interpreter", "version", "help"):
+            overhead = startup[name]["seconds"] - startup["interpreter"]["seconds"]
+            print(f"{name:<12}{startup[name]['seconds'] * 1000:>12.1f}{startup[name]['median'] * 1000:>14.1f}"
+                  f"{overhead * 1000:>18.1f}")
+        if startup["files_created"]:
+            print(f"啟動時建立的檔案: {', '.join(startup['files_created'])}")
+
+    io_latency = results.get("io_latency")
+    if io_latency:
+        print("=" * 72)
+        print(f"每次開啟檔案延遲 {io_latency['latency_ms']:.1f} ms 時的 all 命令")
+        print("-" * 72)
+        for mode, title in (("sync", "一般模式"), ("async", "非同步 I/O")):
+            metrics = io_latency[mode]
+            print(f"{title:<12}{metrics['seconds']:>10.4f} 秒{metrics['files_per_sec']:>12.1f} files/s")
+        print(f"非同步 I/O 加速 {io_latency['speedup']:.2f} 倍")
+
+
+def main() -> int:
+    """
+    主函數 - 執行量測並與基準比較
+
+    Returns:
+        int: 結束狀態，有效能退步時為 1
+    """
+    parser = argparse.ArgumentParser(description="量測 FormDetails Tool 的處理效能")
+    add_corpus_arguments(parser)
+    parser.add_argument("--commands", nargs="+", choices=COMMANDS, default=list(COMMANDS),
+                        help="要量測的命令（預設全部）")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數，取最短耗時（預設 3）")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="平行處理的工作行程數量（預設 1）")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="auto",
+                        help="JSON後端（預設 auto）")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "latest.json",
+                        help="量測結果輸出檔案（預設 benchmarks/results/latest.json）")
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json",
+                        help="基準檔案（預設 benchmarks/results/baseline.json）")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="容許的效能變動比例（預設 0.15）")
+    parser.add_argument("--startup-repeat", type=int, default=10,
+                        help="每個啟動時間量測的執行次數，0 表示不量測（預設 10）")
+    parser.add_argument("--io-latency-ms", type=float, default=0,
+                        help="在輸入與輸出資料夾模擬每次開啟檔案的延遲（毫秒），"
+                             "比較一般模式與 --async-io 的耗時，0 表示不量測（預設 0）")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="將本次結果存為新的基準")
+    args = parser.parse_args()
+
+    # 量測時不輸出每個檔案的處理日誌
+    logging.getLogger().setLevel(logging.WARNING)
+
+    temp_dir = Path(tempfile.mkdtemp(prefix="formdetails-bench-"))
+    try:
+        corpus = generate_corpus(temp_dir, files=args.files, forms_per_file=args.forms,
+                                 fields_per_form=args.fields, append_fields=args.append_fields,
+                                 translation_ratio=args.translation_ratio, seed=args.seed)
+        results = run_benchmarks(temp_dir, corpus, commands=args.commands, repeat=args.repeat,
+                                 jobs=args.jobs, json_backend=args.json_backend)
+        if args.io_latency_ms > 0:
+            results["io_latency"] = measure_io_latency(temp_dir, corpus, args.io_latency_ms / 1000,
+                                                       repeat=args.repeat, jobs=args.jobs,
+                                                       json_backend=args.json_backend)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if args.startup_repeat > 0:
+        results["startup"] = measure_startup(args.startup_repeat)
+
+    print_results(results)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"量測結果已儲存至 {args.output}")
+
+    regressions = []
+    if args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"與基準 {args.baseline} 相比效能退步：")
+            for regression in regressions:
+                print(f"  - {regression}")
+        else:
+            print(f"與基準 {args.baseline} 相比沒有效能退步")
+
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"已更新基準 {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
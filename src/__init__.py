@@ -7,6 +7,8 @@ FormDetails Tool - JSON 檔案處理工具集
 主要模組：
 - merge_json: JSON 合併功能
 - optimized_process_json: C# 結構優化功能
+- pipeline: 合併與優化的單次處理流程
+- api: 不讀寫檔案的記憶體內處理 API
 """
 
 __version__ = "1.0.0"
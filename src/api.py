@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+記憶體內處理 API
+功能：直接在記憶體中合併、優化或完整處理已解析的 FormDetail 資料或原始 JSON 位元組，
+合併資料由呼叫端預先提供；不讀寫任何檔案（不使用 add/、out/ 與 append_json.json），
+不使用 print，處理訊息只經由 logging 記錄並依呼叫端的日誌設定輸出；匯入時也沒有任何副作用，適合嵌入其他服務
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from append_data import AppendData, decode_fragments
+from batch import iter_batch
+from interning import get_intern_table
+from merge_json import JSONMerger, MergeData, ProcessedData
+from metrics import FileMetrics
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+from routing import RoutingTable
+
+# 可執行的處理，與命令列的命令相同
+COMMANDS = ("merge", "optimize", "all")
+
+# 沒有指定名稱時的文件名稱，用於日誌、指標與路由的檔案模式
+DEFAULT_NAME = "document.json"
+
+# 輸入文件：已解析的 FormDetail 資料，或原始 JSON 內容
+Document = Union[Dict[str, Any], bytes, str]
+
+# 預先提供的合併資料：formField 物件、append_json.json 的內容，或已載入的合併資料與路由表
+AppendSource = Union[Sequence[Dict[str, Any]], bytes, str, AppendData, RoutingTable]
+
+
+def preload_append_data(append_data: AppendSource,
+                        intern_strings: bool = False) -> Union[MergeData, List[Dict[str, Any]]]:
+    """
+    將呼叫端提供的合併資料轉換為可直接合併的形式
+
+    Args:
+        append_data: formField 物件的序列；append_json.json 的內容（位元組或字串，
+            支援與檔案相同的 JSON 陣列、連續物件、逗號分隔片段與 NDJSON）；或已載入的 AppendData / RoutingTable
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+
+    Returns:
+        list | AppendData | RoutingTable: 要合併的資料
+
+    Raises:
+        json.JSONDecodeError: 內容不是合法的JSON片段
+        ValueError: 有不是物件的formField
+    """
+    if isinstance(append_data, (AppendData, RoutingTable)):
+        return append_data
+    if isinstance(append_data, (bytes, bytearray)):
+        append_data = bytes(append_data).decode('utf-8')
+    if isinstance(append_data, str):
+        fields = decode_fragments(append_data)
+    else:
+        fields = list(append_data)
+        for index, field in enumerate(fields):
+            if not isinstance(field, dict):
+                raise ValueError(f"第 {index + 1} 個formField不是JSON物件")
+    if intern_strings:
+        fields, _ = get_intern_table().intern(fields)
+    return fields
+
+
+class Transformer:
+    """
+    在記憶體中處理 FormDetail 文件
+
+    建立時只編譯結構描述並準備合併資料，之後可重複呼叫 transform 或 transform_many；
+    輸入為已解析的資料時返回處理後的資料，輸入為位元組或字串時返回依輸出格式序列化（並壓縮）的位元組。
+    已解析的資料在合併時會直接修改。
+    """
+
+    def __init__(self, command: str = "all", append_data: Optional[AppendSource] = None,
+                 merge_policy: str = "append", output_format: Optional[OutputFormat] = None,
+                 json_backend: str = "auto", schema_path: Optional[str] = None, intern_strings: bool = False):
+        """
+        初始化處理器
+
+        Args:
+            command (str): merge 只合併、optimize 只進行C#結構優化、all 合併後優化，見 COMMANDS
+            append_data: 要合併的資料，見 preload_append_data；merge 與 all 必須提供
+            merge_policy (str): 合併策略，見 options.MERGE_POLICIES
+            output_format (OutputFormat): 輸入為位元組時的輸出格式，預設為排版JSON；
+                patch 格式時返回由輸入變成處理結果的 JSON Patch 操作，fsync 策略不使用
+            json_backend (str): JSON後端（auto / json / orjson）
+            schema_path (str): C#類別結構描述檔路徑，預設為內建的 formdetail_schema.json
+            intern_strings (bool): 解析後是否以字串共用表替換重複的鍵與短字串值
+
+        Raises:
+            ValueError: 不支援的處理、合併策略或JSON後端，或 merge / all 沒有提供合併資料
+        """
+        if command not in COMMANDS:
+            raise ValueError(f"不支援的處理: {command}，可使用 {' / '.join(COMMANDS)}")
+        if command != "optimize" and append_data is None:
+            raise ValueError(f"{command} 需要提供合併資料")
+
+        self.command = command
+        self.output_format = output_format or OutputFormat()
+        options = dict(output_dir=None, output_format=self.output_format, json_backend=json_backend,
+                       intern_strings=intern_strings)
+        self.append_data = None if command == "optimize" else preload_append_data(append_data, intern_strings)
+
+        if command == "merge":
+            self.processor = JSONMerger(merge_policy=merge_policy, **options)
+        elif command == "optimize":
+            self.processor = FormDetailProcessor(schema_path=schema_path, **options)
+        else:
+            self.processor = FormDetailPipeline(merge_policy=merge_policy, schema_path=schema_path, **options)
+            self.processor.append_data = self.append_data
+
+    def _process(self, data: Any, name: str, metrics: FileMetrics, parsed: bool) -> Optional[ProcessedData]:
+        """依處理類型處理已解析的資料或原始內容"""
+        if self.command == "merge":
+            if parsed:
+                return self.processor.process_document(data, name, self.append_data, metrics)
+            return self.processor.process_json_content(data, name, self.append_data, metrics)
+        if parsed:
+            return self.processor.process_document(data, name, metrics)
+        return self.processor.process_json_content(data, name, metrics)
+
+    def run(self, document: Document, name: str = DEFAULT_NAME) -> Tuple[FileMetrics, Any]:
+        """
+        處理單個文件並返回處理指標，失敗時不拋出例外
+
+        Args:
+            document (dict | bytes | str): 已解析的資料或原始 JSON 內容
+            name (str): 文件名稱，用於比對路由的檔案模式與指標
+
+        Returns:
+            tuple: (處理指標, 處理結果，失敗時為None；錯誤訊息見 FileMetrics.error)
+        """
+        metrics = FileMetrics(name)
+        if isinstance(document, str):
+            document = document.encode('utf-8')
+        parsed = not isinstance(document, (bytes, bytearray))
+
+        processed_data = self._process(document if parsed else bytes(document), name, metrics, parsed)
+        if processed_data is None:
+            return metrics, None
+        if parsed:
+            metrics.ok = True
+            return metrics, processed_data
+
+        try:
+            payload = self.output_format.encode(self.output_format.serialize(processed_data, self.processor.codec))
+        except Exception as e:
+            metrics.fail(e)
+            return metrics, None
+        metrics.lap("serialize")
+        metrics.ok = True
+        metrics.bytes_out = len(payload)
+        return metrics, payload
+
+    def _run_item(self, item: Union[Document, Tuple[str, Document]]) -> Tuple[FileMetrics, Any]:
+        """處理 transform_many 的單個項目，可在工作行程中執行"""
+        if isinstance(item, tuple):
+            return self.run(item[1], item[0])
+        return self.run(item)
+
+    def transform(self, document: Document, name: str = DEFAULT_NAME) -> Any:
+        """
+        處理單個文件
+
+        Args:
+            document (dict | bytes | str): 已解析的資料或原始 JSON 內容
+            name (str): 文件名稱，用於比對路由的檔案模式與錯誤訊息
+
+        Returns:
+            dict | list | bytes: 輸入為已解析的資料時為處理後的資料（patch 格式時為 JSON Patch 操作），
+                輸入為位元組或字串時為輸出內容
+
+        Raises:
+            ValueError: 無法解析或處理文件，例如合併時文件沒有forms陣列
+        """
+        metrics, result = self.run(document, name)
+        if not metrics.ok:
+            raise ValueError(f"無法處理 {name}: {metrics.error}")
+        return result
+
+    def transform_many(self, documents: Iterable[Union[Document, Tuple[str, Document]]],
+                       jobs: int = 1) -> Iterator[Tuple[FileMetrics, Any]]:
+        """
+        逐一處理多個文件，依輸入順序逐步產生結果；文件只在需要時才從 documents 取出
+
+        Args:
+            documents (iterable): 文件，或 (名稱, 文件)
+            jobs (int): 平行處理的工作行程數量，0 表示使用所有CPU核心；大於 1 時合併資料與文件須可序列化，
+                已解析的資料在工作行程中處理，傳入的物件不會被修改
+
+        Yields:
+            tuple: (處理指標, 處理結果，失敗時為None)，見 run
+        """
+        return iter_batch(self._run_item, documents, jobs)
+
+
+def transform(document: Document, command: str = "all", append_data: Optional[AppendSource] = None,
+              name: str = DEFAULT_NAME, **options: Any) -> Any:
+    """
+    在記憶體中處理單個文件，見 Transformer.transform
+
+    Args:
+        document (dict | bytes | str): 已解析的資料或原始 JSON 內容
+        command (str): merge / optimize / all
+        append_data: 要合併的資料，見 preload_append_data
+        name (str): 文件名稱
+        **options: 其他 Transformer 參數，例如 merge_policy、output_format
+
+    Returns:
+        dict | list | bytes: 處理結果
+    """
+    return Transformer(command, append_data, **options).transform(document, name)
+
+
+def transform_many(documents: Iterable[Union[Document, Tuple[str, Document]]], command: str = "all",
+                   append_data: Optional[AppendSource] = None, jobs: int = 1,
+                   **options: Any) -> Iterator[Tuple[FileMetrics, Any]]:
+    """
+    在記憶體中逐一處理多個文件並依序產生結果，見 Transformer.transform_many
+
+    Args:
+        documents (iterable): 文件，或 (名稱, 文件)
+        command (str): merge / optimize / all
+        append_data: 要合併的資料，見 preload_append_data
+        jobs (int): 平行處理的工作行程數量
+        **options: 其他 Transformer 參數，例如 merge_policy、output_format
+
+    Yields:
+        tuple: (處理指標, 處理結果，失敗時為None)
+    """
+    return Transformer(command, append_data, **options).transform_many(documents, jobs)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+合併資料載入
+功能：一次走訪 append_json.json 的內容即可解析 JSON 陣列、連續的物件、以逗號分隔（含結尾逗號）的片段或 NDJSON，
+並將解析結果以檔案雜湊為鍵快取在輸出資料夾，內容未變更時重複執行與工作行程都不必重新解析
+"""
+
+import gc
+import json
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from build_cache import hash_file
+from interning import get_intern_table
+from json_codec import STDLIB_DECODE_OPTIONS, get_codec
+
+CACHE_NAME = ".formdetails-append"
+
+# 快取格式版本，解析規則變更時遞增
+CACHE_VERSION = 1
+
+_DECODER = json.JSONDecoder(**STDLIB_DECODE_OPTIONS)
+
+# 值與值之間可以有空白、換行與逗號
+_SEPARATOR = re.compile(r"[ \t\n\r,]*")
+
+# 目前行程已載入的合併資料，以檔案雜湊為鍵；工作行程以 fork 啟動時直接沿用。
+# 監看模式下合併資料會多次變更，只保留最近載入的幾份
+_loaded: Dict[str, List[Dict[str, Any]]] = {}
+_MAX_LOADED = 4
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    暫停循環垃圾回收
+
+    解析大量小型物件時，分代垃圾回收會因配置數量不斷觸發而掃描所有新建的容器；
+    JSON資料沒有循環參照，解析期間暫停可省下這些掃描。
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_fragments(text: str) -> List[Dict[str, Any]]:
+    """
+    一次走訪內容，解析所有頂層的JSON值
+
+    頂層的值可以用空白、換行或逗號分隔，允許結尾逗號；頂層的陣列會展開為其中的元素。
+
+    Args:
+        text (str): 檔案內容
+
+    Returns:
+        list: 所有formField物件
+
+    Raises:
+        json.JSONDecodeError: 內容不是合法的JSON片段
+        ValueError: 有不是物件的formField
+    """
+    fields: List[Dict[str, Any]] = []
+    pos = _SEPARATOR.match(text, 1 if text.startswith("\ufeff") else 0).end()
+    end = len(text)
+
+    with _gc_paused():
+        while pos < end:
+            value, pos = _DECODER.raw_decode(text, pos)
+            if isinstance(value, list):
+                fields.extend(value)
+            else:
+                fields.append(value)
+            pos = _SEPARATOR.match(text, pos).end()
+
+    for index, field in enumerate(fields):
+        if not isinstance(field, dict):
+            raise ValueError(f"第 {index + 1} 個formField不是JSON物件")
+    return fields
+
+
+def _remember(digest: str, fields: List[Dict[str, Any]]):
+    """記錄目前行程已載入的合併資料"""
+    _loaded.pop(digest, None)
+    while len(_loaded) >= _MAX_LOADED:
+        del _loaded[next(iter(_loaded))]
+    _loaded[digest] = fields
+
+
+class AppendData(Sequence):
+    """
+    已載入的合併資料
+
+    序列化（傳給工作行程）時只保留檔案雜湊與快取路徑，工作行程第一次使用時才由快取載入，
+    之後在同一行程中重複使用。
+    """
+
+    def __init__(self, fields: List[Dict[str, Any]], digest: str, source: Path,
+                 cache_path: Optional[Path] = None, json_backend: str = "json",
+                 intern_strings: bool = False):
+        """
+        初始化合併資料
+
+        Args:
+            fields (list): formField物件
+            digest (str): append_json.json 的內容雜湊
+            source (Path): append_json.json 的路徑
+            cache_path (Path): 快取檔案路徑
+            json_backend (str): 讀取快取時使用的JSON後端
+            intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值，工作行程重新載入時也會替換
+        """
+        self.digest = digest
+        self.source = Path(source)
+        self.cache_path = cache_path
+        self.json_backend = json_backend
+        self.intern_strings = intern_strings
+        # 字串共用估計節省的位元組數，只在載入的行程中記錄
+        self.interned_bytes = 0
+        if intern_strings:
+            fields, self.interned_bytes = get_intern_table().intern(fields)
+        _remember(digest, fields)
+
+    @property
+    def fields(self) -> List[Dict[str, Any]]:
+        """所有formField物件"""
+        fields = _loaded.get(self.digest)
+        if fields is None:
+            fields = self._reload()
+            _remember(self.digest, fields)
+        return fields
+
+    def _reload(self) -> List[Dict[str, Any]]:
+        """在未載入過的行程中由快取載入，快取不存在或已變更時重新解析原始檔案"""
+        fields = None
+        if self.cache_path is not None:
+            cached = read_cache(self.cache_path, self.json_backend, digest=self.digest)
+            if cached is not None:
+                fields = cached[1]
+        if fields is None:
+            fields = decode_fragments(self.source.read_text(encoding='utf-8'))
+        if self.intern_strings:
+            fields, _ = get_intern_table().intern(fields)
+        return fields
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"digest": self.digest, "source": self.source, "cache_path": self.cache_path,
+                "json_backend": self.json_backend, "intern_strings": self.intern_strings,
+                "interned_bytes": 0}
+
+    def __getitem__(self, index):
+        return self.fields[index]
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.fields)
+
+    def __repr__(self) -> str:
+        return f"AppendData({self.source.name!r}, {len(self)} fields)"
+
+
+def read_cache(cache_path: Path, json_backend: str = "json", digest: Optional[str] = None,
+               signature: Optional[Tuple[str, int, int]] = None) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    讀取合併資料快取
+
+    快取第一行為標頭（雜湊、原始檔案路徑、大小與修改時間），第二行為緊湊格式的formField陣列；
+    標頭不符時不解析陣列。
+
+    Args:
+        cache_path (Path): 快取檔案路徑
+        json_backend (str): JSON後端
+        digest (str): 預期的檔案雜湊
+        signature (tuple): 原始檔案的 (路徑, 大小, 修改時間 ns)，未指定 digest 時以此比對
+
+    Returns:
+        tuple: (檔案雜湊, formField物件)，快取不存在或不符時返回None
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CACHE_VERSION:
+                return None
+            if digest is not None:
+                if header.get("hash") != digest:
+                    return None
+            elif signature is None or (header.get("source"), header.get("size"), header.get("mtime_ns")) != signature:
+                return None
+            content = f.read()
+        with _gc_paused():
+            return header["hash"], get_codec(json_backend).loads(content)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"無法讀取合併資料快取 {cache_path}: {e}")
+        return None
+
+
+def write_cache(cache_path: Path, fields: List[Dict[str, Any]], digest: str, signature: Tuple[str, int, int],
+                json_backend: str = "json"):
+    """
+    以原子方式寫入合併資料快取，失敗時只記錄警告
+
+    Args:
+        cache_path (Path): 快取檔案路徑
+        fields (list): formField物件
+        digest (str): 原始檔案雜湊
+        signature (tuple): 原始檔案的 (路徑, 大小, 修改時間 ns)
+        json_backend (str): JSON後端
+    """
+    source, size, mtime_ns = signature
+    header = {"version": CACHE_VERSION, "hash": digest, "source": source, "size": size, "mtime_ns": mtime_ns}
+    # 多個分片或工作行程可能同時寫入同一個快取，各自使用不同的暫存檔
+    temp_path = None
+
+    try:
+        with tempfile.NamedTemporaryFile(dir=cache_path.parent, prefix=cache_path.name + ".", suffix=".tmp",
+                                         delete=False) as f:
+            temp_path = Path(f.name)
+            f.write(json.dumps(header).encode('utf-8') + b"\n")
+            f.write(get_codec(json_backend).dumps(fields, indent=None))
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
+        logging.warning(f"無法寫入合併資料快取 {cache_path}: {e}")
+
+
+def load_append_file(path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None,
+                     json_backend: str = "json", cache_name: str = CACHE_NAME,
+                     intern_strings: bool = False) -> AppendData:
+    """
+    載入合併資料，優先使用快取
+
+    原始檔案的路徑、大小與修改時間與快取相同時不必計算雜湊；不同時以雜湊比對，內容未變更仍使用快取。
+
+    Args:
+        path (Path): append_json.json 的路徑
+        cache_dir (Path): 快取資料夾，None 表示不使用快取
+        json_backend (str): JSON後端
+        cache_name (str): 快取檔案名稱，同一個快取資料夾中有多個合併資料時需各自指定
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+
+    Returns:
+        AppendData: 合併資料
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+        json.JSONDecodeError: 內容不是合法的JSON片段
+        ValueError: 有不是物件的formField
+    """
+    path = Path(path)
+    file_stat = path.stat()
+    signature = (str(path.resolve()), file_stat.st_size, file_stat.st_mtime_ns)
+    cache_path = Path(cache_dir) / cache_name if cache_dir is not None else None
+
+    if cache_path is not None:
+        cached = read_cache(cache_path, json_backend, signature=signature)
+        if cached is None:
+            # 修改時間改變但內容相同時仍使用快取，並更新標頭以便下次直接比對修改時間
+            digest = hash_file(path)
+            cached = read_cache(cache_path, json_backend, digest=digest)
+            if cached is not None:
+                write_cache(cache_path, cached[1], digest, signature, json_backend)
+        if cached is not None:
+            digest, fields = cached
+            return AppendData(fields, digest, path, cache_path, json_backend, intern_strings)
+    else:
+        digest = hash_file(path)
+
+    fields = decode_fragments(path.read_bytes().decode('utf-8'))
+    if cache_path is not None:
+        write_cache(cache_path, fields, digest, signature, json_backend)
+    return AppendData(fields, digest, path, cache_path, json_backend, intern_strings)
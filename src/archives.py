@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+封存檔輸入與輸出
+功能：直接讀取 zip、tar、tar.gz 中的JSON成員並逐一交給處理流程，處理結果可直接寫入輸出封存檔，
+不必先解壓縮到 add 資料夾、處理後再壓縮 out 資料夾；成員名稱與 out/<原始檔案名稱> 的配置相同
+"""
+
+import gzip
+import io
+import logging
+import tarfile
+import time
+import zipfile
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+from batch import iter_batch
+from logging_setup import file_logger
+from metrics import FileMetrics
+from output_formats import OutputFormat
+from output_writer import replace_if_changed, temp_path_for
+from sharding import Shard, shard_of
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+# 寫入封存檔的成員使用固定的修改時間（zip 可表示的最早時間），
+# 相同的輸入產生完全相同的封存檔，內容未變更時不改寫既有的封存檔
+_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_MEMBER_MTIME = 315532800  # 1980-01-01 00:00:00 UTC
+
+# 處理單個成員的函數：傳入 (成員名稱, 內容)，返回處理指標與輸出內容（失敗時為None）
+MemberTask = Callable[[Tuple[str, bytes]], Tuple[FileMetrics, Optional[bytes]]]
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    """
+    依副檔名判斷路徑是否為支援的封存檔
+
+    Args:
+        path (Path): 檔案路徑
+
+    Returns:
+        bool: 副檔名為 .zip、.tar、.tar.gz 或 .tgz 時返回True
+    """
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _safe_member_name(name: str) -> Optional[str]:
+    """
+    正規化成員名稱；絕對路徑或包含 .. 的名稱寫到輸出資料夾時會跑到資料夾外，返回None
+    """
+    path = PurePosixPath(name.replace("\\", "/"))
+    if path.is_absolute() or ".." in path.parts or not path.parts:
+        return None
+    return path.as_posix()
+
+
+def _wanted(name: str) -> bool:
+    """是否為要處理的JSON成員（略過 macOS 封存時附加的 __MACOSX 資料夾）"""
+    return name.lower().endswith(".json") and not name.startswith("__MACOSX/")
+
+
+def iter_inputs(source: Union[str, Path]) -> Iterator[Tuple[str, bytes]]:
+    """
+    依序讀取輸入資料夾或封存檔中的所有JSON檔案
+
+    資料夾依檔案名稱排序，只讀取第一層的 *.json；封存檔依成員在檔案中的順序，包含子資料夾中的成員。
+    tar 與 tar.gz 以串流方式讀取，不需要先讀完整個封存檔。
+
+    Args:
+        source (Path): 輸入資料夾或封存檔路徑
+
+    Yields:
+        tuple: (相對路徑, 檔案內容)
+    """
+    source = Path(source)
+    if not is_archive(source):
+        for path in sorted(source.glob("*.json")):
+            yield path.name, path.read_bytes()
+        return
+
+    if source.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _wanted(info.filename):
+                    continue
+                name = _safe_member_name(info.filename)
+                if name is None:
+                    logging.warning(f"略過路徑不安全的封存檔成員: {info.filename}")
+                    continue
+                yield name, archive.read(info)
+        return
+
+    with tarfile.open(source, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not _wanted(member.name):
+                continue
+            name = _safe_member_name(member.name)
+            if name is None:
+                logging.warning(f"略過路徑不安全的封存檔成員: {member.name}")
+                continue
+            yield name, archive.extractfile(member).read()
+
+
+def output_member_name(name: str, output_format: OutputFormat) -> str:
+    """
+    取得輸出檔案（或輸出封存檔成員）的相對路徑，與輸出到 out 資料夾時的檔案名稱相同
+
+    Args:
+        name (str): 輸入檔案的相對路徑
+        output_format (OutputFormat): 輸出格式
+
+    Returns:
+        str: 輸出的相對路徑，例如 範例.json.gz
+    """
+    path = PurePosixPath(name)
+    return (path.parent / output_format.output_name(path.name)).as_posix()
+
+
+class ArchiveWriter:
+    """
+    輸出封存檔
+
+    先寫入同一個資料夾中的暫存檔，關閉時內容與既有的封存檔相同則保留既有檔案，
+    否則以 os.replace 原子取代；處理中斷時不會留下寫到一半的封存檔。
+    """
+
+    def __init__(self, path: Union[str, Path], fsync: str = "none"):
+        """
+        建立暫存檔並開始寫入
+
+        Args:
+            path (Path): 輸出封存檔路徑，格式依副檔名決定
+            fsync (str): 同步寫入策略，見 options.FSYNC_POLICIES
+        """
+        self.path = Path(path)
+        self.fsync = fsync
+        self.temp_path = temp_path_for(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._raw = open(self.temp_path, 'wb')
+        self._gzip = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+
+        name = self.path.name.lower()
+        if name.endswith(".zip"):
+            self._zip = zipfile.ZipFile(self._raw, "w", compression=zipfile.ZIP_DEFLATED)
+        elif name.endswith((".tar.gz", ".tgz")):
+            # 固定 gzip 標頭中的時間與檔案名稱，相同內容產生相同的位元組
+            self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0, filename="", compresslevel=6)
+            self._tar = tarfile.open(fileobj=self._gzip, mode="w", format=tarfile.PAX_FORMAT)
+        else:
+            self._tar = tarfile.open(fileobj=self._raw, mode="w", format=tarfile.PAX_FORMAT)
+
+    def write(self, name: str, data: bytes, compress: bool = True):
+        """
+        加入一個成員
+
+        Args:
+            name (str): 成員名稱
+            data (bytes): 成員內容
+            compress (bool): zip 成員是否壓縮；內容已經是 gzip/xz 時不必再壓縮
+        """
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=_MEMBER_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+            return
+
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = _MEMBER_MTIME
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def _close_streams(self):
+        """依序關閉封存層、壓縮層與暫存檔"""
+        for stream in (self._zip, self._tar, self._gzip, self._raw):
+            if stream is not None:
+                stream.close()
+
+    def close(self) -> bool:
+        """
+        完成封存檔
+
+        Returns:
+            bool: 是否改寫了輸出封存檔；內容與既有檔案相同時返回False
+        """
+        self._close_streams()
+        return replace_if_changed(self.temp_path, self.path, self.fsync)
+
+    def abort(self):
+        """放棄寫入並刪除暫存檔，保留既有的封存檔"""
+        try:
+            self._close_streams()
+        finally:
+            self.temp_path.unlink(missing_ok=True)
+
+
+def _write_file(path: Path, output_format: OutputFormat, payload: bytes) -> bool:
+    """寫入輸出資料夾中的檔案（含子資料夾），返回是否改寫了檔案"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return output_format.write_bytes(payload, path)
+
+
+def save_payload(metrics: FileMetrics, payload: bytes, label: str, write: Callable[[bytes], Optional[bool]]):
+    """
+    寫入工作行程返回的輸出內容，並記錄寫入階段的耗時與結果
+
+    Args:
+        metrics (FileMetrics): 該檔案的處理指標
+        payload (bytes): 輸出內容
+        label (str): 日誌中顯示的輸出名稱
+        write (callable): 寫入函數，返回False表示內容未變更而保留既有檔案
+    """
+    start = time.perf_counter()
+    try:
+        metrics.written = write(payload) is not False
+    except Exception as e:
+        file_logger.error("寫入輸出時發生錯誤 %s: %s", label, e)
+        metrics.fail(e)
+        return
+    metrics.stages["write"] += time.perf_counter() - start
+    if metrics.written:
+        file_logger.info("已儲存處理後的檔案: %s", label)
+    else:
+        file_logger.info("內容未變更，保留既有檔案: %s", label)
+    metrics.ok = True
+    metrics.bytes_out = len(payload)
+
+
+def process_members(task: MemberTask, source: Union[str, Path], output: Union[str, Path],
+                    output_format: OutputFormat, jobs: int = 1,
+                    shard: Optional[Shard] = None) -> Tuple[List[FileMetrics], List[str]]:
+    """
+    以 task 處理輸入資料夾或封存檔中的每個JSON檔案，並將結果寫入輸出資料夾或輸出封存檔
+
+    成員內容逐一讀取並交給工作行程，同時在記憶體中的只有正在處理的少數成員；
+    輸出封存檔只能由一個行程寫入，工作行程返回輸出內容，由主行程依輸入順序寫入。
+
+    Args:
+        task (callable): 處理單個成員的函數，見 MemberTask
+        source (Path): 輸入資料夾或封存檔
+        output (Path): 輸出資料夾或封存檔
+        output_format (OutputFormat): 輸出格式，決定輸出名稱與同步寫入策略
+        jobs (int): 平行處理的工作行程數量
+        shard (Shard): 只處理屬於此分片的成員
+
+    Returns:
+        tuple: (每個成員的處理指標, 分片前所有輸入成員的名稱)
+    """
+    output = Path(output)
+    names: List[str] = []
+
+    def selected() -> Iterator[Tuple[str, bytes]]:
+        for name, content in iter_inputs(source):
+            names.append(name)
+            if shard is None or shard_of(name, shard.count) == shard.index:
+                yield name, content
+
+    writer = ArchiveWriter(output, output_format.fsync) if is_archive(output) else None
+    compress_members = output_format.compression == "none"
+    results: List[FileMetrics] = []
+
+    try:
+        for metrics, payload in iter_batch(task, selected(), jobs):
+            results.append(metrics)
+            if payload is None:
+                continue
+
+            member_name = output_member_name(metrics.name, output_format)
+            if writer is not None:
+                save_payload(metrics, payload, member_name,
+                             partial(writer.write, member_name, compress=compress_members))
+            else:
+                save_payload(metrics, payload, member_name,
+                             partial(_write_file, output / member_name, output_format))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if writer is not None:
+        if writer.close():
+            logging.info(f"已儲存輸出封存檔: {output}")
+        else:
+            logging.info(f"輸出封存檔內容未變更，保留既有檔案: {output}")
+    return results, names
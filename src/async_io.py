@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+非同步 I/O 處理流程
+功能：以 asyncio 與有界佇列重疊每個檔案的讀取、處理與寫入：讀取在處理之前預先進行，
+寫入在處理之後於背景完成，處理階段不必等待開啟與讀寫的延遲；已讀入但尚未寫完的位元組數
+不超過設定的上限。適用於 add、out 位於 NFS 等延遲較高的網路磁碟
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from archives import MemberTask, save_payload
+from batch import resolve_jobs
+from logging_setup import file_logger, worker_logging
+from metrics import FileMetrics
+from options import INFLIGHT_MB
+from output_formats import OutputFormat
+
+# 預設的在途位元組上限（已讀入、尚未寫完的輸入檔案大小總和）
+DEFAULT_INFLIGHT_BYTES = INFLIGHT_MB * 1024 * 1024
+
+# 讀取與寫入各自使用的執行緒數量，也就是同時等待中的 I/O 數量
+IO_THREADS = 8
+
+
+class ByteBudget:
+    """
+    在途位元組的上限
+
+    開始讀取前先依檔案大小預留位元組，預留後不超過上限時才開始讀取；
+    單一檔案大於上限時等到沒有其他在途的檔案才讀取，因此仍會處理，且使用量不超過該檔案的大小。
+    """
+
+    def __init__(self, limit: int):
+        """
+        初始化上限
+
+        Args:
+            limit (int): 在途位元組上限
+        """
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def reserve(self, size: int):
+        """
+        等待有足夠的空間後預留位元組
+
+        Args:
+            size (int): 要讀取的檔案大小
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used == 0 or self.used + size <= self.limit)
+            self.used += size
+
+    async def adjust(self, delta: int):
+        """讀取完成後以實際讀入的位元組修正預留的大小（讀取期間檔案大小可能改變）"""
+        if delta:
+            async with self._condition:
+                self.used += delta
+                self._condition.notify_all()
+
+    async def release(self, size: int):
+        """記錄已寫完的位元組，並喚醒等待中的讀取"""
+        async with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
+def _file_size(path: Path) -> int:
+    """讀取前預留的位元組數；無法取得大小時為 0，由讀取回報錯誤"""
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _read_file(path: Path) -> Tuple[bytes, float]:
+    """讀取檔案並返回內容與耗時"""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        content = f.read()
+    return content, time.perf_counter() - start
+
+
+def _write_file(output_path: Path, output_format: OutputFormat, metrics: FileMetrics, payload: bytes):
+    """寫入輸出檔案並記錄寫入階段的指標"""
+    save_payload(metrics, payload, str(output_path), lambda data: output_format.write_bytes(data, output_path))
+
+
+def process_files_async(task: MemberTask, paths: Sequence[Path], output_path: Callable[[str], Path],
+                        output_format: OutputFormat, jobs: int = 1,
+                        inflight_bytes: int = DEFAULT_INFLIGHT_BYTES,
+                        io_threads: int = IO_THREADS) -> List[FileMetrics]:
+    """
+    以非同步 I/O 處理流程處理檔案
+
+    讀取與寫入在各自的執行緒中進行，處理在工作行程（jobs 大於1時）或專用的執行緒中進行；
+    三個階段以有界佇列連接，讀取最多領先處理 io_threads * 2 個檔案，同時受在途位元組上限限制。
+
+    Args:
+        task (callable): 處理單個檔案內容的函數，見 archives.MemberTask
+        paths (list): 要處理的輸入檔案
+        output_path (callable): 由輸入檔案名稱取得輸出檔案路徑
+        output_format (OutputFormat): 輸出格式
+        jobs (int): 平行處理的工作行程數量
+        inflight_bytes (int): 在途位元組上限
+        io_threads (int): 讀取與寫入各自使用的執行緒數量
+
+    Returns:
+        list: 每個檔案的處理指標，依輸入順序排列
+    """
+    if not paths:
+        return []
+
+    jobs = min(resolve_jobs(jobs), len(paths))
+    with ExitStack() as stack:
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            worker_options = stack.enter_context(worker_logging())
+            cpu_pool: Executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs, **worker_options))
+        else:
+            # 處理在另一個執行緒中進行，事件迴圈才能在處理期間繼續發出讀取與寫入
+            cpu_pool = stack.enter_context(ThreadPoolExecutor(1, thread_name_prefix="formdetails-cpu"))
+        read_pool = stack.enter_context(ThreadPoolExecutor(io_threads, thread_name_prefix="formdetails-read"))
+        write_pool = stack.enter_context(ThreadPoolExecutor(io_threads, thread_name_prefix="formdetails-write"))
+
+        return asyncio.run(_run(task, paths, output_path, output_format, jobs, inflight_bytes, io_threads,
+                                (cpu_pool, read_pool, write_pool)))
+
+
+async def _run(task: MemberTask, paths: Sequence[Path], output_path: Callable[[str], Path],
+               output_format: OutputFormat, jobs: int, inflight_bytes: int, io_threads: int,
+               pools: Tuple[Executor, Executor, Executor]) -> List[FileMetrics]:
+    """process_files_async 的事件迴圈部分"""
+    loop = asyncio.get_running_loop()
+    cpu_pool, read_pool, write_pool = pools
+    budget = ByteBudget(inflight_bytes)
+    results: List[Optional[FileMetrics]] = [None] * len(paths)
+    # 依輸入順序排列的讀取工作；佇列大小限制預先讀取的檔案數量
+    reads: asyncio.Queue = asyncio.Queue(maxsize=io_threads * 2)
+    writes: asyncio.Queue = asyncio.Queue(maxsize=io_threads * 2)
+
+    async def read(path: Path, reserved: int) -> Tuple[bytes, float]:
+        try:
+            content, seconds = await loop.run_in_executor(read_pool, _read_file, path)
+        except BaseException:
+            await budget.release(reserved)
+            raise
+        await budget.adjust(len(content) - reserved)
+        return content, seconds
+
+    async def prefetch():
+        # 依輸入順序預留，後面的檔案不會佔用處理前面的檔案所需的空間
+        for index, path in enumerate(paths):
+            reserved = await loop.run_in_executor(read_pool, _file_size, path)
+            await budget.reserve(reserved)
+            await reads.put((index, path, loop.create_task(read(path, reserved))))
+        for _ in range(jobs):
+            await reads.put(None)
+
+    async def process():
+        while True:
+            item = await reads.get()
+            if item is None:
+                return
+            index, path, reading = item
+            try:
+                content, read_seconds = await reading
+            except Exception as e:
+                metrics = FileMetrics(path.name)
+                file_logger.error("處理檔案時發生錯誤 %s: %s", path.name, e)
+                metrics.fail(e)
+                results[index] = metrics
+                continue
+
+            metrics, payload = await loop.run_in_executor(cpu_pool, task, (path.name, content))
+            metrics.stages["read"] += read_seconds
+            results[index] = metrics
+            await writes.put((metrics, payload, len(content)))
+
+    async def write():
+        while True:
+            item = await writes.get()
+            if item is None:
+                return
+            metrics, payload, size = item
+            if payload is not None:
+                await loop.run_in_executor(write_pool, _write_file, output_path(metrics.name),
+                                           output_format, metrics, payload)
+            await budget.release(size)
+
+    writers = [loop.create_task(write()) for _ in range(io_threads)]
+    await asyncio.gather(prefetch(), *(process() for _ in range(jobs)))
+    for _ in writers:
+        await writes.put(None)
+    await asyncio.gather(*writers)
+    return results
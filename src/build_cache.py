@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+增量建置快取
+功能：在輸出資料夾中記錄每個輸入檔案的內容雜湊，略過輸入與設定皆未變更且輸出仍存在的檔案
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+MANIFEST_NAME = ".formdetails-cache"
+
+# 工具版本，與 pyproject.toml 的版本一致
+TOOL_VERSION = "1.0.0"
+
+# 輸出結構版本，C#類別結構或輸出格式變更時遞增，使既有快取全部失效
+SCHEMA_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """
+    計算檔案內容的SHA-256雜湊
+
+    Args:
+        path (Path): 檔案路徑
+
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_fingerprint(mode: str, **options: Any) -> str:
+    """
+    計算處理設定的指紋，任何影響輸出的設定變更都會使快取失效
+
+    Args:
+        mode (str): 處理模式（merge / optimize / all）
+        **options: 其他影響輸出的設定，例如合併資料的雜湊
+
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    settings = {
+        "tool": TOOL_VERSION,
+        "schema": SCHEMA_VERSION,
+        "mode": mode,
+        "options": options,
+    }
+    encoded = json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class BuildCache:
+    """輸出資料夾的增量建置快取"""
+
+    def __init__(self, output_dir: Path, fingerprint: str, force: bool = False,
+                 manifest_name: str = MANIFEST_NAME):
+        """
+        初始化快取
+
+        Args:
+            output_dir (Path): 輸出資料夾路徑
+            fingerprint (str): 目前處理設定的指紋
+            force (bool): 是否忽略快取，強制重新處理所有檔案
+            manifest_name (str): 快取清單的檔案名稱，分片處理時各分片使用各自的清單
+        """
+        self.manifest_path = Path(output_dir) / manifest_name
+        self.fingerprint = fingerprint
+        self.force = force
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[str, Dict[str, Any]] = self._load_entries()
+
+    def _load_entries(self) -> Dict[str, Dict[str, Any]]:
+        """載入快取清單，格式不符或損毀時視為空快取"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"無法讀取快取清單 {self.manifest_path}，將重新處理所有檔案: {e}")
+            return {}
+
+        if not isinstance(manifest, dict) or manifest.get("schema") != SCHEMA_VERSION:
+            return {}
+
+        entries = manifest.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def _lookup(self, input_path: Path, output_path: Path) -> bool:
+        """檢查快取項目是否仍然有效"""
+        entry = self.entries.get(input_path.name)
+        if entry is None or entry.get("fingerprint") != self.fingerprint:
+            return False
+
+        # 輸出檔案被刪除或被其他命令覆寫時需要重新處理
+        try:
+            output_stat = output_path.stat()
+        except FileNotFoundError:
+            return False
+        if (output_stat.st_size, output_stat.st_mtime_ns) != (entry.get("output_size"), entry.get("output_mtime_ns")):
+            return False
+
+        # 大小與修改時間相同時不需要重新計算雜湊
+        input_stat = input_path.stat()
+        if (input_stat.st_size, input_stat.st_mtime_ns) == (entry.get("input_size"), entry.get("input_mtime_ns")):
+            return True
+
+        if hash_file(input_path) != entry.get("input_hash"):
+            return False
+
+        entry["input_size"] = input_stat.st_size
+        entry["input_mtime_ns"] = input_stat.st_mtime_ns
+        return True
+
+    def is_fresh(self, input_path: Path, output_path: Path) -> bool:
+        """
+        檢查輸入檔案是否可以略過處理，並更新命中/未命中計數
+
+        Args:
+            input_path (Path): 輸入檔案路徑
+            output_path (Path): 對應的輸出檔案路徑
+
+        Returns:
+            bool: 輸入與設定皆未變更且輸出仍存在時返回True
+        """
+        fresh = not self.force and self._lookup(input_path, output_path)
+
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return fresh
+
+    def record(self, input_path: Path, output_path: Path):
+        """
+        記錄成功處理的檔案
+
+        Args:
+            input_path (Path): 輸入檔案路徑
+            output_path (Path): 對應的輸出檔案路徑
+        """
+        input_stat = input_path.stat()
+        output_stat = output_path.stat()
+
+        self.entries[input_path.name] = {
+            "input_hash": hash_file(input_path),
+            "input_size": input_stat.st_size,
+            "input_mtime_ns": input_stat.st_mtime_ns,
+            "fingerprint": self.fingerprint,
+            "output_size": output_stat.st_size,
+            "output_mtime_ns": output_stat.st_mtime_ns,
+        }
+
+    def discard(self, input_path: Path):
+        """移除處理失敗的檔案，使下次執行時重新處理"""
+        self.entries.pop(input_path.name, None)
+
+    def prune(self, input_names: Iterable[str]):
+        """移除已不存在的輸入檔案的快取項目"""
+        keep = set(input_names)
+        self.entries = {name: entry for name, entry in self.entries.items() if name in keep}
+
+    def select_stale(self, input_paths: Sequence[Path], output_path: Callable[[str], Path],
+                     selected: Optional[Sequence[Path]] = None) -> List[Path]:
+        """
+        篩選需要重新處理的輸入檔案，並移除已不存在的輸入檔案的快取項目
+
+        Args:
+            input_paths (list): 所有輸入檔案路徑
+            output_path (callable): 由輸入檔案名稱取得輸出檔案路徑
+            selected (list): 只檢查這些輸入檔案（例如 --where 篩選出的檔案），
+                其他仍存在的輸入檔案保留快取項目；None 表示檢查所有輸入檔案
+
+        Returns:
+            list: 需要重新處理的輸入檔案（保持原順序）
+        """
+        self.prune(path.name for path in input_paths)
+        if selected is None:
+            selected = input_paths
+        return [path for path in selected if not self.is_fresh(path, output_path(path.name))]
+
+    def update(self, input_paths: Sequence[Path], results: Sequence[bool],
+               output_path: Callable[[str], Path]):
+        """
+        依處理結果更新並儲存快取清單
+
+        Args:
+            input_paths (list): 已處理的輸入檔案路徑
+            results (list): 每個檔案是否成功處理
+            output_path (callable): 由輸入檔案名稱取得輸出檔案路徑
+        """
+        for path, ok in zip(input_paths, results):
+            if ok:
+                self.record(path, output_path(path.name))
+            else:
+                self.discard(path)
+
+        self.save()
+
+    def save(self):
+        """以原子方式寫回快取清單"""
+        manifest = {"schema": SCHEMA_VERSION, "entries": self.entries}
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            logging.error(f"儲存快取清單時發生錯誤 {self.manifest_path}: {e}")
+
+    def summary(self) -> str:
+        """返回命中/未命中的摘要文字"""
+        return f"快取命中 {self.hits} 個，未命中 {self.misses} 個"
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+契約檢查
+功能：只讀取輸入檔案，依C#類別結構描述（formdetail_schema.json）檢查資料是否已經符合
+FormDetail / Form / FormField 的契約：類型、必填的鍵、會被移除的空值欄位，以及會被移入
+extensionData 或移除的未宣告的鍵；不轉換、不序列化，也不產生任何輸出檔案
+"""
+
+import json
+import logging
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from archives import iter_inputs
+from batch import iter_batch
+from json_codec import get_codec
+from logging_setup import file_logger
+from schema import FORM_DETAIL, ContractSchema, FieldSpec
+
+# 違反契約的種類：
+# - parse: 無法解析為JSON
+# - error: 解析或檢查時發生其他錯誤，例如巢狀過深
+# - type: 值的類型與宣告不符；必填欄位的 null 在優化時原樣保留，不列為違反契約
+# - missing: 缺少必填或陣列欄位，優化時會補上預設值
+# - empty: 選填欄位的值為空，優化時會移除
+# - extension: 擴展資料的鍵位於物件本身，優化時會移入擴展資料
+# - unknown: 未宣告的鍵，優化時會移除
+VIOLATION_CODES = ("parse", "error", "type", "missing", "empty", "extension", "unknown")
+
+# 結構描述的類型名稱對應的Python類型；bool 是 int 的子類別，需另外排除
+_PYTHON_TYPES = {
+    "string": (str,),
+    "boolean": (bool,),
+    "integer": (int,),
+    "number": (int, float),
+    "object": (dict,),
+    "array": (list,),
+}
+
+_JSON_TYPE_NAMES = {str: "string", bool: "boolean", int: "integer", float: "number",
+                    dict: "object", list: "array", type(None): "null"}
+
+
+def json_type_name(value: Any) -> str:
+    """JSON值的類型名稱，與結構描述的類型名稱相同"""
+    return _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def matches_type(field_type: str, value: Any) -> bool:
+    """
+    值是否符合結構描述宣告的類型
+
+    Args:
+        field_type (str): 結構描述的類型名稱，見 schema.FIELD_TYPES
+        value: JSON值
+
+    Returns:
+        bool: 符合時返回True；any 接受任何值，其他類型不接受 null
+    """
+    if field_type == "any":
+        return True
+    if type(value) is bool:
+        return field_type == "boolean"
+    return isinstance(value, _PYTHON_TYPES[field_type])
+
+
+class Violation:
+    """一筆違反契約的紀錄"""
+
+    __slots__ = ("path", "code", "message")
+
+    def __init__(self, path: str, code: str, message: str):
+        """
+        Args:
+            path (str): 違反契約的位置，例如 forms[0].formFields[2].sort
+            code (str): 種類，見 VIOLATION_CODES
+            message (str): 說明
+        """
+        self.path = path
+        self.code = code
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"Violation({self.path!r}, {self.code!r})"
+
+    def __str__(self) -> str:
+        return f"{self.path or '(根物件)'}: {self.message}"
+
+    def to_dict(self) -> Dict[str, str]:
+        """轉換為可序列化的字典"""
+        return {"path": self.path, "code": self.code, "message": self.message}
+
+
+class _FirstViolation(Exception):
+    """只需要第一筆違反契約的紀錄時，用來立即結束檢查"""
+
+
+class ContractChecker:
+    """依契約描述檢查解析後的資料，規則與 schema.Projector 的投影方式一致"""
+
+    def __init__(self, schema: ContractSchema):
+        """
+        初始化檢查器
+
+        Args:
+            schema (ContractSchema): 契約描述
+        """
+        self.schema = schema
+        # 每個類型宣告的欄位名稱與擴展資料的鍵（已宣告的欄位不會被當作擴展資料）
+        self._declared = {name: frozenset(spec.field_names) for name, spec in schema.types.items()}
+        self._extension_keys = {
+            name: frozenset(spec.extension_keys) - self._declared[name] for name, spec in schema.types.items()
+        }
+
+    def check(self, data: Any, all_violations: bool = False, type_name: str = FORM_DETAIL) -> List[Violation]:
+        """
+        檢查資料是否符合契約
+
+        Args:
+            data: 解析後的JSON資料
+            all_violations (bool): 是否列出所有違反契約的紀錄；False 時找到第一筆即停止
+            type_name (str): 根物件的類型名稱
+
+        Returns:
+            list: 違反契約的紀錄，為空時表示資料已符合契約
+        """
+        violations: List[Violation] = []
+        try:
+            self._check_object(type_name, data, "", violations, all_violations)
+        except _FirstViolation:
+            pass
+        return violations
+
+    @staticmethod
+    def _add(violations: List[Violation], all_violations: bool, path: str, code: str, message: str):
+        """加入一筆紀錄，只需要第一筆時立即結束檢查"""
+        violations.append(Violation(path, code, message))
+        if not all_violations:
+            raise _FirstViolation
+
+    def _check_object(self, type_name: str, data: Any, path: str,
+                      violations: List[Violation], all_violations: bool):
+        """檢查一個物件及其巢狀的物件"""
+        add = partial(self._add, violations, all_violations)
+        if type(data) is not dict:
+            add(path, "type", f"應為 {type_name} 物件，實際為 {json_type_name(data)}")
+            return
+
+        spec = self.schema.types[type_name]
+        prefix = f"{path}." if path else ""
+        for field in spec.fields:
+            field_path = prefix + field.name
+            if field.name not in data:
+                if field.kind != "optional":
+                    add(field_path, "missing", f"缺少{'必填' if field.kind == 'required' else '陣列'}欄位，"
+                                               f"優化時會補上 {_default(field)}")
+                continue
+
+            value = data[field.name]
+            if field.kind == "optional" and (value is None if field.drop == "null" else not value):
+                add(field_path, "empty", f"值為空（{json.dumps(value, ensure_ascii=False)}），優化時會移除")
+            elif field.kind == "required" and value is None:
+                # 優化時必填欄位的 null 原樣保留（對應C#可為 null 的屬性），視為符合契約
+                continue
+            elif field.kind == "list" and type(value) is not list:
+                add(field_path, "type", f"應為 array，實際為 {json_type_name(value)}")
+            elif field.kind != "list" and not matches_type(field.type, value):
+                add(field_path, "type", f"應為 {field.type}，實際為 {json_type_name(value)}")
+            elif field.kind == "list" and field.item:
+                for index, item in enumerate(value):
+                    self._check_object(field.item, item, f"{field_path}[{index}]", violations, all_violations)
+
+        declared = self._declared[type_name]
+        extension_keys = self._extension_keys[type_name]
+        for key in data:
+            if key in declared:
+                continue
+            if key in extension_keys and data[key] is None:
+                add(prefix + key, "empty", "值為空（null），優化時會移除")
+            elif key in extension_keys:
+                add(prefix + key, "extension", f"應位於 {spec.extension_name}，優化時會移入")
+            elif key == spec.extension_name and extension_keys:
+                self._check_extension(spec.extension_name, data[key], extension_keys, prefix + key, add)
+            else:
+                add(prefix + key, "unknown", "契約中未宣告的鍵，優化時會移除")
+
+    @staticmethod
+    def _check_extension(name: str, value: Any, keys: frozenset, path: str, add):
+        """檢查已經存在的擴展資料"""
+        if type(value) is not dict:
+            add(path, "type", f"應為 object，實際為 {json_type_name(value)}")
+            return
+        for key in value:
+            if key not in keys:
+                add(f"{path}.{key}", "unknown", f"{name} 中未宣告的鍵")
+
+
+def _default(field: FieldSpec) -> str:
+    """優化時補上的預設值"""
+    if field.kind == "list":
+        return "[]"
+    return json.dumps(field.default, ensure_ascii=False)
+
+
+@lru_cache(maxsize=None)
+def get_checker(schema_path: Optional[str] = None) -> ContractChecker:
+    """
+    取得檢查器，每個行程的每個結構描述檔只建立一次
+
+    Args:
+        schema_path (str): 結構描述檔路徑，預設為 formdetail_schema.json
+
+    Returns:
+        ContractChecker: 檢查器
+    """
+    return ContractChecker(ContractSchema.load(schema_path))
+
+
+def check_member(member: Tuple[str, bytes], schema_path: Optional[str] = None, json_backend: str = "auto",
+                 all_violations: bool = False) -> Tuple[str, List[Violation]]:
+    """
+    檢查單個檔案，可在工作行程中執行
+
+    Args:
+        member (tuple): (檔案名稱, 內容)
+        schema_path (str): 結構描述檔路徑
+        json_backend (str): JSON後端
+        all_violations (bool): 是否列出所有違反契約的紀錄
+
+    Returns:
+        tuple: (檔案名稱, 違反契約的紀錄)
+    """
+    name, content = member
+    checker = get_checker(schema_path)
+    try:
+        try:
+            data = get_codec(json_backend).loads(content)
+        except ValueError as e:
+            return name, [Violation("", "parse", f"無法解析JSON: {e}")]
+        return name, checker.check(data, all_violations)
+    except Exception as e:
+        # 例如巢狀過深的JSON造成 RecursionError，記錄為不符合的檔案，不中斷其他檔案
+        file_logger.error("檢查檔案時發生錯誤 %s: %s", name, e)
+        return name, [Violation("", "error", f"檢查時發生錯誤: {e}")]
+
+
+def check_inputs(source: Union[str, Path], schema_path: Optional[str] = None, json_backend: str = "auto",
+                 all_violations: bool = False, jobs: int = 1) -> Dict[str, Any]:
+    """
+    檢查輸入資料夾或封存檔中的所有JSON檔案
+
+    Args:
+        source (Path): 輸入資料夾或封存檔
+        schema_path (str): 結構描述檔路徑
+        json_backend (str): JSON後端
+        all_violations (bool): 是否列出每個檔案所有違反契約的紀錄
+        jobs (int): 平行處理的工作行程數量
+
+    Returns:
+        dict: 檢查報告 {"files": [{"name", "ok", "violations"}], "totals": {"files", "valid", "invalid", "violations"}}
+    """
+    task = partial(check_member, schema_path=schema_path, json_backend=json_backend,
+                   all_violations=all_violations)
+    files = []
+    for name, violations in iter_batch(task, iter_inputs(source), jobs):
+        files.append({"name": name, "ok": not violations, "violations": [v.to_dict() for v in violations]})
+
+    invalid = sum(1 for item in files if not item["ok"])
+    return {
+        "all_violations": all_violations,
+        "files": files,
+        "totals": {
+            "files": len(files),
+            "valid": len(files) - invalid,
+            "invalid": invalid,
+            "violations": sum(len(item["violations"]) for item in files),
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """
+    輸出檢查結果
+
+    Args:
+        report (dict): check_inputs 的結果
+    """
+    for item in report["files"]:
+        for violation in item["violations"]:
+            path = violation["path"] or "(根物件)"
+            print(f"{item['name']}: {path}: {violation['message']} [{violation['code']}]")
+
+    totals = report["totals"]
+    print(f"檢查 {totals['files']} 個檔案：{totals['valid']} 個符合契約、{totals['invalid']} 個不符合")
+    if totals["invalid"] and not report["all_violations"]:
+        print("每個檔案只列出第一筆違反契約的紀錄，使用 --all-violations 列出全部")
+
+
+def main(input_dir: str = "add", schema_path: Optional[str] = None, json_backend: str = "auto",
+         all_violations: bool = False, jobs: int = 1, report_out: Optional[str] = None) -> int:
+    """
+    主函數 - 檢查輸入檔案是否符合C#類別契約
+
+    Args:
+        input_dir (str): 輸入資料夾或封存檔路徑
+        schema_path (str): C#類別結構描述檔路徑
+        json_backend (str): JSON後端
+        all_violations (bool): 是否列出每個檔案所有違反契約的紀錄
+        jobs (int): 平行處理的工作行程數量
+        report_out (str): 檢查報告JSON的輸出路徑
+
+    Returns:
+        int: 所有檔案都符合契約時為 0，否則為 1
+    """
+    if not Path(input_dir).exists():
+        logging.error(f"輸入資料夾不存在: {input_dir}")
+        return 1
+
+    report = check_inputs(input_dir, schema_path, json_backend, all_violations, jobs)
+    if not report["files"]:
+        logging.warning(f"在 {input_dir} 中沒有找到JSON檔案")
+    print_report(report)
+
+    if report_out:
+        Path(report_out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    return 1 if report["totals"]["invalid"] else 0
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+欄位索引
+功能：以本機 SQLite 檔案記錄每個輸入檔案中的 formId 與 formFieldId / fieldType / sort / specialFieldCode，
+在 merge / optimize 處理時順便更新，只重新索引內容變更的檔案；可依欄位條件查詢，
+或以 --where 只處理包含符合條件欄位的檔案
+"""
+
+import hashlib
+import logging
+import sqlite3
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from batch import iter_batch
+from build_cache import hash_file
+from json_codec import get_codec
+from metrics import FieldRow, FileMetrics, form_rows
+
+# 索引資料庫的結構版本，資料表變更時遞增，既有的索引會重新建立
+INDEX_VERSION = 1
+
+# --where 可使用的鍵與對應的資料行
+WHERE_KEYS = {
+    "formId": "form_id",
+    "formFieldId": "form_field_id",
+    "fieldType": "field_type",
+    "sort": "sort",
+    "specialFieldCode": "special_field_code",
+}
+
+# 查詢條件：(資料行, 值)；值包含 * 或 ? 時以萬用字元比對
+Condition = Tuple[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (source, name)
+);
+CREATE TABLE IF NOT EXISTS fields (
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    form_index INTEGER NOT NULL,
+    form_id,
+    form_field_id,
+    field_type,
+    sort,
+    special_field_code
+);
+CREATE INDEX IF NOT EXISTS fields_by_file ON fields (source, name);
+CREATE INDEX IF NOT EXISTS fields_by_form_id ON fields (form_id);
+CREATE INDEX IF NOT EXISTS fields_by_form_field_id ON fields (form_field_id);
+CREATE INDEX IF NOT EXISTS fields_by_field_type ON fields (field_type);
+CREATE INDEX IF NOT EXISTS fields_by_special_field_code ON fields (special_field_code);
+"""
+
+_COLUMNS = ("form_index", "form_id", "form_field_id", "field_type", "sort", "special_field_code")
+
+
+def parse_where(expression: str) -> Condition:
+    """
+    解析 --where 條件
+
+    Args:
+        expression (str): KEY=VALUE，KEY 見 WHERE_KEYS；sort 的值為整數
+
+    Returns:
+        tuple: (資料行, 值)
+
+    Raises:
+        ValueError: 格式錯誤或不支援的鍵
+    """
+    key, separator, value = expression.partition("=")
+    key = key.strip()
+    if not separator or key not in WHERE_KEYS:
+        raise ValueError(f"--where 的格式為 KEY=VALUE，KEY 為 {' / '.join(WHERE_KEYS)}: {expression}")
+    if key == "sort":
+        try:
+            return WHERE_KEYS[key], int(value)
+        except ValueError:
+            raise ValueError(f"sort 的值必須是整數: {value}") from None
+    return WHERE_KEYS[key], value
+
+
+def scan_file(path: Path, json_backend: str = "auto") -> Tuple[str, Optional[List[FieldRow]], Tuple[int, int, str]]:
+    """
+    讀取單個輸入檔案並取得索引資料列，可在工作行程中執行
+
+    Args:
+        path (Path): 輸入檔案路徑
+        json_backend (str): JSON後端
+
+    Returns:
+        tuple: (檔案名稱, 索引資料列，無法解析時為None, (大小, 修改時間, 內容雜湊))
+    """
+    stat = path.stat()
+    content = path.read_bytes()
+    signature = (stat.st_size, stat.st_mtime_ns, hashlib.sha256(content).hexdigest())
+    try:
+        data = get_codec(json_backend).loads(content)
+    except ValueError:
+        return path.name, None, signature
+
+    forms = data.get("forms") if isinstance(data, dict) else None
+    rows: List[FieldRow] = []
+    for form_index, form in enumerate(forms if isinstance(forms, list) else []):
+        rows.extend(form_rows(form_index, form))
+    return path.name, rows, signature
+
+
+class FieldIndex:
+    """儲存在本機 SQLite 檔案的欄位索引，以輸入資料夾的絕對路徑區分不同的輸入"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        開啟或建立索引
+
+        Args:
+            path (Path): SQLite 檔案路徑
+        """
+        self.path = Path(path)
+        # 分片在不同行程中同時更新同一個索引時等待寫入鎖
+        self._db = sqlite3.connect(str(self.path), timeout=60)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS fields;")
+            self._db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        """關閉資料庫連線"""
+        self._db.close()
+
+    def __enter__(self) -> "FieldIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def source_key(input_dir: Union[str, Path]) -> str:
+        """輸入資料夾在索引中的鍵"""
+        return str(Path(input_dir).resolve())
+
+    def _signatures(self, source: str) -> Dict[str, Tuple[int, int, str]]:
+        rows = self._db.execute("SELECT name, size, mtime_ns, hash FROM files WHERE source = ?", (source,))
+        return {name: (size, mtime_ns, digest) for name, size, mtime_ns, digest in rows}
+
+    def _store(self, source: str, name: str, rows: List[FieldRow], signature: Tuple[int, int, str]):
+        self._db.execute("DELETE FROM fields WHERE source = ? AND name = ?", (source, name))
+        self._db.executemany(
+            f"INSERT INTO fields (source, name, {', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(source, name, *row) for row in rows])
+        self._db.execute("INSERT OR REPLACE INTO files (source, name, size, mtime_ns, hash) VALUES (?, ?, ?, ?, ?)",
+                         (source, name, *signature))
+
+    def _discard(self, source: str, name: str):
+        self._db.execute("DELETE FROM fields WHERE source = ? AND name = ?", (source, name))
+        self._db.execute("DELETE FROM files WHERE source = ? AND name = ?", (source, name))
+
+    def stale(self, input_dir: Union[str, Path], paths: Sequence[Path]) -> List[Path]:
+        """
+        篩選索引內容已過期的輸入檔案
+
+        大小與修改時間相同時視為未變更；不同時比較內容雜湊，內容相同只更新記錄的大小與修改時間。
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            paths (list): 輸入檔案路徑
+
+        Returns:
+            list: 尚未索引或內容已變更的檔案（保持原順序）
+        """
+        source = self.source_key(input_dir)
+        signatures = self._signatures(source)
+        stale = []
+        for path in paths:
+            signature = signatures.get(path.name)
+            stat = path.stat()
+            if signature is not None and signature[:2] == (stat.st_size, stat.st_mtime_ns):
+                continue
+            if signature is not None and hash_file(path) == signature[2]:
+                self._db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE source = ? AND name = ?",
+                                 (stat.st_size, stat.st_mtime_ns, source, path.name))
+                continue
+            stale.append(path)
+        self._db.commit()
+        return stale
+
+    def prune(self, input_dir: Union[str, Path], names: Iterable[str]):
+        """
+        移除已不存在的輸入檔案
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            names (iterable): 目前所有輸入檔案的名稱
+        """
+        source = self.source_key(input_dir)
+        removed = set(self._signatures(source)) - set(names)
+        for name in removed:
+            self._discard(source, name)
+        self._db.commit()
+
+    def refresh(self, input_dir: Union[str, Path], paths: Sequence[Path], json_backend: str = "auto",
+                jobs: int = 1) -> int:
+        """
+        重新索引內容已變更的輸入檔案
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            paths (list): 輸入檔案路徑
+            json_backend (str): JSON後端
+            jobs (int): 平行處理的工作行程數量
+
+        Returns:
+            int: 重新索引的檔案數量
+        """
+        source = self.source_key(input_dir)
+        stale = self.stale(input_dir, paths)
+        for name, rows, signature in iter_batch(partial(scan_file, json_backend=json_backend), stale, jobs):
+            if rows is None:
+                logging.warning(f"無法解析 {name}，不列入欄位索引")
+                self._discard(source, name)
+            else:
+                self._store(source, name, rows, signature)
+        self._db.commit()
+        return len(stale)
+
+    def record(self, input_dir: Union[str, Path], paths: Sequence[Path], results: Sequence[FileMetrics]):
+        """
+        以處理時收集的資料列更新已處理的檔案，處理失敗的檔案移出索引
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            paths (list): 已處理的輸入檔案路徑
+            results (list): 每個檔案的處理指標，見 FileMetrics.field_rows
+        """
+        source = self.source_key(input_dir)
+        for path, metrics in zip(paths, results):
+            if metrics.ok and metrics.field_rows is not None:
+                stat = path.stat()
+                self._store(source, path.name, metrics.field_rows,
+                            (stat.st_size, stat.st_mtime_ns, hash_file(path)))
+            else:
+                self._discard(source, path.name)
+        self._db.commit()
+
+    def query(self, input_dir: Union[str, Path], conditions: Sequence[Condition]) -> List[Dict[str, Any]]:
+        """
+        查詢符合所有條件的欄位
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            conditions (list): parse_where 的結果，同一個欄位須符合所有條件
+
+        Returns:
+            list: 每個符合的欄位 {"file", "formId", "formFieldId", "fieldType", "sort", "specialFieldCode"}，
+                依檔案名稱與出現順序排列
+        """
+        clauses = ["source = ?"]
+        params: List[Any] = [self.source_key(input_dir)]
+        for column, value in conditions:
+            wildcard = isinstance(value, str) and ("*" in value or "?" in value)
+            clauses.append(f"{column} {'GLOB' if wildcard else '='} ?")
+            params.append(value)
+
+        rows = self._db.execute(
+            f"SELECT name, form_id, form_field_id, field_type, sort, special_field_code FROM fields "
+            f"WHERE {' AND '.join(clauses)} ORDER BY name, rowid", params)
+        keys = ("file", "formId", "formFieldId", "fieldType", "sort", "specialFieldCode")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def select(self, input_dir: Union[str, Path], paths: Sequence[Path],
+               conditions: Sequence[Condition]) -> List[Path]:
+        """
+        篩選包含符合條件欄位的輸入檔案，呼叫前應先以 refresh 更新索引
+
+        Args:
+            input_dir (Path): 輸入資料夾
+            paths (list): 輸入檔案路徑
+            conditions (list): parse_where 的結果
+
+        Returns:
+            list: 符合條件的檔案（保持原順序）
+        """
+        names = {row["file"] for row in self.query(input_dir, conditions)}
+        return [path for path in paths if path.name in names]
+
+    def stats(self, input_dir: Union[str, Path]) -> Dict[str, int]:
+        """
+        返回輸入資料夾的索引統計
+
+        Args:
+            input_dir (Path): 輸入資料夾
+
+        Returns:
+            dict: {"files", "forms", "fields"}
+        """
+        source = self.source_key(input_dir)
+        files = self._db.execute("SELECT COUNT(*) FROM files WHERE source = ?", (source,)).fetchone()[0]
+        forms, fields = self._db.execute(
+            "SELECT COUNT(DISTINCT name || ':' || form_index), COUNT(form_field_id) FROM fields WHERE source = ?",
+            (source,)).fetchone()
+        return {"files": files, "forms": forms, "fields": fields}
+
+
+def open_index(index_path: Optional[str] = None) -> FieldIndex:
+    """
+    開啟欄位索引
+
+    Args:
+        index_path (str): 索引檔路徑，None 表示使用預設的 options.INDEX_FILE
+
+    Returns:
+        FieldIndex: 欄位索引
+    """
+    from options import INDEX_FILE
+
+    return FieldIndex(index_path or INDEX_FILE)
+
+
+def select_inputs(index: FieldIndex, input_dir: Union[str, Path], paths: Sequence[Path], where: Sequence[str],
+                  json_backend: str = "auto", jobs: int = 1) -> List[Path]:
+    """
+    先重新索引內容已變更的檔案，再篩選包含符合 --where 條件欄位的輸入檔案
+
+    Args:
+        index (FieldIndex): 欄位索引
+        input_dir (Path): 輸入資料夾
+        paths (list): 輸入檔案路徑
+        where (list): KEY=VALUE 條件，見 parse_where
+        json_backend (str): JSON後端
+        jobs (int): 平行處理的工作行程數量
+
+    Returns:
+        list: 符合條件的檔案（保持原順序）
+    """
+    refreshed = index.refresh(input_dir, paths, json_backend, jobs)
+    selected = index.select(input_dir, paths, [parse_where(expression) for expression in where])
+    logging.info(f"--where {' 且 '.join(where)}：{len(selected)}/{len(paths)} 個檔案符合條件"
+                 f"（重新索引 {refreshed} 個檔案）")
+    return selected
+
+
+def print_query(rows: List[Dict[str, Any]]):
+    """
+    輸出查詢結果
+
+    Args:
+        rows (list): FieldIndex.query 的結果
+    """
+    for row in rows:
+        print("\t".join("" if row[key] is None else str(row[key]) for key in row))
+
+    files = {row["file"] for row in rows}
+    forms = {(row["file"], row["formId"]) for row in rows}
+    fields = sum(1 for row in rows if row["formFieldId"] is not None)
+    print(f"符合條件：{len(files)} 個檔案、{len(forms)} 個表單、{fields} 個欄位")
+
+
+def main(command: str = "query", input_dir: str = "add", index_path: Optional[str] = None,
+         where: Optional[Sequence[str]] = None, json_backend: str = "auto", jobs: int = 1) -> int:
+    """
+    主函數 - 更新或查詢欄位索引
+
+    Args:
+        command (str): index 只更新索引；query 更新索引後查詢符合條件的欄位
+        input_dir (str): 輸入資料夾路徑
+        index_path (str): 索引檔路徑，預設為 options.INDEX_FILE
+        where (list): KEY=VALUE 查詢條件，見 parse_where
+        json_backend (str): JSON後端
+        jobs (int): 平行處理的工作行程數量
+
+    Returns:
+        int: query 找到符合的欄位或 index 成功時為 0，否則為 1
+    """
+    input_path = Path(input_dir)
+    if not input_path.is_dir():
+        logging.error(f"輸入資料夾不存在: {input_dir}")
+        return 1
+
+    with open_index(index_path) as index:
+        json_files = sorted(input_path.glob("*.json"))
+        index.prune(input_path, [path.name for path in json_files])
+        refreshed = index.refresh(input_path, json_files, json_backend, jobs)
+        logging.info(f"欄位索引 {index.path}：重新索引 {refreshed} 個檔案")
+
+        if command == "index":
+            stats = index.stats(input_path)
+            print(f"已索引 {stats['files']} 個檔案、{stats['forms']} 個表單、{stats['fields']} 個欄位")
+            return 0
+
+        rows = index.query(input_path, [parse_where(expression) for expression in where or []])
+    print_query(rows)
+    return 0 if rows else 1
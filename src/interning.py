@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+字串共用（interning）
+功能：解析後以有上限的共用表替換重複的鍵與短字串值，同一行程中所有檔案與合併資料的
+formFieldId、fieldType、colSpan 等鍵及 dxTextBox 等常見值共用同一個字串物件，
+在記憶體中保留大量表單或在工作行程中常駐的資料因此明顯變小
+"""
+
+import sys
+from typing import Any, Dict, Tuple
+
+# 共用表最多保存的字串數量，達到上限後不再加入新字串，已有的字串仍會共用
+MAX_ENTRIES = 65536
+
+# 超過此長度的字串值多半是名稱、說明或 GUID 等不重複的內容，不加入共用表；鍵不受此限制
+MAX_VALUE_LENGTH = 32
+
+
+class InternTable:
+    """
+    有上限的字串共用表
+
+    每個行程使用一份（見 get_intern_table），處理過的檔案越多，可共用的字串越多。
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_value_length: int = MAX_VALUE_LENGTH):
+        """
+        初始化共用表
+
+        Args:
+            max_entries (int): 最多保存的字串數量
+            max_value_length (int): 加入共用表的字串值的最大長度
+        """
+        self.max_entries = max_entries
+        self.max_value_length = max_value_length
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def clear(self):
+        """清除所有共用的字串"""
+        self._strings.clear()
+
+    def intern(self, data: Any) -> Tuple[Any, int]:
+        """
+        以共用的字串物件替換資料中所有的鍵與短字串值
+
+        物件會重建為鍵相同、順序相同的新字典，陣列就地替換元素。
+
+        Args:
+            data: 解析後的JSON資料
+
+        Returns:
+            tuple: (替換後的資料, 估計節省的位元組數)；節省量為被替換、不再被參照的字串物件大小總和
+        """
+        strings = self._strings
+        max_entries = self.max_entries
+        max_value_length = self.max_value_length
+        # 以物件識別碼記錄被替換的字串，同一個物件（例如 json 在同一份文件中共用的鍵）只計算一次
+        replaced: Dict[int, str] = {}
+
+        def share(text: str) -> str:
+            shared = strings.get(text)
+            if shared is None:
+                if len(strings) < max_entries:
+                    strings[text] = text
+                return text
+            if shared is not text:
+                replaced[id(text)] = text
+            return shared
+
+        def walk(value: Any) -> Any:
+            value_type = type(value)
+            if value_type is dict:
+                return {share(key): walk(item) for key, item in value.items()}
+            if value_type is list:
+                for index, item in enumerate(value):
+                    value[index] = walk(item)
+                return value
+            if value_type is str and len(value) <= max_value_length:
+                return share(value)
+            return value
+
+        data = walk(data)
+        return data, sum(map(sys.getsizeof, replaced.values()))
+
+
+# 目前行程的共用表；工作行程各有一份，在處理的所有檔案間共用
+_table = InternTable()
+
+
+def get_intern_table() -> InternTable:
+    """
+    取得目前行程的字串共用表
+
+    Returns:
+        InternTable: 共用表
+    """
+    return _table
+
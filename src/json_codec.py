@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+JSON編解碼後端
+功能：有安裝 orjson 時使用 orjson 加速解析與序列化，否則使用標準函式庫 json；
+兩種後端對 FormDetail 資料產生完全相同的輸出位元組
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+from options import JSON_BACKENDS
+
+# orjson 以指數表示浮點數的格式與 json 不同（1e16 / 1e+16），輸出中出現時改用 json 重新序列化；
+# orjson 的指數一律是小寫 e，先以字面前綴快速找出 e，再確認它屬於數值而非字串內容
+_EXPONENT = re.compile(rb"e-?\d")
+_NUMBER_BYTES = frozenset(b"0123456789.-")
+_BEFORE_NUMBER = frozenset(b":[, \n")
+
+# 絕對值介於 1e-5 與 1e-4 之間的浮點數 orjson 以小數表示（0.00005），json 則以指數表示（5e-05）
+_SMALL_FRACTION = re.compile(rb"0\.0000")
+
+# 超過 64 位元的整數會被 orjson 解析為浮點數（負數在 19 位數時就可能溢位），輸入中出現過長的數字時改用 json 解析；
+# 先把數字轉為 0、其他位元組轉為空白，再以子字串搜尋尋找連續的數字，
+# 並與指數的判斷相同，只有數字前是 JSON 結構字元或空白時才是數值
+_DIGIT_TABLE = bytes(48 if 48 <= b <= 57 else 32 for b in range(256))
+_LONG_DIGITS = b"0" * 19
+_BEFORE_VALUE = frozenset(b":[, \t\r\n")
+
+
+
+class _NonFiniteFloat(float):
+    """json 解析出的 NaN、Infinity 或超出範圍的數值（1e400）"""
+
+    __slots__ = ()
+
+
+def _parse_float(text: str) -> float:
+    """解析浮點數，非有限值標記為 _NonFiniteFloat"""
+    value = float(text)
+    return value if value - value == 0 else _NonFiniteFloat(value)
+
+
+# 改用 json 解析時的選項：orjson 會把 NaN / Infinity 輸出為 null，但不支援 float 的子類別而拋出 TypeError，
+# 因此將非有限值標記為 _NonFiniteFloat，序列化時改用 json 輸出 NaN / Infinity；orjson 本身不接受這些值，
+# 只有改用 json 解析（或 append_data 解析合併資料）時才會出現
+STDLIB_DECODE_OPTIONS = {"parse_constant": _NonFiniteFloat, "parse_float": _parse_float}
+
+
+def _has_exponent(output: bytes) -> bool:
+    """
+    檢查 orjson 輸出中是否有以指數表示的浮點數
+
+    找到 e 之後往前略過數字、小數點與負號，數字前是 JSON 結構字元時才是數值，
+    GUID 等字串中的 e（例如 98e3）前面會接英數字而被排除。
+    """
+    for match in _EXPONENT.finditer(output):
+        position = match.start() - 1
+        while position >= 0 and output[position] in _NUMBER_BYTES:
+            position -= 1
+        if position < match.start() - 1 and (position < 0 or output[position] in _BEFORE_NUMBER):
+            return True
+    return False
+
+
+def _has_small_fraction(output: bytes) -> bool:
+    """
+    檢查 orjson 輸出中是否有以 0.0000 開頭的浮點數，json 會以指數表示這些值
+
+    與指數的判斷相同，數字（或負號）前是 JSON 結構字元時才是數值。
+    """
+    for match in _SMALL_FRACTION.finditer(output):
+        position = match.start() - 1
+        if position >= 0 and output[position] == 0x2D:  # 負號
+            position -= 1
+        if position < 0 or output[position] in _BEFORE_NUMBER:
+            return True
+    return False
+
+
+def _has_long_digits(raw: bytes) -> bool:
+    """
+    檢查輸入中是否有可能超過 64 位元的整數
+
+    大型檔案中的 GUID 等十六進位字串偶爾會出現 19 個連續數字，前面接英文字母或引號，
+    不是數值而被排除；字串中以空白開頭的長數字仍會被視為數值，只是改用 json 解析。
+    """
+    digits = raw.translate(_DIGIT_TABLE)
+    start = digits.find(_LONG_DIGITS)
+    while start >= 0:
+        position = start - 1
+        if position >= 0 and raw[position] == 0x2D:  # 負號
+            position -= 1
+        if position < 0 or raw[position] in _BEFORE_VALUE:
+            return True
+
+        end = digits.find(b" ", start)
+        if end < 0:
+            return False
+        start = digits.find(_LONG_DIGITS, end)
+    return False
+
+
+class StdlibCodec:
+    """標準函式庫 json 後端"""
+
+    name = "json"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        解析JSON
+
+        Args:
+            data (bytes | str): JSON內容
+
+        Returns:
+            解析後的資料
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = 2) -> bytes:
+        """
+        序列化為UTF-8編碼的JSON（ensure_ascii=False）
+
+        Args:
+            obj: 要序列化的資料
+            indent (int): 縮排空白數，None 表示緊湊格式
+
+        Returns:
+            bytes: JSON內容
+        """
+        if indent is None:
+            text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text = json.dumps(obj, ensure_ascii=False, indent=indent)
+        return text.encode('utf-8')
+
+
+class OrjsonCodec(StdlibCodec):
+    """orjson 後端，遇到兩者行為不同的少數情況時自動改用 json"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        解析JSON
+
+        Args:
+            data (bytes | str): JSON內容
+
+        Returns:
+            解析後的資料
+        """
+        raw = data.encode('utf-8') if isinstance(data, str) else data
+        if _has_long_digits(raw):
+            return json.loads(data, **STDLIB_DECODE_OPTIONS)
+
+        try:
+            return self._orjson.loads(raw)
+        except self._orjson.JSONDecodeError:
+            # 由 json 回報錯誤（或接受 json 可以解析的 NaN、Infinity 等非標準內容），讓兩種後端的行為一致
+            return json.loads(data, **STDLIB_DECODE_OPTIONS)
+
+    def dumps(self, obj: Any, indent: Optional[int] = 2) -> bytes:
+        """
+        序列化為UTF-8編碼的JSON，輸出與 StdlibCodec.dumps 完全相同
+
+        loads 解析出的 NaN / Infinity 也會改用 json 輸出；不是經由 loads 取得、直接傳入的 float('nan')
+        等非有限值無法在不走訪資料的情況下辨識，orjson 會輸出為 null。
+
+        Args:
+            obj: 要序列化的資料
+            indent (int): 縮排空白數，None 表示緊湊格式
+
+        Returns:
+            bytes: JSON內容
+        """
+        if indent not in (None, 2):
+            return super().dumps(obj, indent)
+
+        option = self._orjson.OPT_INDENT_2 if indent == 2 else 0
+        try:
+            output = self._orjson.dumps(obj, option=option)
+        except TypeError:
+            # 超過 64 位元的整數、NaN / Infinity（見 STDLIB_DECODE_OPTIONS）等 orjson 不支援的值
+            return super().dumps(obj, indent)
+
+        if _has_exponent(output) or _has_small_fraction(output):
+            return super().dumps(obj, indent)
+        return output
+
+
+def _orjson_available() -> bool:
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """
+    解析要使用的JSON後端名稱
+
+    Args:
+        name (str): auto / json / orjson
+
+    Returns:
+        str: 實際使用的後端名稱（json 或 orjson）
+    """
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"不支援的JSON後端: {name}")
+
+    if name == "auto":
+        return "orjson" if _orjson_available() else "json"
+
+    if name == "orjson" and not _orjson_available():
+        raise ValueError("未安裝 orjson，請執行 pip install orjson 或改用 --json-backend json")
+
+    return name
+
+
+@lru_cache(maxsize=None)
+def get_codec(name: str = "auto") -> StdlibCodec:
+    """
+    取得JSON編解碼器
+
+    Args:
+        name (str): auto / json / orjson
+
+    Returns:
+        StdlibCodec: 編解碼器實例
+    """
+    if resolve_backend(name) == "orjson":
+        return OrjsonCodec()
+    return StdlibCodec()
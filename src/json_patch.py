@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+JSON Patch 輸出
+功能：在合併與優化的過程中直接記錄 RFC 6902 JSON Patch 操作，描述 add 中的輸入檔案如何變成處理結果；
+不需要先產生完整的輸出再比對差異，輸出大小與變更的多寡成正比
+"""
+
+import copy
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from schema import Projector, get_projector
+
+# 一筆 JSON Patch 操作，例如 {"op": "add", "path": "/forms/0/formFields/-", "value": {...}}
+Operation = Dict[str, Any]
+
+
+def escape_token(token: Any) -> str:
+    """
+    將物件的鍵或陣列索引轉換為 JSON Pointer 的一段（RFC 6901）
+
+    Args:
+        token: 鍵或索引
+
+    Returns:
+        str: 跳脫 ~ 與 / 之後的字串
+    """
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def child_pointer(pointer: str, token: Any) -> str:
+    """
+    取得子項目的 JSON Pointer
+
+    Args:
+        pointer (str): 父項目的 JSON Pointer，根物件為空字串
+        token: 鍵或索引，"-" 表示陣列結尾
+
+    Returns:
+        str: 子項目的 JSON Pointer
+    """
+    return f"{pointer}/{escape_token(token)}"
+
+
+class JsonPatch:
+    """
+    依處理順序記錄的 JSON Patch 操作
+
+    add 與 replace 寫入的值會記錄下來：後續步驟（例如合併後的優化）遇到這些值時，
+    直接以最終的結果取代操作中的值，而不是再對新加入的值產生修正操作。
+    """
+
+    def __init__(self):
+        self.operations: List[Operation] = []
+        # 以 id 記錄新寫入的物件與陣列，值為寫入它們的操作；同一物件可能加入多個form
+        self._inserted: Dict[int, List[Operation]] = {}
+        self._projected: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def _insert(self, op: str, path: str, value: Any):
+        operation = {"op": op, "path": path, "value": value}
+        self.operations.append(operation)
+        if isinstance(value, (dict, list)):
+            self._inserted.setdefault(id(value), []).append(operation)
+
+    def add(self, path: str, value: Any):
+        """新增鍵或插入陣列元素"""
+        self._insert("add", path, value)
+
+    def replace(self, path: str, value: Any):
+        """取代已存在的值"""
+        self._insert("replace", path, value)
+
+    def remove(self, path: str):
+        """移除鍵"""
+        self.operations.append({"op": "remove", "path": path})
+
+    def move(self, source: str, path: str):
+        """將值移到新的位置，不必在操作中重複寫出值"""
+        self.operations.append({"op": "move", "from": source, "path": path})
+
+    def project_inserted(self, value: Any, project: Callable[[Any], Any]) -> bool:
+        """
+        若值是先前的操作寫入的，改為寫入投影後的結果
+
+        Args:
+            value: 處理中的物件或陣列
+            project (callable): 將值轉換為最終結果的函數
+
+        Returns:
+            bool: 值是先前寫入的時返回True，呼叫端不需再為它產生操作
+        """
+        key = id(value)
+        operations = self._inserted.get(key)
+        if operations is None:
+            return False
+        if key not in self._projected:
+            self._projected[key] = project(value)
+        for operation in operations:
+            operation["value"] = self._projected[key]
+        return True
+
+
+class ProjectionPatcher:
+    """
+    依契約描述產生優化步驟的 JSON Patch 操作，規則與 schema.Projector 的投影方式一致：
+    補上缺少的必填與陣列欄位、移除空值的選填欄位與未宣告的鍵，並將擴展資料的鍵移入擴展資料
+    """
+
+    def __init__(self, projector: Projector):
+        """
+        初始化
+
+        Args:
+            projector (Projector): 投影器，用於取得契約描述與投影新寫入的值
+        """
+        self.projector = projector
+        schema = projector.schema
+        self._declared = {name: frozenset(spec.field_names) for name, spec in schema.types.items()}
+        self._extension_keys = {
+            name: frozenset(spec.extension_keys) - self._declared[name] for name, spec in schema.types.items()
+        }
+
+    def diff(self, type_name: str, data: Any, pointer: str, patch: JsonPatch):
+        """
+        記錄將資料投影為指定類型所需的操作
+
+        Args:
+            type_name (str): 類型名稱，例如 Form
+            data (dict): 處理中的物件
+            pointer (str): 物件的 JSON Pointer
+            patch (JsonPatch): 記錄操作的 JsonPatch
+        """
+        project = self.projector.get(type_name)
+        if patch.project_inserted(data, project):
+            return
+        if type(data) is not dict:
+            raise TypeError(f"{pointer or '/'} 應為 {type_name} 物件")
+
+        spec = self.projector.schema.types[type_name]
+        declared = self._declared[type_name]
+        extension_keys = self._extension_keys[type_name]
+        extension_name = spec.extension_name if extension_keys else None
+
+        moved = [key for key, value in data.items() if key in extension_keys and value is not None]
+        for key in data:
+            if key in declared or key in moved or (key == extension_name and moved):
+                continue
+            patch.remove(child_pointer(pointer, key))
+        if moved:
+            extension_pointer = child_pointer(pointer, extension_name)
+            (patch.replace if extension_name in data else patch.add)(extension_pointer, {})
+            for key in moved:
+                patch.move(child_pointer(pointer, key), child_pointer(extension_pointer, key))
+
+        for field in spec.fields:
+            field_pointer = child_pointer(pointer, field.name)
+            if field.name not in data:
+                if field.kind == "required":
+                    patch.add(field_pointer, field.default)
+                elif field.kind == "list":
+                    patch.add(field_pointer, [])
+                continue
+
+            value = data[field.name]
+            if field.kind == "optional":
+                if value is None if field.drop == "null" else not value:
+                    patch.remove(field_pointer)
+            elif field.kind == "list":
+                if not value:
+                    if type(value) is not list:
+                        patch.replace(field_pointer, [])
+                elif field.item:
+                    self.diff_items(field.item, value, field_pointer, patch)
+
+    def diff_items(self, type_name: str, items: Any, pointer: str, patch: JsonPatch):
+        """
+        記錄將陣列中每個元素投影為指定類型所需的操作
+
+        Args:
+            type_name (str): 元素的類型名稱
+            items (list): 處理中的陣列
+            pointer (str): 陣列的 JSON Pointer
+            patch (JsonPatch): 記錄操作的 JsonPatch
+        """
+        project = self.projector.get(type_name)
+        if patch.project_inserted(items, lambda value: [project(item) for item in value] if value else []):
+            return
+        if type(items) is not list:
+            raise TypeError(f"{pointer} 應為 array")
+        for index, item in enumerate(items):
+            self.diff(type_name, item, child_pointer(pointer, index), patch)
+
+
+def _resolve(document: Any, pointer: str):
+    """返回 (父項目, 最後一段)；最後一段為物件的鍵或陣列索引"""
+    tokens = [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+    parent = document
+    for token in tokens[:-1]:
+        parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+    last = tokens[-1]
+    if isinstance(parent, list):
+        return parent, len(parent) if last == "-" else int(last)
+    return parent, last
+
+
+def apply_patch(document: Any, operations: List[Operation]) -> Any:
+    """
+    依序套用 JSON Patch 操作，支援本模組產生的 add / replace / remove / move
+
+    Args:
+        document: 要修改的JSON資料，會直接修改
+        operations (list): JSON Patch 操作
+
+    Returns:
+        修改後的資料；操作的路徑為根物件時返回新的值
+    """
+    for operation in operations:
+        op, path = operation["op"], operation["path"]
+        if op == "move":
+            parent, key = _resolve(document, operation["from"])
+            value = parent.pop(key)
+            op = "add"
+        elif op == "remove":
+            parent, key = _resolve(document, path)
+            parent.pop(key)
+            continue
+        elif op in ("add", "replace"):
+            value = copy.deepcopy(operation["value"])
+        else:
+            raise ValueError(f"不支援的 JSON Patch 操作: {op}")
+
+        if path == "":
+            document = value
+            continue
+        parent, key = _resolve(document, path)
+        if isinstance(parent, list) and op == "add":
+            parent.insert(key, value)
+        else:
+            parent[key] = value
+    return document
+
+
+@lru_cache(maxsize=None)
+def get_patcher(schema_path: Optional[str] = None) -> ProjectionPatcher:
+    """
+    取得優化步驟的 JSON Patch 產生器，每個行程的每個結構描述檔只建立一次
+
+    Args:
+        schema_path (str): 結構描述檔路徑，預設為 formdetail_schema.json
+
+    Returns:
+        ProjectionPatcher: JSON Patch 產生器
+    """
+    return ProjectionPatcher(get_projector(schema_path))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+串流JSON讀寫工具
+功能：逐一讀取頂層物件中 forms 陣列的元素，並以與 json.dump 相同的格式逐一寫出，
+讓記憶體用量取決於單一表單的大小，而不是整個檔案的大小
+"""
+
+import json
+import re
+from typing import Any, BinaryIO, Iterator, Optional, TextIO, Tuple
+
+from json_codec import StdlibCodec
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _StreamReader:
+    """以區塊讀取文字檔，並在緩衝區上逐一解碼JSON值"""
+
+    def __init__(self, fp: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> bool:
+        """丟棄已解析的部分並讀入更多內容，檔案結束時返回False"""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        chunk = self.fp.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer += chunk
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """跳過空白並返回下一個字元，檔案結束時返回空字串"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof or not self._fill(self.chunk_size):
+                return ""
+
+    def next_char(self) -> str:
+        """讀取下一個非空白字元"""
+        char = self.peek()
+        if not char:
+            raise self._error("Unexpected end of data")
+        self.pos += 1
+        return char
+
+    def expect(self, expected: str):
+        """讀取下一個非空白字元並確認為指定字元"""
+        if self.next_char() != expected:
+            self.pos -= 1
+            raise self._error(f"Expecting '{expected}' delimiter")
+
+    def decode(self) -> Any:
+        """解碼下一個完整的JSON值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # 緩衝區內容不足，每次至少讀入目前待解析的長度，避免大型表單被重複解析
+                self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+                continue
+
+            # 數字位於緩衝區尾端時可能被截斷，需要讀入更多內容後重新解碼
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and end == len(self.buffer) and not self.eof:
+                self._fill(self.chunk_size)
+                continue
+
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """逐一解碼陣列中的元素"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield self.decode()
+            char = self.next_char()
+            if char == "]":
+                return
+            if char != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+
+def iter_object_members(fp: TextIO, stream_key: str = "forms", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        skip_non_object: bool = False) -> Iterator[Tuple[str, Any]]:
+    """
+    逐一讀取頂層JSON物件的成員
+
+    stream_key 對應的陣列會以迭代器的形式返回，元素在迭代時才被解碼；
+    呼叫端必須在取得下一個成員前消耗完該迭代器（未消耗的部分會被自動略過）。
+
+    Args:
+        fp (TextIO): 已開啟的文字檔
+        stream_key (str): 要以串流方式讀取的陣列鍵名
+        chunk_size (int): 每次讀取的字元數
+        skip_non_object (bool): 頂層不是物件時是否只檢查語法、不產生任何成員；False 時拋出 JSONDecodeError
+
+    Yields:
+        tuple: (鍵名, 值或陣列元素迭代器)
+    """
+    reader = _StreamReader(fp, chunk_size)
+    if skip_non_object and reader.peek() != "{":
+        # 陣列逐一解碼元素後丟棄，不必一次載入整個陣列
+        if reader.peek() == "[":
+            for _ in reader.iter_array():
+                pass
+        else:
+            reader.decode()
+    else:
+        yield from _iter_members(reader, stream_key)
+
+    if reader.peek():
+        raise reader._error("Extra data")
+
+
+def _iter_members(reader: _StreamReader, stream_key: str) -> Iterator[Tuple[str, Any]]:
+    """逐一讀取物件的成員，見 iter_object_members"""
+    reader.expect("{")
+
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.decode()
+            if not isinstance(key, str):
+                raise reader._error("Expecting property name enclosed in double quotes")
+            reader.expect(":")
+
+            if key == stream_key and reader.peek() == "[":
+                items = reader.iter_array()
+                yield key, items
+                for _ in items:
+                    pass
+            else:
+                yield key, reader.decode()
+
+            char = reader.next_char()
+            if char == "}":
+                break
+            if char != ",":
+                reader.pos -= 1
+                raise reader._error("Expecting ',' delimiter")
+
+
+class StreamingJSONWriter:
+    """
+    逐一寫出頂層物件成員至二進位串流
+
+    indent 為整數時輸出格式與 json.dump(indent=indent, ensure_ascii=False) 完全相同；
+    indent 為 None 時輸出與 json.dump(separators=(',', ':'), ensure_ascii=False) 相同的緊湊格式。
+    """
+
+    def __init__(self, fp: BinaryIO, indent: Optional[int] = 2, codec: Optional[StdlibCodec] = None):
+        self.fp = fp
+        self.indent = indent
+        self.codec = codec or StdlibCodec()
+        self.member_count = 0
+        self.item_count = 0
+
+    def _dumps(self, value: Any, level: int) -> bytes:
+        text = self.codec.dumps(value, self.indent)
+        if self.indent is None:
+            return text
+        return text.replace(b"\n", self._newline(level))
+
+    def _newline(self, level: int) -> bytes:
+        return b"" if self.indent is None else b"\n" + b" " * (self.indent * level)
+
+    def _begin_member(self, key: str):
+        self.fp.write(b"," if self.member_count else b"{")
+        separator = b":" if self.indent is None else b": "
+        self.fp.write(self._newline(1) + self.codec.dumps(key) + separator)
+        self.member_count += 1
+
+    def write_member(self, key: str, value: Any):
+        """寫出一個完整的成員"""
+        self._begin_member(key)
+        self.fp.write(self._dumps(value, 1))
+
+    def begin_array(self, key: str):
+        """開始寫出一個陣列成員"""
+        self._begin_member(key)
+        self.fp.write(b"[")
+        self.item_count = 0
+
+    def write_item(self, value: Any):
+        """寫出陣列中的一個元素"""
+        if self.item_count:
+            self.fp.write(b",")
+        self.fp.write(self._newline(2) + self._dumps(value, 2))
+        self.item_count += 1
+
+    def end_array(self):
+        """結束目前的陣列成員"""
+        if self.item_count:
+            self.fp.write(self._newline(1))
+        self.fp.write(b"]")
+
+    def close(self):
+        """結束頂層物件"""
+        if self.member_count:
+            self.fp.write(self._newline(0) + b"}")
+        else:
+            self.fp.write(b"{}")
+
+
+class NDJSONWriter:
+    """
+    以NDJSON格式逐行寫出陣列元素（每行一個form）至二進位串流
+
+    介面與 StreamingJSONWriter 相同；NDJSON只包含陣列元素，其他頂層成員不會寫出。
+    """
+
+    def __init__(self, fp: BinaryIO, codec: Optional[StdlibCodec] = None):
+        self.fp = fp
+        self.codec = codec or StdlibCodec()
+
+    def write_member(self, key: str, value: Any):
+        """NDJSON不輸出頂層成員"""
+
+    def begin_array(self, key: str):
+        """NDJSON不需要陣列開頭"""
+
+    def write_item(self, value: Any):
+        """寫出一行JSON"""
+        self.fp.write(self.codec.dumps(value, None) + b"\n")
+
+    def end_array(self):
+        """NDJSON不需要陣列結尾"""
+
+    def close(self):
+        """NDJSON不需要結尾"""
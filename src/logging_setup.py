@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+日誌設定
+功能：在命令實際執行時才設定日誌輸出，匯入模組時不會建立或開啟任何日誌檔案；
+處理檔案時只把日誌記錄放入佇列，由背景執行緒格式化並寫入主控台與日誌檔案
+"""
+
+import atexit
+import logging
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 每個檔案的處理訊息（開始處理、已儲存、合併結果、單一檔案的錯誤）使用此記錄器，
+# 等級可與執行摘要分開設定
+FILE_LOGGER_NAME = "formdetails.files"
+file_logger = logging.getLogger(FILE_LOGGER_NAME)
+
+_FILE_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "off": logging.CRITICAL + 1,
+}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    同一行程內的佇列處理器
+
+    記錄不需序列化即可交給背景執行緒，因此不在呼叫端合併訊息參數，
+    格式化完全由背景執行緒負責。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(log_file: Optional[str] = None, level: int = logging.INFO,
+                      file_level: str = "info", queued: bool = True):
+    """
+    設定根日誌記錄器，輸出到主控台與日誌檔案
+
+    queued 為 True 時根記錄器只有一個佇列處理器，實際的格式化與寫入在背景執行緒進行，
+    結束前請呼叫 flush_logging()（程式結束時也會自動呼叫）。
+    根日誌記錄器已有處理器時（例如呼叫端或測試框架已設定）只設定每個檔案的日誌等級，也不會開啟日誌檔案。
+
+    Args:
+        log_file (str): 日誌檔案路徑，None 表示只輸出到主控台
+        level (int): 日誌等級
+        file_level (str): 每個檔案的日誌等級，見 options.FILE_LOG_LEVELS；off 表示只輸出執行摘要
+        queued (bool): 是否以背景執行緒寫入日誌
+    """
+    global _listener, _queue_handler
+
+    if file_level not in _FILE_LEVELS:
+        raise ValueError(f"不支援的日誌等級: {file_level}")
+    file_logger.setLevel(_FILE_LEVELS[file_level])
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, encoding='utf-8'))
+
+    if not queued:
+        logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    atexit.register(flush_logging)
+
+
+def flush_logging():
+    """
+    等待背景執行緒寫出佇列中的所有日誌，之後改為直接寫入
+
+    未使用佇列時不做任何事；可重複呼叫。
+    """
+    global _listener, _queue_handler
+
+    if _listener is None:
+        return
+
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = _queue_handler = None
+
+
+@contextmanager
+def worker_logging() -> Iterator[Dict[str, Any]]:
+    """
+    讓工作行程的日誌也經由佇列寫出
+
+    工作行程無法使用主行程的背景執行緒，因此在區塊內建立跨行程佇列與轉送執行緒，
+    並返回傳給 ProcessPoolExecutor 的 initializer 參數。未使用佇列時返回空的參數，
+    工作行程沿用直接寫入的處理器。
+
+    Yields:
+        dict: ProcessPoolExecutor 的 initializer / initargs 參數
+    """
+    if _listener is None:
+        yield {}
+        return
+
+    import multiprocessing
+
+    log_queue = multiprocessing.Queue()
+    forwarder = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    forwarder.start()
+    try:
+        yield {
+            "initializer": _init_worker,
+            "initargs": (log_queue, logging.getLogger().level, file_logger.level),
+        }
+    finally:
+        forwarder.stop()
+        log_queue.close()
+        log_queue.join_thread()
+
+
+def _init_worker(log_queue, level: int, file_level: int):
+    """工作行程初始化：所有日誌改送到主行程的跨行程佇列"""
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
+    file_logger.setLevel(file_level)
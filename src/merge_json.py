@@ -6,211 +6,707 @@ JSON檔案合併腳本
 
 import json
 import logging
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-# 設定日誌
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('merge_json.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from types import GeneratorType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from append_data import AppendData, load_append_file
+from archives import is_archive
+from build_cache import hash_file, make_fingerprint
+from interning import get_intern_table
+from json_codec import StdlibCodec, get_codec, resolve_backend
+from json_patch import JsonPatch, Operation, child_pointer
+from json_stream import iter_object_members
+from logging_setup import configure_logging, file_logger, flush_logging
+from metrics import FileMetrics, RunMetrics
+from options import INFLIGHT_MB, MERGE_POLICIES
+from output_formats import OutputFormat
+from output_writer import temp_path_for
+from routing import FieldResolver, RoutingTable, load_routes, read_routes, routes_digest
+from runner import run_all_files
+from sharding import Shard
+
+# 合併資料：單一的 append_json.json，或依路由設定檔對應到各個form的合併資料片段
+MergeData = Union[AppendData, RoutingTable]
+
+# 處理結果：處理後的資料，或輸出 JSON Patch 時描述變更的操作陣列
+ProcessedData = Union[Dict[str, Any], List[Operation]]
 
 class JSONMerger:
     """JSON檔案合併器"""
 
-    def __init__(self, append_file="append_json.json", input_dir="add", output_dir="out"):
+    def __init__(self, append_file="append_json.json", input_dir="add", output_dir="out",
+                 merge_policy="append", output_format: Optional[OutputFormat] = None,
+                 json_backend="auto", routes_file=None, intern_strings=False):
         """
         初始化合併器
 
         Args:
             append_file (str): 要合併的JSON檔案名稱
-            input_dir (str): 輸入資料夾路徑
-            output_dir (str): 輸出資料夾路徑
+            input_dir (str): 輸入資料夾路徑，或 .zip / .tar / .tar.gz 封存檔
+            output_dir (str): 輸出資料夾路徑，或要寫入的 .zip / .tar / .tar.gz 封存檔；
+                None 表示只在記憶體中處理（見 api.Transformer），不建立輸出資料夾
+            merge_policy (str): 合併策略，見 MERGE_POLICIES
+            output_format (OutputFormat): 輸出格式，預設為排版JSON
+            json_backend (str): JSON後端（auto / json / orjson）
+            routes_file (str): 路由設定檔路徑，指定時依formId與檔案名稱套用不同的合併資料片段，
+                不使用 append_file
+            intern_strings (bool): 解析後是否以字串共用表替換重複的鍵與短字串值，見 interning.InternTable
         """
+        if merge_policy not in MERGE_POLICIES:
+            raise ValueError(f"不支援的合併策略: {merge_policy}")
+
         self.append_file = Path(append_file)
+        self.routes_file = Path(routes_file) if routes_file is not None else None
         self.input_dir = Path(input_dir)
-        self.output_dir = Path(output_dir)
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.merge_policy = merge_policy
+        self.output_format = output_format or OutputFormat()
+        self.json_backend = resolve_backend(json_backend)
+        self.intern_strings = intern_strings
+        # 更新欄位索引時在處理每個檔案時順便收集索引資料列，見 field_index.FieldIndex.record
+        self.index_fields = False
 
         # 確保輸出資料夾存在
-        self.output_dir.mkdir(exist_ok=True)
+        if self.output_dir is not None and not is_archive(self.output_dir):
+            self.output_dir.mkdir(exist_ok=True)
+
+    @property
+    def cache_dir(self) -> Path:
+        """合併資料快取所在的資料夾；輸出為封存檔時為封存檔所在的資料夾"""
+        return self.output_dir.parent if is_archive(self.output_dir) else self.output_dir
+
+    @property
+    def uses_archives(self) -> bool:
+        """輸入或輸出是否為封存檔；此時逐一處理封存檔成員，不使用增量建置快取"""
+        return is_archive(self.input_dir) or is_archive(self.output_dir)
 
-    def load_append_data(self) -> Optional[List[Dict[str, Any]]]:
+    @property
+    def codec(self) -> StdlibCodec:
+        """目前使用的JSON編解碼器"""
+        return get_codec(self.json_backend)
+
+    def load_append_data(self) -> Optional[MergeData]:
         """
         載入要合併的JSON資料
 
+        支援 JSON 陣列、連續的物件、以逗號分隔（含結尾逗號）的片段與 NDJSON，
+        解析結果快取在輸出資料夾，內容未變更時不會重新解析。
+        指定路由設定檔時載入所有路由的合併資料片段。
+
         Returns:
-            list: 要合併的formFields列表，失敗時返回None
+            AppendData | RoutingTable: 要合併的formFields或路由表，失敗時返回None
         """
+        source = self.routes_file or self.append_file
         try:
-            if not self.append_file.exists():
-                logging.error(f"合併檔案不存在: {self.append_file}")
+            if not source.exists():
+                logging.error(f"合併檔案不存在: {source}")
                 return None
 
-            with open(self.append_file, encoding='utf-8') as f:
-                # 讀取檔案內容
-                content = f.read().strip()
+            if self.routes_file is not None:
+                routes = load_routes(self.routes_file, self.cache_dir, self.json_backend,
+                                     intern_strings=self.intern_strings)
+                logging.info(f"成功載入 {len(routes.routes)} 條路由、{len(routes.fragments)} 個合併資料片段，"
+                             f"共 {routes.field_count} 個要合併的formFields")
+                if self.intern_strings:
+                    saved = sum(fragment.interned_bytes for fragment in routes.fragments.values())
+                    logging.info(f"合併資料字串共用：節省約 {saved} 位元組")
+                return routes
 
-                # 處理可能的格式問題（移除末尾的逗號）
-                if content.endswith(','):
-                    content = content[:-1]
-
-                # 嘗試解析為JSON陣列
-                try:
-                    append_data = json.loads(f"[{content}]")
-                except json.JSONDecodeError:
-                    # 如果不是陣列格式，嘗試解析為單一物件
-                    append_data = json.loads(content)
-                    if not isinstance(append_data, list):
-                        append_data = [append_data]
+            append_data = load_append_file(self.append_file, self.cache_dir, self.json_backend,
+                                           intern_strings=self.intern_strings)
 
             logging.info(f"成功載入 {len(append_data)} 個要合併的formFields")
+            if self.intern_strings:
+                logging.info(f"合併資料字串共用：節省約 {append_data.interned_bytes} 位元組")
             return append_data
 
         except json.JSONDecodeError as e:
-            logging.error(f"JSON解析錯誤 {self.append_file}: {e}")
+            logging.error(f"JSON解析錯誤 {source}: {e}")
             return None
         except Exception as e:
-            logging.error(f"載入合併檔案時發生錯誤 {self.append_file}: {e}")
+            logging.error(f"載入合併檔案時發生錯誤 {source}: {e}")
             return None
 
+    def append_sources(self) -> List[Path]:
+        """
+        返回合併資料的來源檔案，監看模式在這些檔案變更時重新載入
+
+        Returns:
+            list: append_json.json，或路由設定檔與其中所有的合併資料片段
+        """
+        if self.routes_file is None:
+            return [self.append_file]
+        try:
+            _, fragment_paths = read_routes(self.routes_file)
+        except Exception:
+            return [self.routes_file]
+        return [self.routes_file, *fragment_paths]
+
+    @staticmethod
+    def append_resolver(append_data: MergeData, file_name: str) -> FieldResolver:
+        """
+        返回取得單個form要合併的資料的函數
+
+        Args:
+            append_data (AppendData | RoutingTable): 合併資料
+            file_name (str): 輸入檔案名稱，用於比對路由的檔案模式
+
+        Returns:
+            callable: 傳入form、返回要合併的formFields的函數；沒有對應的路由時返回None
+        """
+        if isinstance(append_data, RoutingTable):
+            return append_data.for_file(file_name)
+        return lambda form: append_data
+
     def merge_form_fields(self, original_form_fields: List[Dict[str, Any]],
-                         append_form_fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                         append_form_fields: Sequence[Dict[str, Any]],
+                         patch: Optional[JsonPatch] = None, pointer: str = "") -> List[Dict[str, Any]]:
         """
         合併formFields陣列
 
         Args:
             original_form_fields (list): 原始的formFields
             append_form_fields (list): 要新增的formFields
+            patch (JsonPatch): 記錄合併操作的 JSON Patch，None 表示不記錄
+            pointer (str): formFields陣列的 JSON Pointer
 
         Returns:
             list: 合併後的formFields
         """
+        if self.merge_policy != "append":
+            return self.upsert_form_fields(original_form_fields, append_form_fields, patch, pointer)
+
         # 複製原始陣列
         merged_fields = original_form_fields.copy()
 
         # 新增要合併的欄位
         merged_fields.extend(append_form_fields)
+        if patch is not None:
+            for field in append_form_fields:
+                patch.add(child_pointer(pointer, "-"), field)
 
-        logging.info(f"合併完成：原有 {len(original_form_fields)} 個欄位，新增 {len(append_form_fields)} 個欄位，總計 {len(merged_fields)} 個欄位")
+        file_logger.info("合併完成：原有 %s 個欄位，新增 %s 個欄位，總計 %s 個欄位",
+                         len(original_form_fields), len(append_form_fields), len(merged_fields))
 
         return merged_fields
 
-    def process_json_file(self, file_path: Path, append_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    def upsert_form_fields(self, original_form_fields: List[Dict[str, Any]],
+                           append_form_fields: Sequence[Dict[str, Any]],
+                           patch: Optional[JsonPatch] = None, pointer: str = "") -> List[Dict[str, Any]]:
+        """
+        以formFieldId為索引合併formFields陣列，重複執行結果不變
+
+        已存在的欄位依合併策略取代、保留或逐屬性覆寫，其餘欄位附加在最後；
+        沒有formFieldId的欄位無法比對，一律附加。
+
+        Args:
+            original_form_fields (list): 原始的formFields
+            append_form_fields (list): 要新增的formFields
+            patch (JsonPatch): 記錄合併操作的 JSON Patch，None 表示不記錄；
+                逐屬性覆寫只記錄值有變更的屬性
+            pointer (str): formFields陣列的 JSON Pointer
+
+        Returns:
+            list: 合併後的formFields
+        """
+        merged_fields = original_form_fields.copy()
+
+        # 建立formFieldId索引，重複的formFieldId以第一個為準
+        index: Dict[Any, int] = {}
+        for position, field in enumerate(merged_fields):
+            field_id = field.get("formFieldId") if isinstance(field, dict) else None
+            if field_id:
+                index.setdefault(field_id, position)
+
+        added_count = 0
+        updated_count = 0
+
+        for field in append_form_fields:
+            field_id = field.get("formFieldId")
+            position = index.get(field_id) if field_id else None
+
+            if position is None:
+                if field_id:
+                    index[field_id] = len(merged_fields)
+                merged_fields.append(field)
+                added_count += 1
+                if patch is not None:
+                    patch.add(child_pointer(pointer, "-"), field)
+            elif self.merge_policy == "replace":
+                merged_fields[position] = field
+                updated_count += 1
+                if patch is not None:
+                    patch.replace(child_pointer(pointer, position), field)
+            elif self.merge_policy == "patch":
+                original = merged_fields[position]
+                merged_fields[position] = {**original, **field}
+                updated_count += 1
+                if patch is not None:
+                    self.record_field_patch(original, field, patch, child_pointer(pointer, position))
+
+        file_logger.info("合併完成：原有 %s 個欄位，新增 %s 個欄位，更新 %s 個欄位，總計 %s 個欄位",
+                         len(original_form_fields), added_count, updated_count, len(merged_fields))
+
+        return merged_fields
+
+    @staticmethod
+    def record_field_patch(original: Dict[str, Any], field: Dict[str, Any], patch: JsonPatch, pointer: str):
+        """
+        記錄逐屬性覆寫單個欄位的 JSON Patch 操作，只記錄新增或值有變更的屬性
+
+        Args:
+            original (dict): 原始欄位
+            field (dict): 要覆寫的屬性
+            patch (JsonPatch): 記錄操作的 JSON Patch
+            pointer (str): 欄位的 JSON Pointer
+        """
+        for key, value in field.items():
+            if key not in original:
+                patch.add(child_pointer(pointer, key), value)
+            elif type(original[key]) is not type(value) or original[key] != value:
+                patch.replace(child_pointer(pointer, key), value)
+
+    def merge_form(self, form: Dict[str, Any], append_data: Optional[Sequence[Dict[str, Any]]],
+                   patch: Optional[JsonPatch] = None, pointer: str = "") -> Dict[str, Any]:
+        """
+        將要合併的資料加入單個form的formFields
+
+        Args:
+            form (dict): 表單資料
+            append_data (list): 要合併的資料，None 表示沒有對應的路由，不修改此form
+            patch (JsonPatch): 記錄合併操作的 JSON Patch，None 表示不記錄
+            pointer (str): 表單的 JSON Pointer，例如 /forms/0
+
+        Returns:
+            dict: 合併後的表單資料
+        """
+        if append_data is None:
+            return form
+
+        fields_pointer = child_pointer(pointer, "formFields")
+        if "formFields" in form and form["formFields"]:
+            # 合併formFields
+            form["formFields"] = self.merge_form_fields(form["formFields"], append_data, patch, fields_pointer)
+        else:
+            # 如果沒有formFields，直接新增
+            existed = "formFields" in form
+            form["formFields"] = list(append_data)
+            if patch is not None:
+                (patch.replace if existed else patch.add)(fields_pointer, form["formFields"])
+
+        return form
+
+    def process_json_file(self, file_path: Path, append_data: MergeData,
+                          metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
         """
         處理單個JSON檔案
 
         Args:
             file_path (Path): JSON檔案路徑
-            append_data (list): 要合併的資料
+            append_data (AppendData | RoutingTable): 要合併的資料
+            metrics (FileMetrics): 記錄讀取、解析與合併階段的指標
+
+        Returns:
+            dict | list: 處理後的資料或 JSON Patch 操作，失敗時返回None
+        """
+        metrics = metrics or FileMetrics(file_path.name)
+        file_logger.info("正在處理檔案: %s", file_path.name)
+
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", file_path.name, e)
+            metrics.fail(e)
+            return None
+        metrics.lap("read")
+
+        return self.process_json_content(content, file_path.name, append_data, metrics)
+
+    def process_json_content(self, content: bytes, name: str, append_data: MergeData,
+                             metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
+        """
+        合併已讀取的JSON內容，例如封存檔的成員
+
+        Args:
+            content (bytes): JSON內容
+            name (str): 檔案名稱，用於比對路由的檔案模式、日誌與指標
+            append_data (AppendData | RoutingTable): 要合併的資料
+            metrics (FileMetrics): 記錄解析與合併階段的指標
 
         Returns:
-            dict: 處理後的資料，失敗時返回None
+            dict | list: 處理後的資料，輸出 JSON Patch 時為合併操作的陣列；失敗時返回None
         """
+        metrics = metrics or FileMetrics(name)
+        metrics.bytes_in = len(content)
+
         try:
-            with open(file_path, encoding='utf-8') as f:
-                data = json.load(f)
+            data = self.codec.loads(content)
+            if self.intern_strings:
+                data, metrics.interned_bytes = get_intern_table().intern(data)
+            metrics.lap("parse")
+        except json.JSONDecodeError as e:
+            file_logger.error("JSON解析錯誤 %s: %s", name, e)
+            metrics.fail(f"JSON解析錯誤: {e}")
+            return None
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
+            return None
+
+        return self.process_document(data, name, append_data, metrics)
 
-            logging.info(f"正在處理檔案: {file_path.name}")
+    def process_document(self, data: Any, name: str, append_data: MergeData,
+                         metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
+        """
+        合併已解析的JSON資料，會直接修改傳入的資料
+
+        Args:
+            data (dict): 解析後的FormDetail資料
+            name (str): 檔案名稱，用於比對路由的檔案模式、日誌與指標
+            append_data (AppendData | RoutingTable | list): 要合併的資料
+            metrics (FileMetrics): 記錄合併階段的指標
 
+        Returns:
+            dict | list: 處理後的資料，輸出 JSON Patch 時為合併操作的陣列；失敗時返回None
+        """
+        metrics = metrics or FileMetrics(name)
+
+        try:
             # 檢查是否有forms陣列
             if "forms" not in data or not data["forms"]:
-                logging.warning(f"檔案 {file_path.name} 沒有forms陣列，跳過處理")
+                file_logger.warning("檔案 %s 沒有forms陣列，跳過處理", name)
+                metrics.fail("沒有forms陣列")
                 return None
 
-            # 處理每個form
-            for form in data["forms"]:
-                if "formFields" in form and form["formFields"]:
-                    # 合併formFields
-                    form["formFields"] = self.merge_form_fields(form["formFields"], append_data)
-                else:
-                    # 如果沒有formFields，直接新增
-                    form["formFields"] = append_data.copy()
+            # 處理每個form；輸出 JSON Patch 時在合併的同時記錄每個變更
+            resolve = self.append_resolver(append_data, name)
+            patch = JsonPatch() if self.output_format.writes_patch else None
+            for index, form in enumerate(data["forms"]):
+                metrics.count_form(form)
+                self.merge_form(form, resolve(form), patch, f"/forms/{index}")
+            metrics.lap("transform")
 
-            return data
+            return data if patch is None else patch.operations
 
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON解析錯誤 {file_path.name}: {e}")
-            return None
         except Exception as e:
-            logging.error(f"處理檔案時發生錯誤 {file_path.name}: {e}")
+            file_logger.error("處理檔案時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
             return None
 
-    def save_processed_file(self, processed_data: Dict[str, Any], original_filename: str):
+    def output_path(self, original_filename: str) -> Path:
+        """
+        取得輸出檔案路徑，副檔名依輸出格式而定
+
+        Args:
+            original_filename (str): 原始檔案名稱
+
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        return self.output_dir / self.output_format.output_name(original_filename)
+
+    def save_processed_file(self, processed_data: ProcessedData, original_filename: str,
+                            metrics: Optional[FileMetrics] = None) -> Optional[int]:
         """
         儲存處理後的檔案
 
         Args:
-            processed_data (dict): 處理後的資料
+            processed_data (dict | list): 處理後的資料或 JSON Patch 操作
             original_filename (str): 原始檔案名稱
+            metrics (FileMetrics): 記錄序列化與寫入階段的指標
+
+        Returns:
+            int: 輸出檔案的位元組數，失敗時返回None
         """
-        output_path = self.output_dir / original_filename
+        metrics = metrics or FileMetrics(original_filename)
+        output_path = self.output_path(original_filename)
 
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(processed_data, f, ensure_ascii=False, indent=2)
+            payload = self.output_format.encode(self.output_format.serialize(processed_data, self.codec))
+            metrics.lap("serialize")
+            metrics.written = self.output_format.write_bytes(payload, output_path)
+            metrics.lap("write")
 
-            logging.info(f"已儲存合併後的檔案: {output_path}")
+            if metrics.written:
+                file_logger.info("已儲存合併後的檔案: %s", output_path)
+            else:
+                file_logger.info("內容未變更，保留既有檔案: %s", output_path)
+            return len(payload)
 
         except Exception as e:
-            logging.error(f"儲存檔案時發生錯誤 {output_path}: {e}")
+            file_logger.error("儲存檔案時發生錯誤 %s: %s", output_path, e)
+            metrics.fail(e)
+            return None
 
-    def merge_all_files(self):
+    def stream_json_file(self, file_path: Path, append_data: MergeData,
+                         metrics: Optional[FileMetrics] = None) -> Optional[int]:
         """
-        合併所有JSON檔案
+        以串流方式處理單個JSON檔案，逐一讀取、合併並寫出每個form
+
+        記憶體用量取決於最大的單一form，而非整個檔案；輸出內容與一般模式完全相同。
+        串流模式下讀取的耗時計入解析階段，寫入（含壓縮）的耗時計入序列化階段。
+
+        Args:
+            file_path (Path): JSON檔案路徑
+            append_data (AppendData | RoutingTable): 要合併的資料
+            metrics (FileMetrics): 記錄各階段的指標
+
+        Returns:
+            int: 輸出檔案的位元組數，失敗時返回None
+        """
+        metrics = metrics or FileMetrics(file_path.name)
+        output_path = self.output_path(file_path.name)
+        temp_path = temp_path_for(output_path)
+        resolve = self.append_resolver(append_data, file_path.name)
+
+        try:
+            file_logger.info("正在以串流模式處理檔案: %s", file_path.name)
+            metrics.bytes_in = file_path.stat().st_size
+
+            with open(file_path, encoding='utf-8') as fin, \
+                    self.output_format.open(temp_path) as fout:
+                writer = self.output_format.create_writer(fout, self.codec)
+                metrics.lap("write")
+
+                for key, value in iter_object_members(fin, "forms"):
+                    metrics.lap("parse")
+                    if key != "forms" or not isinstance(value, GeneratorType):
+                        writer.write_member(key, value)
+                        metrics.lap("serialize")
+                        continue
+
+                    writer.begin_array(key)
+                    for form in value:
+                        metrics.lap("parse")
+                        metrics.count_form(form)
+                        merged_form = self.merge_form(form, resolve(form))
+                        metrics.lap("transform")
+                        writer.write_item(merged_form)
+                        metrics.lap("serialize")
+                    writer.end_array()
+
+                writer.close()
+            metrics.lap("serialize")
+
+            # 檢查是否有forms陣列
+            if metrics.forms == 0:
+                file_logger.warning("檔案 %s 沒有forms陣列，跳過處理", file_path.name)
+                metrics.fail("沒有forms陣列")
+                temp_path.unlink()
+                return None
+
+            metrics.written = self.output_format.replace(temp_path, output_path)
+            metrics.lap("write")
+            if metrics.written:
+                file_logger.info("已儲存合併後的檔案: %s", output_path)
+            else:
+                file_logger.info("內容未變更，保留既有檔案: %s", output_path)
+            return output_path.stat().st_size
+
+        except json.JSONDecodeError as e:
+            file_logger.error("JSON解析錯誤 %s: %s", file_path.name, e)
+            metrics.fail(f"JSON解析錯誤: {e}")
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", file_path.name, e)
+            metrics.fail(e)
+
+        if temp_path.exists():
+            temp_path.unlink()
+        return None
+
+    def merge_file(self, json_file: Path, append_data: MergeData,
+                   stream: bool = False) -> FileMetrics:
+        """
+        合併並儲存單個JSON檔案，可在工作行程中執行
+
+        Args:
+            json_file (Path): JSON檔案路徑
+            append_data (AppendData | RoutingTable): 要合併的資料
+            stream (bool): 是否使用串流模式，輸出 JSON Patch 時不使用
+
+        Returns:
+            FileMetrics: 處理結果與各階段指標
+        """
+        metrics = FileMetrics(json_file.name, self.index_fields)
+
+        # JSON Patch 需要完整的輸入才能記錄每個操作的位置，一律完整讀取
+        if stream and not self.output_format.writes_patch:
+            bytes_written = self.stream_json_file(json_file, append_data, metrics)
+        else:
+            processed_data = self.process_json_file(json_file, append_data, metrics)
+            bytes_written = None
+            if processed_data is not None:
+                bytes_written = self.save_processed_file(processed_data, json_file.name, metrics)
+
+        metrics.ok = bytes_written is not None
+        metrics.bytes_out = bytes_written or 0
+        return metrics
+
+    def merge_member(self, member: Tuple[str, bytes], append_data: MergeData) -> Tuple[FileMetrics, Optional[bytes]]:
+        """
+        合併封存檔的單個成員並返回輸出內容，可在工作行程中執行；寫入由呼叫端負責
+
+        Args:
+            member (tuple): (成員名稱, 內容)
+            append_data (AppendData | RoutingTable): 要合併的資料
+
+        Returns:
+            tuple: (處理指標, 依輸出格式序列化並壓縮後的內容，失敗時為None)
+        """
+        name, content = member
+        metrics = FileMetrics(name, self.index_fields)
+        file_logger.info("正在處理檔案: %s", name)
+
+        processed_data = self.process_json_content(content, name, append_data, metrics)
+        if processed_data is None:
+            return metrics, None
+
+        try:
+            payload = self.output_format.encode(self.output_format.serialize(processed_data, self.codec))
+        except Exception as e:
+            file_logger.error("序列化時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
+            return metrics, None
+        metrics.lap("serialize")
+        return metrics, payload
+
+    def file_task(self, stream: bool = False, members: bool = False) -> Optional[Callable[[Any], Any]]:
+        """
+        載入合併資料並返回處理單個檔案的函數，可傳給 run_batch 在工作行程中執行
+
+        Args:
+            stream (bool): 是否使用串流模式
+            members (bool): 是否返回處理封存檔成員的函數，見 merge_member
+
+        Returns:
+            callable: 處理單個檔案的函數，無法載入合併資料時返回None
         """
-        # 載入要合併的資料
         append_data = self.load_append_data()
         if append_data is None:
             logging.error("無法載入合併資料，終止處理")
-            return
+            return None
+
+        if members:
+            return partial(self.merge_member, append_data=append_data)
+        return partial(self.merge_file, append_data=append_data, stream=stream)
+
+    def cache_fingerprint(self) -> str:
+        """
+        計算增量建置快取的設定指紋，合併資料變更時使快取失效
 
-        # 檢查輸入資料夾是否存在
-        if not self.input_dir.exists():
-            logging.error(f"輸入資料夾不存在: {self.input_dir}")
-            return
+        Returns:
+            str: 設定指紋
+        """
+        return make_fingerprint("merge", merge_policy=self.merge_policy,
+                                output_format=self.output_format.describe(),
+                                **self.append_fingerprint())
 
-        # 尋找所有JSON檔案
-        json_files = list(self.input_dir.glob("*.json"))
+    def append_fingerprint(self) -> Dict[str, str]:
+        """
+        返回合併資料的雜湊，供設定指紋使用
 
-        if not json_files:
-            logging.warning(f"在 {self.input_dir} 中沒有找到JSON檔案")
-            return
+        Returns:
+            dict: append_json.json 的雜湊，或路由設定檔與所有片段的雜湊
+        """
+        if self.routes_file is not None:
+            return {"routes_hash": routes_digest(self.routes_file)}
+        return {"append_hash": hash_file(self.append_file)}
 
-        logging.info(f"找到 {len(json_files)} 個JSON檔案")
+    def metrics_settings(self) -> Dict[str, Any]:
+        """
+        返回記錄在處理指標報告中的設定
 
-        # 處理每個檔案
-        processed_count = 0
+        Returns:
+            dict: 設定
+        """
+        return {"json_backend": self.codec.name, "output_format": self.output_format.describe(),
+                "merge_policy": self.merge_policy, "intern_strings": self.intern_strings}
+
+    def merge_all_files(self, jobs: int = 1, stream: bool = False, force: bool = False,
+                        metrics_out: Optional[str] = None, shard: Optional[Shard] = None,
+                        async_io: bool = False,
+                        inflight_bytes: int = INFLIGHT_MB * 1024 * 1024, index_path: Optional[str] = None,
+                        where: Optional[Sequence[str]] = None) -> Optional[RunMetrics]:
+        """
+        合併所有JSON檔案
 
-        for json_file in json_files:
-            processed_data = self.process_json_file(json_file, append_data)
+        Args:
+            jobs (int): 平行處理的工作行程數量，0 表示使用所有CPU核心
+            stream (bool): 是否使用串流模式處理大型檔案
+            force (bool): 是否忽略增量建置快取，重新處理所有檔案
+            metrics_out (str): 處理指標JSON報告的輸出路徑
+            shard (Shard): 只處理屬於此分片的檔案，None 表示處理所有檔案
+            async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入（輸入與輸出為資料夾時）
+            inflight_bytes (int): 非同步 I/O 處理流程中已讀入、尚未寫完的位元組上限
+            index_path (str): 順便更新的欄位索引檔路徑，None 表示不更新索引
+            where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案，見 field_index.parse_where
 
-            if processed_data is not None:
-                self.save_processed_file(processed_data, json_file.name)
-                processed_count += 1
+        Returns:
+            RunMetrics: 處理指標，無法開始處理時返回None
+        """
+        # 載入要合併的資料
+        task = self.file_task(stream, members=self.uses_archives or async_io)
+        if task is None:
+            return None
+
+        return run_all_files(self, "merge", task, "合併完成！", jobs=jobs, stream=stream, force=force,
+                             metrics_out=metrics_out, shard=shard, async_io=async_io,
+                             inflight_bytes=inflight_bytes, index_path=index_path, where=where)
 
-        logging.info(f"合併完成！成功處理 {processed_count}/{len(json_files)} 個檔案")
 
-def main():
+def main(jobs: int = 1, stream: bool = False, force: bool = False, merge_policy: str = "append",
+         output_format: Optional[OutputFormat] = None, json_backend: str = "auto",
+         metrics_out: Optional[str] = None, file_log_level: str = "info",
+         routes_file: Optional[str] = None, intern_strings: bool = False,
+         shard: Optional[Shard] = None, input_dir: str = "add", output_dir: str = "out",
+         async_io: bool = False, inflight_mb: int = INFLIGHT_MB, index_path: Optional[str] = None,
+         where: Optional[Sequence[str]] = None):
     """
     主函數
+
+    Args:
+        jobs (int): 平行處理的工作行程數量
+        stream (bool): 是否使用串流模式
+        force (bool): 是否忽略增量建置快取
+        merge_policy (str): 合併策略
+        output_format (OutputFormat): 輸出格式
+        json_backend (str): JSON後端
+        metrics_out (str): 處理指標JSON報告的輸出路徑
+        file_log_level (str): 每個檔案的日誌等級，off 表示只輸出執行摘要
+        routes_file (str): 路由設定檔路徑
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+        shard (Shard): 只處理屬於此分片的檔案
+        input_dir (str): 輸入資料夾或封存檔路徑
+        output_dir (str): 輸出資料夾或封存檔路徑
+        async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入
+        inflight_mb (int): 非同步 I/O 處理流程中已讀入、尚未寫完的資料上限（MB）
+        index_path (str): 順便更新的欄位索引檔路徑
+        where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案
     """
+    configure_logging("merge_json.log", file_level=file_log_level)
+
     print("JSON檔案合併腳本啟動...")
     print("=" * 60)
     print("功能：將append_json.json的內容合併到add資料夾中JSON檔案的formFields")
     print("=" * 60)
 
     # 創建合併器實例
-    merger = JSONMerger()
+    merger = JSONMerger(input_dir=input_dir, output_dir=output_dir,
+                        merge_policy=merge_policy, output_format=output_format,
+                        json_backend=json_backend, routes_file=routes_file,
+                        intern_strings=intern_strings)
 
     # 執行合併
-    merger.merge_all_files()
+    merger.merge_all_files(jobs=jobs, stream=stream, force=force, metrics_out=metrics_out, shard=shard,
+                           async_io=async_io, inflight_bytes=inflight_mb * 1024 * 1024,
+                           index_path=index_path, where=where)
+    flush_logging()
 
     print("=" * 60)
-    print("合併完成！請檢查out資料夾中的結果。")
+    print(f"合併完成！請檢查 {output_dir} 中的結果。")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+處理指標
+功能：記錄每個檔案各階段（讀取、解析、轉換、序列化、寫入）的耗時、輸入輸出位元組、
+表單與欄位數量及失敗原因，彙總後輸出為JSON報告；並提供 cProfile 效能剖析
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+STAGES = ("read", "parse", "transform", "serialize", "write")
+
+_STAGE_NAMES = {
+    "read": "讀取",
+    "parse": "解析",
+    "transform": "轉換",
+    "serialize": "序列化",
+    "write": "寫入",
+}
+
+# 欄位索引的一列：(表單順序, formId, formFieldId, fieldType, sort, specialFieldCode)，
+# 沒有欄位的表單也有一列，欄位的值為 None；見 field_index.FieldIndex
+FieldRow = Tuple[int, Any, Any, Any, Any, Any]
+
+
+def _index_value(value: Any) -> Any:
+    """欄位索引可儲存的值；物件與陣列以字串表示"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def form_rows(form_index: int, form: Any) -> List[FieldRow]:
+    """
+    取得單個form的欄位索引資料列
+
+    Args:
+        form_index (int): 表單在 forms 陣列中的順序
+        form (dict): 原始表單資料
+
+    Returns:
+        list: 每個欄位一列，沒有欄位時為只有 formId 的一列
+    """
+    if not isinstance(form, dict):
+        return []
+    form_id = _index_value(form.get("formId"))
+    fields = form.get("formFields")
+    rows = [
+        (form_index, form_id, _index_value(field.get("formFieldId")), _index_value(field.get("fieldType")),
+         _index_value(field.get("sort")), _index_value(field.get("specialFieldCode")))
+        for field in (fields if isinstance(fields, list) else []) if isinstance(field, dict)
+    ]
+    return rows or [(form_index, form_id, None, None, None, None)]
+
+
+class FileMetrics:
+    """
+    單個檔案的處理指標，由工作行程回傳給主行程
+
+    以 lap() 分段計時：每次呼叫會把自上次呼叫以來的耗時累計到指定階段。
+    """
+
+    def __init__(self, name: str, collect_fields: bool = False):
+        """
+        初始化檔案指標並開始計時
+
+        Args:
+            name (str): 檔案名稱
+            collect_fields (bool): 是否收集欄位索引的資料列，見 field_rows
+        """
+        self.name = name
+        self.ok = False
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.forms = 0
+        self.fields = 0
+        # 是否改寫了輸出檔案；內容與既有檔案相同時為False
+        self.written = False
+        # 字串共用估計節省的位元組數，見 interning.InternTable
+        self.interned_bytes = 0
+        # 原始表單與欄位的欄位索引資料列，只在更新欄位索引時收集，不列入報告
+        self.field_rows: Optional[List[FieldRow]] = [] if collect_fields else None
+        self.error: Optional[str] = None
+        self._last = time.perf_counter()
+
+    def __repr__(self) -> str:
+        return f"FileMetrics({self.name!r}, ok={self.ok})"
+
+    def lap(self, stage: str):
+        """
+        將自上次計時以來的耗時累計到指定階段
+
+        Args:
+            stage (str): 階段名稱，見 STAGES
+        """
+        now = time.perf_counter()
+        self.stages[stage] += now - self._last
+        self._last = now
+
+    def count_form(self, form: Dict[str, Any]):
+        """
+        累計處理的表單與欄位數量，並依需要收集欄位索引的資料列
+
+        Args:
+            form (dict): 原始表單資料
+        """
+        if self.field_rows is not None:
+            self.field_rows.extend(form_rows(self.forms, form))
+        self.forms += 1
+        self.fields += len(form.get("formFields") or [])
+
+    def fail(self, error: Union[str, Exception]):
+        """
+        記錄失敗原因
+
+        Args:
+            error (str | Exception): 失敗原因
+        """
+        self.ok = False
+        self.error = str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """返回可輸出為JSON的指標"""
+        return {
+            "name": self.name,
+            "ok": self.ok,
+            "error": self.error,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "forms": self.forms,
+            "fields": self.fields,
+            "written": self.written,
+            "interned_bytes": self.interned_bytes,
+            "stages": {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+        }
+
+
+class RunMetrics:
+    """一次執行（merge / optimize / all）的彙總指標"""
+
+    def __init__(self, command: str, **settings: Any):
+        """
+        初始化執行指標並開始計時
+
+        Args:
+            command (str): 命令名稱
+            **settings: 執行設定，例如 json_backend、output_format、jobs
+        """
+        self.command = command
+        self.settings = settings
+        self.started = datetime.now()
+        self.files: List[FileMetrics] = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 增量建置快取略過的檔案名稱
+        self.skipped: List[str] = []
+        # --where 沒有選取、不在這次處理範圍內的檔案名稱
+        self.unselected: List[str] = []
+        # 輸入檔案的數量、雜湊與分片，見 sharding.describe_inputs
+        self.inputs: Optional[Dict[str, Any]] = None
+        self.wall_seconds = 0.0
+        self._start = time.perf_counter()
+
+    def add(self, results: Iterable[FileMetrics]):
+        """
+        加入檔案指標
+
+        Args:
+            results (iterable): 檔案指標
+        """
+        self.files.extend(results)
+
+    def finish(self, cache_hits: int = 0, cache_misses: int = 0, skipped: Iterable[str] = (),
+               unselected: Iterable[str] = ()):
+        """
+        結束計時並記錄增量建置快取的命中數
+
+        Args:
+            cache_hits (int): 快取命中（跳過處理）的檔案數量
+            cache_misses (int): 快取未命中（重新處理）的檔案數量
+            skipped (iterable): 快取命中的檔案名稱，合併分片報告時用來確認每個檔案都有處理
+            unselected (iterable): --where 沒有選取的檔案名稱，不計入處理或略過
+        """
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.skipped = list(skipped)
+        self.unselected = list(unselected)
+        self.wall_seconds = time.perf_counter() - self._start
+
+    @property
+    def failed_files(self) -> List[str]:
+        """處理失敗的檔案名稱"""
+        return [f.name for f in self.files if not f.ok]
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        彙總所有檔案的指標
+
+        Returns:
+            dict: 彙總指標
+        """
+        stages = dict.fromkeys(STAGES, 0.0)
+        for file_metrics in self.files:
+            for stage, seconds in file_metrics.stages.items():
+                stages[stage] += seconds
+
+        return {
+            "files": self.cache_hits + len(self.files),
+            "processed": sum(f.ok for f in self.files),
+            "failed": len(self.failed_files),
+            "skipped": self.cache_hits,
+            "unselected": len(self.unselected),
+            "written": sum(f.ok and f.written for f in self.files),
+            "unchanged": sum(f.ok and not f.written for f in self.files),
+            "bytes_in": sum(f.bytes_in for f in self.files),
+            "bytes_out": sum(f.bytes_out for f in self.files),
+            "forms": sum(f.forms for f in self.files),
+            "fields": sum(f.fields for f in self.files),
+            "interned_bytes": sum(f.interned_bytes for f in self.files),
+            "stages": {stage: round(seconds, 6) for stage, seconds in stages.items()},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """返回可輸出為JSON的報告"""
+        return {
+            "command": self.command,
+            "settings": self.settings,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cache": {"hits": self.cache_hits, "misses": self.cache_misses},
+            "inputs": self.inputs,
+            "totals": self.totals(),
+            "files": [f.to_dict() for f in self.files],
+            "skipped": self.skipped,
+            "unselected": self.unselected,
+        }
+
+    def save(self, path: Union[str, Path]):
+        """
+        將報告寫入JSON檔案
+
+        Args:
+            path (Path): 報告檔案路徑
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temp_path, path)
+        logging.info(f"已儲存處理指標: {path}")
+
+    def log_summary(self):
+        """在日誌中輸出各階段耗時與輸入輸出量"""
+        totals = self.totals()
+        stages = "、".join(f"{_STAGE_NAMES[stage]} {seconds:.3f} 秒"
+                          for stage, seconds in totals["stages"].items())
+        logging.info(f"各階段耗時：{stages}")
+        logging.info(f"讀取 {totals['bytes_in']} 位元組，處理 {totals['forms']} 個表單、"
+                     f"{totals['fields']} 個欄位，總耗時 {self.wall_seconds:.3f} 秒")
+        logging.info(f"輸出檔案：改寫 {totals['written']} 個，內容未變更 {totals['unchanged']} 個")
+        if self.settings.get("intern_strings"):
+            logging.info(f"字串共用：解析結果節省約 {totals['interned_bytes']} 位元組")
+
+
+@contextmanager
+def profiled(path: Optional[Union[str, Path]] = None) -> Iterator[None]:
+    """
+    以 cProfile 剖析區塊內的執行，結束時輸出剖析檔
+
+    只剖析目前行程；使用多個工作行程時，工作行程內的處理不會出現在剖析結果中。
+
+    Args:
+        path (Path): 剖析檔路徑，None 表示不剖析
+    """
+    if not path:
+        yield
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(path))
+        logging.info(f"已儲存效能剖析檔: {path}（可用 python -m pstats {path} 檢視）")
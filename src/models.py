@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+精簡的記憶體資料模型
+功能：依C#類別結構描述（formdetail_schema.json）產生使用 __slots__ 的 FormDetail / Form / FormField 類別，
+每個物件只保存屬性值而不保存鍵，在記憶體中保留大量表單時比巢狀字典節省空間；
+模型可與解析後的JSON快速互相轉換，並提供唯讀的映射介面供投影器直接讀取；
+合併、序列化等其他處理先以 to_dict 轉回字典
+"""
+
+import argparse
+import tracemalloc
+from abc import abstractmethod
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Type
+
+from json_codec import JSON_BACKENDS, get_codec
+from schema import FORM, FORM_DETAIL, FORM_FIELD, ContractSchema, TypeSpec
+
+# 未設定的屬性；__slots__ 屬性未設定時以 AttributeError 表示鍵不存在
+_MISSING = object()
+
+# 每個類型最多共用的鍵順序數量
+_MAX_SHARED_ORDERS = 4096
+
+# 已產生的模型類別，以結構描述檔路徑為鍵
+_model_sets: Dict[Optional[str], "ModelSet"] = {}
+
+
+class Model(Mapping):
+    """
+    所有模型類別的基底類別
+
+    結構描述宣告的欄位與擴展資料的鍵存放在 __slots__ 中，其餘的鍵以 (鍵, 值, 鍵, 值, ...) 的形式
+    存放在 _extra 元組，比每個物件各有一個字典更精簡；未設定的屬性代表鍵不存在。
+    原始資料的鍵順序存放在 _order 元組，鍵順序相同的物件共用同一個元組，
+    因此轉回JSON時鍵與順序都與原始資料相同。
+    """
+
+    __slots__ = ("_extra", "_order")
+
+    # 由 ModelSet 產生類別時設定
+    type_name = ""
+    _slot_set: frozenset = frozenset()
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Model":
+        """
+        由解析後的JSON建立模型，巢狀的清單元素一併轉換；由 ModelSet 依結構描述產生
+
+        Args:
+            data (dict): JSON物件
+
+        Returns:
+            Model: 模型
+        """
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        轉回可序列化的JSON物件，巢狀的模型一併轉換；由 ModelSet 依結構描述產生
+
+        Returns:
+            dict: JSON物件
+        """
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._slot_set:
+            return getattr(self, key, default)
+        extra = getattr(self, "_extra", ())
+        for index in range(0, len(extra), 2):
+            if extra[index] == key:
+                return extra[index + 1]
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._slot_set:
+            return hasattr(self, key)
+        return key in getattr(self, "_extra", ())[::2]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __repr__(self) -> str:
+        return f"{self.type_name}({self.to_dict()!r})"
+
+
+def _slot_names(type_spec: TypeSpec) -> List[str]:
+    """
+    取得類型的 __slots__ 名稱：宣告的欄位、擴展資料名稱與擴展資料的鍵
+
+    不是合法識別字或與映射介面的方法同名的鍵無法作為屬性，存放在 _extra 中。
+    """
+    names = [*type_spec.field_names, type_spec.extension_name or "", *type_spec.extension_keys]
+    return [name for name in dict.fromkeys(names)
+            if name and name.isidentifier() and not hasattr(Model, name)]
+
+
+def _shared_order(orders: Dict[tuple, tuple], keys: tuple) -> tuple:
+    """取得與 keys 相同的共用鍵順序元組；不同的鍵順序過多時不再共用，避免共用表無限增長"""
+    order = orders.get(keys)
+    if order is None:
+        order = keys
+        if len(orders) < _MAX_SHARED_ORDERS:
+            orders[keys] = keys
+    return order
+
+
+def _generate_model_source(type_spec: TypeSpec, slots: List[str], item_types: Dict[str, str]) -> List[str]:
+    """產生單一類型的 from_dict 與 to_dict 原始碼"""
+    name = type_spec.name
+    lines = [
+        f"def from_dict_{name}(data):",
+        f"    obj = new({name})",
+        "    get = data.get",
+        f"    obj._order = order(ORDERS_{name}, tuple(data))",
+        "    found = 0",
+    ]
+    for slot in slots:
+        lines.append(f"    if (value := get({slot!r}, MISSING)) is not MISSING:")
+        item = item_types.get(slot)
+        if item:
+            lines.append("        if type(value) is list:")
+            lines.append(f"            value = [from_dict_{item}(v) if type(v) is dict else v for v in value]")
+        lines.append(f"        obj.{slot} = value")
+        lines.append("        found += 1")
+    lines.extend([
+        "    if found < len(data):",
+        f"        obj._extra = tuple(x for k, v in data.items() if k not in SLOTS_{name} for x in (k, v))",
+        "    return obj",
+        "",
+        f"def to_dict_{name}(obj):",
+        "    out = {}",
+        "    extra = getattr(obj, '_extra', None)",
+        "    position = 1",
+        "    for key in obj._order:",
+    ])
+    # 依原始資料的鍵順序輸出；未宣告的鍵在 _extra 中的順序與 _order 相同，依序取值
+    for slot, item in item_types.items():
+        lines.extend([
+            f"        if key == {slot!r}:",
+            f"            value = obj.{slot}",
+            "            if type(value) is list:",
+            f"                value = [to_dict_{item}(v) if type(v) is {item} else v for v in value]",
+            f"            out[{slot!r}] = value",
+            "            continue",
+        ])
+    lines.extend([
+        f"        if key in SLOTS_{name}:",
+        "            out[key] = getattr(obj, key)",
+        "        else:",
+        "            out[key] = extra[position]",
+        "            position += 2",
+        "    return out",
+        "",
+    ])
+    return lines
+
+
+class ModelSet:
+    """由契約描述產生的所有模型類別"""
+
+    def __init__(self, schema: ContractSchema):
+        """
+        產生模型類別並編譯其轉換函數
+
+        Args:
+            schema (ContractSchema): 契約描述
+        """
+        namespace: Dict[str, Any] = {"MISSING": _MISSING, "new": object.__new__, "order": _shared_order}
+        slots = {name: _slot_names(type_spec) for name, type_spec in schema.types.items()}
+        lines: List[str] = []
+        for name, type_spec in schema.types.items():
+            namespace[f"SLOTS_{name}"] = frozenset(slots[name])
+            namespace[f"ORDERS_{name}"] = {}
+            item_types = {field.name: field.item for field in type_spec.fields
+                          if field.item and field.name in slots[name]}
+            lines.extend(_generate_model_source(type_spec, slots[name], item_types))
+
+        # 轉換函數在呼叫時才以類別名稱取得類別，因此先編譯，再將轉換函數放入類別定義
+        self.source = "\n".join(lines)
+        code = compile(self.source, "<formdetail-models>", "exec")
+        exec(code, namespace)  # nosec B102 - 只執行由結構描述產生的程式碼
+
+        self._classes: Dict[str, Type[Model]] = {}
+        for name in schema.types:
+            cls = type(name, (Model,), {
+                "__slots__": tuple(slots[name]),
+                "__module__": __name__,
+                "type_name": name,
+                "_slot_set": frozenset(slots[name]),
+                "from_dict": staticmethod(namespace[f"from_dict_{name}"]),
+                "to_dict": namespace[f"to_dict_{name}"],
+            })
+            self._classes[name] = namespace[name] = cls
+
+    def get(self, type_name: str) -> Type[Model]:
+        """
+        取得指定類型的模型類別
+
+        Args:
+            type_name (str): 類型名稱，例如 FormField
+
+        Returns:
+            type: 模型類別
+        """
+        return self._classes[type_name]
+
+    @property
+    def form_detail(self) -> Type[Model]:
+        """FormDetail 模型類別"""
+        return self._classes[FORM_DETAIL]
+
+    @property
+    def form(self) -> Type[Model]:
+        """Form 模型類別"""
+        return self._classes[FORM]
+
+    @property
+    def form_field(self) -> Type[Model]:
+        """FormField 模型類別"""
+        return self._classes[FORM_FIELD]
+
+
+def get_models(schema_path: Optional[str] = None) -> ModelSet:
+    """
+    取得模型類別，每個行程的每個結構描述檔只產生一次
+
+    同一個結構描述必須使用相同的類別，轉換函數中的型別比較才會一致。
+
+    Args:
+        schema_path (str): 結構描述檔路徑，預設為 formdetail_schema.json
+
+    Returns:
+        ModelSet: 模型類別
+    """
+    schema_path = str(schema_path) if schema_path else None
+    models = _model_sets.get(schema_path)
+    if models is None:
+        models = _model_sets[schema_path] = ModelSet(ContractSchema.load(schema_path))
+    return models
+
+
+def measure_memory(contents: Sequence[bytes], json_backend: str = "json",
+                   schema_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    以 tracemalloc 量測同一批FormDetail以巢狀字典與模型保存在記憶體中的大小
+
+    Args:
+        contents (list): 每個檔案的內容
+        json_backend (str): 解析使用的JSON後端
+        schema_path (str): 結構描述檔路徑
+
+    Returns:
+        dict: {"dict_bytes", "model_bytes"}
+    """
+    codec = get_codec(json_backend)
+    from_dict = get_models(schema_path).form_detail.from_dict
+
+    def retained(build) -> int:
+        tracemalloc.start()
+        try:
+            documents = build()
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del documents
+        return size
+
+    return {
+        "dict_bytes": retained(lambda: [codec.loads(content) for content in contents]),
+        "model_bytes": retained(lambda: [from_dict(codec.loads(content)) for content in contents]),
+    }
+
+
+def main():
+    """
+    主函數 - 比較FormDetail檔案以巢狀字典與模型保存在記憶體中的大小
+    """
+    parser = argparse.ArgumentParser(description="比較巢狀字典與 __slots__ 模型的記憶體用量")
+    parser.add_argument("files", nargs="+", help="要量測的JSON檔案")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="json",
+                        help="JSON後端（預設 json）")
+    parser.add_argument("--schema", metavar="PATH", help="C#類別結構描述檔")
+    args = parser.parse_args()
+
+    contents = [Path(file_name).read_bytes() for file_name in args.files]
+    result = measure_memory(contents, args.json_backend, args.schema)
+
+    dict_mb = result["dict_bytes"] / 1024 / 1024
+    model_mb = result["model_bytes"] / 1024 / 1024
+    print(f"巢狀字典: {dict_mb:.2f} MB")
+    print(f"模型:     {model_mb:.2f} MB（{result['model_bytes'] / (result['dict_bytes'] or 1):.1%}）")
+
+
+if __name__ == "__main__":
+    main()
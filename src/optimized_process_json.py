@@ -6,18 +6,29 @@ JSON檔案處理腳本 - 針對C# FormDetail類別結構優化
 
 import json
 import logging
+from collections.abc import Mapping
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-# 設定日誌
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('process_json.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from types import GeneratorType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from archives import is_archive
+from build_cache import make_fingerprint
+from interning import get_intern_table
+from json_codec import StdlibCodec, get_codec, resolve_backend
+from json_patch import JsonPatch, Operation, ProjectionPatcher, child_pointer, get_patcher
+from json_stream import iter_object_members
+from logging_setup import configure_logging, file_logger, flush_logging
+from metrics import FileMetrics, RunMetrics
+from options import INFLIGHT_MB
+from output_formats import OutputFormat
+from output_writer import temp_path_for
+from runner import run_all_files
+from schema import FORM, Projector, get_projector, schema_digest
+from sharding import Shard
+
+# 處理結果：處理後的資料，或輸出 JSON Patch 時描述變更的操作陣列
+ProcessedData = Union[Dict[str, Any], List[Operation]]
 
 class FormFieldProcessor:
     """FormField處理器，對應C# FormField類別"""
@@ -25,7 +36,7 @@ class FormFieldProcessor:
     @staticmethod
     def process_form_field(field_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        處理單個FormField，確保符合C#類別定義
+        處理單個FormField，確保符合C#類別定義（欄位規則見 formdetail_schema.json）
 
         Args:
             field_data (dict): 原始欄位資料
@@ -33,54 +44,7 @@ class FormFieldProcessor:
         Returns:
             dict: 處理後的欄位資料
         """
-        processed_field = {}
-
-        # 必填欄位
-        processed_field["formFieldId"] = field_data.get("formFieldId", "")
-        processed_field["fieldName"] = field_data.get("fieldName", "")
-        processed_field["fieldType"] = field_data.get("fieldType", "")
-        processed_field["isReadonly"] = field_data.get("isReadonly", False)
-        processed_field["isVisible"] = field_data.get("isVisible", False)
-        processed_field["infoDisplayCondition"] = field_data.get("infoDisplayCondition", False)
-        processed_field["sort"] = field_data.get("sort", 0)
-        processed_field["specialFieldCode"] = field_data.get("specialFieldCode", "")
-
-        # 可選欄位 - 只保留非空值
-        if field_data.get("defaultValue") is not None:
-            processed_field["defaultValue"] = field_data["defaultValue"]
-
-        if field_data.get("relatedSource") is not None:
-            processed_field["relatedSource"] = field_data["relatedSource"]
-
-        if field_data.get("fieldOptions") and len(field_data["fieldOptions"]) > 0:
-            processed_field["fieldOptions"] = field_data["fieldOptions"]
-
-        if field_data.get("fieldGroup"):
-            processed_field["fieldGroup"] = field_data["fieldGroup"]
-
-        if field_data.get("parentField"):
-            processed_field["parentField"] = field_data["parentField"]
-
-        if field_data.get("displayCondition") is not None:
-            processed_field["displayCondition"] = field_data["displayCondition"]
-
-        if field_data.get("relatedFormsExtend"):
-            processed_field["relatedFormsExtend"] = field_data["relatedFormsExtend"]
-
-        if field_data.get("flowNodeCode"):
-            processed_field["flowNodeCode"] = field_data["flowNodeCode"]
-
-        # 處理擴展資料 (ExtensionData)
-        extension_fields = {}
-        for key, value in field_data.items():
-            if key not in processed_field and value is not None and key in ["colSpan", "translation"]:
-                # 保留額外的欄位作為擴展資料
-                extension_fields[key] = value
-
-        if extension_fields:
-            processed_field["extensionData"] = extension_fields
-
-        return processed_field
+        return get_projector().form_field(field_data)
 
 class FormProcessor:
     """Form處理器，對應C# Form類別"""
@@ -88,7 +52,7 @@ class FormProcessor:
     @staticmethod
     def process_form(form_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        處理單個Form，確保符合C#類別定義
+        處理單個Form，確保符合C#類別定義（欄位規則見 formdetail_schema.json）
 
         Args:
             form_data (dict): 原始表單資料
@@ -96,46 +60,75 @@ class FormProcessor:
         Returns:
             dict: 處理後的表單資料
         """
-        processed_form = {}
-
-        # 必填欄位
-        processed_form["formId"] = form_data.get("formId", "")
-        processed_form["formName"] = form_data.get("formName", "")
-        processed_form["description"] = form_data.get("description", "")
-
-        # 處理FormFields
-        if "formFields" in form_data and form_data["formFields"]:
-            processed_form["formFields"] = [
-                FormFieldProcessor.process_form_field(field)
-                for field in form_data["formFields"]
-            ]
-        else:
-            processed_form["formFields"] = []
-
-        # 處理FieldGroups
-        if "fieldGroups" in form_data and form_data["fieldGroups"]:
-            processed_form["fieldGroups"] = form_data["fieldGroups"]
-        else:
-            processed_form["fieldGroups"] = []
-
-        return processed_form
+        return get_projector().form(form_data)
 
 class FormDetailProcessor:
     """FormDetail處理器，對應C# FormDetail類別"""
 
-    def __init__(self, input_dir="add", output_dir="out"):
+    # 處理指標報告中的命令名稱
+    command = "optimize"
+
+    def __init__(self, input_dir="add", output_dir="out", output_format: Optional[OutputFormat] = None,
+                 json_backend="auto", schema_path: Optional[str] = None, intern_strings: bool = False):
         """
         初始化處理器
 
         Args:
-            input_dir (str): 輸入資料夾路徑
-            output_dir (str): 輸出資料夾路徑
+            input_dir (str): 輸入資料夾路徑，或 .zip / .tar / .tar.gz 封存檔
+            output_dir (str): 輸出資料夾路徑，或要寫入的 .zip / .tar / .tar.gz 封存檔；
+                None 表示只在記憶體中處理（見 api.Transformer），不建立輸出資料夾
+            output_format (OutputFormat): 輸出格式，預設為排版JSON
+            json_backend (str): JSON後端（auto / json / orjson）
+            schema_path (str): C#類別結構描述檔路徑，預設為內建的 formdetail_schema.json
+            intern_strings (bool): 解析後是否以字串共用表替換重複的鍵與短字串值，見 interning.InternTable
         """
         self.input_dir = Path(input_dir)
-        self.output_dir = Path(output_dir)
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.output_format = output_format or OutputFormat()
+        self.json_backend = resolve_backend(json_backend)
+        self.schema_path = str(schema_path) if schema_path else None
+        self.intern_strings = intern_strings
+        # 更新欄位索引時在處理每個檔案時順便收集索引資料列，見 field_index.FieldIndex.record
+        self.index_fields = False
+
+        # 在啟動時編譯結構描述，格式錯誤會立即回報
+        get_projector(self.schema_path)
 
         # 確保輸出資料夾存在
-        self.output_dir.mkdir(exist_ok=True)
+        if self.output_dir is not None and not is_archive(self.output_dir):
+            self.output_dir.mkdir(exist_ok=True)
+
+    @property
+    def uses_archives(self) -> bool:
+        """輸入或輸出是否為封存檔；此時逐一處理封存檔成員，不使用增量建置快取"""
+        return is_archive(self.input_dir) or is_archive(self.output_dir)
+
+    @property
+    def codec(self) -> StdlibCodec:
+        """目前使用的JSON編解碼器"""
+        return get_codec(self.json_backend)
+
+    @property
+    def projector(self) -> Projector:
+        """由結構描述編譯而成的投影器"""
+        return get_projector(self.schema_path)
+
+    @property
+    def patcher(self) -> ProjectionPatcher:
+        """依結構描述產生優化步驟 JSON Patch 操作的產生器"""
+        return get_patcher(self.schema_path)
+
+    def transform_form(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        轉換FormDetail中的單個Form，子類別可覆寫以加入前置處理
+
+        Args:
+            form_data (dict): 原始表單資料
+
+        Returns:
+            dict: 處理後的表單資料
+        """
+        return self.projector.form(form_data)
 
     def process_form_detail(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -149,10 +142,10 @@ class FormDetailProcessor:
         """
         processed_data = {}
 
-        # 處理Forms陣列
-        if "forms" in data and data["forms"]:
+        # 處理Forms陣列；頂層不是物件時（例如陣列）沒有forms
+        if isinstance(data, Mapping) and data.get("forms"):
             processed_data["forms"] = [
-                FormProcessor.process_form(form)
+                self.transform_form(form)
                 for form in data["forms"]
             ]
         else:
@@ -160,96 +153,415 @@ class FormDetailProcessor:
 
         return processed_data
 
-    def process_json_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+    def patch_form(self, form_data: Dict[str, Any], patch: JsonPatch, pointer: str):
+        """
+        記錄轉換單個Form的 JSON Patch 操作，對應 transform_form；子類別可覆寫以加入前置處理
+
+        Args:
+            form_data (dict): 原始表單資料
+            patch (JsonPatch): 記錄操作的 JSON Patch
+            pointer (str): 表單的 JSON Pointer，例如 /forms/0
+        """
+        self.patcher.diff(FORM, form_data, pointer, patch)
+
+    def form_detail_patch(self, data: Dict[str, Any]) -> JsonPatch:
+        """
+        記錄將FormDetail資料轉換為 process_form_detail 結果的 JSON Patch 操作，不產生轉換後的資料
+
+        Args:
+            data (dict): 原始資料
+
+        Returns:
+            JsonPatch: 依序套用到原始資料即得到處理結果的操作（物件的鍵順序除外）
+        """
+        patch = JsonPatch()
+
+        # 頂層不是物件時（例如陣列）沒有forms，與 process_form_detail 相同以空的forms陣列取代整份文件
+        if not isinstance(data, Mapping):
+            patch.replace("", {"forms": []})
+            return patch
+
+        # 只保留forms陣列，其他頂層成員移除
+        for key in data:
+            if key != "forms":
+                patch.remove(child_pointer("", key))
+
+        forms = data.get("forms")
+        if forms:
+            for index, form in enumerate(forms):
+                self.patch_form(form, patch, f"/forms/{index}")
+        elif "forms" not in data:
+            patch.add("/forms", [])
+        elif type(forms) is not list:
+            patch.replace("/forms", [])
+
+        return patch
+
+    def process_json_file(self, file_path: Path, metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
         """
         處理單個JSON檔案
 
         Args:
             file_path (Path): JSON檔案路徑
+            metrics (FileMetrics): 記錄讀取、解析與轉換階段的指標
 
         Returns:
-            dict: 處理後的資料，失敗時返回None
+            dict | list: 處理後的資料或 JSON Patch 操作，失敗時返回None
         """
+        metrics = metrics or FileMetrics(file_path.name)
+        file_logger.info("正在處理檔案: %s", file_path.name)
+
         try:
-            with open(file_path, encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", file_path.name, e)
+            metrics.fail(e)
+            return None
+        metrics.lap("read")
 
-            logging.info(f"正在處理檔案: {file_path.name}")
+        return self.process_json_content(content, file_path.name, metrics)
 
-            # 處理資料
-            processed_data = self.process_form_detail(data)
+    def process_json_content(self, content: bytes, name: str,
+                             metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
+        """
+        處理已讀取的JSON內容，例如封存檔的成員
 
-            return processed_data
+        Args:
+            content (bytes): JSON內容
+            name (str): 檔案名稱，用於日誌與指標
+            metrics (FileMetrics): 記錄解析與轉換階段的指標
+
+        Returns:
+            dict | list: 處理後的資料，輸出 JSON Patch 時為轉換操作的陣列；失敗時返回None
+        """
+        metrics = metrics or FileMetrics(name)
+        metrics.bytes_in = len(content)
 
+        try:
+            data = self.codec.loads(content)
+            if self.intern_strings:
+                data, metrics.interned_bytes = get_intern_table().intern(data)
+            metrics.lap("parse")
         except json.JSONDecodeError as e:
-            logging.error(f"JSON解析錯誤 {file_path.name}: {e}")
+            file_logger.error("JSON解析錯誤 %s: %s", name, e)
+            metrics.fail(f"JSON解析錯誤: {e}")
             return None
         except Exception as e:
-            logging.error(f"處理檔案時發生錯誤 {file_path.name}: {e}")
+            file_logger.error("處理檔案時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
+            return None
+
+        return self.process_document(data, name, metrics)
+
+    def process_document(self, data: Any, name: str, metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
+        """
+        轉換已解析的JSON資料
+
+        Args:
+            data (dict): 解析後的FormDetail資料
+            name (str): 檔案名稱，用於日誌與指標
+            metrics (FileMetrics): 記錄轉換階段的指標
+
+        Returns:
+            dict | list: 處理後的資料，輸出 JSON Patch 時為轉換操作的陣列；失敗時返回None
+        """
+        metrics = metrics or FileMetrics(name)
+
+        try:
+            # 處理資料
+            # 頂層不是物件時（例如陣列或數字）沒有forms，輸出空的forms陣列
+            if isinstance(data, dict):
+                for form in data.get("forms") or []:
+                    metrics.count_form(form)
+            if self.output_format.writes_patch:
+                processed_data = self.form_detail_patch(data).operations
+            else:
+                processed_data = self.process_form_detail(data)
+            metrics.lap("transform")
+
+            return processed_data
+
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
             return None
 
-    def save_processed_file(self, processed_data: Dict[str, Any], original_filename: str):
+    def output_path(self, original_filename: str) -> Path:
+        """
+        取得輸出檔案路徑，副檔名依輸出格式而定
+
+        Args:
+            original_filename (str): 原始檔案名稱
+
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        return self.output_dir / self.output_format.output_name(original_filename)
+
+    def save_processed_file(self, processed_data: ProcessedData, original_filename: str,
+                            metrics: Optional[FileMetrics] = None) -> Optional[int]:
         """
         儲存處理後的檔案
 
         Args:
-            processed_data (dict): 處理後的資料
+            processed_data (dict | list): 處理後的資料或 JSON Patch 操作
             original_filename (str): 原始檔案名稱
+            metrics (FileMetrics): 記錄序列化與寫入階段的指標
+
+        Returns:
+            int: 輸出檔案的位元組數，失敗時返回None
         """
-        output_path = self.output_dir / original_filename
+        metrics = metrics or FileMetrics(original_filename)
+        output_path = self.output_path(original_filename)
 
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(processed_data, f, ensure_ascii=False, indent=2)
+            payload = self.output_format.encode(self.output_format.serialize(processed_data, self.codec))
+            metrics.lap("serialize")
+            metrics.written = self.output_format.write_bytes(payload, output_path)
+            metrics.lap("write")
 
-            logging.info(f"已儲存處理後的檔案: {output_path}")
+            if metrics.written:
+                file_logger.info("已儲存處理後的檔案: %s", output_path)
+            else:
+                file_logger.info("內容未變更，保留既有檔案: %s", output_path)
+            return len(payload)
 
         except Exception as e:
-            logging.error(f"儲存檔案時發生錯誤 {output_path}: {e}")
+            file_logger.error("儲存檔案時發生錯誤 %s: %s", output_path, e)
+            metrics.fail(e)
+            return None
 
-    def process_all_files(self):
+    def stream_json_file(self, file_path: Path, metrics: Optional[FileMetrics] = None) -> Optional[int]:
         """
-        處理所有JSON檔案
+        以串流方式處理單個JSON檔案，逐一讀取、處理並寫出每個Form
+
+        記憶體用量取決於最大的單一Form，而非整個檔案；輸出內容與一般模式完全相同。
+        串流模式下讀取的耗時計入解析階段，寫入（含壓縮）的耗時計入序列化階段。
+
+        Args:
+            file_path (Path): JSON檔案路徑
+            metrics (FileMetrics): 記錄各階段的指標
+
+        Returns:
+            int: 輸出檔案的位元組數，失敗時返回None
         """
-        if not self.input_dir.exists():
-            logging.error(f"輸入資料夾不存在: {self.input_dir}")
-            return
+        metrics = metrics or FileMetrics(file_path.name)
+        output_path = self.output_path(file_path.name)
+        temp_path = temp_path_for(output_path)
 
-        json_files = list(self.input_dir.glob("*.json"))
+        try:
+            file_logger.info("正在以串流模式處理檔案: %s", file_path.name)
+            metrics.bytes_in = file_path.stat().st_size
+
+            with open(file_path, encoding='utf-8') as fin, \
+                    self.output_format.open(temp_path) as fout:
+                writer = self.output_format.create_writer(fout, self.codec)
+                writer.begin_array("forms")
+                metrics.lap("write")
+
+                # FormDetail只保留forms陣列，其他頂層成員直接略過；頂層不是物件時與一般模式相同輸出空的forms陣列
+                for key, value in iter_object_members(fin, "forms", skip_non_object=True):
+                    metrics.lap("parse")
+                    if key == "forms" and isinstance(value, GeneratorType):
+                        for form in value:
+                            metrics.lap("parse")
+                            metrics.count_form(form)
+                            processed_form = self.transform_form(form)
+                            metrics.lap("transform")
+                            writer.write_item(processed_form)
+                            metrics.lap("serialize")
+
+                writer.end_array()
+                writer.close()
+            metrics.lap("serialize")
+
+            metrics.written = self.output_format.replace(temp_path, output_path)
+            metrics.lap("write")
+            if metrics.written:
+                file_logger.info("已儲存處理後的檔案: %s", output_path)
+            else:
+                file_logger.info("內容未變更，保留既有檔案: %s", output_path)
+            return output_path.stat().st_size
 
-        if not json_files:
-            logging.warning(f"在 {self.input_dir} 中沒有找到JSON檔案")
-            return
+        except json.JSONDecodeError as e:
+            file_logger.error("JSON解析錯誤 %s: %s", file_path.name, e)
+            metrics.fail(f"JSON解析錯誤: {e}")
+        except Exception as e:
+            file_logger.error("處理檔案時發生錯誤 %s: %s", file_path.name, e)
+            metrics.fail(e)
 
-        logging.info(f"找到 {len(json_files)} 個JSON檔案")
+        if temp_path.exists():
+            temp_path.unlink()
+        return None
 
-        processed_count = 0
+    def process_file(self, json_file: Path, stream: bool = False) -> FileMetrics:
+        """
+        處理並儲存單個JSON檔案，可在工作行程中執行
 
-        for json_file in json_files:
-            processed_data = self.process_json_file(json_file)
+        Args:
+            json_file (Path): JSON檔案路徑
+            stream (bool): 是否使用串流模式，輸出 JSON Patch 時不使用
 
+        Returns:
+            FileMetrics: 處理結果與各階段指標
+        """
+        metrics = FileMetrics(json_file.name, self.index_fields)
+
+        # JSON Patch 需要完整的輸入才能記錄每個操作的位置，一律完整讀取
+        if stream and not self.output_format.writes_patch:
+            bytes_written = self.stream_json_file(json_file, metrics)
+        else:
+            processed_data = self.process_json_file(json_file, metrics)
+            bytes_written = None
             if processed_data is not None:
-                self.save_processed_file(processed_data, json_file.name)
-                processed_count += 1
+                bytes_written = self.save_processed_file(processed_data, json_file.name, metrics)
+
+        metrics.ok = bytes_written is not None
+        metrics.bytes_out = bytes_written or 0
+        return metrics
+
+    def process_member(self, member: Tuple[str, bytes]) -> Tuple[FileMetrics, Optional[bytes]]:
+        """
+        處理封存檔的單個成員並返回輸出內容，可在工作行程中執行；寫入由呼叫端負責
+
+        Args:
+            member (tuple): (成員名稱, 內容)
+
+        Returns:
+            tuple: (處理指標, 依輸出格式序列化並壓縮後的內容，失敗時為None)
+        """
+        name, content = member
+        metrics = FileMetrics(name, self.index_fields)
+        file_logger.info("正在處理檔案: %s", name)
+
+        processed_data = self.process_json_content(content, name, metrics)
+        if processed_data is None:
+            return metrics, None
+
+        try:
+            payload = self.output_format.encode(self.output_format.serialize(processed_data, self.codec))
+        except Exception as e:
+            file_logger.error("序列化時發生錯誤 %s: %s", name, e)
+            metrics.fail(e)
+            return metrics, None
+        metrics.lap("serialize")
+        return metrics, payload
+
+    def file_task(self, stream: bool = False, members: bool = False) -> Optional[Callable[[Any], Any]]:
+        """
+        返回處理單個檔案的函數，可傳給 run_batch 在工作行程中執行；
+        子類別可覆寫以先載入其他輸入資料
+
+        Args:
+            stream (bool): 是否使用串流模式
+            members (bool): 是否返回處理封存檔成員的函數，見 process_member
+
+        Returns:
+            callable: 處理單個檔案的函數，無法開始處理時返回None
+        """
+        if members:
+            return self.process_member
+        return partial(self.process_file, stream=stream)
+
+    def cache_fingerprint(self) -> str:
+        """
+        計算增量建置快取的設定指紋
+
+        Returns:
+            str: 設定指紋
+        """
+        return make_fingerprint("optimize", output_format=self.output_format.describe(),
+                                schema=schema_digest(self.schema_path))
+
+    def metrics_settings(self) -> Dict[str, Any]:
+        """
+        返回記錄在處理指標報告中的設定，子類別可覆寫以加入其他設定
 
-        logging.info(f"處理完成！成功處理 {processed_count}/{len(json_files)} 個檔案")
+        Returns:
+            dict: 設定
+        """
+        return {"json_backend": self.codec.name, "output_format": self.output_format.describe(),
+                "intern_strings": self.intern_strings}
+
+    def process_all_files(self, jobs: int = 1, stream: bool = False, force: bool = False,
+                          metrics_out: Optional[str] = None, shard: Optional[Shard] = None,
+                          async_io: bool = False,
+                          inflight_bytes: int = INFLIGHT_MB * 1024 * 1024, index_path: Optional[str] = None,
+                          where: Optional[Sequence[str]] = None) -> Optional[RunMetrics]:
+        """
+        處理所有JSON檔案
+
+        Args:
+            jobs (int): 平行處理的工作行程數量，0 表示使用所有CPU核心
+            stream (bool): 是否使用串流模式處理大型檔案
+            force (bool): 是否忽略增量建置快取，重新處理所有檔案
+            metrics_out (str): 處理指標JSON報告的輸出路徑
+            shard (Shard): 只處理屬於此分片的檔案，None 表示處理所有檔案
+            async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入（輸入與輸出為資料夾時）
+            inflight_bytes (int): 非同步 I/O 處理流程中已讀入、尚未寫完的位元組上限
+            index_path (str): 順便更新的欄位索引檔路徑，None 表示不更新索引
+            where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案，見 field_index.parse_where
 
-def main():
+        Returns:
+            RunMetrics: 處理指標，無法開始處理時返回None
+        """
+        task = self.file_task(stream, members=self.uses_archives or async_io)
+        if task is None:
+            return None
+
+        return run_all_files(self, self.command, task, "處理完成！", jobs=jobs, stream=stream, force=force,
+                             metrics_out=metrics_out, shard=shard, async_io=async_io,
+                             inflight_bytes=inflight_bytes, index_path=index_path, where=where)
+
+
+def main(jobs: int = 1, stream: bool = False, force: bool = False,
+         output_format: Optional[OutputFormat] = None, json_backend: str = "auto",
+         schema_path: Optional[str] = None, metrics_out: Optional[str] = None,
+         file_log_level: str = "info", intern_strings: bool = False, shard: Optional[Shard] = None,
+         input_dir: str = "add", output_dir: str = "out",
+         async_io: bool = False, inflight_mb: int = INFLIGHT_MB, index_path: Optional[str] = None,
+         where: Optional[Sequence[str]] = None):
     """
     主函數
+
+    Args:
+        jobs (int): 平行處理的工作行程數量
+        stream (bool): 是否使用串流模式
+        force (bool): 是否忽略增量建置快取
+        output_format (OutputFormat): 輸出格式
+        json_backend (str): JSON後端
+        schema_path (str): C#類別結構描述檔路徑
+        metrics_out (str): 處理指標JSON報告的輸出路徑
+        file_log_level (str): 每個檔案的日誌等級，off 表示只輸出執行摘要
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+        shard (Shard): 只處理屬於此分片的檔案
+        input_dir (str): 輸入資料夾或封存檔路徑
+        output_dir (str): 輸出資料夾或封存檔路徑
+        async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入
+        inflight_mb (int): 非同步 I/O 處理流程中已讀入、尚未寫完的資料上限（MB）
+        index_path (str): 順便更新的欄位索引檔路徑
+        where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案
     """
+    configure_logging("process_json.log", file_level=file_log_level)
+
     print("JSON檔案處理腳本啟動...")
     print("針對C# FormDetail類別結構優化")
     print("=" * 60)
 
     # 創建處理器實例
-    processor = FormDetailProcessor()
+    processor = FormDetailProcessor(input_dir=input_dir, output_dir=output_dir,
+                                    output_format=output_format, json_backend=json_backend,
+                                    schema_path=schema_path, intern_strings=intern_strings)
 
     # 處理所有檔案
-    processor.process_all_files()
+    processor.process_all_files(jobs=jobs, stream=stream, force=force, metrics_out=metrics_out, shard=shard,
+                                async_io=async_io, inflight_bytes=inflight_mb * 1024 * 1024,
+                                index_path=index_path, where=where)
+    flush_logging()
 
     print("=" * 60)
-    print("處理完成！請檢查out資料夾中的結果。")
+    print(f"處理完成！請檢查 {output_dir} 中的結果。")
     print("處理後的JSON檔案已優化以符合C#類別定義。")
 
 if __name__ == "__main__":
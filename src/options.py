@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+命令列選項常數
+功能：集中定義各命令可選用的值，命令列介面只需載入此模組即可建立參數，
+不必在啟動時載入處理模組
+"""
+
+# 合併策略：
+# - append: 直接附加所有欄位（預設，與舊版行為相同）
+# - replace: 以formFieldId比對，已存在的欄位整筆取代
+# - keep: 以formFieldId比對，已存在的欄位保留原值
+# - patch: 以formFieldId比對，已存在的欄位逐屬性覆寫
+MERGE_POLICIES = ("append", "replace", "keep", "patch")
+
+# 輸出格式與壓縮方式，見 output_formats.OutputFormat；patch 輸出由輸入變成處理結果的 JSON Patch
+OUTPUT_STYLES = ("pretty", "compact", "ndjson", "patch")
+COMPRESSIONS = ("none", "gzip", "xz")
+
+# JSON後端，見 json_codec.get_codec
+JSON_BACKENDS = ("auto", "json", "orjson")
+
+# 輸出檔案的同步寫入策略，見 output_writer.write_if_changed：
+# - none: 不呼叫 fsync，由作業系統決定何時寫入磁碟（預設）
+# - file: 取代輸出檔案前將暫存檔寫入磁碟
+# - full: 另外在取代後將輸出資料夾寫入磁碟，斷電後也保證看到新檔案
+FSYNC_POLICIES = ("none", "file", "full")
+
+# 每個檔案的日誌等級，off 表示只輸出執行摘要，見 logging_setup.configure_logging
+FILE_LOG_LEVELS = ("debug", "info", "warning", "error", "off")
+
+# 非同步 I/O 處理流程預設的在途位元組上限（MB），見 async_io.process_files_async
+INFLIGHT_MB = 64
+
+# 欄位索引預設的 SQLite 檔案，見 field_index.FieldIndex
+INDEX_FILE = "formdetails_index.sqlite"
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+輸出格式設定
+功能：提供排版JSON、緊湊JSON、NDJSON（每行一個form）與JSON Patch（RFC 6902）輸出，並可搭配gzip或xz串流壓縮
+"""
+
+import argparse
+import gzip
+import io
+import lzma
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+from json_codec import JSON_BACKENDS, StdlibCodec, get_codec
+from json_stream import NDJSONWriter, StreamingJSONWriter
+from options import COMPRESSIONS, FSYNC_POLICIES, OUTPUT_STYLES
+from output_writer import replace_if_changed, write_if_changed
+
+_STYLE_SUFFIXES = {"pretty": ".json", "compact": ".json", "ndjson": ".ndjson", "patch": ".patch.json"}
+
+# 輸出完整處理結果的格式；patch 輸出的是變更而非文件，不列入格式比較
+DOCUMENT_STYLES = tuple(style for style in OUTPUT_STYLES if style != "patch")
+_COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "xz": ".xz"}
+
+# gzip 壓縮等級，與 zlib 預設值相同，在速度與壓縮率之間取得平衡
+GZIP_LEVEL = 6
+
+
+class OutputFormat:
+    """輸出格式，決定輸出檔案的副檔名、序列化方式與壓縮方式"""
+
+    def __init__(self, style: str = "pretty", compression: str = "none", fsync: str = "none"):
+        """
+        初始化輸出格式
+
+        Args:
+            style (str): 序列化格式，見 OUTPUT_STYLES
+            compression (str): 壓縮方式，見 COMPRESSIONS
+            fsync (str): 同步寫入策略，見 FSYNC_POLICIES；不影響輸出內容
+        """
+        if style not in OUTPUT_STYLES:
+            raise ValueError(f"不支援的輸出格式: {style}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支援的壓縮方式: {compression}")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"不支援的同步寫入策略: {fsync}")
+
+        self.style = style
+        self.compression = compression
+        self.fsync = fsync
+
+    def __repr__(self) -> str:
+        return f"OutputFormat(style={self.style!r}, compression={self.compression!r}, fsync={self.fsync!r})"
+
+    def describe(self) -> str:
+        """返回格式名稱，例如 compact+gzip"""
+        if self.compression == "none":
+            return self.style
+        return f"{self.style}+{self.compression}"
+
+    @property
+    def writes_patch(self) -> bool:
+        """是否輸出由輸入變成處理結果的 JSON Patch，而非處理結果本身"""
+        return self.style == "patch"
+
+    def output_name(self, original_filename: str) -> str:
+        """
+        依輸出格式決定輸出檔案名稱
+
+        Args:
+            original_filename (str): 原始檔案名稱
+
+        Returns:
+            str: 輸出檔案名稱，例如 範例.json、範例.json.gz、範例.ndjson.xz、範例.patch.json
+        """
+        name = original_filename
+        if self.style in ("ndjson", "patch"):
+            name = str(Path(name).with_suffix(_STYLE_SUFFIXES[self.style]))
+        return name + _COMPRESSION_SUFFIXES[self.compression]
+
+    @contextmanager
+    def wrap(self, raw: BinaryIO) -> Iterator[BinaryIO]:
+        """
+        在二進位串流上開啟壓縮層
+
+        Args:
+            raw (BinaryIO): 底層二進位串流，不會被關閉
+
+        Yields:
+            BinaryIO: 可寫入UTF-8編碼JSON的二進位串流
+        """
+        if self.compression == "none":
+            yield raw
+            return
+
+        stream: BinaryIO
+        if self.compression == "gzip":
+            # 固定 mtime 與檔名，讓相同內容產生完全相同的壓縮檔
+            stream = gzip.GzipFile(filename="", mode="wb", fileobj=raw,
+                                   compresslevel=GZIP_LEVEL, mtime=0)
+        else:
+            stream = lzma.LZMAFile(raw, "wb")
+
+        with stream:
+            yield stream
+
+    @contextmanager
+    def open(self, path: Union[str, Path]) -> Iterator[BinaryIO]:
+        """
+        開啟輸出檔案
+
+        Args:
+            path (Path): 輸出檔案路徑
+
+        Yields:
+            BinaryIO: 可寫入UTF-8編碼JSON的二進位串流
+        """
+        with open(path, 'wb') as raw, self.wrap(raw) as stream:
+            yield stream
+
+    def create_writer(self, fp: BinaryIO, codec: Optional[StdlibCodec] = None):
+        """
+        建立對應此格式的串流寫入器
+
+        Args:
+            fp (BinaryIO): 已開啟的二進位串流
+            codec (StdlibCodec): JSON編解碼器
+
+        Returns:
+            StreamingJSONWriter 或 NDJSONWriter
+        """
+        if self.writes_patch:
+            raise ValueError("JSON Patch 輸出不支援串流模式")
+        if self.style == "ndjson":
+            return NDJSONWriter(fp, codec)
+        return StreamingJSONWriter(fp, indent=2 if self.style == "pretty" else None, codec=codec)
+
+    def serialize(self, data: Union[Dict[str, Any], List[Dict[str, Any]]],
+                  codec: Optional[StdlibCodec] = None) -> bytes:
+        """
+        將完整的FormDetail資料序列化為未壓縮的位元組
+
+        NDJSON格式只輸出forms陣列中的每個form，其他頂層成員不會寫出；
+        patch 格式的資料是 JSON Patch 操作的陣列，以緊湊JSON寫出。
+
+        Args:
+            data (dict | list): 要寫出的資料，patch 格式時為 JSON Patch 操作
+            codec (StdlibCodec): JSON編解碼器
+
+        Returns:
+            bytes: 序列化後的內容
+        """
+        codec = codec or StdlibCodec()
+
+        if self.style == "ndjson":
+            return b"".join(codec.dumps(form, None) + b"\n" for form in data.get("forms") or [])
+        return codec.dumps(data, 2 if self.style == "pretty" else None)
+
+    def write(self, data: Dict[str, Any], fp: BinaryIO, codec: Optional[StdlibCodec] = None):
+        """
+        將完整的FormDetail資料寫入二進位串流
+
+        Args:
+            data (dict): 要寫出的資料
+            fp (BinaryIO): 已開啟的二進位串流
+            codec (StdlibCodec): JSON編解碼器
+        """
+        fp.write(self.serialize(data, codec))
+
+    def encode(self, payload: bytes) -> bytes:
+        """
+        依格式壓縮序列化後的內容
+
+        Args:
+            payload (bytes): serialize() 的結果
+
+        Returns:
+            bytes: 輸出檔案的內容
+        """
+        if self.compression == "none":
+            return payload
+
+        buffer = io.BytesIO()
+        with self.wrap(buffer) as fp:
+            fp.write(payload)
+        return buffer.getvalue()
+
+    def write_bytes(self, data: bytes, path: Union[str, Path]) -> bool:
+        """
+        以原子方式寫入輸出檔案，內容與既有檔案相同時不改寫
+
+        Args:
+            data (bytes): encode() 的結果
+            path (Path): 輸出檔案路徑
+
+        Returns:
+            bool: 是否改寫了輸出檔案
+        """
+        return write_if_changed(path, data, self.fsync)
+
+    def replace(self, temp_path: Union[str, Path], path: Union[str, Path]) -> bool:
+        """
+        以串流寫完的暫存檔取代輸出檔案，內容與既有檔案相同時保留既有檔案
+
+        Args:
+            temp_path (Path): 已關閉的暫存檔路徑
+            path (Path): 輸出檔案路徑
+
+        Returns:
+            bool: 是否改寫了輸出檔案
+        """
+        return replace_if_changed(temp_path, path, self.fsync)
+
+
+def measure_formats(data: Dict[str, Any], repeat: int = 3,
+                    codec: Optional[StdlibCodec] = None) -> List[Dict[str, Any]]:
+    """
+    量測每種輸出格式的輸出大小與序列化（含壓縮）耗時
+
+    Args:
+        data (dict): 要序列化的資料
+        repeat (int): 重複次數，取最短耗時
+        codec (StdlibCodec): JSON編解碼器
+
+    Returns:
+        list: 每種格式的 {"format", "bytes", "seconds"}
+    """
+    results = []
+
+    for style in DOCUMENT_STYLES:
+        for compression in COMPRESSIONS:
+            output_format = OutputFormat(style, compression)
+            best = float("inf")
+            size = 0
+
+            for _ in range(repeat):
+                buffer = io.BytesIO()
+                start = time.perf_counter()
+                with output_format.wrap(buffer) as fp:
+                    output_format.write(data, fp, codec)
+                best = min(best, time.perf_counter() - start)
+                size = len(buffer.getvalue())
+
+            results.append({"format": output_format.describe(), "bytes": size, "seconds": best})
+
+    return results
+
+
+def main():
+    """
+    主函數 - 比較各輸出格式的大小與耗時
+    """
+    parser = argparse.ArgumentParser(description="比較各輸出格式的輸出大小與序列化耗時")
+    parser.add_argument("files", nargs="+", help="要量測的JSON檔案")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數（預設 3）")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="auto",
+                        help="JSON後端（預設 auto）")
+    args = parser.parse_args()
+    codec = get_codec(args.json_backend)
+
+    totals: Dict[str, Dict[str, float]] = {}
+    for file_name in args.files:
+        with open(file_name, 'rb') as f:
+            data = codec.loads(f.read())
+        for result in measure_formats(data, repeat=args.repeat, codec=codec):
+            total = totals.setdefault(result["format"], {"bytes": 0, "seconds": 0.0})
+            total["bytes"] += result["bytes"]
+            total["seconds"] += result["seconds"]
+
+    baseline = totals["pretty"]["bytes"] or 1
+    print(f"JSON 後端: {codec.name}")
+    print(f"{'格式':<16}{'位元組':>12}{'比例':>8}{'耗時(ms)':>12}")
+    print("=" * 48)
+    for name, total in totals.items():
+        ratio = total["bytes"] / baseline
+        print(f"{name:<16}{int(total['bytes']):>12}{ratio:>8.1%}{total['seconds'] * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+輸出檔案寫入
+功能：以暫存檔加 os.replace 原子寫入輸出檔案，中斷時不會留下寫到一半的檔案；
+內容與既有檔案相同時不改寫，保留其修改時間，下游依修改時間判斷的快取與同步工作不會誤判為變更
+"""
+
+import filecmp
+import itertools
+import os
+from pathlib import Path
+from typing import Union
+
+from options import FSYNC_POLICIES
+
+# 比較既有檔案內容時每次讀取的大小
+_COMPARE_CHUNK_SIZE = 1024 * 1024
+
+# 同一個行程中暫存檔名稱的流水號
+_temp_ids = itertools.count()
+
+
+def temp_path_for(path: Union[str, Path]) -> Path:
+    """
+    取得與輸出檔案位於同一個資料夾、不與其他寫入者共用的暫存檔路徑
+
+    名稱包含行程編號與流水號，多個分片、工作行程或執行緒同時寫入同一個輸出檔案時不會互相覆寫暫存檔。
+
+    Args:
+        path (Path): 輸出檔案路徑
+
+    Returns:
+        Path: 暫存檔路徑
+    """
+    path = Path(path)
+    return path.with_name(f"{path.name}.{os.getpid()}-{next(_temp_ids)}.tmp")
+
+
+def same_content(path: Path, payload: bytes) -> bool:
+    """
+    既有檔案的內容是否與要寫入的內容相同
+
+    先比較檔案大小，大小相同時才逐段讀取比較內容。
+
+    Args:
+        path (Path): 既有檔案路徑
+        payload (bytes): 要寫入的內容
+
+    Returns:
+        bool: 內容相同時返回True，檔案不存在時返回False
+    """
+    try:
+        if os.stat(path).st_size != len(payload):
+            return False
+        view = memoryview(payload)
+        with open(path, 'rb') as f:
+            for offset in range(0, len(payload), _COMPARE_CHUNK_SIZE):
+                chunk = view[offset:offset + _COMPARE_CHUNK_SIZE]
+                if f.read(len(chunk)) != chunk:
+                    return False
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _fsync_directory(directory: Path):
+    """將資料夾的項目（重新命名的結果）寫入磁碟；Windows 無法開啟資料夾，略過"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _check_fsync(fsync: str):
+    """檢查同步寫入策略"""
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"不支援的同步寫入策略: {fsync}")
+
+
+def replace_if_changed(temp_path: Union[str, Path], path: Union[str, Path], fsync: str = "none") -> bool:
+    """
+    以已寫完的暫存檔取代輸出檔案；內容與既有檔案相同時刪除暫存檔，保留既有檔案
+
+    Args:
+        temp_path (Path): 已關閉的暫存檔路徑，需與輸出檔案位於同一個資料夾
+        path (Path): 輸出檔案路徑
+        fsync (str): 同步寫入策略，見 options.FSYNC_POLICIES
+
+    Returns:
+        bool: 是否改寫了輸出檔案
+    """
+    _check_fsync(fsync)
+    temp_path, path = Path(temp_path), Path(path)
+
+    if path.exists() and filecmp.cmp(temp_path, path, shallow=False):
+        temp_path.unlink()
+        return False
+
+    if fsync != "none":
+        with open(temp_path, 'rb') as f:
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    if fsync == "full":
+        _fsync_directory(path.parent)
+    return True
+
+
+def write_if_changed(path: Union[str, Path], payload: bytes, fsync: str = "none") -> bool:
+    """
+    內容與既有檔案不同時，先寫入暫存檔再以 os.replace 原子取代輸出檔案
+
+    Args:
+        path (Path): 輸出檔案路徑
+        payload (bytes): 要寫入的內容
+        fsync (str): 同步寫入策略，見 options.FSYNC_POLICIES
+
+    Returns:
+        bool: 是否改寫了輸出檔案；內容相同時返回False
+    """
+    _check_fsync(fsync)
+    path = Path(path)
+    if same_content(path, payload):
+        return False
+
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    if fsync == "full":
+        _fsync_directory(path.parent)
+    return True
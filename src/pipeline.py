@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+完整處理流程腳本
+功能：將append_json.json合併到add資料夾中的JSON檔案後，立即進行C#結構優化；
+每個檔案只解析與輸出一次
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from build_cache import make_fingerprint
+from json_patch import JsonPatch
+from logging_setup import configure_logging, flush_logging
+from merge_json import JSONMerger, MergeData
+from metrics import FileMetrics
+from optimized_process_json import FormDetailProcessor, ProcessedData
+from options import INFLIGHT_MB
+from output_formats import OutputFormat
+from routing import FieldResolver
+from schema import schema_digest
+from sharding import Shard
+
+
+class FormDetailPipeline(FormDetailProcessor):
+    """合併與優化的單次處理流程，在記憶體中依序執行JSON合併與C#結構優化"""
+
+    command = "all"
+
+    def __init__(self, append_file="append_json.json", input_dir="add", output_dir="out",
+                 merge_policy="append", output_format: Optional[OutputFormat] = None,
+                 json_backend="auto", schema_path: Optional[str] = None, routes_file=None,
+                 intern_strings: bool = False):
+        """
+        初始化處理流程
+
+        Args:
+            append_file (str): 要合併的JSON檔案名稱
+            input_dir (str): 輸入資料夾路徑，或 .zip / .tar / .tar.gz 封存檔
+            output_dir (str): 輸出資料夾路徑，或要寫入的 .zip / .tar / .tar.gz 封存檔；
+                None 表示只在記憶體中處理（見 api.Transformer），不建立輸出資料夾
+            merge_policy (str): 合併策略，見 merge_json.MERGE_POLICIES
+            output_format (OutputFormat): 輸出格式，預設為排版JSON
+            json_backend (str): JSON後端（auto / json / orjson）
+            schema_path (str): C#類別結構描述檔路徑，預設為內建的 formdetail_schema.json
+            routes_file (str): 路由設定檔路徑，指定時依formId與檔案名稱套用不同的合併資料片段
+            intern_strings (bool): 解析後是否以字串共用表替換重複的鍵與短字串值，合併資料也一併替換
+        """
+        super().__init__(input_dir=input_dir, output_dir=output_dir, output_format=output_format,
+                         json_backend=json_backend, schema_path=schema_path, intern_strings=intern_strings)
+        self.merger = JSONMerger(append_file=append_file, input_dir=input_dir, output_dir=output_dir,
+                                 merge_policy=merge_policy, json_backend=json_backend,
+                                 routes_file=routes_file, intern_strings=intern_strings)
+        self.append_data: MergeData = []
+        # 目前處理中的檔案取得每個form合併資料的函數，只在處理檔案期間設定
+        self.resolve_append: Optional[FieldResolver] = None
+
+    def transform_form(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        先合併formFields，再轉換為符合C#類別定義的Form
+
+        Args:
+            form_data (dict): 原始表單資料
+
+        Returns:
+            dict: 處理後的表單資料
+        """
+        append_data = self.resolve_append(form_data) if self.resolve_append else self.append_data
+        merged_form = self.merger.merge_form(form_data, append_data)
+        return super().transform_form(merged_form)
+
+    def patch_form(self, form_data: Dict[str, Any], patch: JsonPatch, pointer: str):
+        """
+        先記錄合併formFields的操作，再記錄轉換合併結果的操作；
+        合併新加入的欄位直接以轉換後的內容寫入，不再另外修正
+
+        Args:
+            form_data (dict): 原始表單資料
+            patch (JsonPatch): 記錄操作的 JSON Patch
+            pointer (str): 表單的 JSON Pointer，例如 /forms/0
+        """
+        append_data = self.resolve_append(form_data) if self.resolve_append else self.append_data
+        merged_form = self.merger.merge_form(form_data, append_data, patch, pointer)
+        super().patch_form(merged_form, patch, pointer)
+
+    def cache_fingerprint(self) -> str:
+        """
+        計算增量建置快取的設定指紋，合併資料變更時使快取失效
+
+        Returns:
+            str: 設定指紋
+        """
+        return make_fingerprint("all", merge_policy=self.merger.merge_policy,
+                                output_format=self.output_format.describe(),
+                                schema=schema_digest(self.schema_path),
+                                **self.merger.append_fingerprint())
+
+    def metrics_settings(self) -> Dict[str, Any]:
+        """
+        返回記錄在處理指標報告中的設定，加入合併策略
+
+        Returns:
+            dict: 設定
+        """
+        return dict(super().metrics_settings(), merge_policy=self.merger.merge_policy)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.__dict__, resolve_append=None)
+
+    def append_sources(self) -> List[Path]:
+        """合併資料的來源檔案，見 JSONMerger.append_sources"""
+        return self.merger.append_sources()
+
+    def process_file(self, json_file: Path, stream: bool = False) -> FileMetrics:
+        """
+        處理並儲存單個JSON檔案，先依檔案名稱選出適用的合併資料路由
+
+        Args:
+            json_file (Path): JSON檔案路徑
+            stream (bool): 是否使用串流模式
+
+        Returns:
+            FileMetrics: 處理結果與各階段指標
+        """
+        self.resolve_append = self.merger.append_resolver(self.append_data, json_file.name)
+        return super().process_file(json_file, stream)
+
+    def process_document(self, data: Any, name: str, metrics: Optional[FileMetrics] = None) -> Optional[ProcessedData]:
+        """
+        合併並轉換已解析的JSON資料，先依檔案名稱選出適用的合併資料路由；會直接修改傳入的資料
+
+        Args:
+            data (dict): 解析後的FormDetail資料
+            name (str): 檔案名稱，用於比對路由的檔案模式、日誌與指標
+            metrics (FileMetrics): 記錄轉換階段的指標
+
+        Returns:
+            dict | list: 處理後的資料，輸出 JSON Patch 時為合併與轉換操作的陣列；失敗時返回None
+        """
+        self.resolve_append = self.merger.append_resolver(self.append_data, name)
+        return super().process_document(data, name, metrics)
+
+    def process_member(self, member: Tuple[str, bytes]) -> Tuple[FileMetrics, Optional[bytes]]:
+        """
+        處理封存檔的單個成員，先依成員名稱選出適用的合併資料路由
+
+        Args:
+            member (tuple): (成員名稱, 內容)
+
+        Returns:
+            tuple: (處理指標, 輸出內容，失敗時為None)
+        """
+        self.resolve_append = self.merger.append_resolver(self.append_data, member[0])
+        return super().process_member(member)
+
+    def file_task(self, stream: bool = False, members: bool = False) -> Optional[Callable[[Any], Any]]:
+        """
+        載入合併資料並返回處理單個檔案的函數
+
+        Args:
+            stream (bool): 是否使用串流模式
+            members (bool): 是否返回處理封存檔成員的函數
+
+        Returns:
+            callable: 處理單個檔案的函數，無法載入合併資料時返回None
+        """
+        # 載入要合併的資料
+        append_data = self.merger.load_append_data()
+        if append_data is None:
+            logging.error("無法載入合併資料，終止處理")
+            return None
+
+        self.append_data = append_data
+        return super().file_task(stream, members)
+
+def main(jobs: int = 1, stream: bool = False, force: bool = False, merge_policy: str = "append",
+         output_format: Optional[OutputFormat] = None, json_backend: str = "auto",
+         schema_path: Optional[str] = None, metrics_out: Optional[str] = None,
+         file_log_level: str = "info", routes_file: Optional[str] = None,
+         intern_strings: bool = False, shard: Optional[Shard] = None,
+         input_dir: str = "add", output_dir: str = "out",
+         async_io: bool = False, inflight_mb: int = INFLIGHT_MB, index_path: Optional[str] = None,
+         where: Optional[Sequence[str]] = None):
+    """
+    主函數
+
+    Args:
+        jobs (int): 平行處理的工作行程數量
+        stream (bool): 是否使用串流模式
+        force (bool): 是否忽略增量建置快取
+        merge_policy (str): 合併策略
+        output_format (OutputFormat): 輸出格式
+        json_backend (str): JSON後端
+        schema_path (str): C#類別結構描述檔路徑
+        metrics_out (str): 處理指標JSON報告的輸出路徑
+        file_log_level (str): 每個檔案的日誌等級，off 表示只輸出執行摘要
+        routes_file (str): 路由設定檔路徑
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+        shard (Shard): 只處理屬於此分片的檔案
+        input_dir (str): 輸入資料夾或封存檔路徑
+        output_dir (str): 輸出資料夾或封存檔路徑
+        async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入
+        inflight_mb (int): 非同步 I/O 處理流程中已讀入、尚未寫完的資料上限（MB）
+        index_path (str): 順便更新的欄位索引檔路徑
+        where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案
+    """
+    configure_logging("pipeline.log", file_level=file_log_level)
+
+    print("完整處理流程啟動...")
+    print("=" * 60)
+    print("功能：合併append_json.json並優化為C#類別結構，每個檔案只處理一次")
+    print("=" * 60)
+
+    # 創建處理流程實例
+    pipeline = FormDetailPipeline(input_dir=input_dir, output_dir=output_dir,
+                                  merge_policy=merge_policy, output_format=output_format,
+                                  json_backend=json_backend, schema_path=schema_path,
+                                  routes_file=routes_file, intern_strings=intern_strings)
+
+    # 處理所有檔案
+    pipeline.process_all_files(jobs=jobs, stream=stream, force=force, metrics_out=metrics_out, shard=shard,
+                               async_io=async_io, inflight_bytes=inflight_mb * 1024 * 1024,
+                               index_path=index_path, where=where)
+    flush_logging()
+
+    print("=" * 60)
+    print(f"處理完成！請檢查 {output_dir} 中的結果。")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+合併資料路由
+功能：以路由設定檔將不同的合併資料片段對應到不同的 formId 或輸入檔案，一次處理即可套用所有路由；
+載入時建立 formId 索引，每個form的查詢只需常數時間
+"""
+
+import hashlib
+import json
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from append_data import CACHE_NAME, AppendData, load_append_file
+from build_cache import hash_file
+
+ROUTE_KEYS = ("forms", "files", "fragments")
+
+# fnmatch 的萬用字元，不含萬用字元的 formId 模式直接放進索引
+_WILDCARDS = frozenset("*?[")
+
+# 依formId取得合併資料的函數，沒有對應的路由時返回None
+FieldResolver = Callable[[Dict[str, Any]], Optional[Sequence[Dict[str, Any]]]]
+
+# 工作行程每處理一個檔案都會還原一次路由表，以路由與合併資料片段的雜湊為鍵共用查詢結果；
+# 監看模式下路由會多次變更，只保留最近的幾份
+_memos: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+_MAX_MEMOS = 4
+
+
+class Route:
+    """路由設定檔中的單一路由"""
+
+    def __init__(self, fragments: List[str], forms: Optional[List[str]] = None,
+                 files: Optional[List[str]] = None):
+        self.fragments = fragments
+        self.forms = forms or []
+        self.files = files or []
+
+    def matches_file(self, file_name: str) -> bool:
+        """輸入檔案是否符合路由，未指定 files 時符合所有檔案"""
+        return not self.files or any(fnmatchcase(file_name, pattern) for pattern in self.files)
+
+    def matches_form(self, form_id: str) -> bool:
+        """formId 是否符合路由，未指定 forms 時符合所有form"""
+        return not self.forms or any(fnmatchcase(form_id, pattern) for pattern in self.forms)
+
+    def __repr__(self) -> str:
+        return f"Route(forms={self.forms!r}, files={self.files!r}, fragments={self.fragments!r})"
+
+
+def parse_routes(data: Any) -> List[Route]:
+    """
+    由路由設定資料建立路由，並檢查格式
+
+    Args:
+        data (dict): 路由設定資料，格式為 {"routes": [{"forms": [...], "files": [...], "fragments": [...]}]}
+
+    Returns:
+        list: 路由
+
+    Raises:
+        ValueError: 格式錯誤
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("routes"), list):
+        raise ValueError("路由設定必須是包含 routes 陣列的JSON物件")
+    if not data["routes"]:
+        raise ValueError("路由設定沒有任何路由")
+
+    routes = []
+    for index, route_data in enumerate(data["routes"], 1):
+        if not isinstance(route_data, dict):
+            raise ValueError(f"第 {index} 條路由必須是JSON物件")
+        unknown = sorted(set(route_data) - set(ROUTE_KEYS))
+        if unknown:
+            raise ValueError(f"第 {index} 條路由有不支援的設定: {', '.join(unknown)}")
+        try:
+            route = Route(**route_data)
+        except TypeError as e:
+            raise ValueError(f"第 {index} 條路由定義錯誤: {e}") from e
+
+        for key in ROUTE_KEYS:
+            patterns = getattr(route, key)
+            if not isinstance(patterns, list) or not all(isinstance(p, str) and p for p in patterns):
+                raise ValueError(f"第 {index} 條路由的 {key} 必須是字串陣列")
+        if not route.fragments:
+            raise ValueError(f"第 {index} 條路由沒有指定合併資料片段")
+        routes.append(route)
+
+    return routes
+
+
+def read_routes(path: Union[str, Path]) -> Tuple[List[Route], List[Path]]:
+    """
+    讀取路由設定檔
+
+    Args:
+        path (Path): 路由設定檔路徑
+
+    Returns:
+        tuple: (路由, 依出現順序排列且不重複的合併資料片段路徑)，片段路徑相對於設定檔所在資料夾
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+        json.JSONDecodeError: 內容不是合法的JSON
+        ValueError: 格式錯誤
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        routes = parse_routes(json.load(f))
+
+    fragment_paths = dict.fromkeys(path.parent / fragment for route in routes for fragment in route.fragments)
+    return routes, list(fragment_paths)
+
+
+def routes_digest(path: Union[str, Path]) -> str:
+    """
+    計算路由設定檔與所有合併資料片段的雜湊，任一檔案變更時改變
+
+    Args:
+        path (Path): 路由設定檔路徑
+
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    _, fragment_paths = read_routes(path)
+    digest = hashlib.sha256(hash_file(Path(path)).encode('ascii'))
+    for fragment_path in fragment_paths:
+        digest.update(hash_file(fragment_path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def fragment_cache_name(path: Path) -> str:
+    """
+    取得合併資料片段的快取檔案名稱，以路徑區分同一個快取資料夾中的多個片段
+
+    Args:
+        path (Path): 合併資料片段路徑
+
+    Returns:
+        str: 快取檔案名稱
+    """
+    key = hashlib.sha256(str(path.resolve()).encode('utf-8')).hexdigest()[:16]
+    return f"{CACHE_NAME}-{key}"
+
+
+class RoutingTable:
+    """
+    已載入的路由與合併資料片段
+
+    不含萬用字元的formId模式在載入時放進索引，其餘路由逐一比對；
+    每個輸入檔案適用的路由與每個formId的查詢結果都會記住，同一個formId之後只需一次字典查詢。
+    序列化（傳給工作行程）時不包含這些查詢結果，合併資料片段也只傳送雜湊；
+    工作行程中還原的路由表與先前還原的相同時沿用其查詢結果。
+    """
+
+    def __init__(self, routes: List[Route], fragments: Dict[Path, AppendData], source: Path):
+        """
+        初始化路由表
+
+        Args:
+            routes (list): 路由
+            fragments (dict): {片段路徑: 合併資料}
+            source (Path): 路由設定檔路徑
+        """
+        self.routes = routes
+        self.fragments = fragments
+        self.source = Path(source)
+
+        # formId → 以該formId精確指定的路由；_scanned 為含萬用字元或未指定 forms、需要逐一比對的路由
+        self._exact: Dict[str, List[int]] = {}
+        self._scanned: List[int] = []
+        for index, route in enumerate(routes):
+            exact = [pattern for pattern in route.forms if not _WILDCARDS.intersection(pattern)]
+            for pattern in exact:
+                self._exact.setdefault(pattern, []).append(index)
+            if not route.forms or len(exact) < len(route.forms):
+                self._scanned.append(index)
+
+        self._attach_memo()
+
+    def _attach_memo(self):
+        """取得此行程中相同路由與片段的查詢結果，沒有時建立新的"""
+        key = (str(self.source), repr(self.routes), *(fragment.digest for fragment in self.fragments.values()))
+        memo = _memos.pop(key, None)
+        if memo is None:
+            memo = {"file_routes": {}, "resolved": {}, "fragment_fields": {}}
+        while len(_memos) >= _MAX_MEMOS:
+            del _memos[next(iter(_memos))]
+        _memos[key] = memo
+
+        self._file_routes: Dict[str, FrozenSet[int]] = memo["file_routes"]
+        self._resolved: Dict[FrozenSet[int], Dict[str, Optional[List[Dict[str, Any]]]]] = memo["resolved"]
+        self._fragment_fields: Dict[Path, List[Dict[str, Any]]] = memo["fragment_fields"]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for key in ("_file_routes", "_resolved", "_fragment_fields"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._attach_memo()
+
+    @property
+    def field_count(self) -> int:
+        """所有合併資料片段的formField數量"""
+        return sum(len(fragment) for fragment in self.fragments.values())
+
+    def sources(self) -> List[Path]:
+        """路由設定檔與所有合併資料片段的路徑"""
+        return [self.source, *self.fragments]
+
+    def routes_for_file(self, file_name: str) -> FrozenSet[int]:
+        """
+        取得適用於輸入檔案的路由
+
+        Args:
+            file_name (str): 輸入檔案名稱
+
+        Returns:
+            frozenset: 路由的索引
+        """
+        allowed = self._file_routes.get(file_name)
+        if allowed is None:
+            allowed = frozenset(index for index, route in enumerate(self.routes)
+                                if route.matches_file(file_name))
+            self._file_routes[file_name] = allowed
+        return allowed
+
+    def _fields_of(self, path: Path) -> List[Dict[str, Any]]:
+        """取得合併資料片段的formField，每個行程只載入一次"""
+        fields = self._fragment_fields.get(path)
+        if fields is None:
+            fields = self._fragment_fields[path] = list(self.fragments[path])
+        return fields
+
+    def resolve(self, form_id: str, allowed: FrozenSet[int]) -> Optional[List[Dict[str, Any]]]:
+        """
+        取得formId在指定路由中對應的合併資料
+
+        多條路由符合時依設定檔中的順序串接各自的片段，重複的片段只套用一次。
+
+        Args:
+            form_id (str): formId
+            allowed (frozenset): 適用的路由索引
+
+        Returns:
+            list: 要合併的formFields，沒有符合的路由時返回None
+        """
+        matched = {index for index in self._exact.get(form_id, ()) if index in allowed}
+        matched.update(index for index in self._scanned
+                       if index in allowed and self.routes[index].matches_form(form_id))
+        if not matched:
+            return None
+
+        paths = dict.fromkeys(self.source.parent / fragment
+                              for index in sorted(matched) for fragment in self.routes[index].fragments)
+        return [field for path in paths for field in self._fields_of(path)]
+
+    def for_file(self, file_name: str) -> FieldResolver:
+        """
+        返回依form的formId取得合併資料的函數，查詢結果在同一組路由的檔案間共用
+
+        Args:
+            file_name (str): 輸入檔案名稱
+
+        Returns:
+            callable: 傳入form、返回要合併的formFields（沒有對應的路由時返回None）的函數
+        """
+        allowed = self.routes_for_file(file_name)
+        resolved = self._resolved.setdefault(allowed, {})
+
+        def lookup(form: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+            form_id = form.get("formId")
+            form_id = "" if form_id is None else str(form_id)
+            try:
+                return resolved[form_id]
+            except KeyError:
+                fields = resolved[form_id] = self.resolve(form_id, allowed)
+                return fields
+
+        return lookup
+
+    def __repr__(self) -> str:
+        return f"RoutingTable({self.source.name!r}, {len(self.routes)} routes, {len(self.fragments)} fragments)"
+
+
+def load_routes(path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None,
+                json_backend: str = "json", intern_strings: bool = False) -> RoutingTable:
+    """
+    載入路由設定檔與所有合併資料片段，片段的解析結果各自快取
+
+    Args:
+        path (Path): 路由設定檔路徑
+        cache_dir (Path): 快取資料夾，None 表示不使用快取
+        json_backend (str): JSON後端
+        intern_strings (bool): 是否以字串共用表替換片段中重複的鍵與短字串值
+
+    Returns:
+        RoutingTable: 路由表
+
+    Raises:
+        FileNotFoundError: 設定檔或片段不存在
+        json.JSONDecodeError: 內容不是合法的JSON
+        ValueError: 格式錯誤
+    """
+    path = Path(path)
+    routes, fragment_paths = read_routes(path)
+    fragments = {
+        fragment_path: load_append_file(fragment_path, cache_dir, json_backend,
+                                        cache_name=fragment_cache_name(fragment_path),
+                                        intern_strings=intern_strings)
+        for fragment_path in fragment_paths
+    }
+    return RoutingTable(routes, fragments, path)
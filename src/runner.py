@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+處理所有輸入檔案的執行流程
+功能：merge、optimize 與 all 共用的執行流程：尋找輸入檔案、分片、欄位索引與 --where 篩選、
+增量建置快取、依序或非同步 I/O 處理，最後輸出執行摘要與處理指標報告
+"""
+
+import logging
+from typing import Any, Callable, Optional, Sequence
+
+from archives import process_members
+from batch import run_batch
+from build_cache import MANIFEST_NAME, BuildCache
+from metrics import RunMetrics
+from options import INFLIGHT_MB
+from sharding import Shard, describe_inputs
+
+
+def run_all_files(processor: Any, mode: str, task: Callable[[Any], Any], done_message: str, jobs: int = 1,
+                  stream: bool = False, force: bool = False, metrics_out: Optional[str] = None,
+                  shard: Optional[Shard] = None, async_io: bool = False,
+                  inflight_bytes: int = INFLIGHT_MB * 1024 * 1024, index_path: Optional[str] = None,
+                  where: Optional[Sequence[str]] = None) -> Optional[RunMetrics]:
+    """
+    以處理器處理輸入資料夾或封存檔中的所有JSON檔案
+
+    Args:
+        processor: JSONMerger 或 FormDetailProcessor，提供輸入輸出路徑、輸出格式、快取指紋與處理指標設定
+        mode (str): 命令名稱，記錄在處理指標報告中
+        task (callable): 處理單個檔案的函數，見 file_task；非同步 I/O 或封存檔時處理 (名稱, 內容)
+        done_message (str): 執行摘要最後一行的開頭，例如「合併完成！」
+        jobs (int): 平行處理的工作行程數量，0 表示使用所有CPU核心
+        stream (bool): 是否使用串流模式處理大型檔案
+        force (bool): 是否忽略增量建置快取，重新處理所有檔案
+        metrics_out (str): 處理指標JSON報告的輸出路徑
+        shard (Shard): 只處理屬於此分片的檔案，None 表示處理所有檔案
+        async_io (bool): 是否以非同步 I/O 處理流程重疊讀取、處理與寫入（輸入與輸出為資料夾時）
+        inflight_bytes (int): 非同步 I/O 處理流程中已讀入、尚未寫完的位元組上限
+        index_path (str): 順便更新的欄位索引檔路徑，None 表示不更新索引
+        where (list): 只處理包含符合所有 KEY=VALUE 條件欄位的檔案，見 field_index.parse_where
+
+    Returns:
+        RunMetrics: 處理指標，無法開始處理時返回None
+    """
+    run_metrics = RunMetrics(mode, jobs=jobs, stream=stream, force=force, async_io=async_io,
+                             where=list(where) if where else None,
+                             **processor.metrics_settings())
+
+    # 檢查輸入資料夾是否存在
+    if not processor.input_dir.exists():
+        logging.error(f"輸入資料夾不存在: {processor.input_dir}")
+        return None
+
+    if stream and processor.output_format.writes_patch:
+        logging.info("輸出 JSON Patch 時不使用串流模式，每個檔案完整讀取")
+    elif processor.uses_archives and stream:
+        logging.info("輸入或輸出為封存檔時不使用串流模式，每個檔案完整讀取")
+
+    if processor.uses_archives:
+        if where:
+            logging.error("輸入或輸出為封存檔時不支援 --where")
+            return None
+        if index_path is not None:
+            logging.info("輸入或輸出為封存檔時不更新欄位索引")
+        if async_io:
+            logging.info("輸入或輸出為封存檔時不使用非同步 I/O 模式，成員依序讀取並交給工作行程")
+        results, names = process_members(task, processor.input_dir, processor.output_dir,
+                                         processor.output_format, jobs, shard)
+        if not names:
+            logging.warning(f"在 {processor.input_dir} 中沒有找到JSON檔案")
+            return None
+        run_metrics.inputs = describe_inputs(names, shard)
+        run_metrics.add(results)
+        run_metrics.finish(0, len(results))
+        logging.info(f"找到 {len(names)} 個JSON檔案" + (f"，分片 {shard} 分配到 {len(results)} 個" if shard else ""))
+        return report_run(processor, run_metrics, "輸入或輸出為封存檔，不使用增量建置快取", len(results),
+                          done_message, metrics_out)
+
+    # 尋找所有JSON檔案
+    json_files = sorted(processor.input_dir.glob("*.json"))
+
+    if not json_files:
+        logging.warning(f"在 {processor.input_dir} 中沒有找到JSON檔案")
+        return None
+
+    logging.info(f"找到 {len(json_files)} 個JSON檔案")
+    input_names = [path.name for path in json_files]
+    run_metrics.inputs = describe_inputs(input_names, shard)
+    if shard is not None:
+        json_files = shard.select(json_files, processor.input_dir)
+        logging.info(f"分片 {shard}：分配到 {len(json_files)} 個檔案")
+
+    index = None
+    selected_files = json_files
+    if index_path is not None or where:
+        # 只有使用欄位索引時才載入 sqlite3
+        from field_index import open_index, select_inputs
+
+        index = open_index(index_path)
+        index.prune(processor.input_dir, input_names)
+        if where:
+            selected_files = select_inputs(index, processor.input_dir, json_files, where,
+                                           processor.json_backend, jobs)
+
+    # 處理每個檔案（結果依檔案順序排列）
+    cache = BuildCache(processor.output_dir, processor.cache_fingerprint(), force=force,
+                       manifest_name=shard.manifest_name if shard else MANIFEST_NAME)
+    stale_files = cache.select_stale(json_files, processor.output_path, selected_files)
+    processor.index_fields = index is not None
+
+    if async_io:
+        # 只有使用非同步 I/O 時才載入 asyncio，縮短一般執行的啟動時間
+        from async_io import process_files_async
+
+        if stream and not processor.output_format.writes_patch:
+            logging.info("非同步 I/O 模式不使用串流模式，每個檔案完整讀取")
+        results = process_files_async(task, stale_files, processor.output_path, processor.output_format,
+                                      jobs, inflight_bytes)
+    else:
+        results = run_batch(task, stale_files, jobs)
+    cache.update(stale_files, [r.ok for r in results], processor.output_path)
+    if index is not None:
+        # 處理時已收集處理過的檔案；快取略過的檔案若尚未索引則另外讀取
+        index.record(processor.input_dir, stale_files, results)
+        index.refresh(processor.input_dir, json_files, processor.json_backend, jobs)
+        logging.info(f"已更新欄位索引 {index.path}")
+        index.close()
+    run_metrics.add(results)
+    stale_names = {path.name for path in stale_files}
+    selected_names = {path.name for path in selected_files}
+    run_metrics.finish(cache.hits, cache.misses,
+                       skipped=[path.name for path in selected_files if path.name not in stale_names],
+                       unselected=[path.name for path in json_files if path.name not in selected_names])
+    return report_run(processor, run_metrics, cache.summary(), len(selected_files), done_message, metrics_out)
+
+
+def report_run(processor: Any, run_metrics: RunMetrics, cache_summary: str, file_count: int,
+               done_message: str, metrics_out: Optional[str] = None) -> RunMetrics:
+    """
+    在日誌中輸出執行摘要，並依需要儲存處理指標報告
+
+    Args:
+        processor: 執行的處理器，提供JSON後端與輸出格式
+        run_metrics (RunMetrics): 已結束的執行指標
+        cache_summary (str): 增量建置快取的摘要
+        file_count (int): 這次執行負責的檔案數量
+        done_message (str): 最後一行的開頭，例如「合併完成！」
+        metrics_out (str): 處理指標JSON報告的輸出路徑
+
+    Returns:
+        RunMetrics: 處理指標
+    """
+    totals = run_metrics.totals()
+    write_seconds = totals["stages"]["serialize"] + totals["stages"]["write"]
+
+    if run_metrics.failed_files:
+        logging.warning(f"處理失敗的檔案: {', '.join(run_metrics.failed_files)}")
+
+    logging.info(cache_summary)
+    logging.info(f"JSON 後端: {processor.codec.name}")
+    logging.info(f"輸出格式 {processor.output_format.describe()}：寫入 {totals['bytes_out']} 位元組，序列化與寫入耗時 {write_seconds:.3f} 秒")
+    run_metrics.log_summary()
+    logging.info(f"{done_message}成功處理 {run_metrics.cache_hits + totals['processed']}/{file_count} 個檔案")
+
+    if metrics_out:
+        run_metrics.save(metrics_out)
+    return run_metrics
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+C#類別結構描述
+功能：以宣告式的結構描述檔（formdetail_schema.json）定義 FormDetail / Form / FormField 的契約，
+並在啟動時一次編譯成專用的投影函數，供每個欄位重複使用
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+SCHEMA_FILE = Path(__file__).with_name("formdetail_schema.json")
+
+# 結構描述中的類型名稱
+FORM_DETAIL = "FormDetail"
+FORM = "Form"
+FORM_FIELD = "FormField"
+
+# 欄位種類：
+# - required: 一律輸出，缺少時使用 default
+# - optional: 值符合 drop 規則（null：值為 null；empty：值為空或假值）時不輸出
+# - list: 一律輸出陣列，缺少或為空時輸出 []；指定 item 時逐一投影為該類型
+FIELD_KINDS = ("required", "optional", "list")
+DROP_RULES = ("null", "empty")
+FIELD_TYPES = ("string", "boolean", "integer", "number", "object", "array", "any")
+
+_SCALAR_TYPES = (str, bool, int, float, type(None))
+
+
+class FieldSpec:
+    """結構描述中的單一欄位"""
+
+    def __init__(self, name: str, kind: str, type: str = "any", default: Any = None,
+                 drop: str = "null", item: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.type = type
+        self.default = default
+        self.drop = drop
+        self.item = item
+
+    def __repr__(self) -> str:
+        return f"FieldSpec({self.name!r}, {self.kind!r})"
+
+
+class TypeSpec:
+    """結構描述中的單一類型，對應一個C#類別"""
+
+    def __init__(self, name: str, fields: List[FieldSpec],
+                 extension_name: Optional[str] = None, extension_keys: Optional[List[str]] = None):
+        self.name = name
+        self.fields = fields
+        self.extension_name = extension_name
+        self.extension_keys = list(extension_keys or [])
+
+    @property
+    def field_names(self) -> List[str]:
+        """所有宣告的欄位名稱"""
+        return [field.name for field in self.fields]
+
+    def __repr__(self) -> str:
+        return f"TypeSpec({self.name!r})"
+
+
+class ContractSchema:
+    """FormDetail / Form / FormField 的契約描述"""
+
+    def __init__(self, types: Dict[str, TypeSpec]):
+        self.types = types
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ContractSchema":
+        """
+        由結構描述資料建立契約，並檢查格式
+
+        Args:
+            data (dict): 結構描述資料
+
+        Returns:
+            ContractSchema: 契約描述
+        """
+        if not isinstance(data, dict):
+            raise ValueError("結構描述必須是JSON物件")
+
+        types = {}
+        for type_name, type_data in data.items():
+            if not type_name.isidentifier():
+                raise ValueError(f"類型名稱必須是合法的識別字: {type_name}")
+
+            fields = []
+            for field_data in type_data.get("fields", []):
+                try:
+                    field = FieldSpec(**field_data)
+                except TypeError as e:
+                    raise ValueError(f"{type_name} 的欄位定義錯誤: {e}") from e
+                if field.kind not in FIELD_KINDS:
+                    raise ValueError(f"{type_name}.{field.name} 的 kind 不支援: {field.kind}")
+                if field.drop not in DROP_RULES:
+                    raise ValueError(f"{type_name}.{field.name} 的 drop 不支援: {field.drop}")
+                if field.type not in FIELD_TYPES:
+                    raise ValueError(f"{type_name}.{field.name} 的 type 不支援: {field.type}")
+                if not isinstance(field.default, _SCALAR_TYPES):
+                    raise ValueError(f"{type_name}.{field.name} 的 default 必須是純量值")
+                fields.append(field)
+
+            extension = type_data.get("extensionData") or {}
+            types[type_name] = TypeSpec(type_name, fields,
+                                        extension.get("name"), extension.get("keys"))
+
+        for type_spec in types.values():
+            for field in type_spec.fields:
+                if field.item is not None and field.item not in types:
+                    raise ValueError(f"{type_spec.name}.{field.name} 參照了未定義的類型: {field.item}")
+
+        return cls(types)
+
+    @classmethod
+    def load(cls, path: Optional[Union[str, Path]] = None) -> "ContractSchema":
+        """
+        載入結構描述檔
+
+        Args:
+            path (Path): 結構描述檔路徑，預設為 formdetail_schema.json
+
+        Returns:
+            ContractSchema: 契約描述
+        """
+        with open(path or SCHEMA_FILE, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _generate_type_source(type_spec: TypeSpec) -> List[str]:
+    """產生單一類型的投影函數原始碼"""
+    lines = [f"def project_{type_spec.name}(data):", "    get = data.get"]
+
+    # 開頭連續的必填/陣列欄位直接放進字典常值，其餘欄位依宣告順序逐一加入，維持輸出鍵順序
+    fields = list(type_spec.fields)
+    literal_fields = []
+    while fields and fields[0].kind == "required":
+        literal_fields.append(fields.pop(0))
+
+    lines.append("    out = {")
+    for field in literal_fields:
+        lines.append(f"        {field.name!r}: get({field.name!r}, {field.default!r}),")
+    lines.append("    }")
+
+    for field in fields:
+        if field.kind == "required":
+            lines.append(f"    out[{field.name!r}] = get({field.name!r}, {field.default!r})")
+        elif field.kind == "list":
+            lines.append(f"    value = get({field.name!r})")
+            if field.item:
+                lines.append(f"    out[{field.name!r}] = [project_{field.item}(item) for item in value] if value else []")
+            else:
+                lines.append(f"    out[{field.name!r}] = value if value else []")
+        elif field.drop == "null":
+            lines.append(f"    if (value := get({field.name!r})) is not None:")
+            lines.append(f"        out[{field.name!r}] = value")
+        else:
+            lines.append(f"    if value := get({field.name!r}):")
+            lines.append(f"        out[{field.name!r}] = value")
+
+    lines.extend(_generate_extension_source(type_spec))
+    lines.append("    return out")
+    return lines
+
+
+def _generate_extension_source(type_spec: TypeSpec) -> List[str]:
+    """
+    產生擴展資料的原始碼，擴展資料的鍵順序與輸入資料相同
+
+    一到兩個鍵時直接以 get 取值，只有兩個鍵同時存在時才需要比較它們在輸入中的順序；
+    更多鍵時改為掃描輸入資料的所有鍵。
+    """
+    keys = [key for key in type_spec.extension_keys if key not in type_spec.field_names]
+    name = type_spec.extension_name
+    if not name or not keys:
+        return []
+
+    if len(keys) > 2:
+        return [
+            f"    extension = {{key: value for key, value in data.items() "
+            f"if key in EXTENSION_KEYS_{type_spec.name} and value is not None}}",
+            "    if extension:",
+            f"        out[{name!r}] = extension",
+        ]
+
+    first = keys[0]
+    lines = [f"    first = get({first!r})"]
+    if len(keys) == 1:
+        lines.append("    if first is not None:")
+        lines.append(f"        out[{name!r}] = {{{first!r}: first}}")
+        return lines
+
+    second = keys[1]
+    lines.extend([
+        f"    second = get({second!r})",
+        "    if first is not None:",
+        "        if second is not None:",
+        "            keys = list(data)",
+        f"            if keys.index({first!r}) < keys.index({second!r}):",
+        f"                out[{name!r}] = {{{first!r}: first, {second!r}: second}}",
+        "            else:",
+        f"                out[{name!r}] = {{{second!r}: second, {first!r}: first}}",
+        "        else:",
+        f"            out[{name!r}] = {{{first!r}: first}}",
+        "    elif second is not None:",
+        f"        out[{name!r}] = {{{second!r}: second}}",
+    ])
+    return lines
+
+
+def generate_source(schema: ContractSchema) -> str:
+    """
+    由契約描述產生投影函數的Python原始碼
+
+    Args:
+        schema (ContractSchema): 契約描述
+
+    Returns:
+        str: 原始碼
+    """
+    lines: List[str] = []
+    for type_spec in schema.types.values():
+        lines.extend(_generate_type_source(type_spec))
+        lines.append("")
+    return "\n".join(lines)
+
+
+class Projector:
+    """由契約描述編譯而成的投影器，將原始資料轉換為符合C#類別定義的資料"""
+
+    def __init__(self, schema: ContractSchema):
+        """
+        編譯投影函數
+
+        Args:
+            schema (ContractSchema): 契約描述
+        """
+        self.schema = schema
+        self.source = generate_source(schema)
+
+        namespace: Dict[str, Any] = {}
+        for type_spec in schema.types.values():
+            # 已宣告的欄位不會被當作擴展資料
+            keys = set(type_spec.extension_keys) - set(type_spec.field_names)
+            namespace[f"EXTENSION_KEYS_{type_spec.name}"] = frozenset(keys)
+
+        code = compile(self.source, "<formdetail-schema>", "exec")
+        exec(code, namespace)  # nosec B102 - 只執行由結構描述產生的程式碼
+
+        self._functions: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            name: namespace[f"project_{name}"] for name in schema.types
+        }
+
+    def get(self, type_name: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """
+        取得指定類型的投影函數
+
+        Args:
+            type_name (str): 類型名稱，例如 FormField
+
+        Returns:
+            callable: 投影函數
+        """
+        return self._functions[type_name]
+
+    @property
+    def form_detail(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """FormDetail 投影函數"""
+        return self._functions[FORM_DETAIL]
+
+    @property
+    def form(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """Form 投影函數"""
+        return self._functions[FORM]
+
+    @property
+    def form_field(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """FormField 投影函數"""
+        return self._functions[FORM_FIELD]
+
+
+@lru_cache(maxsize=None)
+def get_projector(schema_path: Optional[str] = None) -> Projector:
+    """
+    取得編譯好的投影器，每個行程的每個結構描述檔只編譯一次
+
+    Args:
+        schema_path (str): 結構描述檔路徑，預設為 formdetail_schema.json
+
+    Returns:
+        Projector: 投影器
+    """
+    return Projector(ContractSchema.load(schema_path))
+
+
+def schema_digest(schema_path: Optional[str] = None) -> str:
+    """
+    計算結構描述檔的雜湊，供增量建置快取判斷契約是否變更
+
+    Args:
+        schema_path (str): 結構描述檔路徑，預設為 formdetail_schema.json
+
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    return hashlib.sha256(Path(schema_path or SCHEMA_FILE).read_bytes()).hexdigest()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+分片處理
+功能：依輸入檔案相對路徑的穩定雜湊把 add 資料夾的檔案分配到 N 個分片，多台機器各自以 --shard i/N
+處理其中一份而不需要互相協調；並合併各分片的處理指標報告，確認每個輸入檔案恰好處理一次
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from build_cache import MANIFEST_NAME
+from metrics import STAGES
+
+
+def shard_of(relative_path: str, count: int) -> int:
+    """
+    計算檔案所屬的分片
+
+    以相對路徑（/ 分隔）的 SHA-256 決定，與機器、作業系統及 Python 的雜湊種子無關。
+
+    Args:
+        relative_path (str): 相對於輸入資料夾的路徑
+        count (int): 分片數量
+
+    Returns:
+        int: 分片編號，1 到 count
+    """
+    digest = hashlib.sha256(relative_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def relative_name(path: Path, root: Path) -> str:
+    """輸入檔案相對於輸入資料夾、以 / 分隔的路徑"""
+    return path.relative_to(root).as_posix()
+
+
+def inputs_digest(names: Iterable[str]) -> str:
+    """
+    計算輸入檔案集合的雜湊，合併報告時用來確認各分片看到相同的輸入
+
+    Args:
+        names (iterable): 所有輸入檔案的相對路徑
+
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    return hashlib.sha256("\n".join(sorted(names)).encode('utf-8')).hexdigest()
+
+
+class Shard:
+    """N 個分片中的第 i 個（i 從 1 開始）"""
+
+    def __init__(self, index: int, count: int):
+        """
+        初始化分片
+
+        Args:
+            index (int): 分片編號，1 到 count
+            count (int): 分片數量
+
+        Raises:
+            ValueError: 編號或數量不合法
+        """
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"分片必須是 1/N 到 N/N: {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """
+        解析命令列的 i/N
+
+        Args:
+            text (str): 例如 2/4
+
+        Returns:
+            Shard: 分片
+
+        Raises:
+            ValueError: 格式錯誤
+        """
+        index, separator, count = text.partition("/")
+        if not separator or not index.strip().isdigit() or not count.strip().isdigit():
+            raise ValueError(f"分片格式應為 i/N（例如 2/4）: {text}")
+        return cls(int(index), int(count))
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def __repr__(self) -> str:
+        return f"Shard({self.index}, {self.count})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Shard) and (self.index, self.count) == (other.index, other.count)
+
+    @property
+    def manifest_name(self) -> str:
+        """增量建置快取清單的檔案名稱，共用輸出資料夾時各分片的清單互不覆寫"""
+        return f"{MANIFEST_NAME}-shard-{self.index}of{self.count}"
+
+    def select(self, paths: Sequence[Path], root: Path) -> List[Path]:
+        """
+        篩選屬於此分片的輸入檔案
+
+        Args:
+            paths (list): 所有輸入檔案路徑
+            root (Path): 輸入資料夾路徑
+
+        Returns:
+            list: 屬於此分片的輸入檔案（保持原順序）
+        """
+        return [path for path in paths if shard_of(relative_name(path, root), self.count) == self.index]
+
+
+def describe_inputs(names: Sequence[str], shard: Optional[Shard] = None) -> Dict[str, Any]:
+    """
+    返回記錄在處理指標報告中的輸入檔案資訊
+
+    Args:
+        names (list): 分片前的所有輸入檔案相對於輸入資料夾（或封存檔）的路徑
+        shard (Shard): 目前執行的分片，None 表示處理所有檔案
+
+    Returns:
+        dict: {"count", "digest", "shard"}
+    """
+    return {
+        "count": len(names),
+        "digest": inputs_digest(names),
+        "shard": str(shard) if shard else None,
+    }
+
+
+def _report_shard(report: Dict[str, Any]) -> Shard:
+    """報告所屬的分片，沒有分片的報告視為 1/1"""
+    text = (report.get("inputs") or {}).get("shard")
+    return Shard.parse(text) if text else Shard(1, 1)
+
+
+def combine_reports(reports: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合併各分片的處理指標報告，並檢查每個輸入檔案是否恰好處理一次
+
+    檢查項目：所有分片都有報告且沒有重複、各分片看到相同的輸入檔案、每個檔案屬於回報它的分片、
+    沒有檔案被處理兩次、處理與略過的檔案數量等於輸入檔案數量，以及沒有處理失敗的檔案。
+
+    Args:
+        reports (list): 各分片以 --metrics-out 輸出的報告
+
+    Returns:
+        dict: 合併後的報告；"problems" 列出所有檢查失敗的項目，為空時表示驗證通過
+    """
+    problems: List[str] = []
+    if not reports:
+        return {"problems": ["沒有任何報告"]}
+
+    for position, report in enumerate(reports, 1):
+        if not report.get("inputs"):
+            problems.append(f"第 {position} 份報告沒有輸入檔案資訊，請以支援分片的版本重新產生")
+    if problems:
+        return {"problems": problems}
+
+    shards = [_report_shard(report) for report in reports]
+    count = shards[0].count
+    if any(shard.count != count for shard in shards):
+        problems.append("報告的分片數量不一致: " + ", ".join(str(shard) for shard in shards))
+    else:
+        indexes = [shard.index for shard in shards]
+        missing = [str(index) for index in range(1, count + 1) if index not in indexes]
+        duplicated = sorted({str(index) for index in indexes if indexes.count(index) > 1})
+        if missing:
+            problems.append(f"缺少分片 {', '.join(missing)}（共 {count} 個）")
+        if duplicated:
+            problems.append(f"分片 {', '.join(duplicated)} 有多份報告")
+
+    commands = sorted({report.get("command") for report in reports}, key=str)
+    if len(commands) > 1:
+        problems.append(f"報告來自不同的命令: {', '.join(map(str, commands))}")
+
+    inputs = [report["inputs"] for report in reports]
+    if len({(item.get("count"), item.get("digest")) for item in inputs}) > 1:
+        problems.append("各分片的輸入檔案不同，請確認每台機器的 add 資料夾內容相同")
+
+    # 每個檔案由哪些分片負責（含增量建置快取略過與 --where 沒有選取的檔案）
+    owners: Dict[str, List[str]] = {}
+    files: List[Dict[str, Any]] = []
+    for report, shard in zip(reports, shards):
+        names = ([item["name"] for item in report.get("files", [])] + list(report.get("skipped", []))
+                 + list(report.get("unselected", [])))
+        for name in names:
+            owners.setdefault(name, []).append(str(shard))
+            if shard.count == count and shard_of(name, count) != shard.index:
+                problems.append(f"{name} 不屬於分片 {shard}")
+        files.extend(report.get("files", []))
+
+    for name, shard_names in sorted(owners.items()):
+        if len(shard_names) > 1:
+            problems.append(f"{name} 被處理了 {len(shard_names)} 次（分片 {', '.join(shard_names)}）")
+    if len(owners) != inputs[0].get("count"):
+        problems.append(f"處理、略過與未選取的檔案共 {len(owners)} 個，輸入檔案共 {inputs[0].get('count')} 個")
+
+    failed = sorted(item["name"] for item in files if not item.get("ok"))
+    if failed:
+        problems.append(f"處理失敗的檔案: {', '.join(failed)}")
+
+    return {
+        "command": commands[0] if len(commands) == 1 else None,
+        "settings": reports[0].get("settings", {}),
+        "shards": [str(shard) for shard in shards],
+        # 各分片在不同機器上同時執行，整體耗時取最長的分片
+        "wall_seconds": max(report.get("wall_seconds", 0.0) for report in reports),
+        "inputs": dict(inputs[0], shard=None),
+        "cache": {key: sum(report.get("cache", {}).get(key, 0) for report in reports)
+                  for key in ("hits", "misses")},
+        "totals": _combine_totals(report.get("totals", {}) for report in reports),
+        "files": sorted(files, key=lambda item: item["name"]),
+        "skipped": sorted(name for report in reports for name in report.get("skipped", [])),
+        "unselected": sorted(name for report in reports for name in report.get("unselected", [])),
+        "problems": problems,
+    }
+
+
+def _combine_totals(totals: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """加總各分片的彙總指標"""
+    combined: Dict[str, Any] = {"stages": dict.fromkeys(STAGES, 0.0)}
+    for item in totals:
+        for key, value in item.items():
+            if key == "stages":
+                for stage, seconds in value.items():
+                    combined["stages"][stage] = round(combined["stages"].get(stage, 0.0) + seconds, 6)
+            else:
+                combined[key] = combined.get(key, 0) + value
+    return combined
+
+
+def combine_report_files(paths: Sequence[Union[str, Path]],
+                         output: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    讀取並合併報告檔案，指定 output 時寫入合併後的報告
+
+    Args:
+        paths (list): 報告檔案路徑
+        output (Path): 合併後的報告路徑
+
+    Returns:
+        dict: 合併後的報告
+    """
+    reports = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            reports.append(json.load(f))
+
+    combined = combine_reports(reports)
+    if output:
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(combined, ensure_ascii=False, indent=2), encoding='utf-8')
+    return combined
+
+
+def print_combined(combined: Dict[str, Any]):
+    """
+    輸出合併結果與驗證結果
+
+    Args:
+        combined (dict): combine_reports 的結果
+    """
+    if "totals" in combined:
+        totals = combined["totals"]
+        print(f"分片: {', '.join(combined['shards'])}")
+        print(f"輸入檔案 {combined['inputs']['count']} 個：處理 {totals.get('processed', 0)} 個、"
+              f"略過（快取） {totals.get('skipped', 0)} 個、失敗 {totals.get('failed', 0)} 個"
+              + (f"、未選取（--where） {totals['unselected']} 個" if totals.get("unselected") else ""))
+        print(f"讀取 {totals.get('bytes_in', 0)} 位元組，寫入 {totals.get('bytes_out', 0)} 位元組，"
+              f"最長的分片耗時 {combined['wall_seconds']:.3f} 秒")
+
+    if combined["problems"]:
+        print("❌ 驗證失敗：")
+        for problem in combined["problems"]:
+            print(f"  - {problem}")
+    else:
+        print("✅ 每個輸入檔案都恰好處理一次")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    主函數 - 合併各分片的處理指標報告
+
+    Returns:
+        int: 驗證通過時為 0，否則為 1
+    """
+    parser = argparse.ArgumentParser(description="合併各分片的處理指標報告並確認每個輸入檔案恰好處理一次")
+    parser.add_argument("reports", nargs="+", help="各分片以 --metrics-out 輸出的報告")
+    parser.add_argument("-o", "--output", metavar="PATH", help="合併後的報告路徑")
+    args = parser.parse_args(argv)
+
+    combined = combine_report_files(args.reports, args.output)
+    print_combined(combined)
+    return 1 if combined["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+監看模式
+功能：常駐執行並以 os.scandir 輪詢 add 資料夾中檔案的大小與修改時間，只處理新增或變更的檔案；
+檔案在一段時間內沒有變動才會處理，避免讀到寫入到一半的檔案；append_json.json（或路由設定檔與其中的合併資料片段）
+變更時重新處理所有檔案
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from batch import run_batch
+from build_cache import BuildCache
+from logging_setup import configure_logging, flush_logging
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+
+# 檔案簽章：(大小, 修改時間 ns)
+Signature = Tuple[int, int]
+
+Processor = Union[JSONMerger, FormDetailProcessor]
+
+
+def scan_json_files(directory: Path) -> Dict[str, Signature]:
+    """
+    以 os.scandir 取得資料夾中所有JSON檔案的簽章
+
+    Args:
+        directory (Path): 資料夾路徑
+
+    Returns:
+        dict: {檔案名稱: (大小, 修改時間 ns)}，資料夾不存在時返回空字典
+    """
+    signatures = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return signatures
+
+
+def scan_files(paths: List[Path]) -> Dict[str, Signature]:
+    """
+    取得多個檔案的簽章
+
+    Args:
+        paths (list): 檔案路徑
+
+    Returns:
+        dict: {檔案路徑: (大小, 修改時間 ns)}，不包含不存在的檔案
+    """
+    signatures = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        signatures[str(path)] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+class ChangeTracker:
+    """
+    依連續兩次輪詢的簽章判斷哪些檔案已變更且寫入完成
+
+    檔案的簽章與上次輪詢相同、與上次處理時不同，且修改時間已超過 settle 秒，才視為可處理。
+    """
+
+    def __init__(self, settle: float = 2.0):
+        """
+        初始化追蹤器
+
+        Args:
+            settle (float): 檔案最後修改後需要等待的秒數
+        """
+        self.settle = settle
+        self.seen: Dict[str, Signature] = {}
+        self.done: Dict[str, Signature] = {}
+
+    def update(self, snapshot: Dict[str, Signature], now: Optional[float] = None) -> Tuple[List[str], List[str]]:
+        """
+        以本次輪詢的結果更新狀態
+
+        Args:
+            snapshot (dict): 本次輪詢的檔案簽章
+            now (float): 目前時間（epoch 秒），預設為 time.time()
+
+        Returns:
+            tuple: (可處理的檔案名稱, 已刪除的檔案名稱)，皆已排序
+        """
+        now = time.time() if now is None else now
+
+        ready = sorted(
+            name for name, signature in snapshot.items()
+            if self.done.get(name) != signature
+            and self.seen.get(name) == signature
+            and now - signature[1] / 1e9 >= self.settle
+        )
+        removed = sorted(name for name in self.done if name not in snapshot)
+
+        self.seen = snapshot
+        for name in removed:
+            del self.done[name]
+        return ready, removed
+
+    def mark_done(self, name: str):
+        """記錄檔案已以目前的簽章處理，之後只有再次變更才會處理"""
+        self.done[name] = self.seen[name]
+
+    def reset(self):
+        """忘記所有已處理的檔案，下次輪詢時重新處理"""
+        self.done.clear()
+
+
+class Watcher:
+    """常駐監看輸入資料夾，保留已載入的合併資料與處理器，只處理變更的檔案"""
+
+    def __init__(self, processor: Processor, jobs: int = 1, stream: bool = False,
+                 interval: float = 1.0, settle: float = 2.0):
+        """
+        初始化監看器
+
+        Args:
+            processor (JSONMerger | FormDetailProcessor): 處理器，需提供 file_task、cache_fingerprint 與 output_path
+            jobs (int): 平行處理的工作行程數量
+            stream (bool): 是否使用串流模式
+            interval (float): 輪詢間隔秒數
+            settle (float): 檔案最後修改後需要等待的秒數
+        """
+        self.processor = processor
+        self.jobs = jobs
+        self.stream = stream
+        self.interval = interval
+        self.files = ChangeTracker(settle)
+        self.append = ChangeTracker(settle)
+        self.append_sources: List[Path] = []
+        self.task = None
+        self.cache: Optional[BuildCache] = None
+        self.processed = 0
+        self.failed = 0
+
+    def reload(self) -> bool:
+        """
+        載入合併資料並重建增量建置快取的設定指紋
+
+        Returns:
+            bool: 是否成功載入；失敗時沿用先前的合併資料
+        """
+        task = self.processor.file_task(self.stream)
+        if task is None:
+            return False
+
+        self.task = task
+        self.cache = BuildCache(self.processor.output_dir, self.processor.cache_fingerprint())
+        return True
+
+    def start(self) -> bool:
+        """
+        開始監看，記錄目前的檔案狀態
+
+        Returns:
+            bool: 是否成功載入合併資料
+        """
+        self.track_append_sources()
+        return self.reload()
+
+    def track_append_sources(self):
+        """
+        取得處理器目前的合併資料來源並記錄其簽章，視為已處理
+
+        路由設定檔變更後合併資料片段可能增減，重新載入後需再次呼叫。
+        """
+        sources = getattr(self.processor, "append_sources", None)
+        self.append_sources = sources() if sources is not None else []
+        self.append.update(scan_files(self.append_sources))
+        for key in self.append.seen:
+            self.append.mark_done(key)
+
+    def check_append_file(self):
+        """合併資料的來源檔案寫入完成且內容變更時重新載入，並重新處理所有檔案"""
+        if not self.append_sources:
+            return
+
+        ready, _ = self.append.update(scan_files(self.append_sources))
+        if not ready:
+            return
+
+        for key in ready:
+            self.append.mark_done(key)
+        logging.info(f"偵測到合併資料變更: {', '.join(ready)}")
+        if self.reload():
+            self.track_append_sources()
+            self.files.reset()
+        else:
+            logging.warning("無法載入新的合併資料，沿用先前的合併資料")
+
+    def poll(self) -> int:
+        """
+        執行一次輪詢並處理已變更的檔案
+
+        Returns:
+            int: 本次處理的檔案數量
+        """
+        self.check_append_file()
+
+        snapshot = scan_json_files(self.processor.input_dir)
+        ready, removed = self.files.update(snapshot)
+        if removed:
+            self.cache.prune(snapshot)
+            logging.info(f"輸入檔案已刪除: {', '.join(removed)}")
+
+        output_path = self.processor.output_path
+        stale_files = []
+        for name in ready:
+            self.files.mark_done(name)
+            path = self.processor.input_dir / name
+            if not self.cache.is_fresh(path, output_path(name)):
+                stale_files.append(path)
+
+        if not stale_files:
+            return 0
+
+        results = run_batch(self.task, stale_files, self.jobs)
+        self.cache.update(stale_files, [r.ok for r in results], output_path)
+
+        failed_files = [r.name for r in results if not r.ok]
+        self.processed += len(results)
+        self.failed += len(failed_files)
+        if failed_files:
+            logging.warning(f"處理失敗的檔案: {', '.join(failed_files)}")
+        logging.info(f"已處理 {len(results) - len(failed_files)}/{len(results)} 個變更的檔案")
+        return len(results)
+
+    def run(self, max_polls: Optional[int] = None):
+        """
+        持續輪詢直到中斷（Ctrl+C）
+
+        Args:
+            max_polls (int): 最多輪詢次數，None 表示不限
+        """
+        if not self.start():
+            return
+
+        logging.info(f"開始監看 {self.processor.input_dir}（每 {self.interval} 秒輪詢，"
+                     f"檔案需靜置 {self.files.settle} 秒）")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                self.poll()
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+        logging.info(f"停止監看：共處理 {self.processed} 個檔案，失敗 {self.failed} 個")
+
+
+def create_processor(target: str = "all", merge_policy: str = "append",
+                     output_format: Optional[OutputFormat] = None, json_backend: str = "auto",
+                     schema_path: Optional[str] = None, routes_file: Optional[str] = None,
+                     intern_strings: bool = False) -> Processor:
+    """
+    建立監看時使用的處理器
+
+    Args:
+        target (str): 要執行的處理（merge / optimize / all）
+        merge_policy (str): 合併策略
+        output_format (OutputFormat): 輸出格式
+        json_backend (str): JSON後端
+        schema_path (str): C#類別結構描述檔路徑
+        routes_file (str): 路由設定檔路徑
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+
+    Returns:
+        JSONMerger | FormDetailProcessor: 處理器
+    """
+    if target == "merge":
+        return JSONMerger(merge_policy=merge_policy, output_format=output_format,
+                          json_backend=json_backend, routes_file=routes_file,
+                          intern_strings=intern_strings)
+    if target == "optimize":
+        return FormDetailProcessor(output_format=output_format, json_backend=json_backend,
+                                   schema_path=schema_path, intern_strings=intern_strings)
+    if target == "all":
+        return FormDetailPipeline(merge_policy=merge_policy, output_format=output_format,
+                                  json_backend=json_backend, schema_path=schema_path,
+                                  routes_file=routes_file, intern_strings=intern_strings)
+    raise ValueError(f"不支援的監看處理: {target}")
+
+
+def main(target: str = "all", jobs: int = 1, stream: bool = False, merge_policy: str = "append",
+         output_format: Optional[OutputFormat] = None, json_backend: str = "auto",
+         schema_path: Optional[str] = None, interval: float = 1.0, settle: float = 2.0,
+         file_log_level: str = "info", routes_file: Optional[str] = None,
+         intern_strings: bool = False):
+    """
+    主函數
+
+    Args:
+        target (str): 要執行的處理（merge / optimize / all）
+        jobs (int): 平行處理的工作行程數量
+        stream (bool): 是否使用串流模式
+        merge_policy (str): 合併策略
+        output_format (OutputFormat): 輸出格式
+        json_backend (str): JSON後端
+        schema_path (str): C#類別結構描述檔路徑
+        interval (float): 輪詢間隔秒數
+        settle (float): 檔案最後修改後需要等待的秒數
+        file_log_level (str): 每個檔案的日誌等級，off 表示只輸出摘要
+        routes_file (str): 路由設定檔路徑
+        intern_strings (bool): 是否以字串共用表替換重複的鍵與短字串值
+    """
+    configure_logging("watch.log", file_level=file_log_level)
+
+    print("監看模式啟動...（按 Ctrl+C 停止）")
+    print("=" * 60)
+
+    processor = create_processor(target, merge_policy=merge_policy, output_format=output_format,
+                                 json_backend=json_backend, schema_path=schema_path,
+                                 routes_file=routes_file, intern_strings=intern_strings)
+    Watcher(processor, jobs=jobs, stream=stream, interval=interval, settle=settle).run()
+    flush_logging()
+
+    print("=" * 60)
+    print("監看已停止。")
+
+if __name__ == "__main__":
+    main()
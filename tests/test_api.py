@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 記憶體內處理 API
+"""
+
+import copy
+import gzip
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from api import Transformer, preload_append_data, transform, transform_many
+from json_patch import apply_patch
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+
+DOCUMENT = {
+    "meta": {"version": 1},
+    "forms": [{"formId": "A", "formFields": [
+        {"formFieldId": "f1", "fieldName": "欄位1", "sort": 1, "colSpan": 2, "legacy": True},
+    ]}],
+}
+
+APPEND_FIELDS = [{"formFieldId": "f1", "fieldName": "新名稱"}, {"formFieldId": "f9", "fieldName": "新增欄位"}]
+
+
+class TestTransformer:
+    """與檔案處理結果一致性的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+        (self.input_dir / "a.json").write_text(json.dumps(DOCUMENT, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text(json.dumps(APPEND_FIELDS, ensure_ascii=False), encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def file_output(self, command, output_format, merge_policy="replace"):
+        """以檔案處理 add/a.json 並返回輸出檔案的內容"""
+        output_dir = self.temp_dir / f"out-{command}"
+        options = dict(input_dir=self.input_dir, output_dir=output_dir, output_format=output_format,
+                       json_backend="json")
+        if command == "merge":
+            JSONMerger(append_file=self.append_file, merge_policy=merge_policy, **options).merge_all_files()
+        elif command == "optimize":
+            FormDetailProcessor(**options).process_all_files()
+        else:
+            FormDetailPipeline(append_file=self.append_file, merge_policy=merge_policy, **options).process_all_files()
+        append_data._loaded.clear()
+        return (output_dir / output_format.output_name("a.json")).read_bytes()
+
+    @pytest.mark.parametrize("command", ["merge", "optimize", "all"])
+    def test_matches_file_output(self, command):
+        """測試位元組輸入的結果與輸出檔案相同，已解析的輸入返回相同內容的資料"""
+        output_format = OutputFormat("compact", "gzip")
+        expected = self.file_output(command, output_format)
+        transformer = Transformer(command, APPEND_FIELDS, merge_policy="replace", output_format=output_format,
+                                  json_backend="json")
+
+        content = (self.input_dir / "a.json").read_bytes()
+        assert transformer.transform(content, "a.json") == expected
+        assert transformer.transform(content.decode('utf-8'), "a.json") == expected
+        assert transformer.transform(copy.deepcopy(DOCUMENT)) == json.loads(gzip.decompress(expected))
+
+    def test_patch(self):
+        """測試 patch 格式時返回 JSON Patch 操作"""
+        operations = transform(copy.deepcopy(DOCUMENT), "all", APPEND_FIELDS, output_format=OutputFormat("patch"))
+
+        assert apply_patch(copy.deepcopy(DOCUMENT), operations) == transform(copy.deepcopy(DOCUMENT), "all",
+                                                                             APPEND_FIELDS)
+
+    def test_append_content(self):
+        """測試合併資料可直接傳入 append_json.json 的內容"""
+        fields = preload_append_data(b'{"formFieldId": "f9"},\n{"formFieldId": "f10"},\n')
+
+        assert fields == [{"formFieldId": "f9"}, {"formFieldId": "f10"}]
+        result = transform(copy.deepcopy(DOCUMENT), "merge", '[{"formFieldId": "f9"}]')
+        assert [field["formFieldId"] for field in result["forms"][0]["formFields"]] == ["f1", "f9"]
+        with pytest.raises(ValueError):
+            preload_append_data([1])
+
+    def test_errors(self):
+        """測試參數錯誤與無法處理的文件"""
+        with pytest.raises(ValueError):
+            Transformer("check")
+        with pytest.raises(ValueError):
+            Transformer("merge")
+        with pytest.raises(ValueError, match="沒有forms陣列"):
+            transform({"forms": []}, "merge", [])
+        with pytest.raises(ValueError, match="JSON解析錯誤"):
+            transform(b"{", "optimize")
+
+
+class TestTransformMany:
+    """批次處理測試"""
+
+    def test_lazy(self):
+        """測試逐步取出文件並依序產生結果，失敗的文件不中斷處理"""
+        consumed = []
+
+        def documents():
+            for name, document in [("a.json", DOCUMENT), ("b.json", b"{"), ("c.json", b'{"forms": []}')]:
+                consumed.append(name)
+                yield name, copy.deepcopy(document)
+
+        results = transform_many(documents(), "optimize", output_format=OutputFormat("compact"))
+        assert consumed == []
+
+        metrics, result = next(results)
+        assert consumed == ["a.json"]
+        assert metrics.ok and result["forms"][0]["formId"] == "A"
+
+        rest = list(results)
+        assert [(m.name, m.ok) for m, _ in rest] == [("b.json", False), ("c.json", True)]
+        assert rest[0][1] is None and rest[1][1] == b'{"forms":[]}'
+
+    def test_jobs(self):
+        """測試多個工作行程的結果與單行程相同，且不修改傳入的資料"""
+        documents = [copy.deepcopy(DOCUMENT) for _ in range(5)]
+        transformer = Transformer("all", APPEND_FIELDS, json_backend="json")
+
+        parallel = [result for _, result in transformer.transform_many(documents, jobs=2)]
+        assert documents == [DOCUMENT] * 5
+        assert parallel == [result for _, result in transformer.transform_many(copy.deepcopy(documents))]
+
+
+def test_no_side_effects():
+    """測試匯入與處理都不建立任何檔案，也不輸出到標準輸出"""
+    script = ("import api; "
+              "api.transform(b'{\"forms\": [{\"formId\": \"A\"}]}', 'all', b'{\"formFieldId\": \"f1\"}')")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result = subprocess.run([sys.executable, "-c", script], cwd=temp_dir, capture_output=True, text=True,
+                                env={"PYTHONPATH": str(src_path)})
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == ""
+        assert list(Path(temp_dir).iterdir()) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 合併資料載入
+"""
+
+import json
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from append_data import CACHE_NAME, AppendData, decode_fragments, load_append_file
+from json_codec import get_codec
+from merge_json import JSONMerger
+
+FIELDS = [{"fieldName": "欄位一", "sort": 1}, {"fieldName": "欄位二", "sort": 2}]
+
+APPEND_FILE = Path(__file__).parent.parent / "append_json.json"
+
+
+class TestDecodeFragments:
+    """合併資料格式測試"""
+
+    @pytest.mark.parametrize("text", [
+        json.dumps(FIELDS, ensure_ascii=False, indent=2),
+        json.dumps(FIELDS[0], ensure_ascii=False) + json.dumps(FIELDS[1], ensure_ascii=False),
+        ",\n".join(json.dumps(field, ensure_ascii=False, indent=2) for field in FIELDS) + ",\n",
+        "\n".join(json.dumps(field, ensure_ascii=False) for field in FIELDS) + "\n",
+        "\ufeff" + json.dumps(FIELDS, ensure_ascii=False),
+        json.dumps(FIELDS[:1], ensure_ascii=False) + ",\n" + json.dumps(FIELDS[1], ensure_ascii=False),
+    ], ids=["array", "concatenated", "trailing-comma", "ndjson", "bom", "mixed"])
+    def test_formats(self, text):
+        """測試陣列、連續物件、逗號分隔片段與 NDJSON 都解析為相同的欄位"""
+        assert decode_fragments(text) == FIELDS
+
+    def test_empty(self):
+        """測試空白內容"""
+        assert decode_fragments(" \n") == []
+
+    def test_invalid(self):
+        """測試錯誤的JSON與不是物件的欄位"""
+        with pytest.raises(json.JSONDecodeError):
+            decode_fragments('{"fieldName": "a"} {"fieldName": ')
+        with pytest.raises(ValueError, match="第 2 個"):
+            decode_fragments('{"fieldName": "a"}, 1')
+
+    def test_non_finite_values(self):
+        """測試合併資料中的 NaN / Infinity 以 orjson 後端序列化時與 json 相同"""
+        pytest.importorskip("orjson")
+        fields = decode_fragments('{"defaultValue": NaN}, {"defaultValue": -Infinity},')
+
+        assert get_codec("orjson").dumps(fields, None) == b'[{"defaultValue":NaN},{"defaultValue":-Infinity}]'
+
+    def test_repository_append_file(self):
+        """測試專案中的 append_json.json（陣列格式）解析為欄位而非巢狀陣列"""
+        fields = decode_fragments(APPEND_FILE.read_text(encoding='utf-8'))
+
+        assert fields
+        assert all(isinstance(field, dict) and "fieldName" in field for field in fields)
+
+
+class TestAppendCache:
+    """合併資料快取測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.append_file = self.temp_dir / "append_json.json"
+        self.cache_dir = self.temp_dir / "out"
+        self.cache_dir.mkdir()
+        self.append_file.write_text(json.dumps(FIELDS, ensure_ascii=False), encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def forbid_decode(self, monkeypatch):
+        """之後的載入若重新解析原始檔案就失敗"""
+        def decode(text):
+            raise AssertionError("不應重新解析")
+        monkeypatch.setattr(append_data, "decode_fragments", decode)
+
+    def test_cache_hit(self, monkeypatch):
+        """測試內容未變更時由快取載入"""
+        first = load_append_file(self.append_file, self.cache_dir)
+        assert (self.cache_dir / CACHE_NAME).exists()
+
+        self.forbid_decode(monkeypatch)
+        second = load_append_file(self.append_file, self.cache_dir)
+        assert list(second) == FIELDS
+        assert second.digest == first.digest
+
+    def test_touched_file_uses_cache(self, monkeypatch):
+        """測試只有修改時間改變時以雜湊比對並使用快取"""
+        load_append_file(self.append_file, self.cache_dir)
+        stat = self.append_file.stat()
+        os.utime(self.append_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.forbid_decode(monkeypatch)
+        assert list(load_append_file(self.append_file, self.cache_dir)) == FIELDS
+
+        header = json.loads((self.cache_dir / CACHE_NAME).read_bytes().split(b"\n", 1)[0])
+        assert header["mtime_ns"] == stat.st_mtime_ns + 10 ** 9
+
+    def test_changed_file_is_reparsed(self):
+        """測試內容變更時重新解析"""
+        first = load_append_file(self.append_file, self.cache_dir)
+        self.append_file.write_text('{"fieldName": "新欄位"},', encoding='utf-8')
+
+        second = load_append_file(self.append_file, self.cache_dir)
+        assert list(second) == [{"fieldName": "新欄位"}]
+        assert second.digest != first.digest
+
+    def test_cache_temp_file_is_unique(self):
+        """測試寫入快取時不使用固定的暫存檔名稱，失敗時也不留下暫存檔"""
+        # 另一個分片正在寫入的固定名稱暫存檔不影響這次寫入
+        (self.cache_dir / (CACHE_NAME + ".tmp")).mkdir()
+        load_append_file(self.append_file, self.cache_dir)
+        assert (self.cache_dir / CACHE_NAME).is_file()
+
+        (self.cache_dir / CACHE_NAME).unlink()
+        signature = (str(self.append_file), 0, 0)
+        append_data.write_cache(self.cache_dir / CACHE_NAME, [{"fieldName": object()}], "digest", signature)
+        assert sorted(os.listdir(self.cache_dir)) == [CACHE_NAME + ".tmp"]
+
+    def test_pickle_excludes_fields(self, monkeypatch):
+        """測試傳給工作行程時只傳送雜湊，並在工作行程中由快取載入"""
+        loaded = load_append_file(self.append_file, self.cache_dir)
+        payload = pickle.dumps(loaded)
+        assert "欄位一".encode('utf-8') not in payload
+
+        # 模擬尚未載入過合併資料的工作行程
+        append_data._loaded.clear()
+        self.forbid_decode(monkeypatch)
+        restored = pickle.loads(payload)
+        assert isinstance(restored, AppendData)
+        assert restored[1] == FIELDS[1]
+        assert len(restored) == 2
+
+    def test_merger_uses_output_dir_cache(self):
+        """測試 JSONMerger 把快取寫在輸出資料夾並回傳平坦的欄位列表"""
+        self.append_file.write_text(APPEND_FILE.read_text(encoding='utf-8'), encoding='utf-8')
+        merger = JSONMerger(append_file=self.append_file, output_dir=self.cache_dir)
+
+        fields = merger.load_append_data()
+        assert len(fields) == len(json.loads(APPEND_FILE.read_text(encoding='utf-8')))
+        assert (self.cache_dir / CACHE_NAME).exists()
+
+        form = merger.merge_form({"formId": "a", "formFields": [{"fieldName": "原始"}]}, fields)
+        assert all(isinstance(field, dict) for field in form["formFields"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
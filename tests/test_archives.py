@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 封存檔輸入與輸出
+"""
+
+import io
+import json
+import subprocess
+import sys
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from archives import ArchiveWriter, iter_inputs
+from batch import iter_batch
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+from sharding import Shard, combine_reports
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+FILE_COUNT = 6
+
+
+def square(value):
+    """測試用的工作函數，必須在模組層級定義才能傳給工作行程"""
+    return value * value
+
+
+def read_archive(path):
+    """讀取封存檔中所有成員的內容"""
+    path = Path(path)
+    if path.name.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+
+
+def write_archive(path, files):
+    """以 {名稱: 內容} 建立輸入封存檔"""
+    path = Path(path)
+    if path.name.endswith(".zip"):
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return
+    with tarfile.open(path, "w:gz" if path.name.endswith(".gz") else "w") as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+
+class TestIterBatch:
+    """延遲批次處理測試"""
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_order_and_laziness(self, jobs):
+        """測試結果依輸入順序返回，且輸入以產生器逐一讀取"""
+        consumed = []
+
+        def items():
+            for value in range(50):
+                consumed.append(value)
+                yield value
+
+        results = iter_batch(square, items(), jobs, chunk_size=4)
+        assert consumed == []
+        assert list(results) == [value * value for value in range(50)]
+        assert len(consumed) == 50
+
+
+class TestArchives:
+    """封存檔輸入與輸出測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        self.files = {}
+        for index in range(FILE_COUNT):
+            data = {"forms": [{"formId": f"form_{index}", "formName": f"表單{index}",
+                               "formFields": [{"fieldName": "欄位", "sort": index}]}]}
+            self.files[f"{index}.json"] = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        for name, content in self.files.items():
+            (self.input_dir / name).write_bytes(content)
+        self.append_file.write_text('{"fieldName": "新增欄位"}', encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def create(self, command, input_path, output_path, **kwargs):
+        """建立指定命令的處理器"""
+        if command == "merge":
+            return JSONMerger(append_file=self.append_file, input_dir=input_path,
+                              output_dir=output_path, json_backend="json", **kwargs)
+        if command == "optimize":
+            return FormDetailProcessor(input_dir=input_path, output_dir=output_path, json_backend="json", **kwargs)
+        return FormDetailPipeline(append_file=self.append_file, input_dir=input_path,
+                                  output_dir=output_path, json_backend="json", **kwargs)
+
+    def run(self, command, input_path, output_path, jobs=1, shard=None, **kwargs):
+        """執行處理並返回處理指標"""
+        processor = self.create(command, input_path, output_path, **kwargs)
+        run = processor.merge_all_files if command == "merge" else processor.process_all_files
+        return run(jobs=jobs, shard=shard)
+
+    def expected(self, command):
+        """以資料夾輸入與輸出處理，返回 {檔案名稱: 內容}"""
+        output_dir = self.temp_dir / f"expected_{command}"
+        self.run(command, self.input_dir, output_dir)
+        return {path.name: path.read_bytes() for path in sorted(output_dir.glob("*.json"))}
+
+    @pytest.mark.parametrize("suffix", [".zip", ".tar", ".tar.gz"])
+    @pytest.mark.parametrize("command", ["merge", "optimize", "all"])
+    def test_archive_to_directory(self, command, suffix):
+        """測試從封存檔讀取的結果與從資料夾讀取相同"""
+        source = self.temp_dir / f"forms{suffix}"
+        write_archive(source, self.files)
+        output_dir = self.temp_dir / "out"
+
+        run_metrics = self.run(command, source, output_dir)
+
+        assert run_metrics.totals()["processed"] == FILE_COUNT
+        assert {path.name: path.read_bytes() for path in output_dir.glob("*.json")} == self.expected(command)
+
+    @pytest.mark.parametrize("suffix", [".zip", ".tar", ".tgz"])
+    def test_directory_to_archive(self, suffix):
+        """測試輸出封存檔的成員名稱與內容和輸出到資料夾時相同，且不會建立輸出資料夾"""
+        output = self.temp_dir / "result" / f"out{suffix}"
+
+        self.run("all", self.input_dir, output)
+
+        assert read_archive(output) == self.expected("all")
+        assert sorted(path.name for path in output.parent.iterdir()) == [output.name]
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_archive_to_archive(self, jobs):
+        """測試封存檔到封存檔，子資料夾中的成員保留相對路徑，壓縮輸出的成員名稱加上副檔名"""
+        files = dict(self.files)
+        files["nested/extra.json"] = files.pop("0.json")
+        files["readme.txt"] = b"not json"
+        source = self.temp_dir / "forms.zip"
+        write_archive(source, files)
+        output = self.temp_dir / "out.zip"
+
+        run_metrics = self.run("optimize", source, output, jobs=jobs,
+                               output_format=OutputFormat("compact", "gzip"))
+
+        names = sorted(read_archive(output))
+        assert names == sorted(f"{index}.json.gz" for index in range(1, FILE_COUNT)) + ["nested/extra.json.gz"]
+        assert run_metrics.inputs["count"] == FILE_COUNT
+
+    def test_deterministic_and_unchanged(self):
+        """測試相同輸入產生相同的封存檔，內容未變更時保留既有的封存檔"""
+        output = self.temp_dir / "out.tar.gz"
+        self.run("all", self.input_dir, output)
+        first = output.read_bytes()
+        stat = output.stat()
+
+        self.run("all", self.input_dir, output, jobs=2)
+
+        assert output.read_bytes() == first
+        assert output.stat().st_mtime_ns == stat.st_mtime_ns
+        assert output.stat().st_ino == stat.st_ino
+        assert not list(output.parent.glob(output.name + ".*tmp"))
+
+    def test_failed_member(self):
+        """測試無法解析的成員記錄為失敗，不寫入輸出封存檔，其他成員照常處理"""
+        files = dict(self.files, **{"broken.json": b"{"})
+        source = self.temp_dir / "forms.zip"
+        write_archive(source, files)
+        output = self.temp_dir / "out.zip"
+
+        run_metrics = self.run("optimize", source, output)
+
+        assert run_metrics.failed_files == ["broken.json"]
+        assert sorted(read_archive(output)) == sorted(self.files)
+
+    def test_unsafe_member_names(self):
+        """測試略過絕對路徑與包含 .. 的成員，以及 macOS 的 __MACOSX 資料夾"""
+        source = self.temp_dir / "forms.zip"
+        write_archive(source, {"../escape.json": b"{}", "/abs.json": b"{}",
+                               "__MACOSX/._0.json": b"", "ok/0.json": b"{}"})
+
+        assert [name for name, _ in iter_inputs(source)] == ["ok/0.json"]
+
+    def test_abort_keeps_existing_archive(self):
+        """測試放棄寫入時保留既有的封存檔並刪除暫存檔"""
+        output = self.temp_dir / "out.zip"
+        output.write_bytes(b"existing")
+
+        writer = ArchiveWriter(output)
+        writer.write("0.json", b"{}")
+        writer.abort()
+
+        assert output.read_bytes() == b"existing"
+        assert not list(output.parent.glob("out.zip.*tmp"))
+
+    def test_routes(self):
+        """測試路由設定依封存檔成員名稱比對"""
+        routes_file = self.temp_dir / "routes.json"
+        routes_file.write_text(json.dumps({"routes": [{"files": ["nested/*"], "fragments": ["nested.json"]}]}),
+                               encoding='utf-8')
+        (self.temp_dir / "nested.json").write_text('[{"fieldName": "路由欄位"}]', encoding='utf-8')
+        files = {"nested/a.json": self.files["0.json"], "b.json": self.files["1.json"]}
+        source = self.temp_dir / "forms.tar"
+        write_archive(source, files)
+        output = self.temp_dir / "out.zip"
+
+        self.run("merge", source, output, routes_file=routes_file)
+
+        outputs = {name: json.loads(content) for name, content in read_archive(output).items()}
+        assert [f["fieldName"] for f in outputs["nested/a.json"]["forms"][0]["formFields"]] == ["欄位", "路由欄位"]
+        assert [f["fieldName"] for f in outputs["b.json"]["forms"][0]["formFields"]] == ["欄位"]
+
+    def test_shards(self):
+        """測試分片處理封存檔的成員，合併報告驗證通過"""
+        source = self.temp_dir / "forms.zip"
+        write_archive(source, self.files)
+
+        reports = [self.run("all", source, self.temp_dir / f"out-{index}.zip", shard=Shard(index, 2)).to_dict()
+                   for index in (1, 2)]
+
+        assert combine_reports(reports)["problems"] == []
+        members = [set(read_archive(self.temp_dir / f"out-{index}.zip")) for index in (1, 2)]
+        assert members[0] | members[1] == set(self.files)
+        assert not members[0] & members[1]
+
+    def test_cli(self):
+        """測試命令列 --input 與 --output，watch 不接受這兩個參數"""
+        def run(*args):
+            return subprocess.run([sys.executable, str(MAIN_SCRIPT), *args], cwd=self.temp_dir,
+                                  capture_output=True, text=True, encoding='utf-8')
+
+        write_archive(self.temp_dir / "forms.tgz", self.files)
+
+        result = run("all", "--input", "forms.tgz", "--output", "out.zip")
+        assert result.returncode == 0, result.stderr
+        assert sorted(read_archive(self.temp_dir / "out.zip")) == sorted(self.files)
+        assert run("watch", "--output", "out.zip").returncode == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
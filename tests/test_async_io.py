@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 非同步 I/O 處理流程
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+import async_io
+from async_io import process_files_async
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+
+FILE_COUNT = 20
+
+
+class TestAsyncIO:
+    """非同步 I/O 處理流程測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        for index in range(FILE_COUNT):
+            fields = [{"fieldName": f"欄位{i}", "sort": i} for i in range(index % 4 + 1)]
+            data = {"forms": [{"formId": f"form_{index}", "formName": f"表單{index}", "formFields": fields}]}
+            (self.input_dir / f"{index:02d}.json").write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text('{"fieldName": "新增欄位"}', encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def create(self, command, output_dir, **kwargs):
+        """建立指定命令的處理器"""
+        if command == "merge":
+            return JSONMerger(append_file=self.append_file, input_dir=self.input_dir,
+                              output_dir=output_dir, json_backend="json", **kwargs)
+        if command == "optimize":
+            return FormDetailProcessor(input_dir=self.input_dir, output_dir=output_dir, json_backend="json", **kwargs)
+        return FormDetailPipeline(append_file=self.append_file, input_dir=self.input_dir,
+                                  output_dir=output_dir, json_backend="json", **kwargs)
+
+    def run(self, command, output_dir, **kwargs):
+        """執行處理並返回處理指標"""
+        processor = self.create(command, output_dir)
+        run = processor.merge_all_files if command == "merge" else processor.process_all_files
+        return run(**kwargs)
+
+    @staticmethod
+    def outputs(output_dir):
+        """輸出資料夾中所有輸出檔案的內容"""
+        return {path.name: path.read_bytes() for path in sorted(output_dir.glob("*.json*"))}
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    @pytest.mark.parametrize("command", ["merge", "optimize", "all"])
+    def test_same_output_as_sync(self, command, jobs):
+        """測試非同步 I/O 模式的輸出與處理指標和一般模式相同"""
+        sync_metrics = self.run(command, self.temp_dir / "sync")
+        async_metrics = self.run(command, self.temp_dir / "async", jobs=jobs, async_io=True)
+
+        assert self.outputs(self.temp_dir / "async") == self.outputs(self.temp_dir / "sync")
+        assert [f.name for f in async_metrics.files] == [f.name for f in sync_metrics.files]
+        assert async_metrics.totals()["processed"] == FILE_COUNT
+        assert async_metrics.totals()["bytes_out"] == sync_metrics.totals()["bytes_out"]
+        assert all(f.stages["read"] > 0 and f.stages["write"] > 0 for f in async_metrics.files)
+        assert async_metrics.settings["async_io"] is True
+
+    def test_build_cache(self):
+        """測試非同步 I/O 模式更新增量建置快取，再次執行時略過未變更的檔案"""
+        output_dir = self.temp_dir / "out"
+        self.run("all", output_dir, async_io=True)
+        (self.input_dir / "00.json").write_text('{"forms": []}', encoding='utf-8')
+
+        run_metrics = self.run("all", output_dir, async_io=True)
+
+        assert (run_metrics.cache_hits, run_metrics.cache_misses) == (FILE_COUNT - 1, 1)
+        assert [f.name for f in run_metrics.files] == ["00.json"]
+
+    def test_failures(self):
+        """測試無法解析的檔案記錄為失敗，其他檔案照常處理"""
+        (self.input_dir / "broken.json").write_text("{", encoding='utf-8')
+
+        run_metrics = self.run("optimize", self.temp_dir / "out", async_io=True)
+
+        assert run_metrics.failed_files == ["broken.json"]
+        assert len(list((self.temp_dir / "out").glob("*.json"))) == FILE_COUNT
+
+    def test_unreadable_file(self):
+        """測試讀取失敗的檔案記錄為失敗"""
+        processor = FormDetailProcessor(input_dir=self.input_dir, output_dir=self.temp_dir / "out",
+                                        json_backend="json")
+        paths = [self.input_dir / "00.json", self.input_dir / "missing.json"]
+
+        results = process_files_async(processor.process_member, paths, processor.output_path,
+                                      processor.output_format)
+
+        assert [(r.name, r.ok) for r in results] == [("00.json", True), ("missing.json", False)]
+
+    @pytest.mark.parametrize("inflight_bytes", [1, 10 ** 9])
+    def test_inflight_budget(self, inflight_bytes):
+        """測試在途位元組上限小於單一檔案時仍能依序處理所有檔案"""
+        processor = FormDetailProcessor(input_dir=self.input_dir, output_dir=self.temp_dir / "out",
+                                        output_format=OutputFormat("compact", "gzip"), json_backend="json")
+        paths = sorted(self.input_dir.glob("*.json"))
+
+        results = process_files_async(processor.process_member, paths, processor.output_path,
+                                      processor.output_format, inflight_bytes=inflight_bytes, io_threads=2)
+
+        assert [r.name for r in results] == [path.name for path in paths]
+        assert all(r.ok for r in results)
+        assert len(list(processor.output_dir.glob("*.json.gz"))) == FILE_COUNT
+
+    def test_budget_limits_reads(self, monkeypatch):
+        """測試讀取前依檔案大小預留，大於上限的檔案單獨在途，使用量不超過上限或該檔案的大小"""
+        big = {"forms": [{"formId": "big", "formFields": [{"fieldName": "x" * 100, "sort": i} for i in range(200)]}]}
+        (self.input_dir / "10.json").write_text(json.dumps(big), encoding='utf-8')
+        paths = sorted(self.input_dir.glob("*.json"))
+        big_size = (self.input_dir / "10.json").stat().st_size
+        limit = big_size // 4
+        peaks = []
+
+        class RecordingBudget(async_io.ByteBudget):
+            async def reserve(self, size):
+                await super().reserve(size)
+                peaks.append(self.used)
+
+        monkeypatch.setattr(async_io, "ByteBudget", RecordingBudget)
+        processor = FormDetailProcessor(input_dir=self.input_dir, output_dir=self.temp_dir / "out",
+                                        json_backend="json")
+
+        results = process_files_async(processor.process_member, paths, processor.output_path,
+                                      processor.output_format, inflight_bytes=limit, io_threads=4)
+
+        assert all(r.ok for r in results)
+        assert big_size in peaks
+        assert max(peaks) <= max(limit, big_size)
+        assert all(peak <= limit for peak in peaks if peak != big_size)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 測試資料產生器與效能量測
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加 src 與 benchmarks 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+benchmarks_path = Path(__file__).parent.parent / "benchmarks"
+sys.path.insert(0, str(src_path))
+sys.path.insert(0, str(benchmarks_path))
+
+from generate_corpus import generate_corpus
+from merge_json import JSONMerger
+from run_benchmarks import COMMANDS, STAGES, compare_results, injected_latency, measure_io_latency, run_benchmarks
+
+
+class TestBenchmarks:
+    """測試資料產生器與效能量測測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_generate_corpus(self):
+        """測試產生的資料集數量與內容"""
+        corpus = generate_corpus(self.temp_dir, files=3, forms_per_file=2, fields_per_form=4,
+                                 append_fields=5, translation_ratio=1.0)
+
+        files = sorted((self.temp_dir / "add").glob("*.json"))
+        assert len(files) == 3
+        assert corpus["fields"] == 24
+        assert corpus["bytes"] == sum(f.stat().st_size for f in files)
+
+        data = json.loads(files[0].read_text(encoding='utf-8'))
+        assert len(data["forms"]) == 2
+        field = data["forms"][0]["formFields"][0]
+        assert len(field["translation"]) == 3
+        assert not field["fieldName"].isascii()
+
+        merger = JSONMerger(append_file=self.temp_dir / "append_json.json",
+                            output_dir=self.temp_dir / "out")
+        assert len(merger.load_append_data()) == 5
+
+    def test_generate_corpus_is_deterministic(self):
+        """測試相同參數與 seed 產生相同的檔案"""
+        generate_corpus(self.temp_dir / "a", files=2, seed=7)
+        generate_corpus(self.temp_dir / "b", files=2, seed=7)
+
+        for path in (self.temp_dir / "a").rglob("*.json"):
+            other = self.temp_dir / "b" / path.relative_to(self.temp_dir / "a")
+            assert path.read_bytes() == other.read_bytes()
+
+    def test_run_benchmarks(self):
+        """測試量測結果包含每個命令與階段"""
+        corpus = generate_corpus(self.temp_dir, files=2, forms_per_file=1, fields_per_form=3)
+        results = run_benchmarks(self.temp_dir, corpus, repeat=1, json_backend="json")
+
+        assert set(results["commands"]) == set(COMMANDS)
+        assert set(results["stages"]) == set(STAGES)
+        for metrics in results["commands"].values():
+            assert metrics["fields_per_sec"] > 0
+            assert metrics["peak_mb"] > 0
+        assert len(list((self.temp_dir / "out").glob("*.json"))) == 2
+
+    def test_measure_io_latency(self):
+        """測試模擬網路磁碟延遲時，非同步 I/O 處理流程比一般模式快"""
+        corpus = generate_corpus(self.temp_dir, files=8, forms_per_file=1, fields_per_form=3)
+        results = measure_io_latency(self.temp_dir, corpus, latency=0.02, repeat=1, json_backend="json")
+
+        assert results["latency_ms"] == 20
+        assert results["async"]["seconds"] < results["sync"]["seconds"]
+        assert results["speedup"] > 1
+        assert len(list((self.temp_dir / "out").glob("*.json"))) == 8
+
+    def test_injected_latency_is_scoped(self):
+        """測試延遲只加在指定的資料夾，離開後恢復原本的 open"""
+        import builtins
+        real_open = builtins.open
+        (self.temp_dir / "slow").mkdir()
+
+        with injected_latency([self.temp_dir / "slow"], 0.05):
+            assert builtins.open is not real_open
+            start = time.perf_counter()
+            open(self.temp_dir / "fast.txt", "w").close()
+            assert time.perf_counter() - start < 0.05
+            start = time.perf_counter()
+            open(self.temp_dir / "slow" / "a.txt", "w").close()
+            assert time.perf_counter() - start >= 0.05
+        assert builtins.open is real_open
+
+    def test_compare_results(self):
+        """測試效能退步的判斷"""
+        baseline = {
+            "environment": {"json_backend": "json"},
+            "corpus": {"files": 1},
+            "commands": {"all": {"fields_per_sec": 1000.0, "peak_mb": 10.0}},
+            "stages": {"parse": {"fields_per_sec": 5000.0}}
+        }
+        current = json.loads(json.dumps(baseline))
+        assert compare_results(current, baseline) == []
+
+        current["commands"]["all"]["fields_per_sec"] = 800.0
+        current["commands"]["all"]["peak_mb"] = 12.0
+        regressions = compare_results(current, baseline, tolerance=0.15)
+        assert len(regressions) == 2
+
+        # 資料集不同時不比較
+        current["corpus"] = {"files": 2}
+        assert compare_results(current, baseline) == []
+
+    def test_compare_startup(self):
+        """測試啟動時間退步與啟動時建立檔案的判斷"""
+        startup = {
+            "interpreter": {"seconds": 0.02},
+            "version": {"seconds": 0.03},
+            "help": {"seconds": 0.04},
+            "files_created": []
+        }
+        baseline = {"environment": {"json_backend": "json"}, "corpus": {"files": 1}, "startup": startup}
+        current = json.loads(json.dumps(baseline))
+        current["corpus"] = {"files": 2}
+        assert compare_results(current, baseline) == []
+
+        # 資料集不同時仍比較啟動時間
+        current["startup"]["version"]["seconds"] = 0.06
+        current["startup"]["files_created"] = ["merge_json.log"]
+        regressions = compare_results(current, baseline)
+        assert len(regressions) == 2
+        assert any("merge_json.log" in regression for regression in regressions)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
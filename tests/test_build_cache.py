@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 增量建置快取
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from build_cache import MANIFEST_NAME, BuildCache, make_fingerprint
+from merge_json import JSONMerger
+
+
+class TestBuildCache:
+    """增量建置快取測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = Path(self.temp_dir) / "add"
+        self.output_dir = Path(self.temp_dir) / "out"
+        self.append_file = Path(self.temp_dir) / "append_json.json"
+
+        self.input_dir.mkdir()
+        self._write_append({"fieldName": "新增欄位"})
+
+        for i in range(3):
+            self._write_input(f"test_{i}.json", f"form_{i}")
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def _write_append(self, data):
+        with open(self.append_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def _write_input(self, name, form_id):
+        data = {"forms": [{"formId": form_id, "formFields": [{"fieldName": "原始欄位"}]}]}
+        with open(self.input_dir / name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def _run_merge(self, force=False):
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+        merger.merge_all_files(force=force)
+
+    def _stale_names(self):
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+        cache = BuildCache(self.output_dir, merger.cache_fingerprint())
+        json_files = sorted(self.input_dir.glob("*.json"))
+        return [path.name for path in cache.select_stale(json_files, lambda name: self.output_dir / name)]
+
+    def test_unchanged_inputs_are_skipped(self):
+        """測試未變更的輸入檔案會被略過"""
+        self._run_merge()
+
+        assert (self.output_dir / MANIFEST_NAME).exists()
+        assert self._stale_names() == []
+
+    def test_modified_input_is_reprocessed(self):
+        """測試內容變更的輸入檔案會被重新處理"""
+        self._run_merge()
+        self._write_input("test_1.json", "changed")
+
+        assert self._stale_names() == ["test_1.json"]
+
+    def test_missing_output_is_reprocessed(self):
+        """測試輸出檔案被刪除時會重新處理"""
+        self._run_merge()
+        (self.output_dir / "test_2.json").unlink()
+
+        assert self._stale_names() == ["test_2.json"]
+
+    def test_append_change_invalidates_all(self):
+        """測試合併資料變更時所有檔案都需要重新處理"""
+        self._run_merge()
+        self._write_append({"fieldName": "另一個欄位"})
+
+        assert self._stale_names() == ["test_0.json", "test_1.json", "test_2.json"]
+
+    def test_force_ignores_cache(self):
+        """測試 force 會忽略快取"""
+        self._run_merge()
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+        cache = BuildCache(self.output_dir, merger.cache_fingerprint(), force=True)
+        json_files = sorted(self.input_dir.glob("*.json"))
+
+        assert len(cache.select_stale(json_files, lambda name: self.output_dir / name)) == 3
+        assert (cache.hits, cache.misses) == (0, 3)
+
+    def test_fingerprint_depends_on_mode_and_options(self):
+        """測試設定指紋依處理模式與選項而不同"""
+        assert make_fingerprint("merge", append_hash="a") == make_fingerprint("merge", append_hash="a")
+        assert make_fingerprint("merge", append_hash="a") != make_fingerprint("merge", append_hash="b")
+        assert make_fingerprint("merge") != make_fingerprint("optimize")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
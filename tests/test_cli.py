@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 命令列啟動
+"""
+
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from logging_setup import configure_logging
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+
+class TestCli:
+    """命令列啟動測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def run_cli(self, *args: str) -> subprocess.CompletedProcess:
+        """在暫存資料夾中執行命令列"""
+        return subprocess.run([sys.executable, *args], cwd=self.temp_dir, capture_output=True,
+                              text=True, encoding='utf-8', check=True)
+
+    @pytest.mark.parametrize("argv", [["--version"], ["--help"], ["merge", "--help"]])
+    def test_startup_creates_no_files(self, argv):
+        """測試只顯示版本或說明時不會建立日誌檔"""
+        self.run_cli(str(MAIN_SCRIPT), *argv)
+
+        assert list(self.temp_dir.iterdir()) == []
+
+    def test_startup_skips_command_modules(self):
+        """測試只顯示版本時不載入處理模組"""
+        result = self.run_cli("-X", "importtime", str(MAIN_SCRIPT), "--version")
+
+        imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()}
+        assert "options" in imported
+        for module in ("merge_json", "optimized_process_json", "pipeline", "concurrent.futures"):
+            assert module not in imported
+
+    def test_command_writes_its_own_log(self):
+        """測試執行命令時才建立該命令的日誌檔"""
+        input_dir = self.temp_dir / "add"
+        input_dir.mkdir()
+        (input_dir / "a.json").write_text(json.dumps({"forms": []}), encoding='utf-8')
+
+        self.run_cli(str(MAIN_SCRIPT), "optimize")
+
+        assert (self.temp_dir / "process_json.log").exists()
+        assert not (self.temp_dir / "merge_json.log").exists()
+
+    def test_configure_logging_keeps_existing_handlers(self):
+        """測試已設定日誌時不重複加入處理器"""
+        log_file = self.temp_dir / "run.log"
+        handler = logging.NullHandler()
+        logging.getLogger().addHandler(handler)
+        try:
+            configure_logging(str(log_file))
+        finally:
+            logging.getLogger().removeHandler(handler)
+
+        assert not log_file.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
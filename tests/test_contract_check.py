@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 契約檢查
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 與 benchmarks 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+benchmarks_path = Path(__file__).parent.parent / "benchmarks"
+sys.path.insert(0, str(src_path))
+sys.path.insert(0, str(benchmarks_path))
+
+from contract_check import check_inputs, get_checker
+from generate_corpus import generate_corpus
+from optimized_process_json import FormDetailProcessor, FormFieldProcessor
+from pipeline import FormDetailPipeline
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+VALID_FIELD = {
+    "formFieldId": "f1", "fieldName": "欄位", "fieldType": "dxTextBox", "isReadonly": False,
+    "isVisible": True, "infoDisplayCondition": False, "sort": 1, "specialFieldCode": "",
+}
+
+
+def form_detail(**field_changes):
+    """建立只有一個欄位的 FormDetail，field_changes 為 None 的鍵會被移除"""
+    field = dict(VALID_FIELD)
+    for key, value in field_changes.items():
+        if value is None:
+            field.pop(key, None)
+        else:
+            field[key] = value
+    return {"forms": [{"formId": "A", "formName": "表單", "description": "", "formFields": [field],
+                       "fieldGroups": []}]}
+
+
+class TestContractChecker:
+    """檢查規則測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.checker = get_checker()
+
+    def test_valid(self):
+        """測試符合契約的資料，包含已經位於 extensionData 的鍵"""
+        assert self.checker.check(form_detail()) == []
+        assert self.checker.check(form_detail(extensionData={"colSpan": 2}, defaultValue=0)) == []
+
+    def test_required_null(self):
+        """測試必填欄位為 null 時與優化結果一致，視為符合契約"""
+        data = form_detail(sort=None)
+        data["forms"][0]["formFields"][0]["sort"] = None
+
+        assert FormFieldProcessor.process_form_field(data["forms"][0]["formFields"][0])["sort"] is None
+        assert self.checker.check(data) == []
+
+    @pytest.mark.parametrize("changes, code, path", [
+        ({"sort": "1"}, "type", "forms[0].formFields[0].sort"),
+        ({"isVisible": 1}, "type", "forms[0].formFields[0].isVisible"),
+        ({"sort": True}, "type", "forms[0].formFields[0].sort"),
+        ({"fieldName": None}, "missing", "forms[0].formFields[0].fieldName"),
+        ({"fieldOptions": []}, "empty", "forms[0].formFields[0].fieldOptions"),
+        ({"relatedSource": "x"}, "type", "forms[0].formFields[0].relatedSource"),
+        ({"colSpan": 2}, "extension", "forms[0].formFields[0].colSpan"),
+        ({"legacy": 1}, "unknown", "forms[0].formFields[0].legacy"),
+        ({"extensionData": {"other": 1}}, "unknown", "forms[0].formFields[0].extensionData.other"),
+    ])
+    def test_violations(self, changes, code, path):
+        """測試每種違反契約的情況與位置"""
+        violations = self.checker.check(form_detail(**changes))
+
+        assert [(v.code, v.path) for v in violations] == [(code, path)]
+
+    def test_nested_types(self):
+        """測試巢狀物件的類型與缺少的陣列"""
+        assert [v.code for v in self.checker.check({"forms": {}})] == ["type"]
+        assert [v.path for v in self.checker.check({"forms": [1]})] == ["forms[0]"]
+        assert [v.path for v in self.checker.check({})] == ["forms"]
+
+    def test_first_or_all(self):
+        """測試預設只返回第一筆，all_violations 時返回全部"""
+        data = form_detail(sort="1", colSpan=2, legacy=1)
+
+        assert len(self.checker.check(data)) == 1
+        assert [v.code for v in self.checker.check(data, all_violations=True)] == ["type", "extension", "unknown"]
+
+
+class TestCheckInputs:
+    """檢查輸入檔案測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.input_dir.mkdir()
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        """寫入輸入檔案"""
+        (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_optimized_output_is_valid(self, jobs):
+        """測試 optimize 的輸出一律符合契約，原始資料則不符合"""
+        corpus_dir = self.temp_dir / "corpus"
+        generate_corpus(corpus_dir, files=4, forms_per_file=2, fields_per_form=5, translation_ratio=0.5)
+        processor = FormDetailProcessor(input_dir=corpus_dir / "add", output_dir=corpus_dir / "out",
+                                        json_backend="json")
+        processor.process_all_files()
+
+        assert check_inputs(corpus_dir / "out", jobs=jobs)["totals"]["invalid"] == 0
+        assert check_inputs(corpus_dir / "add", jobs=jobs)["totals"]["invalid"] == 4
+
+    def test_optimized_sample_is_valid(self):
+        """測試 add/範例.json 經 optimize 與 all 處理後都符合契約"""
+        sample = Path(__file__).parent.parent / "add" / "範例.json"
+        processors = [FormDetailProcessor(input_dir=sample.parent, output_dir=self.temp_dir / "optimize",
+                                          json_backend="json"),
+                      FormDetailPipeline(append_file=Path(__file__).parent.parent / "append_json.json",
+                                         input_dir=sample.parent, output_dir=self.temp_dir / "all",
+                                         json_backend="json")]
+        for processor in processors:
+            processor.process_all_files(force=True)
+            report = check_inputs(processor.output_dir, all_violations=True)
+
+            assert report["totals"]["files"] == 1
+            assert report["totals"]["violations"] == 0, report["files"][0]["violations"][:3]
+
+    def test_report(self):
+        """測試報告內容與無法解析的檔案"""
+        self.write("a.json", form_detail())
+        self.write("b.json", form_detail(sort="1", legacy=1))
+        (self.input_dir / "c.json").write_text("{", encoding='utf-8')
+
+        report = check_inputs(self.input_dir, all_violations=True)
+
+        assert report["totals"] == {"files": 3, "valid": 1, "invalid": 2, "violations": 3}
+        assert [f["ok"] for f in report["files"]] == [True, False, False]
+        assert report["files"][2]["violations"][0]["code"] == "parse"
+
+    def test_error_is_recorded(self):
+        """測試解析時的其他錯誤（巢狀過深）記錄為不符合的檔案，不中斷其他檔案"""
+        (self.input_dir / "a.json").write_text("[" * 100000 + "]" * 100000, encoding='utf-8')
+        self.write("b.json", form_detail())
+
+        report = check_inputs(self.input_dir, json_backend="json")
+
+        assert report["totals"] == {"files": 2, "valid": 1, "invalid": 1, "violations": 1}
+        assert report["files"][0]["violations"][0]["code"] == "error"
+
+    def test_archive_input(self):
+        """測試直接檢查封存檔中的檔案"""
+        with zipfile.ZipFile(self.temp_dir / "forms.zip", "w") as archive:
+            archive.writestr("sub/a.json", json.dumps(form_detail()))
+
+        report = check_inputs(self.temp_dir / "forms.zip")
+        assert [(f["name"], f["ok"]) for f in report["files"]] == [("sub/a.json", True)]
+
+    def test_cli(self):
+        """測試命令列結束代碼、檢查報告，且不產生任何其他檔案"""
+        def run(*args):
+            return subprocess.run([sys.executable, str(MAIN_SCRIPT), "check", *args], cwd=self.temp_dir,
+                                  capture_output=True, text=True, encoding='utf-8')
+
+        self.write("a.json", form_detail())
+        result = run()
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert sorted(path.name for path in self.temp_dir.iterdir()) == ["add"]
+
+        self.write("b.json", form_detail(colSpan=2))
+        result = run("--metrics-out", "report.json")
+        assert result.returncode == 1
+        assert "b.json: forms[0].formFields[0].colSpan" in result.stdout
+        assert sorted(path.name for path in self.temp_dir.iterdir()) == ["add", "report.json"]
+        assert json.loads((self.temp_dir / "report.json").read_text(encoding='utf-8'))["totals"]["invalid"] == 1
+
+        assert run("--schema", "missing.json").returncode == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 欄位索引
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from field_index import FieldIndex, parse_where
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+INPUT_FILES = {
+    "a.json": {"forms": [{"formId": "A", "formFields": [
+        {"formFieldId": "f_amount", "fieldType": "dxNumberBox", "sort": 1},
+        {"formFieldId": "d1", "fieldType": "dxDateBox", "sort": 2, "specialFieldCode": "DATE"},
+    ]}]},
+    "b.json": {"forms": [
+        {"formId": "B", "formFields": [{"formFieldId": "t1", "fieldType": "dxTextBox", "sort": 1}]},
+        {"formId": "C", "formFields": []},
+    ]},
+}
+
+
+class TestFieldIndex:
+    """欄位索引的建立、增量更新與查詢測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.input_dir.mkdir()
+        self.index_path = self.temp_dir / "index.sqlite"
+        for name, data in INPUT_FILES.items():
+            self.write(name, data)
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        """寫入輸入檔案"""
+        (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    def refresh(self):
+        """更新索引並返回重新索引的檔案數量"""
+        paths = sorted(self.input_dir.glob("*.json"))
+        with FieldIndex(self.index_path) as index:
+            index.prune(self.input_dir, [path.name for path in paths])
+            return index.refresh(self.input_dir, paths, json_backend="json")
+
+    def query(self, *expressions):
+        """以 KEY=VALUE 條件查詢索引"""
+        with FieldIndex(self.index_path) as index:
+            return index.query(self.input_dir, [parse_where(expression) for expression in expressions])
+
+    def test_parse_where(self):
+        """測試 --where 條件的解析，sort 為整數"""
+        assert parse_where("formId=A") == ("form_id", "A")
+        assert parse_where("sort=2") == ("sort", 2)
+        assert parse_where("formFieldId=a=b") == ("form_field_id", "a=b")
+        for expression in ("formId", "other=1", "sort=x"):
+            with pytest.raises(ValueError):
+                parse_where(expression)
+
+    def test_query(self):
+        """測試查詢條件、萬用字元，以及沒有欄位的表單"""
+        assert self.refresh() == 2
+
+        assert [row["file"] for row in self.query("fieldType=dxDateBox")] == ["a.json"]
+        assert self.query("formFieldId=f_*")[0] == {
+            "file": "a.json", "formId": "A", "formFieldId": "f_amount", "fieldType": "dxNumberBox",
+            "sort": 1, "specialFieldCode": None,
+        }
+        assert [row["formFieldId"] for row in self.query("sort=1")] == ["f_amount", "t1"]
+        assert self.query("sort=1", "formId=B")[0]["formFieldId"] == "t1"
+        assert self.query("formId=C") == [{"file": "b.json", "formId": "C", "formFieldId": None,
+                                           "fieldType": None, "sort": None, "specialFieldCode": None}]
+
+    def test_incremental(self):
+        """測試只重新索引變更的檔案，移除已刪除的檔案，無法解析的檔案不列入索引"""
+        self.refresh()
+        assert self.refresh() == 0
+
+        # 只更新修改時間，內容相同時不重新索引
+        os.utime(self.input_dir / "b.json", ns=(1, 1))
+        assert self.refresh() == 0
+
+        self.write("b.json", {"forms": [{"formId": "B", "formFields": [{"formFieldId": "d2",
+                                                                         "fieldType": "dxDateBox"}]}]})
+        assert self.refresh() == 1
+        assert [row["formFieldId"] for row in self.query("fieldType=dxDateBox")] == ["d1", "d2"]
+
+        (self.input_dir / "a.json").unlink()
+        (self.input_dir / "c.json").write_text("{", encoding='utf-8')
+        self.refresh()
+        with FieldIndex(self.index_path) as index:
+            assert index.stats(self.input_dir) == {"files": 1, "forms": 1, "fields": 1}
+
+
+class TestIndexedRuns:
+    """merge / optimize 順便更新索引與 --where 的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.index_path = str(self.temp_dir / "index.sqlite")
+        self.input_dir.mkdir()
+        for name, data in INPUT_FILES.items():
+            (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text(json.dumps([{"formFieldId": "new"}]), encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def run(self, command, **kwargs):
+        """執行處理並返回處理指標"""
+        options = dict(input_dir=self.input_dir, output_dir=self.output_dir, json_backend="json")
+        if command == "merge":
+            run_metrics = JSONMerger(append_file=self.append_file, **options).merge_all_files(**kwargs)
+        else:
+            run_metrics = FormDetailProcessor(**options).process_all_files(**kwargs)
+        append_data._loaded.clear()
+        return run_metrics
+
+    def indexed_fields(self):
+        """索引中的 (檔案, formId, formFieldId)"""
+        with FieldIndex(self.index_path) as index:
+            return [(row["file"], row["formId"], row["formFieldId"]) for row in index.query(self.input_dir, [])]
+
+    @pytest.mark.parametrize("command", ["merge", "optimize"])
+    @pytest.mark.parametrize("jobs, async_io", [(1, False), (2, False), (1, True)])
+    def test_index_side_effect(self, command, jobs, async_io):
+        """測試處理時以原始表單更新索引，合併加入的欄位不列入索引"""
+        self.run(command, jobs=jobs, async_io=async_io, index_path=self.index_path)
+
+        assert self.indexed_fields() == [("a.json", "A", "f_amount"), ("a.json", "A", "d1"),
+                                         ("b.json", "B", "t1"), ("b.json", "C", None)]
+
+    def test_cache_hits_are_indexed(self):
+        """測試增量建置快取略過的檔案在第一次使用索引時也會被索引"""
+        self.run("optimize")
+        run_metrics = self.run("optimize", index_path=self.index_path)
+
+        assert run_metrics.cache_hits == 2
+        assert len(self.indexed_fields()) == 4
+
+    def test_where(self):
+        """測試 --where 只處理符合條件的檔案，其他檔案列為略過"""
+        run_metrics = self.run("optimize", where=["fieldType=dxDateBox"], index_path=self.index_path)
+
+        assert sorted(path.name for path in self.output_dir.glob("*.json")) == ["a.json"]
+        report = run_metrics.to_dict()
+        assert (report["skipped"], report["unselected"]) == ([], ["b.json"])
+        assert (report["totals"]["skipped"], report["totals"]["unselected"]) == (0, 1)
+        assert run_metrics.to_dict()["settings"]["where"] == ["fieldType=dxDateBox"]
+
+        # 檔案變更後重新索引，符合條件的檔案隨之改變
+        (self.input_dir / "b.json").write_text(json.dumps({"forms": [{"formId": "B", "formFields": [
+            {"formFieldId": "d2", "fieldType": "dxDateBox"}]}]}), encoding='utf-8')
+        self.run("merge", where=["fieldType=dxDateBox", "formId=B"], index_path=self.index_path)
+        assert (self.output_dir / "b.json").exists()
+
+    def test_where_keeps_cache(self):
+        """測試 --where 不移除未選取檔案的快取項目，之後的完整執行全部命中快取"""
+        self.run("optimize")
+        run_metrics = self.run("optimize", where=["fieldType=dxDateBox"], index_path=self.index_path)
+        assert (run_metrics.cache_hits, run_metrics.cache_misses) == (1, 0)
+
+        run_metrics = self.run("optimize")
+        assert (run_metrics.cache_hits, run_metrics.cache_misses) == (2, 0)
+
+    def test_cli(self):
+        """測試命令列 --index、index 與 query 命令的結束代碼"""
+        def run(*args):
+            return subprocess.run([sys.executable, str(MAIN_SCRIPT), *args], cwd=self.temp_dir,
+                                  capture_output=True, text=True, encoding='utf-8')
+
+        result = run("optimize", "--index", "--summary-only")
+        assert result.returncode == 0, result.stderr
+        assert (self.temp_dir / "formdetails_index.sqlite").exists()
+
+        result = run("query", "--where", "formFieldId=f_*")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.startswith("a.json\tA\tf_amount\tdxNumberBox\t1\t\n")
+
+        assert run("query", "--where", "formId=missing").returncode == 1
+        assert run("index").returncode == 0
+        assert run("query", "--where", "sort=x").returncode == 2
+        assert run("watch", "--where", "formId=A").returncode == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
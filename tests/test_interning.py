@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 字串共用
+"""
+
+import json
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+import interning
+from append_data import load_append_file
+from interning import InternTable
+from merge_json import JSONMerger
+from pipeline import FormDetailPipeline
+
+
+def parse(text):
+    """以 json 解析，每次都產生新的字串物件"""
+    return json.loads(text)
+
+
+class TestInternTable:
+    """字串共用表測試"""
+
+    def test_shares_keys_and_short_values(self):
+        """測試不同文件中的鍵與短字串值共用同一個物件，長字串值不共用，內容不變"""
+        table = InternTable(max_value_length=16)
+        text = '{"fieldType": "dxTextBox", "fieldName": "很長很長很長很長很長很長的欄位名稱", "sort": 1}'
+        first, _ = table.intern(parse(text))
+        second, saved = table.intern(parse(text))
+
+        assert second == parse(text)
+        assert list(second) == ["fieldType", "fieldName", "sort"]
+        assert [k for k in first][0] is [k for k in second][0]
+        assert first["fieldType"] is second["fieldType"]
+        assert first["fieldName"] is not second["fieldName"]
+        assert saved > 0
+
+    def test_nested(self):
+        """測試巢狀陣列與物件中的字串也會共用"""
+        table = InternTable()
+        text = '{"formFields": [{"translation": [{"languageCode": "en-US"}]}, ["en-US", 1, null]]}'
+        first, _ = table.intern(parse(text))
+        second, _ = table.intern(parse(text))
+
+        assert first["formFields"][0]["translation"][0]["languageCode"] is second["formFields"][1][0]
+
+    def test_saved_bytes_counts_each_object_once(self):
+        """測試同一個被替換的字串物件只計算一次節省量"""
+        table = InternTable()
+        table.intern(["dxTextBox"])
+        value = "".join(["dx", "TextBox"])
+
+        _, saved = table.intern([value, value, value])
+        assert saved == sys.getsizeof(value)
+
+    def test_bounded(self):
+        """測試共用表達到上限後不再加入新字串，已有的字串仍會共用"""
+        table = InternTable(max_entries=2)
+        first, _ = table.intern(parse('["甲一", "乙二", "丙三"]'))
+        second, _ = table.intern(parse('["甲一", "乙二", "丙三"]'))
+
+        assert len(table) == 2
+        assert first[1] is second[1]
+        assert first[2] is not second[2]
+
+
+class TestInterningProcessors:
+    """處理器解析時共用字串的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+        self.output_dir.mkdir()
+        interning.get_intern_table().clear()
+
+        for index in range(3):
+            fields = [{"fieldName": f"欄位{i}", "fieldType": "dxTextBox", "isVisible": True} for i in range(5)]
+            data = {"forms": [{"formId": f"form_{index}", "formFields": fields}]}
+            (self.input_dir / f"{index}.json").write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text('[{"fieldName": "新增欄位", "fieldType": "dxTextBox"}]', encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+        interning.get_intern_table().clear()
+
+    def run_pipeline(self, intern_strings, jobs=1):
+        """執行完整處理流程並返回處理指標與所有輸出"""
+        output_dir = self.temp_dir / f"out_{intern_strings}"
+        pipeline = FormDetailPipeline(append_file=self.append_file, input_dir=self.input_dir,
+                                      output_dir=output_dir, json_backend="json",
+                                      intern_strings=intern_strings)
+        run_metrics = pipeline.process_all_files(jobs=jobs)
+        outputs = {path.name: path.read_bytes() for path in sorted(output_dir.glob("*.json"))}
+        return run_metrics, outputs
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_pipeline_reports_savings(self, jobs):
+        """測試共用字串時輸出相同，並在處理指標中回報節省的位元組數"""
+        plain_metrics, plain_outputs = self.run_pipeline(False)
+        interned_metrics, interned_outputs = self.run_pipeline(True, jobs)
+
+        assert interned_outputs == plain_outputs
+        assert plain_metrics.totals()["interned_bytes"] == 0
+        assert interned_metrics.totals()["interned_bytes"] > 0
+        assert interned_metrics.settings["intern_strings"] is True
+        assert all("interned_bytes" in f for f in interned_metrics.to_dict()["files"])
+
+    def test_merger(self):
+        """測試合併器解析輸入檔案時共用字串"""
+        merger = JSONMerger(append_file=self.append_file, input_dir=self.input_dir, output_dir=self.output_dir,
+                            json_backend="json", intern_strings=True)
+        run_metrics = merger.merge_all_files()
+
+        assert run_metrics.totals()["interned_bytes"] > 0
+
+    def test_append_data(self):
+        """測試合併資料與輸入檔案共用字串，工作行程重新載入時也會共用"""
+        loaded = load_append_file(self.append_file, self.output_dir, intern_strings=True)
+        table = interning.get_intern_table()
+        assert loaded[0]["fieldType"] is table.intern("dxTextBox")[0]
+
+        restored = pickle.loads(pickle.dumps(loaded))
+        append_data._loaded.clear()
+        table.clear()
+        assert restored.intern_strings
+        assert restored[0]["fieldType"] is table.intern("dxTextBox")[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
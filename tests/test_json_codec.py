@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - JSON編解碼後端
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from json_codec import (OrjsonCodec, StdlibCodec, _has_exponent, _has_long_digits, _has_small_fraction, get_codec,
+                        resolve_backend)
+
+orjson = pytest.importorskip("orjson")
+
+SAMPLE_FILE = Path(__file__).parent.parent / "add" / "範例.json"
+
+EDGE_CASES = {
+    "forms": [
+        {
+            "formId": "邊界-測試",
+            "description": "引號 \" 反斜線 \\ 換行 \n 定位 \t 控制 \u0001 \u007f   😀",
+            "formFields": [
+                {"sort": 0, "colSpan": -4, "isVisible": True, "defaultValue": None},
+                {"translation": [], "editorOptions": {}, "ratio": 1.5, "small": 0.1},
+                {"huge": 18446744073709551616, "exp": 1e16, "tiny": 1e-7, "fraction": 5e-05,
+                 "fractions": [1.5e-05, -5e-05, 0.0001], "text": "0.00005"},
+                {"negative": -9223372036854775809, "big": 1.5e300, "small": -2.5e-8, "code": "line2e5"}
+            ],
+            "fieldGroups": []
+        }
+    ]
+}
+
+
+class TestJsonCodec:
+    """JSON編解碼後端測試"""
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_backends_are_byte_identical_on_sample(self, indent):
+        """測試兩種後端對範例檔案產生完全相同的輸出"""
+        raw = SAMPLE_FILE.read_bytes()
+        stdlib, fast = StdlibCodec(), OrjsonCodec()
+
+        data = fast.loads(raw)
+        assert data == stdlib.loads(raw)
+        assert fast.dumps(data, indent) == stdlib.dumps(data, indent)
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_backends_are_byte_identical_on_edge_cases(self, indent):
+        """測試CJK、跳脫字元、空容器、超大整數與指數浮點數的輸出一致"""
+        stdlib, fast = StdlibCodec(), OrjsonCodec()
+
+        assert fast.dumps(EDGE_CASES, indent) == stdlib.dumps(EDGE_CASES, indent)
+
+        raw = stdlib.dumps(EDGE_CASES, indent)
+        assert fast.loads(raw) == stdlib.loads(raw)
+        assert fast.loads(raw)["forms"][0]["formFields"][2]["huge"] == 18446744073709551616
+
+    @pytest.mark.parametrize("indent", [2, None])
+    def test_non_finite_floats(self, indent):
+        """測試改用 json 解析的 NaN、Infinity 與超出範圍的數值輸出與 json 相同，不會變成 null"""
+        raw = b'{"a": NaN, "b": 1e400, "c": [-Infinity, 1.5, null]}'
+        stdlib, fast = StdlibCodec(), OrjsonCodec()
+
+        output = fast.dumps(fast.loads(raw), indent)
+        assert output == stdlib.dumps(stdlib.loads(raw), indent)
+        assert b"NaN" in output and b"-Infinity" in output
+
+    def test_sample_does_not_fall_back(self):
+        """測試範例檔案（含有GUID）不會觸發改用 json 的判斷"""
+        raw = SAMPLE_FILE.read_bytes()
+        assert not _has_long_digits(raw)
+        output = orjson.dumps(orjson.loads(raw), option=orjson.OPT_INDENT_2)
+        assert not _has_exponent(output)
+        assert not _has_small_fraction(output)
+
+    @pytest.mark.parametrize("value, expected", [
+        (5e-05, True),
+        (-1.5e-05, True),
+        (0.0001, False),
+        (10.00005, False),
+        ("0.00005", False),
+    ])
+    def test_has_small_fraction(self, value, expected):
+        """測試 json 以指數表示、orjson 以小數表示的浮點數會改用 json 序列化"""
+        assert _has_small_fraction(orjson.dumps({"a": [value]})) is expected
+
+    @pytest.mark.parametrize("raw, expected", [
+        (b'{"id": 12345678901234567890}', True),
+        (b'[-9223372036854775809]', True),
+        (b'12345678901234567890', True),
+        (b"[1,\n\t12345678901234567890]", True),
+        (b'{"source": "1234567890123456789012345ABCDEFA"}', False),
+        (b'{"source": "ABCDEF1234567890123456789012345A"}', False),
+        (b'{"a": 1.12345678901234567890}', False),
+        (b'{"a": 123456789012345678}', False),
+    ])
+    def test_has_long_digits(self, raw, expected):
+        """測試只有數值（而非 GUID 等字串內容）中的長數字才會改用 json 解析"""
+        assert _has_long_digits(raw) is expected
+
+    def test_stdlib_matches_json_dump(self):
+        """測試 json 後端與原本的 json.dump(ensure_ascii=False, indent=2) 相同"""
+        expected = json.dumps(EDGE_CASES, ensure_ascii=False, indent=2).encode('utf-8')
+        assert StdlibCodec().dumps(EDGE_CASES) == expected
+
+    def test_invalid_json_raises_decode_error(self):
+        """測試兩種後端對錯誤的JSON都拋出 json.JSONDecodeError"""
+        for codec in (StdlibCodec(), OrjsonCodec()):
+            with pytest.raises(json.JSONDecodeError):
+                codec.loads(b'{"forms": [}')
+
+    def test_resolve_backend(self):
+        """測試後端名稱解析"""
+        assert resolve_backend("auto") == "orjson"
+        assert resolve_backend("json") == "json"
+        assert get_codec("json").name == "json"
+        with pytest.raises(ValueError):
+            resolve_backend("simdjson")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
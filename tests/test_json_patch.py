@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - JSON Patch 輸出
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from json_patch import JsonPatch, apply_patch, child_pointer, get_patcher
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from output_formats import OutputFormat
+from pipeline import FormDetailPipeline
+from schema import FORM
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+INPUT_FILES = {
+    "a.json": {
+        "meta": {"version": 1},
+        "forms": [
+            {
+                "formId": "A", "formName": "表單A", "colSpan": 1,
+                "formFields": [
+                    {"formFieldId": "f1", "fieldName": "欄位1", "sort": 1, "colSpan": 2, "fieldOptions": [],
+                     "defaultValue": None, "legacy/key": True},
+                    {"formFieldId": "f2", "fieldName": "欄位2", "sort": 2, "translation": ["x"],
+                     "extensionData": {"old": 1}},
+                ],
+            },
+            {"formId": "B", "formFields": []},
+        ],
+    },
+    "b.json": {"forms": [{"formId": "C", "formName": "表單C", "description": "", "fieldGroups": [],
+                          "formFields": [{"formFieldId": "f1", "fieldName": "欄位1", "fieldType": "dxTextBox",
+                                          "isReadonly": False, "isVisible": True,
+                                          "infoDisplayCondition": False, "sort": 1,
+                                          "specialFieldCode": ""}]}]},
+    "c.json": {"forms": []},
+}
+
+APPEND_FIELDS = [
+    {"formFieldId": "f1", "fieldName": "新名稱", "sort": 1, "colSpan": 3},
+    {"formFieldId": "f9", "fieldName": "新增欄位", "fieldGroup": ""},
+]
+
+
+class TestJsonPatch:
+    """JSON Patch 操作記錄與套用測試"""
+
+    def test_pointer_escaping(self):
+        """測試 JSON Pointer 跳脫 ~ 與 /，套用時還原"""
+        assert child_pointer("/forms/0", "a/b~c") == "/forms/0/a~1b~0c"
+        assert apply_patch({"a/b~c": 1}, [{"op": "remove", "path": "/a~1b~0c"}]) == {}
+
+    def test_apply(self):
+        """測試套用 add / replace / remove / move，陣列以 - 附加"""
+        document = {"items": [1], "a": 1, "b": {}}
+        operations = [
+            {"op": "add", "path": "/items/-", "value": 2},
+            {"op": "add", "path": "/items/0", "value": 0},
+            {"op": "replace", "path": "/a", "value": 5},
+            {"op": "move", "from": "/a", "path": "/b/a"},
+            {"op": "remove", "path": "/items/1"},
+        ]
+
+        assert apply_patch(document, operations) == {"items": [0, 2], "b": {"a": 5}}
+        with pytest.raises(ValueError):
+            apply_patch({}, [{"op": "test", "path": "/a", "value": 1}])
+
+    def test_projection_ops(self):
+        """測試優化步驟的操作：移除、補上預設值，並以 move 將擴展資料移入"""
+        field = {"formFieldId": "f1", "colSpan": 2, "defaultValue": None, "legacy": 1}
+        patch = JsonPatch()
+
+        get_patcher().diff("FormField", field, "/f", patch)
+
+        ops = [(op["op"], op["path"]) for op in patch.operations]
+        assert ("remove", "/f/legacy") in ops
+        assert ("remove", "/f/defaultValue") in ops
+        assert ("add", "/f/extensionData") in ops
+        assert ("move", "/f/colSpan") not in ops
+        assert {"op": "move", "from": "/f/colSpan", "path": "/f/extensionData/colSpan"} in patch.operations
+        assert ("add", "/f/sort") in ops
+
+    def test_inserted_values_are_projected(self):
+        """測試先前加入的值在優化時直接改寫為投影結果，同一物件加入多處時共用結果"""
+        field = {"fieldName": "新增", "colSpan": 2}
+        form = {"formId": "A", "formName": "", "description": "", "fieldGroups": [], "formFields": [field]}
+        patch = JsonPatch()
+        patch.add("/forms/0/formFields/-", field)
+        patch.add("/forms/1/formFields/-", field)
+
+        get_patcher().diff(FORM, form, "/forms/0", patch)
+
+        projected = get_patcher().projector.form_field(field)
+        assert len(patch) == 2
+        assert all(op["value"] == projected for op in patch.operations)
+
+
+class TestPatchOutput:
+    """以 JSON Patch 輸出合併與優化結果的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        for name, data in INPUT_FILES.items():
+            (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text(json.dumps(APPEND_FIELDS, ensure_ascii=False), encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def run(self, command, output_dir, style, merge_policy="append", **kwargs):
+        """以指定輸出格式執行處理並返回處理指標"""
+        options = dict(input_dir=self.input_dir, output_dir=output_dir,
+                       output_format=OutputFormat(style), json_backend="json")
+        if command == "merge":
+            processor = JSONMerger(append_file=self.append_file, merge_policy=merge_policy, **options)
+            run_metrics = processor.merge_all_files(**kwargs)
+        elif command == "optimize":
+            run_metrics = FormDetailProcessor(**options).process_all_files(**kwargs)
+        else:
+            processor = FormDetailPipeline(append_file=self.append_file, merge_policy=merge_policy, **options)
+            run_metrics = processor.process_all_files(**kwargs)
+        append_data._loaded.clear()
+        return run_metrics
+
+    def patches(self, output_dir):
+        """輸出資料夾中的 {輸入檔案名稱: JSON Patch 操作}"""
+        return {path.name.replace(".patch.json", ".json"): json.loads(path.read_text(encoding='utf-8'))
+                for path in sorted(output_dir.glob("*.patch.json"))}
+
+    @pytest.mark.parametrize("merge_policy", ["append", "replace", "keep", "patch"])
+    @pytest.mark.parametrize("command", ["merge", "optimize", "all"])
+    def test_patch_reproduces_output(self, command, merge_policy):
+        """測試將 JSON Patch 套用到輸入檔案的結果與一般輸出相同，合併時略過沒有forms的檔案"""
+        full_metrics = self.run(command, self.temp_dir / "full", "compact", merge_policy)
+        run_metrics = self.run(command, self.temp_dir / "patch", "patch", merge_policy)
+
+        patches = self.patches(self.temp_dir / "patch")
+        assert sorted(patches) == sorted(path.name for path in (self.temp_dir / "full").glob("*.json"))
+        assert run_metrics.failed_files == full_metrics.failed_files
+        for name, operations in patches.items():
+            expected = json.loads((self.temp_dir / "full" / name).read_text(encoding='utf-8'))
+            assert apply_patch(json.loads(json.dumps(INPUT_FILES[name])), operations) == expected, name
+
+    def test_patch_size_matches_change(self):
+        """測試符合契約的檔案沒有操作，逐屬性覆寫只記錄有變更的屬性"""
+        self.run("optimize", self.temp_dir / "optimize", "patch")
+        patches = self.patches(self.temp_dir / "optimize")
+        assert patches["b.json"] == []
+        assert patches["c.json"] == []
+
+        self.run("merge", self.temp_dir / "merge", "patch", "patch")
+        patches = self.patches(self.temp_dir / "merge")
+        assert patches["b.json"] == [
+            {"op": "replace", "path": "/forms/0/formFields/0/fieldName", "value": "新名稱"},
+            {"op": "add", "path": "/forms/0/formFields/0/colSpan", "value": 3},
+            {"op": "add", "path": "/forms/0/formFields/-", "value": APPEND_FIELDS[1]},
+        ]
+
+    def test_pipeline_adds_projected_fields(self):
+        """測試完整流程中新加入的欄位直接以優化後的內容寫入"""
+        self.run("all", self.temp_dir / "out", "patch")
+
+        operations = self.patches(self.temp_dir / "out")["b.json"]
+        added = [op for op in operations if op["path"] == "/forms/0/formFields/-"]
+        assert [op["value"]["fieldName"] for op in added] == ["新名稱", "新增欄位"]
+        assert added[0]["value"]["extensionData"] == {"colSpan": 3}
+        assert "fieldGroup" not in added[1]["value"]
+        assert len(operations) == len(added)
+
+    def test_stream_and_async(self):
+        """測試串流模式改為完整讀取，非同步 I/O 模式輸出相同的 JSON Patch"""
+        self.run("all", self.temp_dir / "sync", "patch", stream=True)
+        self.run("all", self.temp_dir / "async", "patch", async_io=True)
+
+        assert self.patches(self.temp_dir / "async") == self.patches(self.temp_dir / "sync")
+
+    def test_non_object_document(self):
+        """測試頂層不是物件的檔案在一般、串流與 JSON Patch 模式都輸出空的forms陣列"""
+        documents = {"array.json": [1, {"forms": []}], "number.json": 5, "null.json": None}
+        self.input_dir = self.temp_dir / "non_object"
+        self.input_dir.mkdir()
+        for name, data in documents.items():
+            (self.input_dir / name).write_text(json.dumps(data), encoding='utf-8')
+
+        results = [self.run("optimize", self.temp_dir / "full", "compact"),
+                   self.run("optimize", self.temp_dir / "stream", "compact", stream=True),
+                   self.run("optimize", self.temp_dir / "patch", "patch")]
+        assert [run_metrics.failed_files for run_metrics in results] == [[], [], []]
+
+        for name, operations in self.patches(self.temp_dir / "patch").items():
+            expected = (self.temp_dir / "full" / name).read_bytes()
+            assert json.loads(expected) == {"forms": []}
+            assert (self.temp_dir / "stream" / name).read_bytes() == expected
+            assert apply_patch(documents[name], operations) == {"forms": []}
+
+    def test_cli(self):
+        """測試命令列 --format patch"""
+        result = subprocess.run([sys.executable, str(MAIN_SCRIPT), "all", "--format", "patch"],
+                                cwd=self.temp_dir, capture_output=True, text=True, encoding='utf-8')
+
+        assert result.returncode == 0, result.stderr
+        assert sorted(path.name for path in (self.temp_dir / "out").glob("*.patch.json")) == \
+            ["a.patch.json", "b.patch.json", "c.patch.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 串流JSON讀寫工具
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from json_stream import StreamingJSONWriter, iter_object_members
+
+
+SAMPLE_DATA = {
+    "version": 12345,
+    "forms": [
+        {
+            "formId": "form_1",
+            "formName": "測試表單",
+            "formFields": [
+                {"fieldName": "欄位 \"一\"", "sort": 1.5, "isVisible": True},
+                {"fieldName": "欄位二", "translation": [], "defaultValue": None}
+            ]
+        },
+        {"formId": "form_2", "formFields": []}
+    ],
+    "meta": {"tags": ["a", "b"], "empty": {}}
+}
+
+
+class TestJsonStream:
+    """串流JSON讀寫測試"""
+
+    def _roundtrip(self, data, chunk_size):
+        """以串流方式讀取並寫回資料"""
+        source = io.StringIO(json.dumps(data, ensure_ascii=False, indent=2))
+        target = io.BytesIO()
+        writer = StreamingJSONWriter(target)
+
+        for key, value in iter_object_members(source, "forms", chunk_size=chunk_size):
+            if key == "forms":
+                writer.begin_array(key)
+                for form in value:
+                    writer.write_item(form)
+                writer.end_array()
+            else:
+                writer.write_member(key, value)
+
+        writer.close()
+        return target.getvalue().decode('utf-8')
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    def test_roundtrip_matches_json_dump(self, chunk_size):
+        """測試串流輸出與 json.dump(indent=2) 完全相同"""
+        expected = json.dumps(SAMPLE_DATA, ensure_ascii=False, indent=2)
+        assert self._roundtrip(SAMPLE_DATA, chunk_size) == expected
+
+    def test_empty_object_and_array(self):
+        """測試空物件與空陣列"""
+        assert self._roundtrip({}, 3) == json.dumps({}, indent=2)
+        assert self._roundtrip({"forms": []}, 3) == json.dumps({"forms": []}, indent=2)
+
+    def test_forms_are_decoded_lazily(self):
+        """測試forms元素在迭代時才被解碼"""
+        source = io.StringIO('{"forms": [{"formId": "a"}, {"formId": "b"}, ]}')
+        members = iter_object_members(source, "forms", chunk_size=4)
+        key, forms = next(members)
+
+        assert key == "forms"
+        assert next(forms) == {"formId": "a"}
+        assert next(forms) == {"formId": "b"}
+        with pytest.raises(json.JSONDecodeError):
+            next(forms)
+
+    def test_invalid_document(self):
+        """測試非物件的頂層資料"""
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_object_members(io.StringIO("[1, 2]")))
+
+    @pytest.mark.parametrize("text", ['[1, {"forms": [2]}]', '"forms"', "5", "null", "[]"])
+    def test_skip_non_object(self, text):
+        """測試略過非物件的頂層資料時不產生成員，但仍檢查語法"""
+        assert list(iter_object_members(io.StringIO(text), chunk_size=2, skip_non_object=True)) == []
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_object_members(io.StringIO(text + " 1"), chunk_size=2, skip_non_object=True))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
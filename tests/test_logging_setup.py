@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 日誌設定
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+SRC_PATH = Path(__file__).parent.parent / "src"
+
+# 根日誌記錄器在測試框架中已有處理器，因此在子行程中設定日誌
+QUEUED_SCRIPT = """
+import logging, sys
+sys.path.insert(0, sys.argv[1])
+from logging_setup import configure_logging, file_logger, flush_logging
+
+class Counted:
+    calls = 0
+    def __str__(self):
+        Counted.calls += 1
+        return "counted"
+
+configure_logging("run.log", file_level=sys.argv[2])
+root_handlers = [type(h).__name__ for h in logging.getLogger().handlers]
+value = Counted()
+file_logger.info("每個檔案 %s", value)
+file_logger.error("檔案錯誤 %s", "a.json")
+logging.info("執行摘要")
+calls_before_flush = Counted.calls
+flush_logging()
+flush_logging()
+logging.info("之後直接寫入")
+print(root_handlers, calls_before_flush)
+"""
+
+
+class TestLoggingSetup:
+    """日誌設定測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def run_queued(self, file_level: str):
+        """在子行程中以佇列設定日誌並返回輸出與日誌檔內容"""
+        result = subprocess.run([sys.executable, "-c", QUEUED_SCRIPT, str(SRC_PATH), file_level],
+                                cwd=self.temp_dir, capture_output=True, text=True,
+                                encoding='utf-8', check=True)
+        return result.stdout.strip(), (self.temp_dir / "run.log").read_text(encoding='utf-8')
+
+    def test_queued_logging(self):
+        """測試呼叫端只放入佇列，訊息由背景執行緒格式化，flush後改為直接寫入"""
+        output, log = self.run_queued("info")
+
+        assert output == "['_DeferredQueueHandler'] 0"
+        lines = log.splitlines()
+        assert [line.split(" - ", 2)[2] for line in lines] == [
+            "每個檔案 counted", "檔案錯誤 a.json", "執行摘要", "之後直接寫入"]
+
+    @pytest.mark.parametrize("file_level, expected", [
+        ("error", ["檔案錯誤 a.json", "執行摘要", "之後直接寫入"]),
+        ("off", ["執行摘要", "之後直接寫入"]),
+    ])
+    def test_file_level(self, file_level, expected):
+        """測試每個檔案的日誌等級不影響執行摘要"""
+        _, log = self.run_queued(file_level)
+
+        assert [line.split(" - ", 2)[2] for line in log.splitlines()] == expected
+
+    def write_corpus(self, files: int):
+        """建立輸入檔案與合併資料"""
+        input_dir = self.temp_dir / "add"
+        input_dir.mkdir()
+        for index in range(files):
+            data = {"forms": [{"formId": f"form_{index}", "formFields": [{"fieldName": "欄位"}]}]}
+            (input_dir / f"{index}.json").write_text(json.dumps(data), encoding='utf-8')
+        (self.temp_dir / "append_json.json").write_text('{"fieldName": "新增欄位"}', encoding='utf-8')
+
+    def test_worker_logs_reach_log_file(self):
+        """測試多個工作行程的日誌經由主行程寫入日誌檔"""
+        self.write_corpus(6)
+
+        subprocess.run([sys.executable, str(MAIN_SCRIPT), "all", "--jobs", "2"], cwd=self.temp_dir,
+                       capture_output=True, check=True)
+
+        log = (self.temp_dir / "pipeline.log").read_text(encoding='utf-8')
+        assert log.count("正在處理檔案") == 6
+        assert log.count("已儲存處理後的檔案") == 6
+        assert "處理完成！成功處理 6/6 個檔案" in log
+
+    def test_summary_only(self):
+        """測試 --summary-only 只輸出執行摘要"""
+        self.write_corpus(3)
+        (self.temp_dir / "add" / "broken.json").write_text('{"forms": [', encoding='utf-8')
+
+        subprocess.run([sys.executable, str(MAIN_SCRIPT), "all", "--summary-only"], cwd=self.temp_dir,
+                       capture_output=True, check=True)
+
+        log = (self.temp_dir / "pipeline.log").read_text(encoding='utf-8')
+        assert "正在處理檔案" not in log
+        assert "JSON解析錯誤" not in log
+        assert "處理失敗的檔案: broken.json" in log
+        assert "處理完成！成功處理 3/4 個檔案" in log
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
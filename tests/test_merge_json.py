@@ -110,6 +110,49 @@ class TestJSONMerger:
         assert result[2]["fieldName"] == "新增欄位1"
         assert result[3]["fieldName"] == "新增欄位2"
 
+    @pytest.mark.parametrize("policy, expected_type", [
+        ("replace", "dxDateBox"),
+        ("keep", "dxTextBox"),
+        ("patch", "dxDateBox"),
+    ])
+    def test_upsert_form_fields(self, policy, expected_type):
+        """測試以formFieldId比對的合併策略"""
+        original_fields = [
+            {"formFieldId": "a", "fieldName": "欄位A", "fieldType": "dxTextBox", "sort": 1},
+            {"formFieldId": "b", "fieldName": "欄位B", "fieldType": "dxTextBox"}
+        ]
+
+        append_fields = [
+            {"formFieldId": "a", "fieldType": "dxDateBox"},
+            {"formFieldId": "c", "fieldName": "欄位C", "fieldType": "dxNumberBox"}
+        ]
+
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir),
+            merge_policy=policy
+        )
+
+        result = merger.merge_form_fields(original_fields, append_fields)
+
+        assert [field["formFieldId"] for field in result] == ["a", "b", "c"]
+        assert result[0]["fieldType"] == expected_type
+        assert ("sort" in result[0]) == (policy != "replace")
+
+        # 重複執行不會再新增欄位
+        assert merger.merge_form_fields(result, append_fields) == result
+
+    def test_invalid_merge_policy(self):
+        """測試不支援的合併策略"""
+        with pytest.raises(ValueError):
+            JSONMerger(
+                append_file=str(self.append_file),
+                input_dir=str(self.input_dir),
+                output_dir=str(self.output_dir),
+                merge_policy="unknown"
+            )
+
     def test_process_json_file_success(self):
         """測試成功處理 JSON 檔案"""
         # 建立測試 JSON 檔案
@@ -192,6 +235,73 @@ class TestJSONMerger:
 
         assert saved_data == test_data
 
+    def test_merge_all_files_parallel(self):
+        """測試多工作行程合併結果與單行程一致"""
+        append_data = [{"fieldName": "新增欄位", "fieldType": "dxSelectBox"}]
+        with open(self.append_file, 'w', encoding='utf-8') as f:
+            json.dump(append_data, f, ensure_ascii=False)
+
+        for i in range(4):
+            test_json_data = {"forms": [{"formId": f"form_{i}", "formFields": []}]}
+            with open(self.input_dir / f"test_{i}.json", 'w', encoding='utf-8') as f:
+                json.dump(test_json_data, f, ensure_ascii=False)
+
+        # 沒有forms陣列的檔案會被記錄為失敗
+        with open(self.input_dir / "broken.json", 'w', encoding='utf-8') as f:
+            json.dump({"otherData": "test"}, f)
+
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+
+        merger.merge_all_files(jobs=2)
+        parallel_outputs = {
+            p.name: p.read_text(encoding='utf-8') for p in self.output_dir.glob("*.json")
+        }
+
+        for p in self.output_dir.glob("*.json"):
+            p.unlink()
+
+        merger.merge_all_files(jobs=1)
+        serial_outputs = {
+            p.name: p.read_text(encoding='utf-8') for p in self.output_dir.glob("*.json")
+        }
+
+        assert len(parallel_outputs) == 4
+        assert "broken.json" not in parallel_outputs
+        assert parallel_outputs == serial_outputs
+
+    def test_stream_json_file_matches_process_json_file(self):
+        """測試串流模式輸出與一般模式完全相同"""
+        test_json_data = {
+            "forms": [
+                {"formId": "form_1", "formFields": [{"fieldName": "原始欄位"}]},
+                {"formId": "form_2"}
+            ],
+            "version": 2
+        }
+
+        test_file = self.input_dir / "test.json"
+        with open(test_file, 'w', encoding='utf-8') as f:
+            json.dump(test_json_data, f, ensure_ascii=False, indent=2)
+
+        append_data = [{"fieldName": "新增欄位", "fieldType": "dxSelectBox"}]
+
+        merger = JSONMerger(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+
+        assert merger.merge_file(test_file, append_data, stream=False).ok
+        expected = (self.output_dir / "test.json").read_text(encoding='utf-8')
+
+        assert merger.merge_file(test_file, append_data, stream=True).ok
+        assert (self.output_dir / "test.json").read_text(encoding='utf-8') == expected
+        assert not list(self.output_dir.glob("*.tmp"))
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 處理指標
+"""
+
+import json
+import pstats
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from merge_json import JSONMerger
+from metrics import STAGES, FileMetrics, RunMetrics, profiled
+from optimized_process_json import FormDetailProcessor
+from pipeline import FormDetailPipeline
+
+
+TEST_DATA = {
+    "forms": [
+        {"formId": "form_1", "formFields": [{"fieldName": "欄位一"}, {"fieldName": "欄位二"}]},
+        {"formId": "form_2", "formFields": [{"fieldName": "欄位三"}]}
+    ]
+}
+
+
+class TestMetrics:
+    """處理指標測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = Path(self.temp_dir) / "add"
+        self.output_dir = Path(self.temp_dir) / "out"
+        self.append_file = Path(self.temp_dir) / "append_json.json"
+        self.metrics_out = Path(self.temp_dir) / "metrics.json"
+        self.input_dir.mkdir()
+
+        with open(self.append_file, 'w', encoding='utf-8') as f:
+            json.dump({"fieldName": "新增欄位", "formFieldId": "append-1"}, f, ensure_ascii=False)
+
+        with open(self.input_dir / "a.json", 'w', encoding='utf-8') as f:
+            json.dump(TEST_DATA, f, ensure_ascii=False, indent=2)
+
+        with open(self.input_dir / "broken.json", 'w', encoding='utf-8') as f:
+            f.write('{"forms": [')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_metrics(self):
+        """測試分段計時與表單、欄位計數"""
+        metrics = FileMetrics("a.json")
+        metrics.lap("read")
+        metrics.lap("parse")
+        for form in TEST_DATA["forms"]:
+            metrics.count_form(form)
+        metrics.fail(ValueError("壞掉了"))
+
+        result = metrics.to_dict()
+        assert set(result["stages"]) == set(STAGES)
+        assert all(seconds >= 0 for seconds in result["stages"].values())
+        assert (result["forms"], result["fields"]) == (2, 3)
+        assert result["ok"] is False
+        assert result["error"] == "壞掉了"
+
+    def test_run_metrics_totals(self):
+        """測試彙總指標"""
+        run_metrics = RunMetrics("optimize", jobs=1)
+        first, second = FileMetrics("a.json"), FileMetrics("b.json")
+        first.ok, first.bytes_in, first.bytes_out, first.fields = True, 100, 80, 3
+        first.stages["parse"] = 0.5
+        second.stages["parse"] = 0.25
+        run_metrics.add([first, second])
+        run_metrics.finish(cache_hits=2, cache_misses=2)
+
+        totals = run_metrics.totals()
+        assert totals["files"] == 4
+        assert (totals["processed"], totals["failed"], totals["skipped"]) == (1, 1, 2)
+        assert (totals["bytes_in"], totals["bytes_out"], totals["fields"]) == (100, 80, 3)
+        assert totals["stages"]["parse"] == 0.75
+        assert run_metrics.failed_files == ["b.json"]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_processor_metrics_report(self, stream):
+        """測試 FormDetailProcessor 輸出指標報告"""
+        processor = FormDetailProcessor(input_dir=str(self.input_dir), output_dir=str(self.output_dir),
+                                        json_backend="json")
+        run_metrics = processor.process_all_files(stream=stream, metrics_out=str(self.metrics_out))
+
+        report = json.loads(self.metrics_out.read_text(encoding='utf-8'))
+        assert report == json.loads(json.dumps(run_metrics.to_dict()))
+        assert report["command"] == "optimize"
+        assert report["settings"]["stream"] is stream
+        assert report["totals"]["processed"] == 1
+        assert report["totals"]["failed"] == 1
+
+        files = {f["name"]: f for f in report["files"]}
+        assert files["a.json"]["ok"]
+        assert (files["a.json"]["forms"], files["a.json"]["fields"]) == (2, 3)
+        assert files["a.json"]["bytes_in"] == (self.input_dir / "a.json").stat().st_size
+        assert files["a.json"]["bytes_out"] == (self.output_dir / "a.json").stat().st_size
+        assert "JSON解析錯誤" in files["broken.json"]["error"]
+
+    def test_top_level_array(self):
+        """測試頂層為陣列的檔案仍輸出空的forms陣列，不列為處理失敗"""
+        (self.input_dir / "broken.json").unlink()
+        (self.input_dir / "array.json").write_text('[{"a": 1}]', encoding='utf-8')
+        processor = FormDetailProcessor(input_dir=str(self.input_dir), output_dir=str(self.output_dir),
+                                        json_backend="json")
+
+        run_metrics = processor.process_all_files()
+
+        assert run_metrics.failed_files == []
+        assert json.loads((self.output_dir / "array.json").read_text(encoding='utf-8')) == {"forms": []}
+
+    def test_merger_and_pipeline_share_metrics(self):
+        """測試 JSONMerger 與 FormDetailPipeline 使用相同的指標格式"""
+        merger = JSONMerger(append_file=str(self.append_file), input_dir=str(self.input_dir),
+                            output_dir=str(self.output_dir))
+        pipeline = FormDetailPipeline(append_file=str(self.append_file), input_dir=str(self.input_dir),
+                                      output_dir=str(self.output_dir), merge_policy="replace")
+
+        merge_metrics = merger.merge_all_files(force=True)
+        pipeline_metrics = pipeline.process_all_files(force=True)
+
+        assert merge_metrics.command == "merge"
+        assert pipeline_metrics.command == "all"
+        assert pipeline_metrics.settings["merge_policy"] == "replace"
+        for run_metrics in (merge_metrics, pipeline_metrics):
+            totals = run_metrics.totals()
+            assert (totals["processed"], totals["failed"], totals["fields"]) == (1, 1, 3)
+            assert set(totals["stages"]) == set(STAGES)
+
+    def test_profiled(self):
+        """測試 cProfile 剖析檔"""
+        profile_path = Path(self.temp_dir) / "run.prof"
+
+        with profiled(profile_path):
+            sum(range(1000))
+
+        assert pstats.Stats(str(profile_path)).total_calls > 0
+
+        with profiled(None):
+            pass
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
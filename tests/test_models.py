@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 精簡的記憶體資料模型
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 與 benchmarks 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+benchmarks_path = Path(__file__).parent.parent / "benchmarks"
+sys.path.insert(0, str(src_path))
+sys.path.insert(0, str(benchmarks_path))
+
+from generate_corpus import generate_corpus
+from models import Model, get_models, measure_memory
+from optimized_process_json import FormDetailProcessor, FormFieldProcessor, FormProcessor
+
+EXAMPLE_FILE = next((Path(__file__).parent.parent / "add").glob("*.json"))
+
+
+class TestModels:
+    """模型轉換與映射介面測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.models = get_models()
+        self.example = json.loads(EXAMPLE_FILE.read_text(encoding='utf-8'))
+
+    def test_round_trip(self):
+        """測試轉換為模型再轉回時與原始資料完全相同，巢狀清單也轉換為模型"""
+        detail = self.models.form_detail.from_dict(self.example)
+
+        form = detail.forms[0]
+        assert type(form) is self.models.form
+        assert type(form.formFields[0]) is self.models.form_field
+        assert detail.to_dict() == self.example
+        # 鍵順序也與原始資料相同
+        assert json.dumps(detail.to_dict(), ensure_ascii=False) == json.dumps(self.example, ensure_ascii=False)
+
+    def test_key_order(self):
+        """測試宣告的欄位與未宣告的鍵交錯時保持原始順序，鍵順序相同的物件共用同一個元組"""
+        data = {"sort": 1, "custom": "a", "fieldName": "欄位", "colSpan": 2, "other": None}
+        first = self.models.form_field.from_dict(data)
+        second = self.models.form_field.from_dict(dict(data))
+
+        assert list(first.to_dict()) == list(data)
+        assert list(first) == list(data)
+        assert first._order is second._order
+
+    def test_generated_methods(self):
+        """測試基底類別是抽象類別，產生的類別直接定義轉換函數"""
+        with pytest.raises(TypeError):
+            Model()
+        for cls in (self.models.form_detail, self.models.form, self.models.form_field):
+            assert not cls.__abstractmethods__
+            assert "from_dict" in vars(cls) and "to_dict" in vars(cls)
+
+    def test_slots_only(self):
+        """測試模型沒有 __dict__，未宣告的鍵存放在元組中"""
+        field = self.models.form_field.from_dict({"fieldName": "欄位", "colSpan": 2, "editorOptions": {"a": 1}})
+
+        assert not hasattr(field, "__dict__")
+        assert field.colSpan == 2
+        assert field._extra == ("editorOptions", {"a": 1})
+        with pytest.raises(AttributeError):
+            field.unknown = 1
+
+    def test_missing_keys_stay_missing(self):
+        """測試原始資料沒有的鍵轉回時也不存在，值為 None 的鍵保留"""
+        data = {"fieldName": "欄位", "defaultValue": None}
+        field = self.models.form_field.from_dict(data)
+
+        assert field.to_dict() == data
+        assert "fieldType" not in field
+        assert field.get("fieldType", "預設") == "預設"
+        with pytest.raises(KeyError):
+            field["fieldType"]
+
+    def test_mapping_interface(self):
+        """測試唯讀的映射介面包含宣告的欄位與未宣告的鍵"""
+        field = self.models.form_field.from_dict({"fieldName": "欄位", "custom": 1})
+
+        assert field["custom"] == 1
+        assert "custom" in field and "sort" not in field
+        assert len(field) == 2
+        assert dict(field) == {"fieldName": "欄位", "custom": 1}
+        with pytest.raises(TypeError):
+            field["sort"] = 3
+
+
+class TestProcessorsOnModels:
+    """投影器直接讀取模型的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.models = get_models()
+        self.example = json.loads(EXAMPLE_FILE.read_text(encoding='utf-8'))
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_projection(self):
+        """測試C#結構優化處理模型與處理字典的結果相同"""
+        detail = self.models.form_detail.from_dict(self.example)
+        form, raw_form = detail.forms[0], self.example["forms"][0]
+
+        assert FormFieldProcessor.process_form_field(form.formFields[0]) == \
+            FormFieldProcessor.process_form_field(raw_form["formFields"][0])
+        assert FormProcessor.process_form(form) == FormProcessor.process_form(raw_form)
+        processor = FormDetailProcessor(output_dir=self.temp_dir)
+        assert processor.process_form_detail(detail) == processor.process_form_detail(self.example)
+
+
+class TestMemory:
+    """記憶體用量測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_models_use_less_memory(self):
+        """測試產生的資料集以模型保存時比巢狀字典小"""
+        generate_corpus(self.temp_dir, files=4, forms_per_file=3, fields_per_form=20)
+        contents = [path.read_bytes() for path in sorted((self.temp_dir / "add").glob("*.json"))]
+
+        result = measure_memory(contents)
+        assert 0 < result["model_bytes"] < result["dict_bytes"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
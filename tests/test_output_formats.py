@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 輸出格式
+"""
+
+import gzip
+import json
+import lzma
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from json_patch import apply_patch
+from optimized_process_json import FormDetailProcessor
+from output_formats import COMPRESSIONS, DOCUMENT_STYLES, OUTPUT_STYLES, OutputFormat, measure_formats
+
+
+TEST_DATA = {
+    "forms": [
+        {"formId": "form_1", "formName": "測試表單", "formFields": [{"fieldName": "欄位一"}]},
+        {"formId": "form_2", "formName": "第二張表單", "formFields": []}
+    ]
+}
+
+
+def read_output(path):
+    """依副檔名解壓縮並讀取輸出檔案"""
+    if path.suffix == ".gz":
+        return gzip.decompress(path.read_bytes()).decode('utf-8')
+    if path.suffix == ".xz":
+        return lzma.decompress(path.read_bytes()).decode('utf-8')
+    return path.read_text(encoding='utf-8')
+
+
+class TestOutputFormat:
+    """OutputFormat 類別測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = Path(self.temp_dir) / "add"
+        self.output_dir = Path(self.temp_dir) / "out"
+        self.input_dir.mkdir()
+
+        with open(self.input_dir / "test.json", 'w', encoding='utf-8') as f:
+            json.dump(TEST_DATA, f, ensure_ascii=False, indent=2)
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_output_name(self):
+        """測試輸出檔名依格式加上副檔名"""
+        assert OutputFormat().output_name("範例.json") == "範例.json"
+        assert OutputFormat("compact", "gzip").output_name("範例.json") == "範例.json.gz"
+        assert OutputFormat("ndjson", "xz").output_name("範例.json") == "範例.ndjson.xz"
+        assert OutputFormat("patch", "gzip").output_name("範例.json") == "範例.patch.json.gz"
+
+    def test_invalid_format(self):
+        """測試不支援的格式"""
+        with pytest.raises(ValueError):
+            OutputFormat("yaml")
+        with pytest.raises(ValueError):
+            OutputFormat("pretty", "zip")
+
+    @pytest.mark.parametrize("style", OUTPUT_STYLES)
+    @pytest.mark.parametrize("compression", COMPRESSIONS)
+    def test_save_and_stream_are_identical(self, style, compression):
+        """測試一般模式與串流模式輸出完全相同，且內容可還原"""
+        output_format = OutputFormat(style, compression)
+        processor = FormDetailProcessor(
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir),
+            output_format=output_format
+        )
+        output_path = self.output_dir / output_format.output_name("test.json")
+
+        assert processor.process_file(self.input_dir / "test.json").ok
+        expected = output_path.read_bytes()
+
+        result = processor.process_file(self.input_dir / "test.json", stream=True)
+        assert result.ok
+        assert result.bytes_out == len(expected)
+        assert output_path.read_bytes() == expected
+
+        text = read_output(output_path)
+        if style == "patch":
+            source = json.loads((self.input_dir / "test.json").read_text(encoding='utf-8'))
+            forms = apply_patch(source, json.loads(text))["forms"]
+        elif style == "ndjson":
+            forms = [json.loads(line) for line in text.splitlines()]
+        else:
+            forms = json.loads(text)["forms"]
+        assert [form["formId"] for form in forms] == ["form_1", "form_2"]
+
+    def test_measure_formats(self):
+        """測試每種格式都有量測結果，且緊湊格式小於排版格式"""
+        results = {r["format"]: r for r in measure_formats(TEST_DATA, repeat=1)}
+
+        assert len(results) == len(DOCUMENT_STYLES) * len(COMPRESSIONS)
+        assert results["compact"]["bytes"] < results["pretty"]["bytes"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 輸出檔案寫入
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import output_writer
+from output_formats import OutputFormat
+from output_writer import replace_if_changed, same_content, temp_path_for, write_if_changed
+from pipeline import FormDetailPipeline
+
+# 足以讓修改時間明顯不同的偏移量
+OLD_MTIME_NS = 10 ** 18
+
+
+class TestOutputWriter:
+    """原子寫入與略過相同內容的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / "out.json"
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def age(self, path):
+        """把檔案的修改時間設為過去的固定值"""
+        os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+    def test_same_content(self):
+        """測試先比較大小再比較內容"""
+        assert not same_content(self.path, b"abc")
+        self.path.write_bytes(b"abc")
+
+        assert same_content(self.path, b"abc")
+        assert not same_content(self.path, b"abd")
+        assert not same_content(self.path, b"abcd")
+
+    def test_write_if_changed(self):
+        """測試內容相同時不改寫並保留修改時間，不同時原子取代且不留下暫存檔"""
+        assert write_if_changed(self.path, b'{"a": 1}')
+        self.age(self.path)
+
+        assert not write_if_changed(self.path, b'{"a": 1}')
+        assert self.path.stat().st_mtime_ns == OLD_MTIME_NS
+
+        assert write_if_changed(self.path, b'{"a": 2}')
+        assert self.path.read_bytes() == b'{"a": 2}'
+        assert self.path.stat().st_mtime_ns != OLD_MTIME_NS
+        assert os.listdir(self.temp_dir) == ["out.json"]
+
+    def test_failed_write_keeps_previous_file(self, monkeypatch):
+        """測試寫入中斷時保留原本的檔案並刪除暫存檔"""
+        self.path.write_bytes(b"old")
+
+        def fail(*args):
+            raise OSError("磁碟已滿")
+        monkeypatch.setattr(output_writer.os, "replace", fail)
+
+        with pytest.raises(OSError):
+            write_if_changed(self.path, b"new")
+        assert self.path.read_bytes() == b"old"
+        assert os.listdir(self.temp_dir) == ["out.json"]
+
+    def test_unique_temp_path(self):
+        """測試每次寫入使用不同的暫存檔，不受其他寫入者的暫存檔影響"""
+        first, second = temp_path_for(self.path), temp_path_for(self.path)
+        assert first != second
+        assert first.parent == second.parent == self.temp_dir
+        assert first.name.startswith("out.json.") and first.suffix == ".tmp"
+
+        # 另一個分片正在寫入的暫存檔
+        (self.temp_dir / "out.json.tmp").mkdir()
+        assert write_if_changed(self.path, b"data")
+        assert self.path.read_bytes() == b"data"
+        assert sorted(os.listdir(self.temp_dir)) == ["out.json", "out.json.tmp"]
+
+    def test_replace_if_changed(self):
+        """測試串流寫完的暫存檔內容相同時刪除暫存檔並保留既有檔案"""
+        temp_path = self.temp_dir / "out.json.tmp"
+        temp_path.write_bytes(b"same")
+        assert replace_if_changed(temp_path, self.path)
+        self.age(self.path)
+
+        temp_path.write_bytes(b"same")
+        assert not replace_if_changed(temp_path, self.path)
+        assert not temp_path.exists()
+        assert self.path.stat().st_mtime_ns == OLD_MTIME_NS
+
+    @pytest.mark.parametrize("fsync, expected", [("none", 0), ("file", 1), ("full", 2)])
+    def test_fsync_policy(self, monkeypatch, fsync, expected):
+        """測試同步寫入策略決定 fsync 的次數，內容未變更時不呼叫"""
+        calls = []
+        monkeypatch.setattr(output_writer.os, "fsync", calls.append)
+
+        write_if_changed(self.path, b"data", fsync)
+        write_if_changed(self.path, b"data", fsync)
+        assert len(calls) == expected
+
+    def test_invalid_fsync_policy(self):
+        """測試不支援的同步寫入策略"""
+        with pytest.raises(ValueError):
+            write_if_changed(self.path, b"data", "always")
+        with pytest.raises(ValueError):
+            OutputFormat(fsync="always")
+
+
+class TestUnchangedOutputs:
+    """重新處理時略過未變更輸出的測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        for index in range(3):
+            data = {"forms": [{"formId": f"form_{index}", "formFields": [{"fieldName": "欄位"}]}]}
+            (self.input_dir / f"{index}.json").write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text('{"fieldName": "新增欄位"}', encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    @pytest.mark.parametrize("stream", [False, True])
+    @pytest.mark.parametrize("compression", ["none", "gzip", "xz"])
+    def test_forced_rerun(self, stream, compression):
+        """測試忽略增量建置快取重新處理時，內容相同的輸出不改寫並計入未變更數量"""
+        pipeline = FormDetailPipeline(append_file=self.append_file, input_dir=self.input_dir,
+                                      output_dir=self.output_dir, json_backend="json",
+                                      output_format=OutputFormat("compact", compression))
+        first = pipeline.process_all_files(stream=stream).totals()
+        assert (first["written"], first["unchanged"]) == (3, 0)
+
+        output_path = pipeline.output_path("0.json")
+        os.utime(output_path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        (self.input_dir / "1.json").write_text(json.dumps({"forms": [{"formId": "changed"}]}), encoding='utf-8')
+
+        second = pipeline.process_all_files(stream=stream, force=True).totals()
+        assert (second["written"], second["unchanged"]) == (1, 2)
+        assert output_path.stat().st_mtime_ns == OLD_MTIME_NS
+        assert not list(self.output_dir.glob("*.tmp"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - FormDetailPipeline 類別
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from pipeline import FormDetailPipeline
+
+
+class TestFormDetailPipeline:
+    """FormDetailPipeline 類別測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = Path(self.temp_dir) / "add"
+        self.output_dir = Path(self.temp_dir) / "out"
+        self.append_file = Path(self.temp_dir) / "append_json.json"
+
+        self.input_dir.mkdir()
+
+        append_data = {
+            "fieldName": "新增欄位",
+            "fieldType": "dxTextBox",
+            "formFieldId": "append-1",
+            "colSpan": 4,
+            "parentField": None
+        }
+        with open(self.append_file, 'w', encoding='utf-8') as f:
+            json.dump(append_data, f, ensure_ascii=False, indent=2)
+
+        test_json_data = {
+            "forms": [
+                {
+                    "formId": "test_form",
+                    "formName": "測試表單",
+                    "formFields": [
+                        {"fieldName": "原始欄位", "fieldType": "dxSelectBox", "extra": 1}
+                    ]
+                }
+            ],
+            "otherData": "test"
+        }
+        with open(self.input_dir / "test.json", 'w', encoding='utf-8') as f:
+            json.dump(test_json_data, f, ensure_ascii=False, indent=2)
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def _create_pipeline(self):
+        return FormDetailPipeline(
+            append_file=str(self.append_file),
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir)
+        )
+
+    def test_output_contains_merged_and_optimized_fields(self):
+        """測試輸出同時包含合併的欄位與C#結構優化結果"""
+        self._create_pipeline().process_all_files()
+
+        with open(self.output_dir / "test.json", encoding='utf-8') as f:
+            result = json.load(f)
+
+        assert list(result) == ["forms"]
+        fields = result["forms"][0]["formFields"]
+        assert [field["fieldName"] for field in fields] == ["原始欄位", "新增欄位"]
+        assert "extra" not in fields[0]
+        assert fields[1]["extensionData"] == {"colSpan": 4}
+        assert "parentField" not in fields[1]
+
+    def test_stream_matches_in_memory(self):
+        """測試串流模式輸出與一般模式完全相同"""
+        pipeline = self._create_pipeline()
+
+        pipeline.process_all_files()
+        expected = (self.output_dir / "test.json").read_text(encoding='utf-8')
+
+        pipeline.process_all_files(stream=True, force=True)
+        assert (self.output_dir / "test.json").read_text(encoding='utf-8') == expected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
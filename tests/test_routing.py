@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 合併資料路由
+"""
+
+import json
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+import routing
+from merge_json import JSONMerger
+from pipeline import FormDetailPipeline
+from routing import load_routes, parse_routes, routes_digest
+from watch import Watcher
+
+ROUTES = {
+    "routes": [
+        {"forms": ["HR-001", "HR-1*"], "fragments": ["fragments/hr.json"]},
+        {"files": ["finance_*.json"], "fragments": ["fragments/finance.json"]},
+        {"forms": ["HR-001"], "fragments": ["fragments/common.json", "fragments/hr.json"]},
+    ]
+}
+
+FRAGMENTS = {
+    "hr.json": [{"fieldName": "員工編號"}],
+    "finance.json": [{"fieldName": "成本中心"}],
+    "common.json": [{"fieldName": "備註"}],
+}
+
+
+def field_names(form):
+    """取得form中所有欄位的名稱"""
+    return [field["fieldName"] for field in form["formFields"]]
+
+
+class TestParseRoutes:
+    """路由設定格式測試"""
+
+    @pytest.mark.parametrize("data, message", [
+        ([], "routes 陣列"),
+        ({"routes": []}, "沒有任何路由"),
+        ({"routes": [{"forms": ["a"]}]}, "定義錯誤"),
+        ({"routes": [{"forms": ["a"], "fragments": []}]}, "沒有指定合併資料片段"),
+        ({"routes": [{"fragments": ["a.json"], "form": ["a"]}]}, "不支援的設定: form"),
+        ({"routes": [{"fragments": "a.json"}]}, "fragments 必須是字串陣列"),
+        ({"routes": [{"fragments": ["a.json"], "files": [1]}]}, "files 必須是字串陣列"),
+    ])
+    def test_invalid(self, data, message):
+        """測試格式錯誤時回報是哪條路由的哪個設定"""
+        with pytest.raises(ValueError, match=message):
+            parse_routes(data)
+
+
+class TestRoutingTable:
+    """路由表測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.routes_file = self.temp_dir / "routes.json"
+        self.input_dir.mkdir()
+        self.output_dir.mkdir()
+        (self.temp_dir / "fragments").mkdir()
+
+        self.write_routes(ROUTES)
+        for name, fields in FRAGMENTS.items():
+            self.write_fragment(name, fields)
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+        routing._memos.clear()
+
+    def write_routes(self, data):
+        """寫入路由設定檔"""
+        self.routes_file.write_text(json.dumps(data), encoding='utf-8')
+
+    def write_fragment(self, name, fields):
+        """寫入合併資料片段"""
+        (self.temp_dir / "fragments" / name).write_text(json.dumps(fields, ensure_ascii=False), encoding='utf-8')
+
+    def write_input(self, name, form_ids):
+        """寫入輸入檔案"""
+        data = {"forms": [{"formId": form_id, "formFields": [{"fieldName": "原始"}]} for form_id in form_ids]}
+        (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    def read_output(self, name):
+        """讀取輸出檔案"""
+        return json.loads((self.output_dir / name).read_text(encoding='utf-8'))
+
+    def test_resolve(self):
+        """測試精確與萬用字元的formId、檔案模式，多條路由依順序串接且重複的片段只套用一次"""
+        table = load_routes(self.routes_file, self.output_dir)
+        lookup = table.for_file("finance_2024.json")
+
+        assert [f["fieldName"] for f in lookup({"formId": "HR-001"})] == ["員工編號", "成本中心", "備註"]
+        assert [f["fieldName"] for f in lookup({"formId": "HR-123"})] == ["員工編號", "成本中心"]
+        assert [f["fieldName"] for f in lookup({"formId": "SALES"})] == ["成本中心"]
+
+        other = table.for_file("other.json")
+        assert [f["fieldName"] for f in other({"formId": "HR-001"})] == ["員工編號", "備註"]
+        assert other({"formId": "SALES"}) is None
+        assert other({}) is None
+
+    def test_lookup_is_memoized(self, monkeypatch):
+        """測試同一個formId只比對一次路由，並在相同路由的檔案間共用"""
+        table = load_routes(self.routes_file, self.output_dir)
+        calls = []
+        resolve = table.resolve
+        monkeypatch.setattr(table, "resolve", lambda *args: calls.append(args) or resolve(*args))
+
+        for name in ("a.json", "b.json"):
+            lookup = table.for_file(name)
+            for _ in range(3):
+                lookup({"formId": "HR-001"})
+
+        assert len(calls) == 1
+
+    def test_pickle(self):
+        """測試傳給工作行程時不包含查詢結果與欄位內容，還原後結果相同"""
+        table = load_routes(self.routes_file, self.output_dir)
+        table.for_file("a.json")({"formId": "HR-001"})
+
+        payload = pickle.dumps(table)
+        assert "員工編號".encode('utf-8') not in payload
+
+        append_data._loaded.clear()
+        routing._memos.clear()
+        restored = pickle.loads(payload)
+        assert [f["fieldName"] for f in restored.for_file("a.json")({"formId": "HR-001"})] == ["員工編號", "備註"]
+
+    def test_fragments_are_cached_separately(self):
+        """測試每個合併資料片段有各自的快取檔案"""
+        load_routes(self.routes_file, self.output_dir)
+
+        assert len(list(self.output_dir.glob(".formdetails-append-*"))) == 3
+
+    def test_digest_tracks_fragments(self):
+        """測試任一片段變更時路由雜湊改變"""
+        before = routes_digest(self.routes_file)
+        self.write_fragment("common.json", [{"fieldName": "新備註"}])
+
+        assert routes_digest(self.routes_file) != before
+
+    def test_merge_single_pass(self):
+        """測試一次合併即依路由套用不同的片段，沒有對應路由的form維持不變"""
+        self.write_input("finance_q1.json", ["HR-001", "SALES"])
+        self.write_input("other.json", ["HR-100", "SALES"])
+
+        merger = JSONMerger(input_dir=self.input_dir, output_dir=self.output_dir,
+                            json_backend="json", routes_file=self.routes_file)
+        run_metrics = merger.merge_all_files()
+        assert run_metrics.totals()["processed"] == 2
+
+        finance = self.read_output("finance_q1.json")["forms"]
+        assert field_names(finance[0]) == ["原始", "員工編號", "成本中心", "備註"]
+        assert field_names(finance[1]) == ["原始", "成本中心"]
+
+        other = self.read_output("other.json")["forms"]
+        assert field_names(other[0]) == ["原始", "員工編號"]
+        assert field_names(other[1]) == ["原始"]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_pipeline(self, stream):
+        """測試完整處理流程依檔案名稱套用路由，串流模式結果相同"""
+        self.write_input("finance_q1.json", ["SALES"])
+        self.write_input("other.json", ["SALES", "HR-001"])
+
+        pipeline = FormDetailPipeline(input_dir=self.input_dir, output_dir=self.output_dir,
+                                      json_backend="json", routes_file=self.routes_file)
+        pipeline.process_all_files(stream=stream)
+
+        assert field_names(self.read_output("finance_q1.json")["forms"][0]) == ["原始", "成本中心"]
+        other = self.read_output("other.json")["forms"]
+        assert field_names(other[0]) == ["原始"]
+        assert field_names(other[1]) == ["原始", "員工編號", "備註"]
+
+    def test_missing_fragment(self):
+        """測試片段不存在時無法開始處理"""
+        (self.temp_dir / "fragments" / "common.json").unlink()
+        self.write_input("a.json", ["HR-001"])
+
+        merger = JSONMerger(input_dir=self.input_dir, output_dir=self.output_dir,
+                            json_backend="json", routes_file=self.routes_file)
+        assert merger.merge_all_files() is None
+        assert not (self.output_dir / "a.json").exists()
+
+    def test_watch_fragment_change(self):
+        """測試監看模式在片段變更時重新處理所有檔案"""
+        self.write_input("a.json", ["HR-001"])
+        pipeline = FormDetailPipeline(input_dir=self.input_dir, output_dir=self.output_dir,
+                                      json_backend="json", routes_file=self.routes_file)
+        watcher = Watcher(pipeline, settle=0)
+        assert watcher.start()
+        assert len(watcher.append_sources) == 4
+        watcher.poll()
+        assert watcher.poll() == 1
+
+        self.write_fragment("common.json", [{"fieldName": "備註"}, {"fieldName": "簽核"}])
+        watcher.poll()
+        assert watcher.poll() == 1
+        assert field_names(self.read_output("a.json")["forms"][0]) == ["原始", "員工編號", "備註", "簽核"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - C#類別結構描述與投影器
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from optimized_process_json import FormDetailProcessor
+from schema import SCHEMA_FILE, ContractSchema, Projector, get_projector
+
+
+class TestSchemaProjector:
+    """結構描述編譯與投影測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.schema_data = json.loads(SCHEMA_FILE.read_text(encoding='utf-8'))
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_form_field_defaults_and_drops(self):
+        """測試必填欄位的預設值與可選欄位的省略規則"""
+        result = get_projector().form_field({
+            "fieldName": "欄位一",
+            "defaultValue": 0,
+            "relatedSource": None,
+            "fieldOptions": [],
+            "fieldGroup": "",
+            "displayCondition": False,
+            "flowNodeCode": "node_1",
+            "editorOptions": {"width": 100}
+        })
+
+        assert result == {
+            "formFieldId": "",
+            "fieldName": "欄位一",
+            "fieldType": "",
+            "isReadonly": False,
+            "isVisible": False,
+            "infoDisplayCondition": False,
+            "sort": 0,
+            "specialFieldCode": "",
+            "defaultValue": 0,
+            "displayCondition": False,
+            "flowNodeCode": "node_1"
+        }
+
+    @pytest.mark.parametrize("field, expected", [
+        ({"colSpan": 2, "translation": []}, [("colSpan", 2), ("translation", [])]),
+        ({"translation": "x", "fieldName": "a", "colSpan": 1}, [("translation", "x"), ("colSpan", 1)]),
+        ({"colSpan": None, "translation": "x"}, [("translation", "x")]),
+        ({"colSpan": 3}, [("colSpan", 3)]),
+    ])
+    def test_extension_data_follows_input_order(self, field, expected):
+        """測試擴展資料只保留非null值，且鍵順序與輸入相同"""
+        result = get_projector().form_field(field)
+        assert list(result["extensionData"].items()) == expected
+
+    def test_no_extension_data(self):
+        """測試沒有擴展資料時不輸出 extensionData"""
+        assert "extensionData" not in get_projector().form_field({"colSpan": None})
+
+    def test_form_detail_projection(self):
+        """測試 FormDetail / Form 的投影"""
+        result = get_projector().form_detail({
+            "version": 1,
+            "forms": [{"formId": "form_1", "formFields": [{"fieldName": "a"}], "extra": True}]
+        })
+
+        assert list(result) == ["forms"]
+        form = result["forms"][0]
+        assert list(form) == ["formId", "formName", "description", "formFields", "fieldGroups"]
+        assert form["formFields"][0]["fieldName"] == "a"
+        assert form["fieldGroups"] == []
+
+    def test_sample_file(self):
+        """測試範例檔案的每個欄位都符合契約"""
+        sample = Path(__file__).parent.parent / "add" / "範例.json"
+        data = json.loads(sample.read_text(encoding='utf-8'))
+        result = get_projector().form_detail(data)
+
+        assert len(result["forms"]) == len(data["forms"])
+        for field in (f for form in result["forms"] for f in form["formFields"]):
+            assert "editorOptions" not in field
+            assert set(field.get("extensionData", {})) <= {"colSpan", "translation"}
+
+    def test_custom_schema(self):
+        """測試修改結構描述即可變更契約，不需修改程式"""
+        self.schema_data["FormField"]["fields"].append(
+            {"name": "editorOptions", "kind": "optional", "type": "object", "drop": "empty"}
+        )
+        self.schema_data["FormField"]["extensionData"]["keys"].append("helpText")
+        schema_path = Path(self.temp_dir) / "schema.json"
+        schema_path.write_text(json.dumps(self.schema_data), encoding='utf-8')
+
+        processor = FormDetailProcessor(input_dir=self.temp_dir, output_dir=self.temp_dir,
+                                        schema_path=str(schema_path))
+        result = processor.transform_form({
+            "formFields": [{"editorOptions": {"width": 1}, "helpText": "說明", "colSpan": 2}]
+        })
+
+        field = result["formFields"][0]
+        assert field["editorOptions"] == {"width": 1}
+        assert field["extensionData"] == {"helpText": "說明", "colSpan": 2}
+
+    def test_schema_change_invalidates_cache_fingerprint(self):
+        """測試結構描述變更時快取指紋也會改變"""
+        schema_path = Path(self.temp_dir) / "schema.json"
+        schema_path.write_text(json.dumps(self.schema_data), encoding='utf-8')
+        processor = FormDetailProcessor(input_dir=self.temp_dir, output_dir=self.temp_dir,
+                                        schema_path=str(schema_path))
+        before = processor.cache_fingerprint()
+
+        self.schema_data["Form"]["fields"].pop()
+        schema_path.write_text(json.dumps(self.schema_data), encoding='utf-8')
+
+        assert processor.cache_fingerprint() != before
+
+    @pytest.mark.parametrize("mutate", [
+        lambda s: s["FormField"]["fields"][0].update(kind="mandatory"),
+        lambda s: s["FormField"]["fields"][8].update(drop="never"),
+        lambda s: s["FormField"]["fields"][0].update(default=[]),
+        lambda s: s["Form"]["fields"][3].update(item="Missing"),
+        lambda s: s.update({"Bad-Name": {"fields": []}}),
+        lambda s: s["Form"]["fields"].append({"name": "x", "kind": "required", "unknown": 1}),
+    ])
+    def test_invalid_schema(self, mutate):
+        """測試格式錯誤的結構描述"""
+        mutate(self.schema_data)
+        with pytest.raises(ValueError):
+            Projector(ContractSchema.from_dict(self.schema_data))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
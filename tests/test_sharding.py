@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 分片處理
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import append_data
+from merge_json import JSONMerger
+from optimized_process_json import FormDetailProcessor
+from pipeline import FormDetailPipeline
+from sharding import Shard, combine_reports, shard_of
+
+MAIN_SCRIPT = Path(__file__).parent.parent / "__main__.py"
+
+FILE_COUNT = 12
+
+
+class TestShard:
+    """分片分配測試"""
+
+    @pytest.mark.parametrize("text", ["0/3", "4/3", "1/0", "2", "a/3", "1/3/5", "-1/3"])
+    def test_invalid(self, text):
+        """測試不合法的分片"""
+        with pytest.raises(ValueError):
+            Shard.parse(text)
+
+    def test_parse(self):
+        """測試解析與顯示分片"""
+        shard = Shard.parse("2/4")
+
+        assert (shard.index, shard.count) == (2, 4)
+        assert str(shard) == "2/4"
+
+    def test_stable_partition(self):
+        """測試每個檔案恰好屬於一個分片，且分配結果固定"""
+        root = Path("add")
+        paths = [root / f"file_{index}.json" for index in range(200)]
+        selected = [Shard(index, 3).select(paths, root) for index in (1, 2, 3)]
+
+        assert sorted(path for part in selected for path in part) == sorted(paths)
+        assert all(part for part in selected)
+        # 固定的雜湊值，與 Python 的雜湊種子無關
+        assert shard_of("file_0.json", 3) == shard_of("file_0.json", 3)
+        assert [shard_of(f"file_{index}.json", 1) for index in range(5)] == [1] * 5
+
+
+class TestShardedRuns:
+    """分片執行與合併報告測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        for index in range(FILE_COUNT):
+            data = {"forms": [{"formId": f"form_{index}", "formFields": [{"fieldName": "欄位"}]}]}
+            (self.input_dir / f"{index}.json").write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        self.append_file.write_text('{"fieldName": "新增欄位"}', encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+        append_data._loaded.clear()
+
+    def create(self, command):
+        """建立指定命令的處理器，所有分片共用同一個輸出資料夾"""
+        if command == "merge":
+            return JSONMerger(append_file=self.append_file, input_dir=self.input_dir,
+                              output_dir=self.output_dir, json_backend="json")
+        if command == "optimize":
+            return FormDetailProcessor(input_dir=self.input_dir, output_dir=self.output_dir, json_backend="json")
+        return FormDetailPipeline(append_file=self.append_file, input_dir=self.input_dir,
+                                  output_dir=self.output_dir, json_backend="json")
+
+    def run_shard(self, command, shard, **kwargs):
+        """執行一個分片並返回報告"""
+        processor = self.create(command)
+        run = processor.merge_all_files if command == "merge" else processor.process_all_files
+        return run(shard=Shard.parse(shard), **kwargs).to_dict()
+
+    @pytest.mark.parametrize("command", ["merge", "optimize", "all"])
+    def test_shards_cover_all_files(self, command):
+        """測試所有分片合起來恰好處理每個檔案一次，合併報告驗證通過"""
+        reports = [self.run_shard(command, f"{index}/3") for index in (1, 2, 3)]
+        combined = combine_reports(reports)
+
+        assert combined["problems"] == []
+        assert combined["totals"]["processed"] == FILE_COUNT
+        assert [f["name"] for f in combined["files"]] == sorted(f"{index}.json" for index in range(FILE_COUNT))
+        assert sorted(path.name for path in self.output_dir.glob("*.json")) == [f["name"] for f in combined["files"]]
+
+    def test_cache_is_per_shard(self):
+        """測試共用輸出資料夾時各分片的增量建置快取互不影響，略過的檔案也計入驗證"""
+        for index in (1, 2):
+            self.run_shard("all", f"{index}/2")
+        reports = [self.run_shard("all", f"{index}/2") for index in (1, 2)]
+
+        assert all(report["cache"]["misses"] == 0 for report in reports)
+        combined = combine_reports(reports)
+        assert combined["problems"] == []
+        assert len(combined["skipped"]) == FILE_COUNT
+
+    def test_where_unselected(self, tmp_path):
+        """測試 --where 沒有選取的檔案與快取略過的檔案分開記錄，合併報告仍驗證通過"""
+        index_path = str(tmp_path / "index.sqlite")
+        (self.input_dir / "0.json").write_text(json.dumps({"forms": [{"formId": "x", "formFields": [
+            {"formFieldId": "d1", "fieldType": "dxDateBox"}]}]}), encoding='utf-8')
+        reports = [self.run_shard("optimize", f"{index}/2", index_path=index_path, where=["fieldType=dxDateBox"])
+                   for index in (1, 2)]
+        combined = combine_reports(reports)
+
+        assert combined["problems"] == []
+        assert combined["totals"]["processed"] == 1
+        assert (combined["totals"]["skipped"], combined["skipped"]) == (0, [])
+        assert len(combined["unselected"]) == combined["totals"]["unselected"] == FILE_COUNT - 1
+
+    def test_detects_missing_and_duplicate_shards(self):
+        """測試缺少分片、重複的分片與不同的輸入檔案"""
+        first = self.run_shard("optimize", "1/3")
+        second = self.run_shard("optimize", "2/3", force=True)
+
+        problems = combine_reports([first, second, second])["problems"]
+        assert any("缺少分片 3" in problem for problem in problems)
+        assert any("分片 2 有多份報告" in problem for problem in problems)
+        assert any("被處理了 2 次" in problem for problem in problems)
+
+        (self.input_dir / "extra.json").write_text('{"forms": []}', encoding='utf-8')
+        third = self.run_shard("optimize", "3/3")
+        assert any("輸入檔案不同" in problem for problem in combine_reports([first, second, third])["problems"])
+
+    def test_detects_wrong_shard_and_failures(self):
+        """測試檔案出現在不屬於它的分片，以及處理失敗的檔案"""
+        (self.input_dir / "broken.json").write_text("{", encoding='utf-8')
+        reports = [self.run_shard("optimize", f"{index}/2") for index in (1, 2)]
+        problems = combine_reports(reports)["problems"]
+        assert any("broken.json" in problem and "失敗" in problem for problem in problems)
+
+        moved = reports[0]["files"].pop()
+        reports[1]["files"].append(moved)
+        assert any(f"{moved['name']} 不屬於分片 2/2" in problem for problem in combine_reports(reports)["problems"])
+
+    def test_cli(self):
+        """測試命令列分片執行與 combine-reports 的結束代碼"""
+        def run(*args):
+            return subprocess.run([sys.executable, str(MAIN_SCRIPT), *args], cwd=self.temp_dir,
+                                  capture_output=True, text=True, encoding='utf-8')
+
+        for index in (1, 2):
+            assert run("optimize", "--shard", f"{index}/2", "--metrics-out", f"shard-{index}.json").returncode == 0
+
+        result = run("combine-reports", "shard-1.json", "shard-2.json", "--metrics-out", "combined.json")
+        assert result.returncode == 0, result.stdout
+        assert json.loads((self.temp_dir / "combined.json").read_text(encoding='utf-8'))["problems"] == []
+
+        assert run("combine-reports", "shard-1.json").returncode == 1
+        assert run("optimize", "--shard", "3/2").returncode == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+測試檔案 - 監看模式
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from optimized_process_json import FormDetailProcessor
+from pipeline import FormDetailPipeline
+from watch import ChangeTracker, Watcher, scan_json_files
+
+
+def make_form_detail(form_id, fields=1):
+    """建立測試用的FormDetail資料"""
+    return {"forms": [{"formId": form_id, "formFields": [{"fieldName": f"欄位{i}"} for i in range(fields)]}]}
+
+
+class TestChangeTracker:
+    """檔案變更追蹤測試"""
+
+    def test_debounce(self):
+        """測試簽章連續兩次輪詢相同且已靜置才處理"""
+        tracker = ChangeTracker(settle=2.0)
+        mtime = 100 * 10 ** 9
+
+        assert tracker.update({"a.json": (10, mtime)}, now=200) == ([], [])
+        # 仍在寫入：大小改變
+        assert tracker.update({"a.json": (20, mtime)}, now=200) == ([], [])
+        # 簽章穩定但剛修改
+        assert tracker.update({"a.json": (20, mtime)}, now=101) == ([], [])
+        assert tracker.update({"a.json": (20, mtime)}, now=200) == (["a.json"], [])
+
+        tracker.mark_done("a.json")
+        assert tracker.update({"a.json": (20, mtime)}, now=300) == ([], [])
+
+    def test_removed_and_reset(self):
+        """測試刪除的檔案與重新處理所有檔案"""
+        tracker = ChangeTracker(settle=0)
+        snapshot = {"a.json": (1, 0), "b.json": (1, 0)}
+        tracker.update(snapshot)
+        ready, _ = tracker.update(snapshot)
+        for name in ready:
+            tracker.mark_done(name)
+
+        assert tracker.update({"b.json": (1, 0)}) == ([], ["a.json"])
+
+        tracker.reset()
+        assert tracker.update({"b.json": (1, 0)}) == (["b.json"], [])
+
+
+class TestWatcher:
+    """監看器測試"""
+
+    def setup_method(self):
+        """每個測試方法前的設定"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "add"
+        self.output_dir = self.temp_dir / "out"
+        self.append_file = self.temp_dir / "append_json.json"
+        self.input_dir.mkdir()
+
+        self.write_input("a.json", make_form_detail("form_a"))
+        self.write_input("b.json", make_form_detail("form_b"))
+        self.append_file.write_text(json.dumps({"fieldName": "新增欄位"}, ensure_ascii=False), encoding='utf-8')
+
+    def teardown_method(self):
+        """每個測試方法後的清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def write_input(self, name, data):
+        """寫入輸入檔案"""
+        (self.input_dir / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    def read_output(self, name):
+        """讀取輸出檔案"""
+        return json.loads((self.output_dir / name).read_text(encoding='utf-8'))
+
+    def make_watcher(self):
+        """建立不需等待靜置時間的監看器"""
+        pipeline = FormDetailPipeline(append_file=self.append_file, input_dir=self.input_dir,
+                                      output_dir=self.output_dir, json_backend="json")
+        watcher = Watcher(pipeline, settle=0)
+        assert watcher.start()
+        return watcher
+
+    def test_scan_json_files(self):
+        """測試只列出JSON檔案"""
+        (self.input_dir / "notes.txt").write_text("x", encoding='utf-8')
+        (self.input_dir / "sub.json").mkdir()
+
+        assert sorted(scan_json_files(self.input_dir)) == ["a.json", "b.json"]
+        assert scan_json_files(self.temp_dir / "missing") == {}
+
+    def test_processes_only_changed_files(self):
+        """測試只處理新增與變更的檔案"""
+        watcher = self.make_watcher()
+
+        # 第一次輪詢只記錄簽章
+        assert watcher.poll() == 0
+        assert watcher.poll() == 2
+        assert watcher.poll() == 0
+        assert len(self.read_output("a.json")["forms"][0]["formFields"]) == 2
+
+        self.write_input("a.json", make_form_detail("form_a", fields=3))
+        self.write_input("c.json", make_form_detail("form_c"))
+        watcher.poll()
+        assert watcher.poll() == 2
+        assert len(self.read_output("a.json")["forms"][0]["formFields"]) == 4
+        assert self.read_output("c.json")["forms"][0]["formId"] == "form_c"
+
+    def test_append_file_change_reprocesses_all(self):
+        """測試合併資料變更時重新處理所有檔案"""
+        watcher = self.make_watcher()
+        watcher.poll()
+        watcher.poll()
+
+        self.append_file.write_text('{"fieldName": "新增一"}, {"fieldName": "新增二"}', encoding='utf-8')
+        watcher.poll()
+        assert watcher.poll() == 2
+        for name in ("a.json", "b.json"):
+            assert len(self.read_output(name)["forms"][0]["formFields"]) == 3
+
+    def test_broken_append_file_keeps_previous_data(self):
+        """測試合併資料無法解析時沿用先前的合併資料"""
+        watcher = self.make_watcher()
+        watcher.poll()
+        watcher.poll()
+
+        self.append_file.write_text('{"fieldName": ', encoding='utf-8')
+        watcher.poll()
+        watcher.poll()
+        self.write_input("c.json", make_form_detail("form_c"))
+        watcher.poll()
+        assert watcher.poll() == 1
+        assert len(self.read_output("c.json")["forms"][0]["formFields"]) == 2
+
+    def test_skips_up_to_date_outputs(self):
+        """測試重新啟動監看時略過快取中仍有效的檔案"""
+        processor = FormDetailProcessor(input_dir=self.input_dir, output_dir=self.output_dir,
+                                        json_backend="json")
+        processor.process_all_files()
+
+        watcher = Watcher(processor, settle=0)
+        assert watcher.start()
+        watcher.poll()
+        assert watcher.poll() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])